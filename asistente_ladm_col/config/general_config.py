@@ -29,9 +29,20 @@ LATEST_UPDATE_FOR_SUPPORTED_MODEL_VERSION = "17.07.2018"
 DEFAULT_EPSG =  "3116"
 DEFAULT_TOO_LONG_BOUNDARY_SEGMENTS_TOLERANCE = 200 # meters
 DEFAULT_USE_ROADS_VALUE = False
+DEFAULT_INCREMENTAL_QUALITY_CHECKS = False # Re-evaluate only features around edits when running quality checks again
+DIRTY_REGION_MARGIN = 0.01 # meters, edited extents are grown by this distance to include touching features
+DEFAULT_VERTEX_MATCH_TOLERANCE = 0.000001 # meters
+GAPS_TILE_SIZE = 500 # meters, side of the tiles in which gaps in plots are searched
+ERROR_LAYER_CHUNK_SIZE = 10000 # Error features buffered before being written to the error layer
+ERROR_LAYER_DISK_THRESHOLD = 100000 # Expected error features from which error layers are written to a GeoPackage
+PG_MAX_POOL_CONNECTIONS = 4 # Connections each PGConnector can open to run queries concurrently
+DEFAULT_FETCH_SIZE = 5000 # Rows per round trip when streaming query results
+DEFAULT_INSTRUMENTATION_ENABLED = False # Time spans and count DB queries and features, see utils/instrumentation.py
+INSTRUMENTATION_MAX_TRACE_EVENTS = 100000 # Span events kept for the JSON trace file, the oldest ones are dropped
 HELP_URL = "https://agenciaimplementacion.github.io/Asistente-LADM_COL"
 FIELD_MAPPING_PATH = os.path.join(os.path.expanduser('~'), 'Asistente-LADM_COL', 'field_mappings')
 MAXIMUM_FIELD_MAPPING_FILES_PER_TABLE = 10
+METADATA_CACHE_PATH = os.path.join(os.path.expanduser('~'), 'Asistente-LADM_COL', 'cache')
 PLUGIN_VERSION = get_plugin_metadata('asistente_ladm_col', 'version')
 PLUGIN_NAME = get_plugin_metadata('asistente_ladm_col', 'name')
 HELP_DIR_NAME = 'help'
@@ -41,6 +52,10 @@ STYLES_DIR = os.path.join(PLUGIN_DIR, 'styles')
 # (Other versions, if found, will be dropped in favor of this one)
 REPORTS_REQUIRED_VERSION = '0.1'
 URL_REPORTS_LIBRARIES = 'https://github.com/AgenciaImplementacion/annex_17/releases/download/{}/impresion.zip'.format(REPORTS_REQUIRED_VERSION)
+REPORTS_MAX_WORKERS = max(1, (os.cpu_count() or 2) // 2) # Report processes to run concurrently
+REPORTS_JOB_TIMEOUT = 300 # seconds before a report process is killed
+REPORTS_JOB_RETRIES = 1 # Times a failed report is run again
+ANNEX17_BATCH_SIZE = 100 # Plots whose report data is extracted per query
 
 MODULE_HELP_MAPPING = {
     '' : 'index.html', # default module is '', just go to index.html
@@ -122,6 +137,9 @@ INTERLIS_TEST_METADATA_TABLE_PG = 't_ili2db_table_prop'
 # Endpoint for testing the Source Service (avoid last slash)
 DEFAULT_ENDPOINT_SOURCE_SERVICE = 'http://portal.proadmintierra.info:18888/filemanager'
 SOURCE_SERVICE_UPLOAD_SUFFIX = 'v1/file'
+SOURCE_SERVICE_MAX_IN_FLIGHT = 4 # Files uploaded concurrently
+SOURCE_SERVICE_UPLOAD_RETRIES = 2
+SOURCE_SERVICE_RETRY_BACKOFF = 1 # seconds before the first retry, doubled for each retry
 SOURCE_SERVICE_EXPECTED_ID = 'IDEATFileManager'
 
 # UI OBJECTNAMES
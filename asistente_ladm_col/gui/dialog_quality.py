@@ -17,6 +17,7 @@
  ***************************************************************************/
 """
 import collections
+from functools import partial
 
 from qgis.PyQt.QtCore import (Qt,
                               QCoreApplication)
@@ -25,8 +26,12 @@ from qgis.PyQt.QtGui import (QBrush,
                              QIcon,
                              QColor)
 from qgis.PyQt.QtWidgets import (QDialog,
+                                 QHBoxLayout,
+                                 QProgressBar,
+                                 QPushButton,
                                  QTreeWidgetItem,
-                                 QTreeWidgetItemIterator)
+                                 QWidget)
+from qgis.core import Qgis
 
 from ..config.general_config import translated_strings
 from ..config.table_mapping_config import (BOUNDARY_POINT_TABLE,
@@ -173,6 +178,7 @@ class DialogQuality(QDialog, DIALOG_UI):
     def load_items(self):
         self.trw_quality_rules.setUpdatesEnabled(False) # Don't render until we're ready
         self.trw_quality_rules.clear()
+        self.rule_items = dict()
 
         font = QFont()
         font.setBold(True)
@@ -188,6 +194,7 @@ class DialogQuality(QDialog, DIALOG_UI):
             for rule in items['rules']:
                 rule_item = QTreeWidgetItem([rule['text']])
                 rule_item.setData(0, Qt.UserRole, rule['id'])
+                self.rule_items[rule['id']] = rule_item
 
                 children.append(rule_item)
 
@@ -201,83 +208,99 @@ class DialogQuality(QDialog, DIALOG_UI):
 
         self.trw_quality_rules.setUpdatesEnabled(True) # Now render!
 
+    def get_rule_functions(self):
+        """
+        Map each rule id to the QualityUtils call that runs it.
+        """
+        return {
+            'check_overlaps_in_boundary_points': partial(self.quality.check_overlapping_points, self._db, BOUNDARY_POINT_TABLE),
+            'check_overlaps_in_control_points': partial(self.quality.check_overlapping_points, self._db, CONTROL_POINT_TABLE),
+            'check_boundary_points_covered_by_boundary_nodes': partial(self.quality.check_boundary_points_covered_by_boundary_nodes, self._db),
+            'check_boundary_points_covered_by_plot_nodes': partial(self.quality.check_boundary_points_covered_by_plot_nodes, self._db),
+            'check_too_long_boundary_segments': partial(self.quality.check_too_long_segments, self._db),
+            'check_overlaps_in_boundaries': partial(self.quality.check_overlaps_in_boundaries, self._db),
+            'check_boundaries_are_not_split': partial(self.quality.check_boundaries_are_not_split, self._db),
+            'check_boundaries_covered_by_plots': partial(self.quality.check_boundaries_covered_by_plots, self._db),
+            'check_boundary_nodes_covered_by_boundary_points': partial(self.quality.check_boundary_nodes_covered_by_boundary_points, self._db),
+            'check_dangles_in_boundaries': partial(self.quality.check_dangles_in_boundaries, self._db),
+            'check_overlaps_in_plots': partial(self.quality.check_overlapping_polygons, self._db, PLOT_TABLE),
+            'check_overlaps_in_buildings': partial(self.quality.check_overlapping_polygons, self._db, BUILDING_TABLE),
+            'check_overlaps_in_rights_of_way': partial(self.quality.check_overlapping_polygons, self._db, RIGHT_OF_WAY_TABLE),
+            'check_plots_covered_by_boundaries': partial(self.quality.check_plots_covered_by_boundaries, self._db),
+            #'check_missing_survey_points_in_buildings': partial(self.quality.check_missing_survey_points_in_buildings, self._db),
+            'check_right_of_way_overlaps_buildings': partial(self.quality.check_right_of_way_overlaps_buildings, self._db),
+            'check_gaps_in_plots': partial(self.quality.check_gaps_in_plots, self._db),
+            'check_multipart_in_right_of_way': partial(self.quality.check_multiparts_in_right_of_way, self._db),
+            'check_plot_nodes_covered_by_boundary_points': partial(self.quality.check_plot_nodes_covered_by_boundary_points, self._db),
+            'check_parcel_right_relationship': partial(self.quality.check_parcel_right_relationship, self._db),
+            'find_duplicate_records_in_a_table': partial(self.quality.find_duplicate_records_in_a_table, self._db),
+            'check_fraction_sum_for_party_groups': partial(self.quality.check_fraction_sum_for_party_groups, self._db),
+            'check_department_code_has_two_numerical_characters': partial(self.quality.basic_logic_validations, self._db, 'DEPARTMENT_CODE_VALIDATION'),
+            'check_municipality_code_has_three_numerical_characters': partial(self.quality.basic_logic_validations, self._db, 'MUNICIPALITY_CODE_VALIDATION'),
+            'check_zone_code_has_two_numerical_characters': partial(self.quality.basic_logic_validations, self._db, 'ZONE_CODE_VALIDATION'),
+            'check_parcel_number_has_30_numerical_characters': partial(self.quality.basic_logic_validations, self._db, 'PARCEL_NUMBER_VALIDATION'),
+            'check_parcel_number_before_has_20_numerical_characters': partial(self.quality.basic_logic_validations, self._db, 'PARCEL_NUMBER_BEFORE_VALIDATION'),
+            'check_col_party_natural_type': partial(self.quality.advance_logic_validations, self._db, 'COL_PARTY_TYPE_NATURAL_VALIDATION'),
+            'check_col_party_legal_type': partial(self.quality.advance_logic_validations, self._db, 'COL_PARTY_TYPE_NO_NATURAL_VALIDATION'),
+            'check_parcel_type_and_22_position_of_parcel_number': partial(self.quality.advance_logic_validations, self._db, 'PARCEL_TYPE_AND_22_POSITON_OF_PARCEL_NUMBER_VALIDATION'),
+            'check_uebaunit_parcel': partial(self.quality.advance_logic_validations, self._db, 'UEBAUNIT_PARCEL_VALIDATION')
+        }
+
     def accepted(self):
         #self.qgis_utils.remove_error_group_requested.emit()
 
-        iterator = QTreeWidgetItemIterator(self.trw_quality_rules, QTreeWidgetItemIterator.Selectable)
-        while iterator.value():
-            item = iterator.value()
+        rule_functions = self.get_rule_functions()
+        rules = list()
+        for group, items in self.items_dict.items():
+            for rule in items['rules']:
+                rule_item = self.rule_items[rule['id']]
+                if rule_item.isSelected():
+                    rules.append({
+                        'id': rule['id'],
+                        'text': rule['text'],
+                        'function': rule_functions[rule['id']]
+                    })
+
+        if self.quality.rule_runner.is_running():
+            self.qgis_utils.message_emitted.emit(
+                QCoreApplication.translate("DialogQuality", "Quality rules are still being checked, wait for them to finish or cancel them."),
+                Qgis.Warning)
+            return
+
+        # Rules run one after the other once the dialog is closed, error
+        # layers are added to the map as each of them finishes
+        self.show_progress(len(rules))
+        self.quality.run_rules(rules)
+
+    def show_progress(self, rules_count):
+        rule_runner = self.quality.rule_runner
+        qgis_utils = self.qgis_utils
 
-            if item.isSelected():
-                id = item.data(0, Qt.UserRole)
+        widget = QWidget()
+        layout = QHBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        progress = QProgressBar()
+        progress.setRange(0, 100)
+        progress.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        layout.addWidget(progress)
+        cancel_button = QPushButton(QCoreApplication.translate("DialogQuality", "Cancel"))
+        layout.addWidget(cancel_button)
 
-                if id == 'check_overlaps_in_boundary_points':
-                    self.quality.check_overlapping_points(self._db, BOUNDARY_POINT_TABLE)
-                elif id == 'check_overlaps_in_control_points':
-                    self.quality.check_overlapping_points(self._db, CONTROL_POINT_TABLE)
-                elif id == 'check_boundary_points_covered_by_boundary_nodes':
-                    self.quality.check_boundary_points_covered_by_boundary_nodes(self._db)
-                elif id == 'check_boundary_points_covered_by_plot_nodes':
-                    self.quality.check_boundary_points_covered_by_plot_nodes(self._db)
-                elif id == 'check_too_long_boundary_segments':
-                    self.quality.check_too_long_segments(self._db)
-                elif id == 'check_overlaps_in_boundaries':
-                    self.quality.check_overlaps_in_boundaries(self._db)
-                elif id == 'check_boundaries_are_not_split':
-                    self.quality.check_boundaries_are_not_split(self._db)
-                elif id == 'check_boundaries_covered_by_plots':
-                    self.quality.check_boundaries_covered_by_plots(self._db)
-                elif id == 'check_boundary_nodes_covered_by_boundary_points':
-                    self.quality.check_boundary_nodes_covered_by_boundary_points(self._db)
-                elif id == 'check_dangles_in_boundaries':
-                    self.quality.check_dangles_in_boundaries(self._db)
-                elif id == 'check_overlaps_in_plots':
-                    self.quality.check_overlapping_polygons(self._db, PLOT_TABLE)
-                elif id == 'check_overlaps_in_buildings':
-                    self.quality.check_overlapping_polygons(self._db, BUILDING_TABLE)
-                elif id == 'check_overlaps_in_rights_of_way':
-                    self.quality.check_overlapping_polygons(self._db, RIGHT_OF_WAY_TABLE)
-                elif id == 'check_plots_covered_by_boundaries':
-                    self.quality.check_plots_covered_by_boundaries(self._db)
-                #elif id == 'check_missing_survey_points_in_buildings':
-                #    self.quality.check_missing_survey_points_in_buildings(self._db)
-                elif id == 'check_right_of_way_overlaps_buildings':
-                    self.quality.check_right_of_way_overlaps_buildings(self._db)
-                elif id == 'check_gaps_in_plots':
-                    self.quality.check_gaps_in_plots(self._db)
-                elif id == 'check_multipart_in_right_of_way':
-                    self.quality.check_multiparts_in_right_of_way(self._db)
-                elif id == 'check_plot_nodes_covered_by_boundary_points':
-                    self.quality.check_plot_nodes_covered_by_boundary_points(self._db)
-                elif id == 'check_parcel_right_relationship':
-                    self.quality.check_parcel_right_relationship(self._db)
-                elif id == 'find_duplicate_records_in_a_table':
-                    self.quality.find_duplicate_records_in_a_table(self._db)
-                elif id == 'check_fraction_sum_for_party_groups':
-                    self.quality.check_fraction_sum_for_party_groups(self._db)
-                elif id == 'check_department_code_has_two_numerical_characters':
-                    self.quality.basic_logic_validations(self._db, 'DEPARTMENT_CODE_VALIDATION')
-                elif id == 'check_municipality_code_has_three_numerical_characters':
-                    self.quality.basic_logic_validations(self._db, 'MUNICIPALITY_CODE_VALIDATION')
-                elif id == 'check_zone_code_has_two_numerical_characters':
-                    self.quality.basic_logic_validations(self._db, 'ZONE_CODE_VALIDATION')
-                elif id == 'check_parcel_number_has_30_numerical_characters':
-                    self.quality.basic_logic_validations(self._db, 'PARCEL_NUMBER_VALIDATION')
-                elif id == 'check_parcel_number_before_has_20_numerical_characters':
-                    self.quality.basic_logic_validations(self._db, 'PARCEL_NUMBER_BEFORE_VALIDATION')
-                elif id == 'check_col_party_natural_type':
-                    self.quality.advance_logic_validations(self._db, 'COL_PARTY_TYPE_NATURAL_VALIDATION')
-                elif id == 'check_col_party_legal_type':
-                    self.quality.advance_logic_validations(self._db, 'COL_PARTY_TYPE_NO_NATURAL_VALIDATION')
-                elif id == 'check_parcel_type_and_22_position_of_parcel_number':
-                    self.quality.advance_logic_validations(self._db, 'PARCEL_TYPE_AND_22_POSITON_OF_PARCEL_NUMBER_VALIDATION')
-                elif id == 'check_uebaunit_parcel':
-                    self.quality.advance_logic_validations(self._db, 'UEBAUNIT_PARCEL_VALIDATION')
+        rule_runner.progress_changed.connect(progress.setValue)
+        cancel_button.clicked.connect(rule_runner.cancel)
 
-            iterator += 1
+        def rules_finished(results):
+            rule_runner.progress_changed.disconnect(progress.setValue)
+            rule_runner.rules_finished.disconnect(rules_finished)
+            qgis_utils.clear_message_bar_emitted.emit()
+            if len(results) < rules_count:
+                qgis_utils.message_emitted.emit(
+                    QCoreApplication.translate("DialogQuality", "Quality rules canceled after checking {} of {} rules.").format(len(results), rules_count),
+                    Qgis.Warning)
 
-        if self.qgis_utils.error_group_exists():
-            self.qgis_utils.set_error_group_visibility(True)
+        rule_runner.rules_finished.connect(rules_finished)
+        qgis_utils.create_progress_message_bar_emitted.emit(
+            QCoreApplication.translate("DialogQuality", "Checking quality rules..."), widget)
 
     def rejected(self):
         pass
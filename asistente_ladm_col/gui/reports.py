@@ -31,7 +31,6 @@ from qgis.PyQt.QtCore import (Qt,
                               QSettings,
                               QUrl,
                               QFile,
-                              QProcess,
                               QEventLoop,
                               QIODevice)
 from qgis.PyQt.QtWidgets import (QFileDialog,
@@ -42,15 +41,21 @@ from qgis.core import (QgsWkbTypes,
                        QgsNetworkContentFetcherTask,
                        QgsApplication)
 
-from ..config.general_config import (TEST_SERVER,
+from ..config.general_config import (ANNEX17_BATCH_SIZE,
+                                     TEST_SERVER,
                                      PLUGIN_NAME,
                                      REPORTS_REQUIRED_VERSION,
+                                     REPORTS_MAX_WORKERS,
+                                     REPORTS_JOB_TIMEOUT,
+                                     REPORTS_JOB_RETRIES,
                                      URL_REPORTS_LIBRARIES)
 from ..config.table_mapping_config import (ID_FIELD,
                                            PLOT_TABLE)
 from ..utils.qt_utils import (OverrideCursor,
                               remove_readonly,
                               normalize_local_url)
+from ..utils.report_pool import (ReportJob,
+                                 ReportWorkerPool)
 
 class ReportGenerator():
     def __init__(self, qgis_utils):
@@ -63,15 +68,43 @@ class ReportGenerator():
         self.log = QgsApplication.messageLog()
         self.LOG_TAB = 'Anexo_17'
         self._downloading = False
+        self.clear_annex17_data()
 
-    def stderr_ready(self, proc):
-        text = bytes(proc.readAllStandardError()).decode(self.encoding)
-        self.log.logMessage(text, self.LOG_TAB, Qgis.Critical)
+    def job_stderr_ready(self, job, text):
+        self.log.logMessage("[{}] {}".format(job.job_id, text), self.LOG_TAB, Qgis.Critical)
 
-    def stdout_ready(self, proc):
-        text = bytes(proc.readAllStandardOutput()).decode(self.encoding)
-        #print("out", text)
-        self.log.logMessage(text, self.LOG_TAB, Qgis.Info)
+    def job_stdout_ready(self, job, text):
+        self.log.logMessage("[{}] {}".format(job.job_id, text), self.LOG_TAB, Qgis.Info)
+
+    def job_finished(self, job):
+        if job.success:
+            self.log.logMessage(
+                QCoreApplication.translate("ReportGenerator", "Report for plot {} generated in {:.1f} seconds.").format(job.job_id, job.finished_at - job.started_at),
+                self.LOG_TAB,
+                Qgis.Info)
+        else:
+            self.log.logMessage(
+                QCoreApplication.translate("ReportGenerator", "Report for plot {} couldn't be generated after {} attempt(s): {}").format(job.job_id, job.attempts, job.error),
+                self.LOG_TAB,
+                Qgis.Critical)
+
+    def update_progress(self, progress, value, summary):
+        progress.setValue(value)
+        self.log.logMessage(summary, self.LOG_TAB, Qgis.Info)
+
+    def get_max_workers(self):
+        return int(QSettings().value("Asistente-LADM_COL/reports/max_workers", REPORTS_MAX_WORKERS))
+
+    def get_report_arguments(self, db, json_spec_file, plot_id, plot_ids, tmp_dir, yaml_config_path, report_path):
+        if plot_id not in self._annex17_points:
+            # Extract data for this plot and the next ones in a few queries
+            index = plot_ids.index(plot_id)
+            self.prefetch_annex17_data(db, plot_ids[index:index + ANNEX17_BATCH_SIZE])
+
+        # Generate data file
+        json_file = self.update_json_data(db, json_spec_file, plot_id, tmp_dir)
+        self._annex17_points.pop(plot_id, None) # Not needed anymore
+        return ['-config', yaml_config_path, '-spec', json_file, '-output', report_path]
 
     def update_yaml_config(self, db, config_path):
         text = ''
@@ -94,7 +127,53 @@ class ReportGenerator():
 
         return new_file_path
 
+    def clear_annex17_data(self):
+        self._annex17_plots = None # {plot_id: [features]}
+        self._annex17_all_plots = None # Features of all plots, grouped by plot
+        self._annex17_plot_spans = None # {plot_id: (start, end) in self._annex17_all_plots}
+        self._annex17_buildings = None
+        self._annex17_points = dict() # {plot_id: [features]}
+
+    def prefetch_annex17_data(self, db, plot_ids):
+        """
+        Extract report data for several plots with set-based queries instead
+        of running the per-plot queries for each one of them. Plot and building
+        data don't depend on the plot, so they are extracted only once.
+
+        If the connection fails, nothing is cached, so that report data is
+        extracted plot by plot.
+        """
+        if self._annex17_plots is None:
+            res, plots = db.get_annex17_plot_data_batch()
+            if not res:
+                self.log.logMessage(
+                    QCoreApplication.translate("ReportGenerator", "Report data couldn't be extracted in batches: {}").format(plots),
+                    self.LOG_TAB,
+                    Qgis.Warning)
+                return
+
+            self._annex17_all_plots = list()
+            self._annex17_plot_spans = dict()
+            for plot_id, features in plots.items():
+                self._annex17_plot_spans[plot_id] = (len(self._annex17_all_plots), len(self._annex17_all_plots) + len(features))
+                self._annex17_all_plots.extend(features)
+            self._annex17_plots = plots
+            self._annex17_buildings = db.get_annex17_building_data()
+
+        res, points = db.get_annex17_point_data_batch(plot_ids)
+        if not res:
+            self.log.logMessage(
+                QCoreApplication.translate("ReportGenerator", "Report data couldn't be extracted in batches: {}").format(points),
+                self.LOG_TAB,
+                Qgis.Warning)
+            return
+
+        self._annex17_points.update(points)
+
     def get_layer_geojson(self, db, layer_name, plot_id):
+        if plot_id in self._annex17_points:
+            return self.get_prefetched_layer_geojson(layer_name, plot_id)
+
         if layer_name == 'terreno':
             return db.get_annex17_plot_data(plot_id, 'only_id')
         elif layer_name == 'terrenos':
@@ -106,6 +185,20 @@ class ReportGenerator():
         else:
             return db.get_annex17_point_data(plot_id)
 
+    def get_prefetched_layer_geojson(self, layer_name, plot_id):
+        if layer_name == 'terreno':
+            return self._annex17_plots.get(plot_id)
+        elif layer_name == 'terrenos':
+            # Cut this plot's features out of the list of all plots
+            start, end = self._annex17_plot_spans.get(plot_id, (0, 0))
+            return self._annex17_all_plots[:start] + self._annex17_all_plots[end:] or None
+        elif layer_name == 'terrenos_all':
+            return self._annex17_all_plots or None
+        elif layer_name == 'construcciones':
+            return self._annex17_buildings
+        else:
+            return self._annex17_points[plot_id]
+
     def update_json_data(self, db, json_spec_file, plot_id, tmp_dir):
         json_data = dict()
         with open(json_spec_file) as f:
@@ -235,8 +328,6 @@ class ReportGenerator():
         print("CONFIG FILE:", yaml_config_path)
 
         total = len(selected_plots)
-        step = 0
-        count = 0
         tmp_dir = self.get_tmp_dir()
 
         # Progress bar setup
@@ -250,43 +341,45 @@ class ReportGenerator():
             QCoreApplication.translate("ReportGenerator", "Generating {} report{}...").format(total, '' if total == 1 else 's'),
             progress)
 
-        for selected_plot in selected_plots:
-            plot_id = selected_plot[ID_FIELD]
-
-            # Generate data file
-            json_file = self.update_json_data(db, json_spec_file, plot_id, tmp_dir)
-            print("JSON FILE:", json_file)
-
-            # Run sh/bat passing config and data files
-            proc = QProcess()
-            proc.readyReadStandardError.connect(
-                functools.partial(self.stderr_ready, proc=proc))
-            proc.readyReadStandardOutput.connect(
-                functools.partial(self.stdout_ready, proc=proc))
+        if not os.access(script_path, os.X_OK):
+            # Grant execution permissions
+            os.chmod(script_path, stat.S_IXOTH | stat.S_IXGRP | stat.S_IXUSR | stat.S_IRUSR | stat.S_IRGRP)
 
+        self.clear_annex17_data()
+        plot_ids = [selected_plot[ID_FIELD] for selected_plot in selected_plots]
+        jobs = list()
+        for plot_id in plot_ids:
             current_report_path = os.path.join(save_into_folder, 'anexo_17_{}.pdf'.format(plot_id))
-            proc.start(script_path, ['-config', yaml_config_path, '-spec', json_file, '-output', current_report_path])
-
-            if not proc.waitForStarted():
-                # Grant execution permissions
-                os.chmod(script_path, stat.S_IXOTH | stat.S_IXGRP | stat.S_IXUSR | stat.S_IRUSR | stat.S_IRGRP)
-                proc.start(script_path, ['-config', yaml_config_path, '-spec', json_file, '-output', current_report_path])
-
-            if not proc.waitForStarted():
-                proc = None
-                print("### COULDN'T EXECUTE SCRIPT TO GENERATE REPORT...")
-            else:
-                loop = QEventLoop()
-                proc.finished.connect(loop.exit)
-                loop.exec()
-
-                print(plot_id, ':', proc.exitCode())
-                if proc.exitCode() == 0:
-                    count += 1
-
-                step += 1
-                progress.setValue(step * 100 / total)
-
+            jobs.append(ReportJob(plot_id,
+                                  script_path,
+                                  functools.partial(self.get_report_arguments,
+                                                    db,
+                                                    json_spec_file,
+                                                    plot_id,
+                                                    plot_ids,
+                                                    tmp_dir,
+                                                    yaml_config_path,
+                                                    current_report_path)))
+
+        # Run sh/bat passing config and data files, several plots at a time
+        pool = ReportWorkerPool(self.get_max_workers(),
+                                REPORTS_JOB_TIMEOUT,
+                                REPORTS_JOB_RETRIES,
+                                self.encoding)
+        pool.stderr_received.connect(self.job_stderr_ready)
+        pool.stdout_received.connect(self.job_stdout_ready)
+        pool.job_finished.connect(self.job_finished)
+        pool.progress_changed.connect(functools.partial(self.update_progress, progress))
+
+        loop = QEventLoop()
+        pool.all_finished.connect(loop.exit)
+        pool.run(jobs)
+        if pool.is_running():
+            loop.exec()
+
+        count = len([job for job in jobs if job.success])
+
+        self.clear_annex17_data()
         os.remove(yaml_config_path)
         button.setEnabled(True)
         self.qgis_utils.clear_message_bar_emitted.emit()
@@ -27,6 +27,7 @@ class DBConnector(QObject):
         self.uri = uri
         self.schema = schema
         self.conn = None
+        self.supports_concurrent_queries = False # Can it run queries from several threads at once?
 
     def test_connection(self):
         pass
@@ -40,6 +41,14 @@ class DBConnector(QObject):
     def get_uri_for_layer(self, layer_name, geometry_type=None):
         pass
 
+    def get_models_fingerprint(self):
+        """
+        Cheap summary of the INTERLIS models and tables in the DB, it changes
+        whenever a model is (re)imported or tables are added or removed. Used
+        to validate cached metadata. None means metadata shouldn't be cached.
+        """
+        return None
+
     def get_description(self):
         return "Current connection details: '{}' -> {} {}".format(
             self.mode,
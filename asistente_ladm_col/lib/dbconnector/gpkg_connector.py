@@ -17,11 +17,13 @@
  ***************************************************************************/
 """
 import os
+import sqlite3
 
 import qgis.utils
 from qgis.PyQt.QtCore import QCoreApplication
 
 from .db_connector import DBConnector
+from ...utils.instrumentation import instrumentation
 
 
 class GPKGConnector(DBConnector):
@@ -49,6 +51,24 @@ class GPKGConnector(DBConnector):
     def validate_db(self):
         pass
 
+    def get_models_fingerprint(self):
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return None
+
+        try:
+            cur = self.conn.cursor()
+            instrumentation.count('db_queries', 2)
+            cur.execute("SELECT modelname || '@' || importdate FROM t_ili2db_model")
+            models = sorted(record[0] for record in cur.fetchall())
+            cur.execute("SELECT count(name) FROM sqlite_master WHERE type = 'table'")
+            tables = cur.fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+        return "{}|{}".format(','.join(models), tables)
+
     def get_uri_for_layer(self, layer_name, geometry_type=None):
         return (True, '{uri}|layername={table}'.format(
                 uri=self.uri,
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.pool
+
+
+class PGConnectionPool:
+    """
+    Thread-safe, bounded pool of psycopg2 connections.
+
+    Connections are checked out per operation, so several threads (e.g.,
+    quality rule tasks) can query the DB concurrently. Checkouts block while
+    all connections are in use. Connections that have been idle for a while
+    are checked (SELECT 1) before handing them out, and broken connections
+    are replaced by new ones.
+    """
+    def __init__(self, uri, max_connections, timeout=30, health_check_interval=30):
+        self.uri = uri
+        self.timeout = timeout # seconds to wait for a free connection
+        self.health_check_interval = health_check_interval # seconds
+        self._semaphore = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._idle = list() # [(connection, timestamp of last use)]
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def checkout(self):
+        if not self._semaphore.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError("No DB connection was released in {} seconds".format(self.timeout))
+
+        try:
+            while True:
+                with self._lock:
+                    conn, last_used = self._idle.pop() if self._idle else (None, None)
+
+                if conn is None:
+                    return psycopg2.connect(self.uri)
+
+                if self._is_healthy(conn, last_used):
+                    return conn
+
+                self._close(conn)
+        except:
+            self._semaphore.release()
+            raise
+
+    def checkin(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                conn.rollback() # Don't leave the connection idle in transaction
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed:
+            self._close(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.time()))
+
+        self._semaphore.release()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, list()
+
+        for conn, last_used in idle:
+            self._close(conn)
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+
+        if time.time() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
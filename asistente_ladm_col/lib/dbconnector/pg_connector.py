@@ -16,6 +16,10 @@
  *                                                                         *
  ***************************************************************************/
 """
+import csv
+import io
+import uuid
+
 import psycopg2
 import psycopg2.extras
 from qgis.PyQt.QtCore import QCoreApplication
@@ -24,10 +28,24 @@ from qgis.core import (QgsWkbTypes,
                        QgsApplication)
 
 from .db_connector import DBConnector
-from ...config.general_config import (INTERLIS_TEST_METADATA_TABLE_PG,
+from .pg_connection_pool import PGConnectionPool
+from ...config.general_config import (ANNEX17_BATCH_SIZE,
+                                      DEFAULT_FETCH_SIZE,
+                                      DEFAULT_VERTEX_MATCH_TOLERANCE,
+                                      INTERLIS_TEST_METADATA_TABLE_PG,
+                                      PG_MAX_POOL_CONNECTIONS,
                                       PLUGIN_NAME,
                                       PLUGIN_DOWNLOAD_URL_IN_QGIS_REPO)
 from ...config.table_mapping_config import (ID_FIELD,
+                                            BFS_TABLE_BOUNDARY_POINT_FIELD,
+                                            LESS_TABLE,
+                                            LESS_TABLE_BOUNDARY_FIELD,
+                                            LESS_TABLE_PLOT_FIELD,
+                                            MORE_BOUNDARY_FACE_STRING_TABLE,
+                                            MOREBFS_TABLE_BOUNDARY_FIELD,
+                                            MOREBFS_TABLE_PLOT_FIELD,
+                                            POINT_BFS_TABLE_BOUNDARY_FIELD,
+                                            POINT_BOUNDARY_FACE_STRING_TABLE,
                                             PARCEL_TABLE,
                                             DEPARTMENT_FIELD,
                                             MUNICIPALITY_FIELD,
@@ -49,6 +67,7 @@ from ...config.table_mapping_config import (ID_FIELD,
                                             UEBAUNIT_TABLE_BUILDING_UNIT_FIELD,
                                             FRACTION_TABLE,
                                             MEMBERS_TABLE)
+from ...utils.instrumentation import instrumentation
 from ...utils.model_parser import ModelParser
 
 
@@ -61,8 +80,10 @@ class PGConnector(DBConnector):
         self.log = QgsApplication.messageLog()
         self.mode = 'pg'
         self.provider = 'postgres'
-        self._tables_info = None
+        self.supports_concurrent_queries = True # See PGConnectionPool
+        self._tables_info = dict() # Catalog cache {schema: {table_name: [records]}}
         self.model_parser = None
+        self._pool = PGConnectionPool(uri, PG_MAX_POOL_CONNECTIONS)
 
         # Logical validations queries
         self.logic_validation_queries = {
@@ -237,6 +258,7 @@ class PGConnector(DBConnector):
 
     def _postgis_exists(self):
         cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        instrumentation.count('db_queries')
         cur.execute("""
                     SELECT
                         count(extversion)
@@ -249,6 +271,7 @@ class PGConnector(DBConnector):
     def _schema_exists(self):
         if self.schema:
             cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            instrumentation.count('db_queries')
             cur.execute("""
                         SELECT EXISTS(SELECT 1 FROM pg_namespace WHERE nspname = '{}');
             """.format(self.schema))
@@ -260,6 +283,7 @@ class PGConnector(DBConnector):
     def _metadata_exists(self):
         if self.schema:
             cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            instrumentation.count('db_queries')
             cur.execute("""
                         SELECT
                           count(tablename)
@@ -272,6 +296,7 @@ class PGConnector(DBConnector):
         return False
 
     def test_connection(self):
+        self.clear_tables_info_cache() # The catalog might have changed since last connection
         try:
             self.conn = psycopg2.connect(self.uri)
             self.log.logMessage("Connection was set! {}".format(self.conn), PLUGIN_NAME, Qgis.Info)
@@ -303,6 +328,8 @@ class PGConnector(DBConnector):
             self.log.logMessage("Connection was set! {}".format(self.conn), PLUGIN_NAME, Qgis.Info)
 
     def close_connection(self):
+        self.clear_tables_info_cache()
+        self._pool.close_all()
         if self.conn:
             self.conn.close()
             self.conn = None
@@ -312,26 +339,15 @@ class PGConnector(DBConnector):
         pass
 
     def get_uri_for_layer(self, layer_name, geometry_type=None):
-        res, cur = self.get_tables_info()
+        res, tables_info = self.get_tables_info()
         if not res:
-            return (res, cur)
+            return (res, tables_info)
         data_source_uri = ''
 
-        for record in cur:
-            if record['schemaname'] == self.schema and record['tablename'] == layer_name.lower():
-                if record['geometry_column']:
-                    if geometry_type is not None:
-                        if QgsWkbTypes.geometryType(QgsWkbTypes.parseType(record['type'])) == geometry_type:
-                            data_source_uri = '{uri} key={primary_key} estimatedmetadata=true srid={srid} type={type} table="{schema}"."{table}" ({geometry_column})'.format(
-                                uri=self.uri,
-                                primary_key=record['primary_key'],
-                                srid=record['srid'],
-                                type=record['type'],
-                                schema=record['schemaname'],
-                                table=record['tablename'],
-                                geometry_column=record['geometry_column']
-                            )
-                    else:
+        for record in tables_info.get(layer_name.lower(), list()):
+            if record['geometry_column']:
+                if geometry_type is not None:
+                    if QgsWkbTypes.geometryType(QgsWkbTypes.parseType(record['type'])) == geometry_type:
                         data_source_uri = '{uri} key={primary_key} estimatedmetadata=true srid={srid} type={type} table="{schema}"."{table}" ({geometry_column})'.format(
                             uri=self.uri,
                             primary_key=record['primary_key'],
@@ -342,23 +358,73 @@ class PGConnector(DBConnector):
                             geometry_column=record['geometry_column']
                         )
                 else:
-                    data_source_uri = '{uri} key={primary_key} table="{schema}"."{table}"'.format(
+                    data_source_uri = '{uri} key={primary_key} estimatedmetadata=true srid={srid} type={type} table="{schema}"."{table}" ({geometry_column})'.format(
                         uri=self.uri,
                         primary_key=record['primary_key'],
+                        srid=record['srid'],
+                        type=record['type'],
                         schema=record['schemaname'],
-                        table=record['tablename']
+                        table=record['tablename'],
+                        geometry_column=record['geometry_column']
                     )
+            else:
+                data_source_uri = '{uri} key={primary_key} table="{schema}"."{table}"'.format(
+                    uri=self.uri,
+                    primary_key=record['primary_key'],
+                    schema=record['schemaname'],
+                    table=record['tablename']
+                )
         if data_source_uri:
             return (True, data_source_uri)
         return (False, QCoreApplication.translate("PGConnector", "Layer '{}' was not found in the database (schema: {}).").format(layer_name, self.schema))
 
+    def get_models_fingerprint(self):
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return None
+
+        try:
+            records = self._execute_query("""
+                        SELECT
+                          (SELECT string_agg(modelname || '@' || importdate::text, ',' ORDER BY modelname)
+                           FROM "{schema}".t_ili2db_model) AS models,
+                          (SELECT count(tablename) FROM pg_catalog.pg_tables WHERE schemaname = '{schema}') AS tables
+                        """.format(schema=self.schema))
+        except psycopg2.Error as e:
+            self.log.logMessage("Models fingerprint couldn't be read: {}".format(e), PLUGIN_NAME, Qgis.Warning)
+            return None
+
+        return "{}|{}".format(records[0]['models'], records[0]['tables'])
+
     def get_tables_info(self):
+        """
+        Catalog info (primary key and geometry columns) of the tables in the
+        current schema, as a dict {table_name: [records]}. It's read once
+        per connection and schema, call clear_tables_info_cache() to read it
+        again (e.g., after the schema structure changes).
+        """
+        if self.schema not in self._tables_info:
+            res, records = self._get_tables_info_from_db()
+            if not res:
+                return (res, records)
+
+            tables_info = dict()
+            for record in records:
+                tables_info.setdefault(record['tablename'], list()).append(record)
+            self._tables_info[self.schema] = tables_info
+
+        return (True, self._tables_info[self.schema])
+
+    def clear_tables_info_cache(self):
+        self._tables_info = dict()
+
+    def _get_tables_info_from_db(self):
         if self.conn is None:
             res, msg = self.test_connection()
             if not res:
                 return (res, msg)
-        cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cur.execute("""
+        records = self._execute_query("""
                     SELECT
                       tbls.schemaname AS schemaname,
                       tbls.tablename AS tablename,
@@ -377,7 +443,7 @@ class PGConnector(DBConnector):
                       AND g.f_table_name = tbls.tablename
                     WHERE i.indisprimary AND schemaname ='{}'
                     """.format(self.schema))
-        return (True, cur)
+        return (True, records)
 
     def get_annex17_plot_data(self, plot_id, mode='only_id'):
         if self.conn is None:
@@ -389,7 +455,6 @@ class PGConnector(DBConnector):
         if mode != 'all':
             where_id = "WHERE l.t_id {} {}".format('=' if mode=='only_id' else '!=', plot_id)
 
-        cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
         query = """SELECT array_to_json(array_agg(features)) AS features
                     FROM (
@@ -409,12 +474,8 @@ class PGConnector(DBConnector):
                             {where_id}
                             ) AS f
                         ) AS ff;""".format(schema=self.schema, where_id=where_id)
-        cur.execute(query)
 
-        if mode == 'only_id':
-            return cur.fetchone()[0]
-        else:
-            return cur.fetchall()[0][0]
+        return self._execute_query(query)[0][0]
 
     def get_annex17_building_data(self):
         if self.conn is None:
@@ -422,7 +483,6 @@ class PGConnector(DBConnector):
             if not res:
                 return (res, msg)
 
-        cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
         query = """SELECT array_to_json(array_agg(features)) AS features
                     FROM (
                     	SELECT f AS features
@@ -438,9 +498,8 @@ class PGConnector(DBConnector):
                             FROM {schema}.construccion AS c
                     		) AS f
                         ) AS ff;""".format(schema=self.schema)
-        cur.execute(query)
 
-        return cur.fetchall()[0][0]
+        return self._execute_query(query)[0][0]
 
     def get_annex17_point_data(self, plot_id):
         if self.conn is None:
@@ -448,298 +507,497 @@ class PGConnector(DBConnector):
             if not res:
                 return (res, msg)
 
-        cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        query = """WITH parametros
+        query = "{};".format(self._get_annex17_point_query([plot_id]))
+        return self._execute_query(query)[0]['features']
+
+    def get_annex17_plot_data_batch(self):
+        """
+        Set-based counterpart of get_annex17_plot_data(): fetches the features
+        of all plots in a single query, so that 'only_id', 'all_but_id' and
+        'all' modes can be split in memory for any number of plots.
+        :return: Tuple (True, dict {plot t_id: list of GeoJSON features}) or
+                 (False, msg) if the connection failed
+        """
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return (res, msg)
+
+        query = """SELECT l.t_id
+                        ,json_build_object('type', 'Feature'
+                            ,'properties', row_to_json((
+                                SELECT l
+                                FROM (
+                                    SELECT left(right(numero_predial,15),6) AS predio
+                                    ) AS l
+                                ))
+                            ,'geometry', ST_AsGeoJSON(poligono_creado)::json) AS feature
+                    FROM {schema}.terreno AS l
+                    LEFT JOIN {schema}.uebaunit ON l.t_id = ue_terreno
+                    LEFT JOIN {schema}.predio ON predio.t_id = baunit_predio;""".format(schema=self.schema)
+
+        features = dict()
+        try:
+            for record in self.iter_sql_query(query, psycopg2.extras.DictCursor):
+                features.setdefault(record['t_id'], list()).append(record['feature'])
+        except psycopg2.OperationalError as e:
+            return (False, str(e))
+
+        return (True, features)
+
+    def get_annex17_point_data_batch(self, plot_ids, chunk_size=ANNEX17_BATCH_SIZE):
+        """
+        Set-based counterpart of get_annex17_point_data(): the boundary point
+        query takes an array of plot ids and is run once per chunk_size plots.
+        :param plot_ids: Iterable of plot t_ids
+        :return: Tuple (True, dict {plot t_id: list of GeoJSON features or
+                 None}) or (False, msg) if the connection failed
+        """
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return (res, msg)
+
+        plot_ids = list(plot_ids)
+        features = dict()
+        try:
+            for i in range(0, len(plot_ids), chunk_size):
+                query = "{};".format(self._get_annex17_point_query(plot_ids[i:i + chunk_size]))
+                for record in self._execute_query(query):
+                    features[record['plot_id']] = record['features']
+        except psycopg2.OperationalError as e:
+            return (False, str(e))
+
+        return (True, features)
+
+    def _get_annex17_point_query(self, plot_ids):
+        """
+        Boundary points of each plot, numbered clockwise from the starting
+        point chosen by criterio_punto_inicial. Every CTE is keyed by plot_id,
+        so that all plots are processed in a single pass.
+        :param plot_ids: List of plot t_ids
+        :return: Query whose records are (plot_id, features), one per plot id
+        """
+        return """WITH parametros
                     AS (
-                    	SELECT {id} AS poligono_t_id
-                    		,2 AS criterio_punto_inicial
+                    	SELECT 2 AS criterio_punto_inicial
                     		,4 AS criterio_observador
                     		,true AS incluir_tipo_derecho
                     	)
-                    	,t
+                    	,ids
                     AS (
-                    	SELECT t_id
-                    		,ST_ForceRHR(poligono_creado) AS poligono_creado
-                    	FROM {schema}.terreno AS t
-                    		,parametros
-                    	WHERE t.t_id = poligono_t_id
+                    	SELECT DISTINCT unnest(ARRAY [{plot_ids}]::bigint[]) AS plot_id
                     	)
-                    	,a
-                    AS (
-                    	SELECT ST_SetSRID(ST_MakePoint(st_xmin(t.poligono_creado), st_ymax(t.poligono_creado)), ST_SRID(t.poligono_creado)) AS p
-                    	FROM t
-                    	)
-                    	,b
+                    	,t
                     AS (
-                    	SELECT ST_SetSRID(ST_MakePoint(st_xmax(t.poligono_creado), st_ymax(t.poligono_creado)), ST_SRID(t.poligono_creado)) AS p
-                    	FROM t
+                    	SELECT t.t_id AS plot_id
+                    		,ST_ForceRHR(t.poligono_creado) AS poligono_creado
+                    	FROM {schema}.terreno AS t
+                    	JOIN ids ON t.t_id = ids.plot_id
                     	)
-                    	,c
+                    	,nw
                     AS (
-                    	SELECT ST_SetSRID(ST_MakePoint(st_xmax(t.poligono_creado), st_ymin(t.poligono_creado)), ST_SRID(t.poligono_creado)) AS p
+                    	SELECT plot_id
+                    		,ST_SetSRID(ST_MakePoint(st_xmin(t.poligono_creado), st_ymax(t.poligono_creado)), ST_SRID(t.poligono_creado)) AS p
                     	FROM t
                     	)
-                    	,d
+                    	,ne
                     AS (
-                    	SELECT ST_SetSRID(ST_MakePoint(st_xmin(t.poligono_creado), st_ymin(t.poligono_creado)), ST_SRID(t.poligono_creado)) AS p
+                    	SELECT plot_id
+                    		,ST_SetSRID(ST_MakePoint(st_xmax(t.poligono_creado), st_ymax(t.poligono_creado)), ST_SRID(t.poligono_creado)) AS p
                     	FROM t
                     	)
                     	,m
                     AS (
-                    	SELECT CASE
+                    	SELECT plot_id
+                    		,CASE
                     			WHEN criterio_observador = 1
-                    				THEN (
-                    						SELECT ST_SetSRID(ST_MakePoint(st_x(ST_centroid(t.poligono_creado)), st_y(ST_centroid(t.poligono_creado))), ST_SRID(t.poligono_creado)) AS p
-                    						FROM t
-                    						)
-                    			WHEN criterio_observador = 2
-                    				THEN (
-                    						SELECT ST_SetSRID(ST_MakePoint(st_x(ST_centroid(st_envelope(t.poligono_creado))), st_y(ST_centroid(st_envelope(t.poligono_creado)))), ST_SRID(t.poligono_creado)) AS p
-                    						FROM t
-                    						)
+                    				THEN ST_SetSRID(ST_MakePoint(st_x(ST_centroid(t.poligono_creado)), st_y(ST_centroid(t.poligono_creado))), ST_SRID(t.poligono_creado))
                     			WHEN criterio_observador = 3
-                    				THEN (
-                    						SELECT ST_SetSRID(ST_PointOnSurface(poligono_creado), ST_SRID(t.poligono_creado)) AS p
-                    						FROM t
-                    						)
+                    				THEN ST_SetSRID(ST_PointOnSurface(poligono_creado), ST_SRID(t.poligono_creado))
                     			WHEN criterio_observador = 4
-                    				THEN (
-                    						SELECT ST_SetSRID(ST_MakePoint(st_x(ST_ClosestPoint(poligono_creado, ST_centroid(t.poligono_creado))), st_y(ST_ClosestPoint(poligono_creado, ST_centroid(t.poligono_creado)))), ST_SRID(t.poligono_creado)) AS p
-                    						FROM t
-                    						)
-                    			ELSE (
-                    					SELECT ST_SetSRID(ST_MakePoint(st_x(ST_centroid(st_envelope(t.poligono_creado))), st_y(ST_centroid(st_envelope(t.poligono_creado)))), ST_SRID(t.poligono_creado)) AS p
-                    					FROM t
-                    					)
+                    				THEN ST_SetSRID(ST_MakePoint(st_x(ST_ClosestPoint(poligono_creado, ST_centroid(t.poligono_creado))), st_y(ST_ClosestPoint(poligono_creado, ST_centroid(t.poligono_creado)))), ST_SRID(t.poligono_creado))
+                    			ELSE ST_SetSRID(ST_MakePoint(st_x(ST_centroid(st_envelope(t.poligono_creado))), st_y(ST_centroid(st_envelope(t.poligono_creado)))), ST_SRID(t.poligono_creado))
                     			END AS p
-                    	FROM parametros
-                    	)
-                    	,norte
-                    AS (
-                    	SELECT ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY [a.p, b.p, m.p, a.p])), ST_SRID(t.poligono_creado)) geom
                     	FROM t
-                    		,a
-                    		,b
-                    		,m
-                    	)
-                    	,este
-                    AS (
-                    	SELECT ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY [m.p, b.p, c.p, m.p])), ST_SRID(t.poligono_creado)) geom
-                    	FROM t
-                    		,b
-                    		,c
-                    		,m
-                    	)
-                    	,sur
-                    AS (
-                    	SELECT ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY [m.p, c.p, d.p, m.p])), ST_SRID(t.poligono_creado)) geom
-                    	FROM t
-                    		,m
-                    		,c
-                    		,d
+                    		,parametros
                     	)
-                    	,oeste
+                    	,norte
                     AS (
-                    	SELECT ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY [a.p, m.p, d.p, a.p])), ST_SRID(t.poligono_creado)) geom
+                    	SELECT t.plot_id
+                    		,ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY [nw.p, ne.p, m.p, nw.p])), ST_SRID(t.poligono_creado)) geom
                     	FROM t
-                    		,a
-                    		,m
-                    		,d
+                    	JOIN nw ON nw.plot_id = t.plot_id
+                    	JOIN ne ON ne.plot_id = t.plot_id
+                    	JOIN m ON m.plot_id = t.plot_id
                     	)
                     	,limite_poligono
                     AS (
-                    	SELECT t_id
+                    	SELECT plot_id
                     		,ST_Boundary(poligono_creado) geom
                     	FROM t
                     	)
                     	,limite_vecinos
                     AS (
-                    	SELECT o.t_id
+                    	SELECT t.plot_id
+                    		,o.t_id
                     		,ST_Boundary(o.poligono_creado) geom
                     	FROM t
-                    		,{schema}.terreno o
-                    	WHERE o.poligono_creado && st_envelope(t.poligono_creado)
-                    		AND t.t_id <> o.t_id
+                    	JOIN {schema}.terreno o ON o.poligono_creado && st_envelope(t.poligono_creado)
+                    		AND t.plot_id <> o.t_id
                     	)
                     	,pre_colindancias
                     AS (
-                    	SELECT limite_vecinos.t_id
+                    	SELECT limite_vecinos.plot_id
+                    		,limite_vecinos.t_id
                     		,st_intersection(limite_poligono.geom, limite_vecinos.geom) geom
                     	FROM limite_poligono
-                    		,limite_vecinos
+                    	JOIN limite_vecinos ON limite_vecinos.plot_id = limite_poligono.plot_id
                     	WHERE st_intersects(limite_poligono.geom, limite_vecinos.geom)
-                    		AND limite_poligono.t_id <> limite_vecinos.t_id
 
                     	UNION
 
-                    	SELECT NULL AS t_id
+                    	SELECT limite_poligono.plot_id
+                    		,NULL AS t_id
                     		,ST_Difference(limite_poligono.geom, a.geom) geom
                     	FROM limite_poligono
-                    		,(
-                    			SELECT ST_LineMerge(ST_Union(geom)) geom
-                    			FROM limite_vecinos
-                    			) a
+                    	LEFT JOIN (
+                    		SELECT plot_id
+                    			,ST_LineMerge(ST_Union(geom)) geom
+                    		FROM limite_vecinos
+                    		GROUP BY plot_id
+                    		) a ON a.plot_id = limite_poligono.plot_id
                     	)
                     	,tmp_colindantes
                     AS (
-                    	SELECT t_id
+                    	SELECT plot_id
+                    		,t_id
                     		,ST_LineMerge(ST_Union(geom)) geom
                     	FROM (
-                    		SELECT SIMPLE.t_id
-                    			,SIMPLE.simple_geom AS geom
-                    			,ST_GeometryType(SIMPLE.simple_geom) AS geom_type
-                    			,ST_AsEWKT(SIMPLE.simple_geom) AS geom_wkt
-                    		FROM (
-                    			SELECT dumped.*
-                    				,(dumped.geom_dump).geom AS simple_geom
-                    				,(dumped.geom_dump).path AS path
-                    			FROM (
-                    				SELECT *
-                    					,ST_Dump(geom) AS geom_dump
-                    				FROM pre_colindancias
-                    				) AS dumped
-                    			) AS SIMPLE
+                    		SELECT plot_id
+                    			,t_id
+                    			,(ST_Dump(geom)).geom AS geom
+                    		FROM pre_colindancias
                     		) a
-                    	GROUP BY t_id
+                    	GROUP BY plot_id
+                    		,t_id
                     	)
                     	,lineas_colindancia
                     AS (
-                    	SELECT *
-                    	FROM (
-                    		SELECT SIMPLE.t_id
-                    			,SIMPLE.simple_geom AS geom
-                    		FROM (
-                    			SELECT dumped.*
-                    				,(dumped.geom_dump).geom AS simple_geom
-                    				,(dumped.geom_dump).path AS path
-                    			FROM (
-                    				SELECT *
-                    					,ST_Dump(geom) AS geom_dump
-                    				FROM (
-                    					SELECT *
-                    					FROM tmp_colindantes
-                    					WHERE ST_GeometryType(geom) = 'ST_MultiLineString'
-                    					) a
-                    				) AS dumped
-                    			) AS SIMPLE
-                    		) a
+                    	SELECT plot_id
+                    		,t_id
+                    		,(ST_Dump(geom)).geom AS geom
+                    	FROM tmp_colindantes
+                    	WHERE ST_GeometryType(geom) = 'ST_MultiLineString'
 
                     	UNION
 
-                    	SELECT *
+                    	SELECT plot_id
+                    		,t_id
+                    		,geom
                     	FROM tmp_colindantes
                     	WHERE ST_GeometryType(geom) <> 'ST_MultiLineString'
                     	)
                     	,puntos_terreno
                     AS (
-                    	SELECT (ST_DumpPoints(poligono_creado)).* AS dp
+                    	SELECT plot_id
+                    		,(ST_DumpPoints(poligono_creado)).*
                     	FROM t
                     	)
                     	,punto_nw
                     AS (
-                    	SELECT geom
-                    		,st_distance(geom, nw) AS dist
+                    	SELECT DISTINCT ON (puntos_terreno.plot_id) puntos_terreno.plot_id
+                    		,puntos_terreno.geom
                     	FROM puntos_terreno
-                    		,(
-                    			SELECT ST_SetSRID(ST_MakePoint(st_xmin(st_envelope(poligono_creado)), st_ymax(st_envelope(poligono_creado))), ST_SRID(poligono_creado)) AS nw
-                    			FROM t
-                    			) a
-                    	ORDER BY dist limit 1
+                    	JOIN nw ON nw.plot_id = puntos_terreno.plot_id
+                    	ORDER BY puntos_terreno.plot_id
+                    		,st_distance(puntos_terreno.geom, nw.p)
                     	)
                     	,punto_inicial_por_lindero_con_punto_nw
                     AS (
-                    	SELECT st_startpoint(lineas_colindancia.geom) geom
+                    	SELECT DISTINCT ON (lineas_colindancia.plot_id) lineas_colindancia.plot_id
+                    		,st_startpoint(lineas_colindancia.geom) geom
                     	FROM lineas_colindancia
-                    		,punto_nw
+                    	JOIN punto_nw ON punto_nw.plot_id = lineas_colindancia.plot_id
                     	WHERE st_intersects(lineas_colindancia.geom, punto_nw.geom)
-                    		AND NOT st_intersects(st_endpoint(lineas_colindancia.geom), punto_nw.geom) limit 1
+                    		AND NOT st_intersects(st_endpoint(lineas_colindancia.geom), punto_nw.geom)
+                    	ORDER BY lineas_colindancia.plot_id
                     	)
                     	,punto_inicial_por_lindero_porcentaje_n
                     AS (
-                    	SELECT round((st_length(st_intersection(lineas_colindancia.geom, norte.geom)) / st_length(lineas_colindancia.geom))::NUMERIC, 2) dist
+                    	SELECT DISTINCT ON (lineas_colindancia.plot_id) lineas_colindancia.plot_id
                     		,st_startpoint(lineas_colindancia.geom) geom
-                    		,st_distance(lineas_colindancia.geom, nw) distance_to_nw
                     	FROM lineas_colindancia
-                    		,norte
-                    		,(
-                    			SELECT ST_SetSRID(ST_MakePoint(st_xmin(st_envelope(poligono_creado)), st_ymax(st_envelope(poligono_creado))), ST_SRID(poligono_creado)) AS nw
-                    			FROM t
-                    			) a
+                    	JOIN norte ON norte.plot_id = lineas_colindancia.plot_id
+                    	JOIN nw ON nw.plot_id = lineas_colindancia.plot_id
                     	WHERE st_intersects(lineas_colindancia.geom, norte.geom)
-                    	ORDER BY dist DESC
-                    		,distance_to_nw limit 1
+                    	ORDER BY lineas_colindancia.plot_id
+                    		,round((st_length(st_intersection(lineas_colindancia.geom, norte.geom)) / st_length(lineas_colindancia.geom))::NUMERIC, 2) DESC
+                    		,st_distance(lineas_colindancia.geom, nw.p)
                     	)
                     	,punto_inicial
                     AS (
-                    	SELECT CASE
+                    	SELECT t.plot_id
+                    		,CASE
                     			WHEN criterio_punto_inicial = 1
-                    				THEN (
-                    						SELECT geom
-                    						FROM punto_inicial_por_lindero_con_punto_nw
-                    						)
+                    				THEN punto_inicial_por_lindero_con_punto_nw.geom
                     			WHEN criterio_punto_inicial = 2
-                    				THEN (
-                    						SELECT geom
-                    						FROM punto_inicial_por_lindero_porcentaje_n
-                    						)
+                    				THEN punto_inicial_por_lindero_porcentaje_n.geom
                     			END AS geom
-                    	FROM parametros
+                    	FROM t
+                    	CROSS JOIN parametros
+                    	LEFT JOIN punto_inicial_por_lindero_con_punto_nw ON punto_inicial_por_lindero_con_punto_nw.plot_id = t.plot_id
+                    	LEFT JOIN punto_inicial_por_lindero_porcentaje_n ON punto_inicial_por_lindero_porcentaje_n.plot_id = t.plot_id
+                    	)
+                    	,punto_inicial_numero
+                    AS (
+                    	SELECT DISTINCT ON (numerados.plot_id) numerados.plot_id
+                    		,numerados.m
+                    	FROM (
+                    		SELECT plot_id
+                    			,geom
+                    			,row_number() OVER (
+                    				PARTITION BY plot_id ORDER BY path
+                    				) AS m
+                    		FROM puntos_terreno
+                    		) numerados
+                    	JOIN punto_inicial ON punto_inicial.plot_id = numerados.plot_id
+                    	ORDER BY numerados.plot_id
+                    		,st_distance(numerados.geom, punto_inicial.geom)
                     	)
                     	,puntos_ordenados
                     AS (
-                    	SELECT CASE
+                    	SELECT plot_id
+                    		,CASE
                     			WHEN id - m + 1 <= 0
                     				THEN total + id - m
                     			ELSE id - m + 1
                     			END AS id
                     		,geom
-                    		,st_x(geom) x
-                    		,st_y(geom) y
                     	FROM (
-                    		SELECT row_number() OVER (
-                    				ORDER BY path
+                    		SELECT puntos_terreno.plot_id
+                    			,row_number() OVER (
+                    				PARTITION BY puntos_terreno.plot_id ORDER BY puntos_terreno.path
                     				) AS id
-                    			,m
-                    			,path
-                    			,geom
-                    			,total
-                    		FROM (
-                    			SELECT (ST_DumpPoints(ST_ForceRHR(poligono_creado))).* AS dp
-                    				,ST_NPoints(poligono_creado) total
-                    				,poligono_creado
-                    			FROM t
-                    			) AS a
-                    			,(
-                    				SELECT row_number() OVER (
-                    						ORDER BY path
-                    						) AS m
-                    					,st_distance(puntos_terreno.geom, punto_inicial.geom) AS dist
-                    				FROM puntos_terreno
-                    					,punto_inicial
-                    				ORDER BY dist limit 1
-                    				) b
-                    		) t
+                    			,punto_inicial_numero.m
+                    			,puntos_terreno.geom
+                    			,ST_NPoints(t.poligono_creado) total
+                    		FROM puntos_terreno
+                    		JOIN t ON t.plot_id = puntos_terreno.plot_id
+                    		JOIN punto_inicial_numero ON punto_inicial_numero.plot_id = puntos_terreno.plot_id
+                    		) AS a
                     	WHERE id <> total
-                    	ORDER BY id
                     	)
-                    SELECT array_to_json(array_agg(features)) AS features
-                    FROM (
-                    	SELECT f AS features
-                    	FROM (
-                    		SELECT 'Feature' AS type
-                    			,ST_AsGeoJSON(geom)::json AS geometry
-                    			,row_to_json((
-                    					SELECT l
-                    					FROM (
-                    						SELECT id AS point_number
-                    						) AS l
-                    					)) AS properties
-                    		FROM puntos_ordenados
-                    		) AS f
-                    	) AS ff;""".format(schema=self.schema, id=plot_id)
-        cur.execute(query)
+                    SELECT ids.plot_id
+                    	,array_to_json(array_agg(json_build_object('type', 'Feature'
+                    		,'geometry', ST_AsGeoJSON(puntos_ordenados.geom)::json
+                    		,'properties', json_build_object('point_number', puntos_ordenados.id)) ORDER BY puntos_ordenados.id)
+                    		FILTER (WHERE puntos_ordenados.id IS NOT NULL)) AS features
+                    FROM ids
+                    LEFT JOIN puntos_ordenados ON puntos_ordenados.plot_id = ids.plot_id
+                    GROUP BY ids.plot_id""".format(schema=self.schema, plot_ids=', '.join(str(int(plot_id)) for plot_id in plot_ids))
+
+    def get_overlapping_polygons(self, table_name, geometry_column):
+        """
+        Set-based counterpart of GeometryUtils.get_overlapping_polygons():
+        self join of a polygon table (GiST index on the bounding box filter)
+        whose multipolygons are compared part by part, as if they had been
+        exploded to single parts.
+        :param table_name: Table in the current schema
+        :param geometry_column: Polygon or multipolygon column
+        :return: Generator of records (polygon_id, overlapping_id, geom) where
+                 polygon_id < overlapping_id are t_ids and geom is the WKB of
+                 the 2D (multi)polygon shared by both parts
+        """
+        # Interiors intersecting in 2 dimensions is the same as
+        # overlaps OR contains OR within for polygons, but is computed once
+        query = """SELECT a.t_id AS polygon_id
+                        ,b.t_id AS overlapping_id
+                        ,ST_AsBinary(ST_Force2D(ST_CollectionExtract(ST_Intersection(part_a.geom, part_b.geom), 3))) AS geom
+                    FROM "{schema}"."{table}" AS a
+                    JOIN "{schema}"."{table}" AS b
+                        ON a.t_id < b.t_id
+                        AND a.{geometry} && b.{geometry}
+                    CROSS JOIN LATERAL ST_Dump(a.{geometry}) AS part_a
+                    CROSS JOIN LATERAL ST_Dump(b.{geometry}) AS part_b
+                    WHERE part_a.geom && part_b.geom
+                        AND ST_Relate(part_a.geom, part_b.geom, '2********')
+                    ORDER BY a.t_id, b.t_id;""".format(schema=self.schema, table=table_name, geometry=geometry_column)
+
+        return self.iter_sql_query(query)
+
+    def get_polygon_union_parts(self, table_name, geometry_column, xmin, ymin, xmax, ymax):
+        """
+        Dissolve the valid polygons of a table whose bounding box intersects a
+        rectangle (GiST index on the bounding box filter). Used to find gaps
+        tile by tile, see GeometryUtils.get_gaps_in_polygon_layer_by_tiles().
+        :param table_name: Table in the current schema
+        :param geometry_column: Polygon or multipolygon column
+        :return: Tuple (True, list of records (geom, nodes)) or (False, msg)
+                 if the connection failed. geom is the WKB of a 2D part of the
+                 union and nodes is a list of 't_id:part index' identifiers of
+                 the single-part polygons intersecting it
+        """
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return (res, msg)
+
+        query = """WITH polygons AS (
+                        SELECT p.t_id::text || ':' || COALESCE(part.path[1], 1)::text AS node
+                            ,part.geom
+                        FROM "{schema}"."{table}" AS p
+                        CROSS JOIN LATERAL ST_Dump(p.{geometry}) AS part
+                        WHERE p.{geometry} && ST_MakeEnvelope({xmin}, {ymin}, {xmax}, {ymax}, ST_SRID(p.{geometry}))
+                            AND ST_IsValid(p.{geometry})
+                            AND NOT ST_IsEmpty(p.{geometry})
+                    ), parts AS (
+                        SELECT (ST_Dump(ST_Union(geom))).geom AS geom FROM polygons
+                    )
+                    SELECT ST_AsBinary(ST_Force2D(parts.geom)) AS geom
+                        ,ARRAY(SELECT polygons.node
+                               FROM polygons
+                               WHERE polygons.geom && parts.geom
+                                   AND ST_Intersects(polygons.geom, parts.geom)) AS nodes
+                    FROM parts;""".format(schema=self.schema, table=table_name, geometry=geometry_column,
+                                          xmin=xmin, ymin=ymin, xmax=xmax, ymax=ymax)
 
-        return cur.fetchone()[0]
+        try:
+            return (True, self._execute_query(query, psycopg2.extras.RealDictCursor))
+        except psycopg2.OperationalError as e:
+            return (False, str(e))
+
+    def fill_topology_table_pointbfs(self, boundary_table, boundary_geometry, point_table, point_geometry,
+                                     boundary_ids=None, tolerance=DEFAULT_VERTEX_MATCH_TOLERANCE):
+        """
+        Set-based counterpart of GeometryUtils.get_pair_boundary_boundary_point():
+        pair boundaries with the boundary points lying on their vertices and
+        insert the pairs that are not yet in the PointBFS table, all in a
+        single statement.
+        :param boundary_ids: List of boundary t_ids to pair, None for all
+        :return: Tuple (True, (inserted pairs, found pairs)) or (False, error message)
+        """
+        boundary_filter = "WHERE l.t_id IN ({})".format(", ".join(str(int(t_id)) for t_id in boundary_ids)) if boundary_ids is not None else ""
+        query = """WITH pairs AS (
+                        SELECT DISTINCT l.t_id AS boundary_id, p.t_id AS point_id
+                        FROM "{schema}"."{boundary_table}" AS l
+                        CROSS JOIN LATERAL ST_DumpPoints(l.{boundary_geometry}) AS v
+                        JOIN "{schema}"."{point_table}" AS p
+                            ON ST_DWithin(v.geom, p.{point_geometry}, {tolerance})
+                        {boundary_filter}
+                    ), inserted AS (
+                        INSERT INTO "{schema}"."{bfs_table}" ({bfs_boundary}, {bfs_point})
+                        SELECT boundary_id, point_id
+                        FROM pairs
+                        WHERE NOT EXISTS (SELECT 1 FROM "{schema}"."{bfs_table}" AS bfs
+                                          WHERE bfs.{bfs_boundary} = pairs.boundary_id
+                                              AND bfs.{bfs_point} = pairs.point_id)
+                        RETURNING 1
+                    )
+                    SELECT (SELECT count(*) FROM inserted) AS inserted, (SELECT count(*) FROM pairs) AS found;""".format(
+            schema=self.schema, boundary_table=boundary_table, boundary_geometry=boundary_geometry,
+            point_table=point_table, point_geometry=point_geometry, tolerance=tolerance,
+            boundary_filter=boundary_filter, bfs_table=POINT_BOUNDARY_FACE_STRING_TABLE,
+            bfs_boundary=POINT_BFS_TABLE_BOUNDARY_FIELD, bfs_point=BFS_TABLE_BOUNDARY_POINT_FIELD)
+
+        res, records = self._execute_write_query(query)
+        if not res:
+            return (res, records)
+        return (True, (records[0]['inserted'], records[0]['found']))
+
+    def fill_topology_tables_morebfs_less(self, plot_table, plot_geometry, boundary_table, boundary_geometry, plot_ids=None):
+        """
+        Set-based counterpart of GeometryUtils.get_pair_boundary_plot(): pair
+        plots with the boundaries sharing lines with their outer rings
+        (MoreBFS) or inner rings (Less) and insert the pairs that are not yet
+        in those tables, all in a single statement.
+        :param plot_ids: List of plot t_ids to pair, None for all
+        :return: Tuple (True, {table name: (inserted pairs, found pairs)}) or (False, error message)
+        """
+        plot_filter = "WHERE p.t_id IN ({})".format(", ".join(str(int(t_id)) for t_id in plot_ids)) if plot_ids is not None else ""
+        is_line = "GeometryType({0}) IN ('LINESTRING', 'MULTILINESTRING') AND NOT ST_IsEmpty({0})"
+        # Intersections are computed once (CTEs referenced twice are materialized) and feed both inserts
+        query = """WITH plots AS (
+                        SELECT p.t_id
+                            ,p.{plot_geometry} AS geom
+                            ,(SELECT ST_Collect(ST_ExteriorRing(part.geom))
+                              FROM ST_Dump(p.{plot_geometry}) AS part) AS outer_rings
+                            ,(SELECT ST_Collect(ST_InteriorRingN(part.geom, n))
+                              FROM ST_Dump(p.{plot_geometry}) AS part
+                              CROSS JOIN LATERAL generate_series(1, ST_NumInteriorRings(part.geom)) AS n) AS inner_rings
+                        FROM "{schema}"."{plot_table}" AS p
+                        {plot_filter}
+                    ), intersections AS (
+                        SELECT plots.t_id AS plot_id
+                            ,b.t_id AS boundary_id
+                            ,ST_Intersection(plots.outer_rings, b.{boundary_geometry}) AS outer_intersection
+                            ,ST_Intersection(plots.inner_rings, b.{boundary_geometry}) AS inner_intersection
+                        FROM plots
+                        JOIN "{schema}"."{boundary_table}" AS b
+                            ON b.{boundary_geometry} && plots.geom
+                            AND ST_Intersects(plots.geom, b.{boundary_geometry})
+                    ), more_pairs AS (
+                        SELECT DISTINCT plot_id, boundary_id FROM intersections WHERE {is_outer_line}
+                    ), less_pairs AS (
+                        SELECT DISTINCT plot_id, boundary_id FROM intersections WHERE {is_inner_line}
+                    ), more_inserted AS (
+                        INSERT INTO "{schema}"."{more_table}" ({more_plot}, {more_boundary})
+                        SELECT plot_id, boundary_id
+                        FROM more_pairs
+                        WHERE NOT EXISTS (SELECT 1 FROM "{schema}"."{more_table}" AS existing
+                                          WHERE existing.{more_plot} = more_pairs.plot_id
+                                              AND existing.{more_boundary} = more_pairs.boundary_id)
+                        RETURNING 1
+                    ), less_inserted AS (
+                        INSERT INTO "{schema}"."{less_table}" ({less_plot}, {less_boundary})
+                        SELECT plot_id, boundary_id
+                        FROM less_pairs
+                        WHERE NOT EXISTS (SELECT 1 FROM "{schema}"."{less_table}" AS existing
+                                          WHERE existing.{less_plot} = less_pairs.plot_id
+                                              AND existing.{less_boundary} = less_pairs.boundary_id)
+                        RETURNING 1
+                    )
+                    SELECT (SELECT count(*) FROM more_inserted) AS more_inserted, (SELECT count(*) FROM more_pairs) AS more_found,
+                        (SELECT count(*) FROM less_inserted) AS less_inserted, (SELECT count(*) FROM less_pairs) AS less_found;""".format(
+            schema=self.schema, plot_table=plot_table, plot_geometry=plot_geometry,
+            boundary_table=boundary_table, boundary_geometry=boundary_geometry, plot_filter=plot_filter,
+            is_outer_line=is_line.format('outer_intersection'), is_inner_line=is_line.format('inner_intersection'),
+            more_table=MORE_BOUNDARY_FACE_STRING_TABLE, more_plot=MOREBFS_TABLE_PLOT_FIELD, more_boundary=MOREBFS_TABLE_BOUNDARY_FIELD,
+            less_table=LESS_TABLE, less_plot=LESS_TABLE_PLOT_FIELD, less_boundary=LESS_TABLE_BOUNDARY_FIELD)
+
+        res, records = self._execute_write_query(query)
+        if not res:
+            return (res, records)
+        return (True, {MORE_BOUNDARY_FACE_STRING_TABLE: (records[0]['more_inserted'], records[0]['more_found']),
+                       LESS_TABLE: (records[0]['less_inserted'], records[0]['less_found'])})
+
+    def _execute_write_query(self, *queries):
+        """
+        Run data modifying statements in a single transaction and fetch the
+        first record of each one.
+        :return: Tuple (True, list of RealDictRow) or (False, error message)
+        """
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return (res, msg)
+
+        conn = self._pool.checkout()
+        records = list()
+        try:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            for query in queries:
+                instrumentation.count('db_queries')
+                cur.execute(query)
+                records.append(cur.fetchone())
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            return (False, QCoreApplication.translate("PGConnector", "There was an error writing into the database: {}").format(e))
+        finally:
+            self._pool.checkin(conn)
+
+        return (True, records)
 
     def execute_sql_query(self, query):
         """
@@ -751,9 +1009,7 @@ class PGConnector(DBConnector):
             res, msg = self.test_connection()
             if not res:
                 return (res, msg)
-        cur = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(query)
-        return cur.fetchall()
+        return self._execute_query(query, psycopg2.extras.RealDictCursor)
 
     def execute_sql_query_dict_cursor(self, query):
         """
@@ -765,6 +1021,118 @@ class PGConnector(DBConnector):
             res, msg = self.test_connection()
             if not res:
                 return (res, msg)
-        cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cur.execute(query)
-        return cur.fetchall()
+        return self._execute_query(query)
+
+    def iter_sql_query(self, query, cursor_factory=psycopg2.extras.RealDictCursor, fetch_size=DEFAULT_FETCH_SIZE):
+        """
+        Generic function for executing SQL statements whose results might be
+        large. Uses a named (server-side) cursor, so records are transferred
+        lazily, fetch_size records per round trip.
+        :param query: SQL Statement
+        :param cursor_factory: psycopg2 cursor class, e.g., RealDictCursor or DictCursor
+        :param fetch_size: Number of records fetched per round trip
+        :return: Generator of records (RealDictRow by default). Unlike
+                 execute_sql_query, it can't return (res, msg) once records
+                 are being consumed, so it raises psycopg2.OperationalError
+                 if the connection fails, either before the first record or
+                 while streaming.
+        """
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                raise psycopg2.OperationalError(msg)
+
+        conn = self._pool.checkout()
+        discard = False
+        try:
+            cur = conn.cursor(name="asistente_ladm_col_{}".format(uuid.uuid4().hex), cursor_factory=cursor_factory)
+            cur.itersize = fetch_size
+            instrumentation.count('db_queries')
+            cur.execute(query)
+            for record in cur:
+                yield record
+            cur.close()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self._pool.checkin(conn, discard)
+
+    def copy_records(self, table_name, columns, records, chunk_size=DEFAULT_FETCH_SIZE):
+        """
+        Bulk insert records into a table of the current schema using COPY.
+        Records are sent in chunks of chunk_size, all of them in a single
+        transaction, so either all of them are inserted or none.
+        :param table_name: Name of the target table
+        :param columns: List of column names
+        :param records: Iterable of lists of values (ordered as columns),
+                        None values are inserted as NULL
+        :return: Tuple (True, number of inserted records) or (False, error message)
+        """
+        if self.conn is None:
+            res, msg = self.test_connection()
+            if not res:
+                return (res, msg)
+
+        query = 'COPY "{schema}"."{table}" ({columns}) FROM STDIN WITH (FORMAT csv)'.format(
+            schema=self.schema,
+            table=table_name,
+            columns=', '.join('"{}"'.format(column) for column in columns))
+
+        conn = self._pool.checkout()
+        count = 0
+        try:
+            cur = conn.cursor()
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for record in records:
+                writer.writerow(record)
+                count += 1
+                if count % chunk_size == 0:
+                    buffer.seek(0)
+                    instrumentation.count('db_queries')
+                    cur.copy_expert(query, buffer)
+                    buffer.seek(0)
+                    buffer.truncate()
+
+            if buffer.tell():
+                buffer.seek(0)
+                instrumentation.count('db_queries')
+                cur.copy_expert(query, buffer)
+            conn.commit()
+            instrumentation.count('db_records', count)
+        except psycopg2.Error as e:
+            conn.rollback()
+            return (False, QCoreApplication.translate("PGConnector", "There was an error copying records into '{}': {}").format(table_name, e))
+        finally:
+            self._pool.checkin(conn)
+
+        return (True, count)
+
+    def _execute_query(self, query, cursor_factory=psycopg2.extras.DictCursor):
+        """
+        Run a query on a connection checked out from the pool and fetch all
+        its records. If the connection was dropped, retry once on a new one.
+        """
+        try:
+            return self._fetch_all(query, cursor_factory)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            self.log.logMessage("Connection to the DB was lost ({}), reconnecting...".format(e), PLUGIN_NAME, Qgis.Warning)
+            self._pool.close_all() # Idle connections were probably dropped as well
+            return self._fetch_all(query, cursor_factory)
+
+    def _fetch_all(self, query, cursor_factory):
+        conn = self._pool.checkout()
+        discard = False
+        try:
+            cur = conn.cursor(cursor_factory=cursor_factory)
+            instrumentation.count('db_queries')
+            cur.execute(query)
+            records = cur.fetchall()
+            instrumentation.count('db_records', len(records))
+            return records
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self._pool.checkin(conn, discard)
@@ -16,24 +16,14 @@
  *                                                                         *
  ***************************************************************************/
 """
-import json
 import os.path
 
-from qgis.PyQt.Qt import QNetworkRequest
 from qgis.PyQt.QtCore import (QEventLoop,
-                              QUrl,
                               pyqtSignal,
                               QObject,
-                              QTextStream,
-                              QIODevice,
                               QCoreApplication,
-                              QFile,
-                              QVariant,
-                              QByteArray,
                               QSettings)
-from qgis.PyQt.QtNetwork import (QNetworkAccessManager,
-                                 QHttpMultiPart,
-                                 QHttpPart)
+from qgis.PyQt.QtNetwork import QNetworkAccessManager
 from qgis.core import (QgsProject,
                        QgsDataSourceUri,
                        Qgis,
@@ -41,8 +31,12 @@ from qgis.core import (QgsProject,
 
 from ..config.general_config import (DEFAULT_ENDPOINT_SOURCE_SERVICE,
                                      PLUGIN_NAME,
+                                     SOURCE_SERVICE_MAX_IN_FLIGHT,
+                                     SOURCE_SERVICE_RETRY_BACKOFF,
+                                     SOURCE_SERVICE_UPLOAD_RETRIES,
                                      SOURCE_SERVICE_UPLOAD_SUFFIX)
 from ..gui.upload_progress_dialog import UploadProgressDialog
+from .source_uploader import SourceUploader
 
 
 class SourceHandler(QObject):
@@ -58,6 +52,7 @@ class SourceHandler(QObject):
         QObject.__init__(self)
         self.log = QgsApplication.messageLog()
         self.qgis_utils = qgis_utils
+        self.network_manager = QNetworkAccessManager(self) # Shared by all uploads
 
     def upload_files(self, layer, field_index, features):
         """
@@ -87,85 +82,30 @@ class SourceHandler(QObject):
 
         upload_dialog = UploadProgressDialog(len(file_features), not_found)
         upload_dialog.show()
-        count = 0
-        upload_errors = 0
-        new_values = dict()
-
-        for feature in file_features:
-            data_url = feature[field_index]
-            file_name = os.path.basename(data_url)
-
-            nam = QNetworkAccessManager()
-            #reply.downloadProgress.connect(upload_dialog.update_current_progress)
-
-            multiPart = QHttpMultiPart(QHttpMultiPart.FormDataType)
-            textPart = QHttpPart()
-            textPart.setHeader(QNetworkRequest.ContentDispositionHeader, QVariant("form-data; name=\"driver\""))
-            textPart.setBody(QByteArray().append('Local'))
-
-            filePart = QHttpPart()
-            filePart.setHeader(QNetworkRequest.ContentDispositionHeader, QVariant("form-data; name=\"file\"; filename=\"{}\"".format(file_name)))
-            file = QFile(data_url)
-            file.open(QIODevice.ReadOnly)
-
-            filePart.setBodyDevice(file)
-            file.setParent(multiPart)  # we cannot delete the file now, so delete it with the multiPart
-
-            multiPart.append(filePart)
-            multiPart.append(textPart)
-
-            service_url = '/'.join([
-                QSettings().value('Asistente-LADM_COL/source/service_endpoint', DEFAULT_ENDPOINT_SOURCE_SERVICE),
-                SOURCE_SERVICE_UPLOAD_SUFFIX])
-            request = QNetworkRequest(QUrl(service_url))
-            reply = nam.post(request, multiPart)
-            #reply.uploadProgress.connect(upload_dialog.update_current_progress)
-            reply.error.connect(self.error_returned)
-            multiPart.setParent(reply)
-
-            # We'll block execution until we get response from the server
-            loop = QEventLoop()
-            reply.finished.connect(loop.quit)
+
+        service_url = '/'.join([
+            QSettings().value('Asistente-LADM_COL/source/service_endpoint', DEFAULT_ENDPOINT_SOURCE_SERVICE),
+            SOURCE_SERVICE_UPLOAD_SUFFIX])
+        uploader = SourceUploader(service_url,
+                                  int(QSettings().value('Asistente-LADM_COL/source/max_in_flight', SOURCE_SERVICE_MAX_IN_FLIGHT)),
+                                  SOURCE_SERVICE_UPLOAD_RETRIES,
+                                  SOURCE_SERVICE_RETRY_BACKOFF,
+                                  self.network_manager)
+        uploader.files_progress_changed.connect(lambda count, total: upload_dialog.update_total_progress(count))
+        uploader.bytes_progress_changed.connect(upload_dialog.update_current_progress)
+        uploader.file_failed.connect(lambda key, error: self.log.logMessage(error, PLUGIN_NAME, Qgis.Critical))
+
+        # We'll block execution until all files are processed
+        results = dict()
+        loop = QEventLoop()
+        uploader.all_finished.connect(lambda urls, errors: results.update(urls=urls, errors=errors))
+        uploader.all_finished.connect(loop.quit)
+        uploader.upload([(feature.id(), feature[field_index]) for feature in file_features])
+        if uploader.is_running():
             loop.exec_()
 
-            response = reply.readAll()
-            data = QTextStream(response, QIODevice.ReadOnly)
-            content = data.readAll()
-
-            if content is None:
-                self.log.logMessage("There was an error uploading file '{}'".format(data_url), PLUGIN_NAME, Qgis.Critical)
-                upload_errors += 1
-                continue
-
-            try:
-                response = json.loads(content)
-            except json.decoder.JSONDecodeError:
-                self.log.logMessage("Couldn't parse JSON response from server for file '{}'!!!".format(data_url), PLUGIN_NAME, Qgis.Critical)
-                upload_errors += 1
-                continue
-
-            if 'error' in response:
-                self.log.logMessage("STATUS: {}. ERROR: {} MESSAGE: {} FILE: {}".format(
-                        response['status'],
-                        response['error'],
-                        response['message'],
-                        data_url),
-                    PLUGIN_NAME, Qgis.Critical)
-                upload_errors += 1
-                continue
-
-            reply.deleteLater()
-
-            if 'url' not in response:
-                self.log.logMessage("'url' attribute not found in JSON response for file '{}'!".format(data_url), PLUGIN_NAME, Qgis.Critical)
-                upload_errors += 1
-                continue
-
-            url = self.get_file_url(response['url'])
-            new_values[feature.id()] = {field_index : url}
-
-            count += 1
-            upload_dialog.update_total_progress(count)
+        upload_errors = len(results['errors'])
+        new_values = {feature_id: {field_index: self.get_file_url(url)} for feature_id, url in results['urls'].items()}
 
         if not_found > 0:
             self.message_with_duration_emitted.emit(
@@ -201,9 +141,6 @@ class SourceHandler(QObject):
 
         return new_values
 
-    def error_returned(self, error_code):
-        self.log.logMessage("Qt network error code: {}".format(error_code), PLUGIN_NAME, Qgis.Critical)
-
     def handle_source_upload(self, layer, field_name):
         field_index = layer.fields().indexFromName(field_name)
 
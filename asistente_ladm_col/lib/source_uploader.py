@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import functools
+import json
+import os.path
+from collections import deque
+
+from qgis.PyQt.QtCore import (QUrl,
+                              pyqtSignal,
+                              QObject,
+                              QTextStream,
+                              QIODevice,
+                              QCoreApplication,
+                              QFile,
+                              QTimer,
+                              QVariant,
+                              QByteArray)
+from qgis.PyQt.QtNetwork import (QNetworkAccessManager,
+                                 QNetworkReply,
+                                 QNetworkRequest,
+                                 QHttpMultiPart,
+                                 QHttpPart)
+
+
+class SourceUploader(QObject):
+    """
+    Upload files to the source service concurrently. All requests share a
+    single QNetworkAccessManager and at most `max_in_flight` of them are
+    active at a time (note Qt opens at most 6 connections per host anyway).
+    Requests failing because of network errors or 5xx responses are retried
+    up to `retries` times, waiting `backoff` seconds before the first retry
+    and doubling the wait for each subsequent one.
+
+    Files are given as a list of (key, file_path) tuples. Once all of them
+    are processed, all_finished is emitted with two dicts: {key: url} for
+    uploaded files and {key: error message} for the rest.
+    """
+    file_uploaded = pyqtSignal(object, str) # key, url returned by the server
+    file_failed = pyqtSignal(object, str) # key, error message
+    files_progress_changed = pyqtSignal(int, int) # processed files, total files
+    bytes_progress_changed = pyqtSignal(int, int) # bytes sent, total bytes
+    all_finished = pyqtSignal(dict, dict) # {key: url}, {key: error message}
+
+    def __init__(self, service_url, max_in_flight=4, retries=2, backoff=1.0, network_manager=None):
+        QObject.__init__(self)
+        self.service_url = service_url
+        self.max_in_flight = max(1, max_in_flight)
+        self.retries = retries
+        self.backoff = backoff
+        self.network_manager = network_manager or QNetworkAccessManager(self)
+        self.max_running = 0 # Peak of simultaneous requests, for diagnostics
+
+        self._queue = deque()
+        self._in_flight = dict() # {key: reply}
+        self._waiting_retry = 0
+        self._attempts = dict()
+        self._bytes_sent = dict()
+        self._total_bytes = 0
+        self._total_files = 0
+        self._urls = dict()
+        self._errors = dict()
+
+    def is_running(self):
+        return bool(self._queue or self._in_flight or self._waiting_retry)
+
+    def upload(self, files):
+        self._queue = deque(files)
+        self._total_files = len(self._queue)
+        self._attempts = {key: 0 for key, file_path in files}
+        self._bytes_sent = {key: 0 for key, file_path in files}
+        self._total_bytes = sum(os.path.getsize(file_path) for key, file_path in files)
+        self._urls = dict()
+        self._errors = dict()
+        self.max_running = 0
+
+        if not self._queue:
+            self.all_finished.emit(self._urls, self._errors)
+            return
+
+        self._start_next_uploads()
+
+    def _start_next_uploads(self):
+        while self._queue and len(self._in_flight) < self.max_in_flight:
+            key, file_path = self._queue.popleft()
+            self._post(key, file_path)
+
+        self.max_running = max(self.max_running, len(self._in_flight))
+
+    def _post(self, key, file_path):
+        self._attempts[key] += 1
+        self._bytes_sent[key] = 0
+
+        multi_part = QHttpMultiPart(QHttpMultiPart.FormDataType)
+        text_part = QHttpPart()
+        text_part.setHeader(QNetworkRequest.ContentDispositionHeader, QVariant("form-data; name=\"driver\""))
+        text_part.setBody(QByteArray().append('Local'))
+
+        file_part = QHttpPart()
+        file_part.setHeader(QNetworkRequest.ContentDispositionHeader, QVariant("form-data; name=\"file\"; filename=\"{}\"".format(os.path.basename(file_path))))
+        file = QFile(file_path)
+        file.open(QIODevice.ReadOnly)
+        file_part.setBodyDevice(file)
+        file.setParent(multi_part) # we cannot delete the file now, so delete it with the multi_part
+
+        multi_part.append(file_part)
+        multi_part.append(text_part)
+
+        reply = self.network_manager.post(QNetworkRequest(QUrl(self.service_url)), multi_part)
+        multi_part.setParent(reply)
+        reply.uploadProgress.connect(functools.partial(self._upload_progress, key))
+        reply.finished.connect(functools.partial(self._reply_finished, key, file_path, reply))
+        self._in_flight[key] = reply
+
+    def _upload_progress(self, key, bytes_sent, bytes_total):
+        self._bytes_sent[key] = bytes_sent
+        self.bytes_progress_changed.emit(sum(self._bytes_sent.values()), self._total_bytes)
+
+    def _reply_finished(self, key, file_path, reply):
+        del self._in_flight[key]
+        reply.deleteLater()
+
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        network_error = reply.error() != QNetworkReply.NoError
+        if (network_error or (status or 0) >= 500) and self._attempts[key] <= self.retries:
+            self._retry_later(key, file_path)
+        else:
+            url, error = self.parse_response(reply, file_path)
+            if url is None:
+                self._errors[key] = error
+                self.file_failed.emit(key, error)
+            else:
+                self._urls[key] = url
+                self.file_uploaded.emit(key, url)
+
+            self._bytes_sent[key] = os.path.getsize(file_path)
+            self.files_progress_changed.emit(len(self._urls) + len(self._errors), self._total_files)
+
+        self._start_next_uploads()
+
+        if not self.is_running():
+            self.all_finished.emit(self._urls, self._errors)
+
+    def _retry_later(self, key, file_path):
+        self._waiting_retry += 1
+        delay = self.backoff * 2 ** (self._attempts[key] - 1)
+        QTimer.singleShot(int(delay * 1000), functools.partial(self._retry, key, file_path))
+
+    def _retry(self, key, file_path):
+        self._waiting_retry -= 1
+        self._queue.append((key, file_path))
+        self._start_next_uploads()
+
+    @staticmethod
+    def parse_response(reply, file_path):
+        """
+        :return: Tuple (url or None, error message or None)
+        """
+        if reply.error() != QNetworkReply.NoError and reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) is None:
+            return (None, QCoreApplication.translate("SourceUploader", "There was an error uploading file '{}': {}").format(file_path, reply.errorString()))
+
+        content = QTextStream(reply.readAll(), QIODevice.ReadOnly).readAll()
+        if content is None:
+            return (None, QCoreApplication.translate("SourceUploader", "There was an error uploading file '{}'").format(file_path))
+
+        try:
+            response = json.loads(content)
+        except json.decoder.JSONDecodeError:
+            return (None, QCoreApplication.translate("SourceUploader", "Couldn't parse JSON response from server for file '{}'!!!").format(file_path))
+
+        if 'error' in response:
+            return (None, "STATUS: {}. ERROR: {} MESSAGE: {} FILE: {}".format(
+                response.get('status'),
+                response.get('error'),
+                response.get('message'),
+                file_path))
+
+        if 'url' not in response:
+            return (None, QCoreApplication.translate("SourceUploader", "'url' attribute not found in JSON response for file '{}'!").format(file_path))
+
+        return (response['url'], None)
@@ -0,0 +1,436 @@
+"""
+Benchmark harness for GeometryUtils, QualityUtils and the topology fillers.
+
+Each benchmark runs on a synthetic dataset (see synthetic_data.py), and its
+time and memory are stored as JSON, so that runs can be compared, e.g.:
+
+    python3 -m asistente_ladm_col.tests.benchmark --size 100 --output after.json --compare before.json
+
+Benchmarks that need the test PostgreSQL server (see tests/utils.py), like
+--copy-csv or --overlapping-polygons, only run when asked for.
+"""
+import argparse
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from qgis.core import (Qgis,
+                       QgsField,
+                       QgsGeometry,
+                       QgsVectorLayer)
+from qgis.PyQt.QtCore import QVariant
+from qgis.testing import start_app
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.general_config import (DEFAULT_EPSG,
+                                                      PLUGIN_VERSION)
+from asistente_ladm_col.config.table_mapping_config import (BFS_TABLE_BOUNDARY_POINT_FIELD,
+                                                            BOUNDARY_POINT_TABLE,
+                                                            BOUNDARY_TABLE,
+                                                            BUILDING_TABLE,
+                                                            ID_FIELD,
+                                                            LESS_TABLE,
+                                                            LESS_TABLE_BOUNDARY_FIELD,
+                                                            LESS_TABLE_PLOT_FIELD,
+                                                            MORE_BOUNDARY_FACE_STRING_TABLE,
+                                                            MOREBFS_TABLE_BOUNDARY_FIELD,
+                                                            MOREBFS_TABLE_PLOT_FIELD,
+                                                            PLOT_TABLE,
+                                                            POINT_BFS_TABLE_BOUNDARY_FIELD,
+                                                            POINT_BOUNDARY_FACE_STRING_TABLE,
+                                                            RIGHT_OF_WAY_TABLE)
+from asistente_ladm_col.tests.synthetic_data import (ERROR_KINDS,
+                                                     add_features,
+                                                     generate_dataset,
+                                                     get_layer,
+                                                     get_node)
+from asistente_ladm_col.tests.utils import (clean_table,
+                                            create_overlapping_polygons_table,
+                                            drop_table,
+                                            get_dbconn,
+                                            get_max_rss,
+                                            get_rss,
+                                            import_projectgenerator,
+                                            restore_schema)
+from asistente_ladm_col.utils.geometry import GeometryUtils
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.utils.quality import QualityUtils
+
+import_projectgenerator()
+
+REGRESSION_THRESHOLD = 1.2 # Slowdown ratio reported as a regression
+SCALING_VERTEX_COUNTS = [10000, 100000, 1000000] # Boundary vertices of each scaling run
+DB_SCHEMA = 'test_ladm_col' # Schema of the test DB (see tests/utils.py) used by DB benchmarks
+COPY_CSV_POINT_COUNT = 1000000 # CSV points copied to the DB by the COPY and provider paths
+OVERLAPPING_POLYGONS_COUNT = 100000 # Polygons checked for overlaps by the Python and PostGIS engines
+
+
+def get_error_layer(geometry_type, fields):
+    """
+    :param fields: List of (name, QVariant type), as in the check_* methods
+    """
+    layer = QgsVectorLayer("{}?crs=EPSG:3116".format(geometry_type), "errors", "memory")
+    layer.dataProvider().addAttributes([QgsField(name, field_type) for name, field_type in fields])
+    layer.updateFields()
+    return layer
+
+
+def get_benchmarks(layers, qgis_utils, quality):
+    """
+    Benchmarks in running order, since checks read the topology tables
+    filled by the first ones.
+
+    :return: List of (name, function returning the number of results)
+    """
+    geometry = qgis_utils.geometry
+
+    def fill_pointbfs():
+        id_pairs = geometry.get_pair_boundary_boundary_point(layers[BOUNDARY_TABLE], layers[BOUNDARY_POINT_TABLE], use_selection=False)
+        return qgis_utils.add_topology_pairs(layers[POINT_BOUNDARY_FACE_STRING_TABLE], POINT_BFS_TABLE_BOUNDARY_FIELD,
+                                             BFS_TABLE_BOUNDARY_POINT_FIELD, id_pairs)
+
+    def fill_morebfs_less():
+        more_pairs, less_pairs = geometry.get_pair_boundary_plot(layers[BOUNDARY_TABLE], layers[PLOT_TABLE], use_selection=False)
+        return qgis_utils.add_topology_pairs(layers[MORE_BOUNDARY_FACE_STRING_TABLE], MOREBFS_TABLE_PLOT_FIELD,
+                                             MOREBFS_TABLE_BOUNDARY_FIELD, more_pairs) + \
+               qgis_utils.add_topology_pairs(layers[LESS_TABLE], LESS_TABLE_PLOT_FIELD, LESS_TABLE_BOUNDARY_FIELD, less_pairs)
+
+    def boundary_points_covered_by_boundary_nodes():
+        error_layer = get_error_layer("Point", [('boundary_point_id', QVariant.Int), ('boundary_id', QVariant.Int), ('error_type', QVariant.String)])
+        return len(quality.get_boundary_points_features_not_covered_by_boundary_nodes(
+            layers[BOUNDARY_POINT_TABLE], layers[BOUNDARY_TABLE], layers[POINT_BOUNDARY_FACE_STRING_TABLE], error_layer))
+
+    def plots_covered_by_boundaries():
+        error_layer = get_error_layer("MultiLineString", [('plot_id', QVariant.Int), ('boundary_id', QVariant.Int), ('error_type', QVariant.String)])
+        return len(quality.get_plot_features_not_covered_by_boundaries(
+            layers[PLOT_TABLE], layers[BOUNDARY_TABLE], layers[MORE_BOUNDARY_FACE_STRING_TABLE], layers[LESS_TABLE], error_layer))
+
+    def boundaries_covered_by_plots():
+        error_layer = get_error_layer("MultiLineString", [('plot_id', QVariant.Int), ('boundary_id', QVariant.Int), ('error_type', QVariant.String)])
+        return len(quality.get_boundary_features_not_covered_by_plots(
+            layers[PLOT_TABLE], layers[BOUNDARY_TABLE], layers[MORE_BOUNDARY_FACE_STRING_TABLE], layers[LESS_TABLE], error_layer))
+
+    def overlapping_polygons(table):
+        error_layer = get_error_layer("Polygon", [('polygon_id', QVariant.Int), ('overlapping_ids', QVariant.String), ('count_parts', QVariant.Int)])
+        return lambda: len(quality.get_overlapping_polygons_features(layers[table], error_layer))
+
+    def overlapping_boundary_points():
+        error_layer = get_error_layer("Point", [('point_count', QVariant.Int), ('intersecting_ids', QVariant.String)])
+        return len(list(quality.iter_overlapping_points_features(layers[BOUNDARY_POINT_TABLE], error_layer)))
+
+    def right_of_way_overlaps_buildings():
+        ids, overlapping_polygons = geometry.get_inner_intersections_between_polygons(layers[RIGHT_OF_WAY_TABLE], layers[BUILDING_TABLE])
+        return len(ids)
+
+    return [
+        ('fill_topology_table_pointbfs', fill_pointbfs),
+        ('fill_topology_tables_morebfs_less', fill_morebfs_less),
+        ('check_boundary_points_covered_by_boundary_nodes', boundary_points_covered_by_boundary_nodes),
+        ('check_plots_covered_by_boundaries', plots_covered_by_boundaries),
+        ('check_boundaries_covered_by_plots', boundaries_covered_by_plots),
+        ('check_overlapping_plots', overlapping_polygons(PLOT_TABLE)),
+        ('check_overlapping_buildings', overlapping_polygons(BUILDING_TABLE)),
+        ('check_overlaps_in_boundary_points', overlapping_boundary_points),
+        ('check_right_of_way_overlaps_buildings', right_of_way_overlaps_buildings),
+        ('check_gaps_in_plots', lambda: len(geometry.get_gaps_in_polygon_layer_by_tiles(layers[PLOT_TABLE], False) or list())),
+        ('check_dangles_in_boundaries', lambda: len(quality.get_dangle_ids(layers[BOUNDARY_TABLE])[1])),
+        ('fix_boundaries', lambda: len(geometry.fix_boundaries(layers[BOUNDARY_TABLE])[0]))
+    ]
+
+
+def measure(name, function, trace_memory=True):
+    """
+    Resident memory is reported as deltas over the benchmark: rss_growth_mb
+    is the memory still held after it, and max_rss_increase_mb is how much it
+    raised the peak of the process. The latter is 0 if the benchmark stayed
+    under the peak of an earlier one, so it's a lower bound of its own peak.
+
+    :return: Dict with the time, memory and number of results of a benchmark
+    """
+    gc.collect()
+    start_rss = get_rss()
+    start_max_rss = get_max_rss()
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    count = function()
+    seconds = time.perf_counter() - start
+
+    python_peak = None
+    if trace_memory:
+        python_peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    end_rss = get_rss()
+    end_max_rss = get_max_rss()
+    return {'name': name,
+            'seconds': round(seconds, 4),
+            'count': count,
+            'python_peak_memory_mb': round(python_peak, 2) if python_peak is not None else None,
+            'rss_growth_mb': round(end_rss - start_rss, 2) if start_rss is not None else None,
+            'max_rss_increase_mb': round(end_max_rss - start_max_rss, 2) if start_max_rss is not None else None}
+
+
+def get_boundary_layers(vertex_count):
+    """
+    Grid of 2-vertex boundaries with a boundary point on every node, built
+    without the other tables so that large grids remain cheap.
+
+    :return: Tuple (boundary layer, boundary point layer)
+    """
+    size = max(1, round(math.sqrt(vertex_count / 4))) # 2 * size * (size + 1) boundaries
+    boundaries = list()
+    for line in range(size + 1):
+        for cell in range(size):
+            boundaries.append((len(boundaries) + 1, QgsGeometry.fromPolylineXY([get_node(line, cell), get_node(line, cell + 1)])))
+            boundaries.append((len(boundaries) + 1, QgsGeometry.fromPolylineXY([get_node(cell, line), get_node(cell + 1, line)])))
+    boundary_points = [(row * (size + 1) + column + 1, QgsGeometry.fromPointXY(get_node(row, column)))
+                       for row in range(size + 1) for column in range(size + 1)]
+
+    boundary_layer = get_layer("LineString", BOUNDARY_TABLE, [ID_FIELD])
+    boundary_point_layer = get_layer("Point", BOUNDARY_POINT_TABLE, [ID_FIELD])
+    add_features(boundary_layer, boundaries)
+    add_features(boundary_point_layer, boundary_points)
+    return (boundary_layer, boundary_point_layer)
+
+
+def run_scaling_benchmark(vertex_counts=SCALING_VERTEX_COUNTS, trace_memory=False):
+    """
+    Time get_pair_boundary_boundary_point() for increasing numbers of
+    boundary vertices. Scaling is linear if microseconds_per_vertex stays
+    about the same, which scaling_factor (the ratio to the smallest run)
+    makes explicit.
+
+    :return: List of dicts, one per vertex count
+    """
+    geometry = GeometryUtils()
+    results = list()
+    for vertex_count in vertex_counts:
+        boundary_layer, boundary_point_layer = get_boundary_layers(vertex_count)
+        result = measure('get_pair_boundary_boundary_point',
+                         lambda: len(geometry.get_pair_boundary_boundary_point(boundary_layer, boundary_point_layer, use_selection=False)),
+                         trace_memory)
+        result['vertices'] = 2 * boundary_layer.featureCount()
+        result['microseconds_per_vertex'] = round(result['seconds'] / result['vertices'] * 1000000, 4)
+        result['scaling_factor'] = round(result['microseconds_per_vertex'] / results[0]['microseconds_per_vertex'], 3) \
+            if results and results[0]['microseconds_per_vertex'] else 1.0
+        results.append(result)
+        print("INFO: {vertices} vertices: {seconds:.3f}s, {microseconds_per_vertex} us per vertex (x{scaling_factor})".format(**result))
+        del boundary_layer, boundary_point_layer
+    return results
+
+
+def run_copy_csv_benchmark(point_count=COPY_CSV_POINT_COUNT, trace_memory=False):
+    """
+    Copy CSV points to the boundary point table of the test DB with COPY and
+    with the QGIS provider. Needs the test PostgreSQL server.
+
+    :return: List of dicts, one per path
+    """
+    restore_schema(DB_SCHEMA)
+    db = get_dbconn(DB_SCHEMA)
+    res, msg = db.test_connection()
+    if not res:
+        raise ConnectionError(msg)
+
+    qgis_utils = QGISUtils()
+    temp_dir = tempfile.mkdtemp()
+    csv_path = os.path.join(temp_dir, 'benchmark_points.csv')
+    with open(csv_path, 'w') as csv_file:
+        csv_file.write('x;y\n')
+        for i in range(point_count):
+            csv_file.write('{};{}\n'.format(963000 + (i % 1000) * 0.5, 1077000 + (i // 1000) * 0.5))
+
+    def copy(copy_function):
+        if not copy_function(csv_path, ';', 'x', 'y', db, DEFAULT_EPSG, BOUNDARY_POINT_TABLE):
+            return 0
+        res, records = db.execute_sql_query('SELECT count(*) AS count FROM "{}"."{}";'.format(DB_SCHEMA, BOUNDARY_POINT_TABLE))
+        return records[0]['count'] if res else 0
+
+    results = list()
+    try:
+        for name, copy_function in [('copy_csv_to_pg', qgis_utils.copy_csv_to_pg),
+                                    ('copy_csv_with_provider', qgis_utils.copy_csv_with_provider)]:
+            clean_table(DB_SCHEMA, BOUNDARY_POINT_TABLE)
+            qgis_utils.disable_automatic_fields(db, BOUNDARY_POINT_TABLE)
+            results.append(measure(name, lambda: copy(copy_function), trace_memory))
+            print("INFO: {name}: {count} points in {seconds:.3f}s".format(**results[-1]))
+    finally:
+        clean_table(DB_SCHEMA, BOUNDARY_POINT_TABLE)
+        db.close_connection()
+        shutil.rmtree(temp_dir, True)
+
+    return results
+
+
+def run_overlapping_polygons_benchmark(polygon_count=OVERLAPPING_POLYGONS_COUNT, trace_memory=False):
+    """
+    Find overlapping polygons of a synthetic table in the test DB with
+    GeometryUtils and with PostGIS. Needs the test PostgreSQL server.
+
+    :return: List of dicts, one per engine
+    """
+    restore_schema(DB_SCHEMA)
+    db = get_dbconn(DB_SCHEMA)
+    res, msg = db.test_connection()
+    if not res:
+        raise ConnectionError(msg)
+
+    table_name = 'benchmark_overlap_plots'
+    create_overlapping_polygons_table(db, table_name, polygon_count)
+    pairs = dict()
+
+    def python_pairs():
+        db.clear_tables_info_cache()
+        res, uri = db.get_uri_for_layer(table_name)
+        if not res:
+            raise ConnectionError(uri)
+        layer = QgsVectorLayer(uri, table_name, 'postgres')
+        pairs['python'] = {tuple(pair) for pair in GeometryUtils().get_overlapping_polygons(layer)} # Feature ids are t_ids
+        return len(pairs['python'])
+
+    def postgis_pairs():
+        pairs['postgis'] = {(record['polygon_id'], record['overlapping_id'])
+                            for record in db.get_overlapping_polygons(table_name, 'poligono_creado')}
+        return len(pairs['postgis'])
+
+    results = list()
+    try:
+        for name, function in [('overlapping_polygons_python', python_pairs),
+                               ('overlapping_polygons_postgis', postgis_pairs)]:
+            results.append(measure(name, function, trace_memory))
+            results[-1]['polygons'] = polygon_count
+            print("INFO: {name}: {count} overlaps among {polygons} polygons in {seconds:.3f}s".format(**results[-1]))
+        if pairs['python'] != pairs['postgis']:
+            print("WARNING: Python and PostGIS engines found different overlaps")
+    finally:
+        drop_table(db, table_name)
+        db.close_connection()
+
+    return results
+
+
+def run_benchmarks(size, errors=None, seed=0, names=None, trace_memory=True, output_path=None, scaling_vertex_counts=None,
+                   copy_csv_point_count=None, overlapping_polygons_count=None):
+    """
+    :param errors: Dict {error kind: number of errors} to inject
+    :param names: Benchmarks to run, all of them if None
+    :param scaling_vertex_counts: Vertex counts to run the scaling benchmark
+                                  for, e.g., SCALING_VERTEX_COUNTS. Not run if None.
+    :param copy_csv_point_count: CSV points to copy to the test DB, e.g.,
+                                 COPY_CSV_POINT_COUNT. Not run if None.
+    :param overlapping_polygons_count: Polygons to check for overlaps in the
+                                       test DB, e.g., OVERLAPPING_POLYGONS_COUNT.
+                                       Not run if None.
+    :param output_path: JSON file where results are written
+    :return: Dict with the environment, the dataset and the results
+    """
+    start = time.perf_counter()
+    layers, injected = generate_dataset(size, errors, seed)
+    generation_seconds = time.perf_counter() - start
+
+    qgis_utils = QGISUtils()
+    quality = QualityUtils(qgis_utils)
+
+    results = list()
+    for name, function in get_benchmarks(layers, qgis_utils, quality):
+        if names is None or name in names:
+            results.append(measure(name, function, trace_memory))
+            print("INFO: {name}: {seconds:.3f}s, {count} results".format(**results[-1]))
+
+    report = {
+        'created': datetime.datetime.now().isoformat(),
+        'environment': {'qgis_version': Qgis.QGIS_VERSION,
+                        'plugin_version': PLUGIN_VERSION,
+                        'python_version': platform.python_version(),
+                        'platform': platform.platform(),
+                        'trace_memory': trace_memory},
+        'dataset': {'size': size,
+                    'seed': seed,
+                    'errors': errors or dict(),
+                    'generation_seconds': round(generation_seconds, 4),
+                    'features': {name: layer.featureCount() for name, layer in layers.items()}},
+        'results': results
+    }
+    if scaling_vertex_counts:
+        report['scaling'] = run_scaling_benchmark(scaling_vertex_counts, trace_memory)
+    if copy_csv_point_count:
+        report['copy_csv'] = run_copy_csv_benchmark(copy_csv_point_count, trace_memory)
+    if overlapping_polygons_count:
+        report['overlapping_polygons'] = run_overlapping_polygons_benchmark(overlapping_polygons_count, trace_memory)
+
+    max_rss = get_max_rss()
+    report['process_max_rss_mb'] = round(max_rss, 2) if max_rss is not None else None # Whole run, not per benchmark
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    return report
+
+
+def compare_results(previous, current, threshold=REGRESSION_THRESHOLD):
+    """
+    :param previous: Report of a previous run (dict as run_benchmarks() returns it)
+    :param current: Report of the current run
+    :return: List of dicts with the time ratio of each benchmark run in both
+    """
+    previous_results = {result['name']: result for result in previous['results']}
+    comparison = list()
+    for result in current['results']:
+        previous_result = previous_results.get(result['name'])
+        if previous_result is None:
+            continue
+
+        ratio = result['seconds'] / previous_result['seconds'] if previous_result['seconds'] else None
+        comparison.append({'name': result['name'],
+                           'previous_seconds': previous_result['seconds'],
+                           'current_seconds': result['seconds'],
+                           'ratio': round(ratio, 3) if ratio is not None else None,
+                           'regression': ratio is not None and ratio > threshold})
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LADM_COL checks on a synthetic dataset.")
+    parser.add_argument('--size', type=int, default=50, help="Plots per side of the tessellation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--errors', nargs='*', default=list(), metavar='KIND=COUNT',
+                        help="Errors to inject, kinds: {}".format(", ".join(sorted(ERROR_KINDS))))
+    parser.add_argument('--only', nargs='*', help="Benchmarks to run")
+    parser.add_argument('--no-memory', action='store_true', help="Don't trace Python memory, which slows down benchmarks")
+    parser.add_argument('--scaling', nargs='*', type=int, metavar='VERTICES',
+                        help="Run the scaling benchmark of boundary/boundary point pairing, by default for {} vertices".format(SCALING_VERTEX_COUNTS))
+    parser.add_argument('--copy-csv', nargs='?', type=int, const=COPY_CSV_POINT_COUNT, metavar='POINTS',
+                        help="Copy CSV points to the test DB with COPY and with the provider, by default {} points".format(COPY_CSV_POINT_COUNT))
+    parser.add_argument('--overlapping-polygons', nargs='?', type=int, const=OVERLAPPING_POLYGONS_COUNT, metavar='POLYGONS',
+                        help="Find overlapping polygons in the test DB with Python and with PostGIS, by default {} polygons".format(OVERLAPPING_POLYGONS_COUNT))
+    parser.add_argument('--output', help="JSON file to write results to")
+    parser.add_argument('--compare', help="JSON file of a previous run to compare with")
+    args = parser.parse_args()
+
+    errors = {kind: int(count) for kind, count in (item.split('=') for item in args.errors)}
+    scaling_vertex_counts = None
+    if args.scaling is not None:
+        scaling_vertex_counts = args.scaling or SCALING_VERTEX_COUNTS
+    report = run_benchmarks(args.size, errors, args.seed, args.only, not args.no_memory, args.output, scaling_vertex_counts,
+                            args.copy_csv, args.overlapping_polygons)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        for item in compare_results(previous, report):
+            print("{}{}: {:.3f}s -> {:.3f}s (x{})".format('REGRESSION ' if item['regression'] else '', item['name'],
+                                                         item['previous_seconds'], item['current_seconds'], item['ratio']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Synthetic LADM_COL datasets to test and benchmark checks at realistic scale.
+
+A dataset is a tessellation of square plots whose sides are boundaries,
+with boundary points on every grid node, a building inside each plot and
+rights of way along some grid lines. Errors can be injected in controlled
+amounts, and the ids of the features involved are returned, so that checks
+can be validated against them.
+"""
+import random
+
+from qgis.core import (QgsFeature,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsRectangle,
+                       QgsVectorLayer)
+
+from asistente_ladm_col.config.table_mapping_config import (BFS_TABLE_BOUNDARY_POINT_FIELD,
+                                                            BOUNDARY_POINT_TABLE,
+                                                            BOUNDARY_TABLE,
+                                                            BUILDING_TABLE,
+                                                            ID_FIELD,
+                                                            LESS_TABLE,
+                                                            LESS_TABLE_BOUNDARY_FIELD,
+                                                            LESS_TABLE_PLOT_FIELD,
+                                                            MORE_BOUNDARY_FACE_STRING_TABLE,
+                                                            MOREBFS_TABLE_BOUNDARY_FIELD,
+                                                            MOREBFS_TABLE_PLOT_FIELD,
+                                                            PLOT_TABLE,
+                                                            POINT_BFS_TABLE_BOUNDARY_FIELD,
+                                                            POINT_BOUNDARY_FACE_STRING_TABLE,
+                                                            RIGHT_OF_WAY_TABLE)
+
+CELL_SIZE = 100 # meters, side of each plot
+ORIGIN = (1000000, 1000000) # EPSG:3116
+RIGHT_OF_WAY_SPACING = 10 # Plots between rights of way
+RIGHT_OF_WAY_WIDTH = 6 # meters
+
+# Error kinds that can be injected and what they do
+ERROR_KINDS = {
+    'overlapping_plots': "plots stretched over their right neighbour",
+    'gaps': "plots removed, leaving their boundaries",
+    'missing_boundary_points': "boundary points removed",
+    'overlapping_boundary_points': "boundary points duplicated",
+    'overlapping_buildings': "buildings duplicated with an offset",
+    'right_of_way_overlaps_buildings': "buildings stretched over a right of way"
+}
+
+
+def get_layer(geometry_type, name, fields):
+    """
+    :param fields: List of integer field names
+    """
+    uri = "{}?crs=EPSG:3116{}".format(geometry_type, "".join("&field={}:integer".format(field) for field in fields))
+    return QgsVectorLayer(uri, name, "memory")
+
+
+def get_node(row, column):
+    return QgsPointXY(ORIGIN[0] + column * CELL_SIZE, ORIGIN[1] + row * CELL_SIZE)
+
+
+def get_cell_rect(row, column, margin=0, stretch=0):
+    return QgsRectangle(ORIGIN[0] + column * CELL_SIZE + margin,
+                        ORIGIN[1] + row * CELL_SIZE + margin,
+                        ORIGIN[0] + (column + 1) * CELL_SIZE - margin + stretch,
+                        ORIGIN[1] + (row + 1) * CELL_SIZE - margin)
+
+
+def add_features(layer, records):
+    """
+    :param records: List of (t_id, geometry)
+    """
+    features = list()
+    for t_id, geometry in records:
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([t_id])
+        feature.setGeometry(geometry)
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+
+
+def generate_dataset(size, errors=None, seed=0):
+    """
+    :param size: Plots per side of the tessellation, i.e., size x size plots
+    :param errors: Dict {error kind (see ERROR_KINDS): number of errors}
+    :param seed: Seed of the selection of features where errors are injected
+    :return: Tuple (layers, injected), where layers is a dict {table name:
+             memory layer}, including empty topology tables, and injected is
+             a dict {error kind: list of t_ids of the features involved}
+    """
+    errors = errors or dict()
+    unknown_kinds = set(errors) - set(ERROR_KINDS)
+    if unknown_kinds:
+        raise ValueError("Unknown error kinds: {}".format(", ".join(sorted(unknown_kinds))))
+
+    rng = random.Random(seed)
+    injected = {kind: list() for kind in errors}
+
+    # Inner cells only, so that gaps are surrounded by plots and stretched
+    # plots have a right neighbour. Columns of stretched plots and gaps
+    # differ so that a stretched plot never ends over a gap, and gaps are
+    # never adjacent, so that each one is found as a separate gap.
+    overlapping_cells = set(rng.sample([(row, column) for row in range(1, size - 1) for column in range(1, size - 1)
+                                        if column % 3 == 1], errors.get('overlapping_plots', 0)))
+    gap_cells = set(rng.sample([(row, column) for row in range(1, size - 1) for column in range(1, size - 1)
+                                if column % 3 == 0 and row % 2 == 1], errors.get('gaps', 0)))
+
+    plots = list()
+    buildings = list()
+    for row in range(size):
+        for column in range(size):
+            t_id = row * size + column + 1
+            if (row, column) in gap_cells:
+                injected['gaps'].append(t_id)
+            else:
+                stretch = CELL_SIZE / 10 if (row, column) in overlapping_cells else 0
+                if stretch:
+                    injected['overlapping_plots'].append(t_id)
+                plots.append((t_id, QgsGeometry.fromRect(get_cell_rect(row, column, stretch=stretch))))
+            buildings.append((t_id, get_cell_rect(row, column, margin=CELL_SIZE / 5)))
+
+    for t_id in rng.sample([t_id for t_id, rect in buildings], errors.get('overlapping_buildings', 0)):
+        rect = buildings[t_id - 1][1]
+        buildings.append((len(buildings) + 1, QgsRectangle(rect.xMinimum() + 5, rect.yMinimum() + 5,
+                                                           rect.xMaximum() + 5, rect.yMaximum() + 5)))
+        injected['overlapping_buildings'].append(t_id)
+
+    # Rights of way run along every RIGHT_OF_WAY_SPACING-th vertical grid
+    # line, so buildings next to them can be stretched over them
+    rights_of_way = list()
+    right_of_way_columns = list(range(RIGHT_OF_WAY_SPACING, size, RIGHT_OF_WAY_SPACING))
+    for i, column in enumerate(right_of_way_columns):
+        x = ORIGIN[0] + column * CELL_SIZE
+        rights_of_way.append((i + 1, QgsGeometry.fromRect(QgsRectangle(x - RIGHT_OF_WAY_WIDTH / 2, ORIGIN[1],
+                                                                       x + RIGHT_OF_WAY_WIDTH / 2, ORIGIN[1] + size * CELL_SIZE))))
+
+    candidates = [row * size + column for row in range(size) for column in right_of_way_columns]
+    for t_id in rng.sample(candidates, errors.get('right_of_way_overlaps_buildings', 0)):
+        rect = buildings[t_id - 1][1] # Building to the left of the right of way
+        buildings[t_id - 1] = (t_id, QgsRectangle(rect.xMinimum(), rect.yMinimum(),
+                                                  rect.xMaximum() + CELL_SIZE / 5 + RIGHT_OF_WAY_WIDTH, rect.yMaximum()))
+        injected['right_of_way_overlaps_buildings'].append(t_id)
+
+    # One boundary per cell side
+    boundaries = list()
+    for line in range(size + 1):
+        for cell in range(size):
+            boundaries.append((len(boundaries) + 1, QgsGeometry.fromPolylineXY([get_node(line, cell), get_node(line, cell + 1)])))
+            boundaries.append((len(boundaries) + 1, QgsGeometry.fromPolylineXY([get_node(cell, line), get_node(cell + 1, line)])))
+
+    boundary_points = [(row * (size + 1) + column + 1, QgsGeometry.fromPointXY(get_node(row, column)))
+                       for row in range(size + 1) for column in range(size + 1)]
+    missing = set(rng.sample([t_id for t_id, geometry in boundary_points], errors.get('missing_boundary_points', 0)))
+    injected_missing = [t_id for t_id, geometry in boundary_points if t_id in missing]
+    boundary_points = [(t_id, geometry) for t_id, geometry in boundary_points if t_id not in missing]
+    if 'missing_boundary_points' in injected:
+        injected['missing_boundary_points'] = injected_missing
+
+    for t_id, geometry in rng.sample(boundary_points, errors.get('overlapping_boundary_points', 0)):
+        boundary_points.append((len(boundary_points) + len(missing) + 1, QgsGeometry(geometry)))
+        injected['overlapping_boundary_points'].append(t_id)
+
+    layers = {
+        PLOT_TABLE: get_layer("Polygon", PLOT_TABLE, [ID_FIELD]),
+        BOUNDARY_TABLE: get_layer("LineString", BOUNDARY_TABLE, [ID_FIELD]),
+        BOUNDARY_POINT_TABLE: get_layer("Point", BOUNDARY_POINT_TABLE, [ID_FIELD]),
+        BUILDING_TABLE: get_layer("Polygon", BUILDING_TABLE, [ID_FIELD]),
+        RIGHT_OF_WAY_TABLE: get_layer("Polygon", RIGHT_OF_WAY_TABLE, [ID_FIELD]),
+        POINT_BOUNDARY_FACE_STRING_TABLE: get_layer("NoGeometry", POINT_BOUNDARY_FACE_STRING_TABLE,
+                                                    [ID_FIELD, POINT_BFS_TABLE_BOUNDARY_FIELD, BFS_TABLE_BOUNDARY_POINT_FIELD]),
+        MORE_BOUNDARY_FACE_STRING_TABLE: get_layer("NoGeometry", MORE_BOUNDARY_FACE_STRING_TABLE,
+                                                   [ID_FIELD, MOREBFS_TABLE_PLOT_FIELD, MOREBFS_TABLE_BOUNDARY_FIELD]),
+        LESS_TABLE: get_layer("NoGeometry", LESS_TABLE, [ID_FIELD, LESS_TABLE_PLOT_FIELD, LESS_TABLE_BOUNDARY_FIELD])
+    }
+
+    add_features(layers[PLOT_TABLE], plots)
+    add_features(layers[BOUNDARY_TABLE], boundaries)
+    add_features(layers[BOUNDARY_POINT_TABLE], boundary_points)
+    add_features(layers[BUILDING_TABLE], [(t_id, QgsGeometry.fromRect(rect)) for t_id, rect in buildings])
+    add_features(layers[RIGHT_OF_WAY_TABLE], rights_of_way)
+
+    return (layers, injected)
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+
+import nose2
+
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.table_mapping_config import (BOUNDARY_POINT_TABLE,
+                                                            BOUNDARY_TABLE,
+                                                            BUILDING_TABLE,
+                                                            PLOT_TABLE)
+from asistente_ladm_col.tests.benchmark import (compare_results,
+                                                run_benchmarks,
+                                                run_scaling_benchmark)
+from asistente_ladm_col.tests.synthetic_data import generate_dataset
+from asistente_ladm_col.tests.utils import import_projectgenerator
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+
+import_projectgenerator()
+
+
+class TestBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+
+    def test_clean_dataset(self):
+        print("\nINFO: Validating a synthetic dataset without errors...")
+        layers, injected = generate_dataset(10)
+        self.assertEqual(injected, dict())
+        self.assertEqual(layers[PLOT_TABLE].featureCount(), 100)
+        self.assertEqual(layers[BOUNDARY_TABLE].featureCount(), 2 * 10 * 11)
+        self.assertEqual(layers[BOUNDARY_POINT_TABLE].featureCount(), 11 * 11)
+        self.assertEqual(layers[BUILDING_TABLE].featureCount(), 100)
+
+        geometry = self.qgis_utils.geometry
+        self.assertEqual(geometry.get_overlapping_polygons(layers[PLOT_TABLE]), list())
+        self.assertEqual(geometry.get_overlapping_points(layers[BOUNDARY_POINT_TABLE]), list())
+        self.assertFalse(geometry.get_gaps_in_polygon_layer_by_tiles(layers[PLOT_TABLE], False))
+
+    def test_injected_errors_are_found(self):
+        print("\nINFO: Validating errors injected in a synthetic dataset...")
+        errors = {'overlapping_plots': 4, 'gaps': 3, 'missing_boundary_points': 5, 'overlapping_boundary_points': 2,
+                  'overlapping_buildings': 3, 'right_of_way_overlaps_buildings': 2}
+        layers, injected = generate_dataset(20, errors, seed=1)
+        self.assertEqual({kind: len(ids) for kind, ids in injected.items()}, errors)
+        self.assertEqual(generate_dataset(20, errors, seed=1)[1], injected) # Reproducible
+
+        geometry = self.qgis_utils.geometry
+        self.assertEqual(layers[PLOT_TABLE].featureCount(), 20 * 20 - 3)
+        self.assertEqual(len(geometry.get_overlapping_polygons(layers[PLOT_TABLE])), 4)
+        self.assertEqual(len(geometry.get_overlapping_polygons(layers[BUILDING_TABLE])), 3)
+        self.assertEqual(len(geometry.get_overlapping_points(layers[BOUNDARY_POINT_TABLE])), 2)
+        self.assertEqual(len(geometry.get_gaps_in_polygon_layer_by_tiles(layers[PLOT_TABLE], False)), 3)
+        self.assertEqual(layers[BOUNDARY_POINT_TABLE].featureCount(), 21 * 21 - 5 + 2)
+
+        with self.assertRaises(ValueError):
+            generate_dataset(5, {'unknown': 1})
+
+    def test_results_as_json(self):
+        print("\nINFO: Validating benchmark results stored as JSON...")
+        path = os.path.join(tempfile.mkdtemp(), 'benchmark.json')
+        names = ['check_overlapping_plots', 'check_overlaps_in_boundary_points']
+        report = run_benchmarks(8, {'overlapping_plots': 2}, names=names, output_path=path)
+
+        with open(path) as f:
+            stored = json.load(f)
+        self.assertEqual(stored, json.loads(json.dumps(report)))
+        self.assertEqual(stored['dataset']['features'][PLOT_TABLE], 64)
+        self.assertEqual([result['name'] for result in stored['results']], names)
+        self.assertEqual(stored['results'][0]['count'], 2)
+        for result in stored['results']:
+            self.assertGreaterEqual(result['seconds'], 0)
+            self.assertIsNotNone(result['python_peak_memory_mb'])
+            self.assertIn('rss_growth_mb', result)
+            self.assertGreaterEqual(result['max_rss_increase_mb'] or 0, 0)
+        self.assertIn('process_max_rss_mb', stored)
+
+        slower = json.loads(json.dumps(stored))
+        slower['results'][0]['seconds'] = stored['results'][0]['seconds'] * 2 + 1
+        comparison = compare_results(stored, slower)
+        self.assertEqual([item['name'] for item in comparison], names)
+        self.assertTrue(comparison[0]['regression'])
+
+    def test_scaling_benchmark(self):
+        print("\nINFO: Validating the boundary/boundary point pairing scaling benchmark...")
+        results = run_scaling_benchmark([400, 1600])
+        self.assertEqual([result['vertices'] for result in results], [2 * 2 * 10 * 11, 2 * 2 * 20 * 21])
+        for result in results:
+            self.assertEqual(result['count'], result['vertices']) # Every vertex lies on a boundary point
+            self.assertIn('microseconds_per_vertex', result)
+        self.assertEqual(results[0]['scaling_factor'], 1.0)
+
+if __name__ == '__main__':
+    nose2.main()
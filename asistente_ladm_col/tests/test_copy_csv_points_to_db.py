@@ -2,7 +2,13 @@ import datetime
 
 import nose2
 import psycopg2
-from qgis.core import QgsApplication
+from qgis.core import (QgsApplication,
+                       QgsField,
+                       NULL)
+from qgis.PyQt.QtCore import (QDate,
+                              QDateTime,
+                              QTime,
+                              QVariant)
 from qgis.analysis import QgsNativeAlgorithms
 from processing.core.Processing import Processing
 from qgis.testing import (unittest,
@@ -192,7 +198,11 @@ class TestCopy(unittest.TestCase):
         self.assertEqual(row[colnames['localizacion_original']], '01010000A02C0C0000B01E85ABFC642D41F2D24DE20A7030418B6CE7FB29529740')
 
     def test_copy_csv_overlapping_to_db(self):
+        print("\nINFO: Validating overlapping CSV points are not copied to DB...")
         clean_table('test_ladm_col', 'puntolindero')
+        # COPY gives up on overlapping points and leaves it to the provider path, which shows them
+        self.assertIsNone(self.qgis_utils.copy_csv_to_pg(get_test_path('csv/puntos_overlapping.csv'), ';', 'x', 'y',
+                                                         self.db_connection, DEFAULT_EPSG, BOUNDARY_POINT_TABLE))
         self.upload_points_from_csv_overlapping()
         self.validate_points_overlapping_in_db()
         clean_table('test_ladm_col', 'puntolindero')
@@ -220,6 +230,48 @@ class TestCopy(unittest.TestCase):
         colnames = {desc[0]: cur.description.index(desc) for desc in cur.description}
         self.assertEqual(len(results), 0)
 
+    def test_parse_csv_values(self):
+        print("\nINFO: Validating conversion of CSV values to field types...")
+        parse = self.qgis_utils.parse_csv_value
+        get_copy_value = self.qgis_utils.get_copy_value
+        self.assertEqual(parse(QgsField('exactitud_horizontal', QVariant.Int), ' 2 '), 2)
+        self.assertEqual(parse(QgsField('z', QVariant.Double), '1410,624', ','), 1410.624)
+        self.assertIsNone(parse(QgsField('exactitud_horizontal', QVariant.Int), 'uno'))
+        self.assertIsNone(parse(QgsField('nombre_punto', QVariant.String), '  '))
+        self.assertEqual(parse(QgsField('nombre_punto', QVariant.String), 'P1'), 'P1')
+
+        date = parse(QgsField('fecha', QVariant.Date), "'2017-04-22 14:16:41'")
+        self.assertEqual(date, QDate(2017, 4, 22))
+        self.assertEqual(get_copy_value(date), '2017-04-22')
+        self.assertIsNone(parse(QgsField('fecha', QVariant.Date), '22/04/2017'))
+
+        date_time = parse(QgsField('comienzo_vida_util_version', QVariant.DateTime), "2017-04-22 14:16:41'")
+        self.assertEqual(date_time, QDateTime(QDate(2017, 4, 22), QTime(14, 16, 41)))
+        self.assertEqual(get_copy_value(date_time), '2017-04-22T14:16:41')
+        self.assertIsNone(parse(QgsField('comienzo_vida_util_version', QVariant.DateTime), 'ayer'))
+        self.assertIsNone(get_copy_value(NULL))
+
+    def test_copy_csv_to_pg_with_reprojection(self):
+        print("\nINFO: Validating COPY of CSV points in EPSG:4326 to DB...")
+        clean_table('test_ladm_col', BOUNDARY_POINT_TABLE)
+        self.qgis_utils.disable_automatic_fields(self.db_connection, BOUNDARY_POINT_TABLE)
+        res = self.qgis_utils.copy_csv_to_pg(get_test_path('csv/puntos_crs_4326_wgs84.csv'), ';', 'x', 'y',
+                                             self.db_connection, '4326', BOUNDARY_POINT_TABLE)
+        self.assertEqual(res, True)
+
+        cur = self.db_connection.conn.cursor()
+        cur.execute("""SELECT st_x(localizacion_original), st_y(localizacion_original), comienzo_vida_util_version
+                       FROM test_ladm_col.puntolindero ORDER BY st_y(localizacion_original) DESC;""")
+        results = cur.fetchall()
+        self.db_connection.conn.rollback()
+        expected = [(963052.433292674, 1077370.54548811), (963056.711416816, 1077286.71929338), (963056.670399835, 1077210.30465577)]
+        self.assertEqual(len(results), len(expected))
+        for (x, y, begin_date), (expected_x, expected_y) in zip(results, expected):
+            self.assertAlmostEqual(x, expected_x, 3)
+            self.assertAlmostEqual(y, expected_y, 3)
+            self.assertEqual(begin_date.replace(microsecond=0), datetime.datetime(2017, 4, 22, 14, 16, 41)) # Quotes are stripped
+        clean_table('test_ladm_col', BOUNDARY_POINT_TABLE)
+
     @classmethod
     def tearDownClass(self):
         self.db_connection.conn.close()
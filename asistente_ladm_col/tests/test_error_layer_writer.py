@@ -0,0 +1,144 @@
+import os
+import tempfile
+import time
+
+import nose2
+
+from qgis.core import (QgsFeature,
+                       QgsField,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsVectorLayer)
+from qgis.PyQt.QtCore import QVariant
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.tests.utils import get_rss
+from asistente_ladm_col.utils.error_layer_writer import ErrorLayerWriter
+
+
+def get_error_layer():
+    layer = QgsVectorLayer("Point?crs=EPSG:3116", "errors", "memory")
+    layer.dataProvider().addAttributes([QgsField('boundary_point_id', QVariant.Int),
+                                        QgsField('error_type', QVariant.String)])
+    layer.updateFields()
+    return layer
+
+
+def iter_error_features(error_layer, count):
+    for i in range(count):
+        feature = QgsFeature(error_layer.fields())
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(1000000 + i % 1000, 1000000 + i // 1000)))
+        feature.setAttributes([i, 'error'])
+        yield feature
+
+
+class TestErrorLayerWriter(unittest.TestCase):
+
+    def test_chunk_boundaries(self):
+        print("\nINFO: Validating chunked writes into memory error layers...")
+        for count in [0, 1, 9, 10, 11, 20, 25]:
+            error_layer = get_error_layer()
+            writer = ErrorLayerWriter(error_layer, chunk_size=10, on_disk=False)
+            for i, feature in enumerate(iter_error_features(error_layer, count), 1):
+                writer.add_feature(feature)
+                # Features reach the layer only when a chunk is full
+                self.assertEqual(error_layer.featureCount(), (i // 10) * 10)
+                self.assertEqual(writer.feature_count(), i)
+
+            layer = writer.finish()
+            self.assertIs(layer, error_layer)
+            self.assertEqual(layer.featureCount(), count)
+            self.assertEqual(sorted(f['boundary_point_id'] for f in layer.getFeatures()), list(range(count)))
+
+    def test_write_to_geopackage(self):
+        print("\nINFO: Validating chunked writes into GeoPackage error layers...")
+        for count in [0, 10, 25]:
+            error_layer = get_error_layer()
+            path = os.path.join(tempfile.mkdtemp(), 'errors.gpkg')
+            writer = ErrorLayerWriter(error_layer, chunk_size=10, on_disk=True, path=path)
+            self.assertTrue(writer.is_on_disk())
+            writer.add_features(iter_error_features(error_layer, count))
+            self.assertEqual(error_layer.featureCount(), 0)
+
+            layer = writer.finish()
+            self.assertTrue(layer.isValid())
+            self.assertEqual(layer.name(), error_layer.name())
+            self.assertEqual(layer.featureCount(), count)
+            self.assertEqual(sorted(f['boundary_point_id'] for f in layer.getFeatures()), list(range(count)))
+            self.assertEqual({f['error_type'] for f in layer.getFeatures()}, {'error'} if count else set())
+
+    def test_storage_by_expected_volume(self):
+        print("\nINFO: Validating error layer storage by expected volume...")
+        error_layer = get_error_layer()
+        self.assertFalse(ErrorLayerWriter(error_layer, expected_count=10).is_on_disk())
+
+        writer = ErrorLayerWriter(error_layer, expected_count=10000000)
+        self.assertTrue(writer.is_on_disk())
+        temp_dir = os.path.dirname(writer.path)
+        layer = writer.finish()
+        self.assertTrue(layer.isValid())
+        self.assertEqual(layer.featureCount(), 0)
+
+        # Temporary GeoPackages are removed with their layers
+        self.assertTrue(os.path.exists(temp_dir))
+        del layer
+        self.assertFalse(os.path.exists(temp_dir))
+
+    def test_benchmark_peak_memory(self):
+        """
+        Resident memory (it includes the memory provider and GDAL, unlike
+        tracemalloc) while writing errors. Note that "memory chunks" still
+        ends with every feature in the memory provider, so only the
+        GeoPackage path lowers the peak memory of the error layer.
+        """
+        print("\nINFO: Benchmarking peak memory writing 1M error points...")
+        if get_rss() is None:
+            self.skipTest("Resident memory can't be measured on this platform")
+
+        count = 1000000
+        max_rss = [0]
+
+        def iter_sampling_rss(error_layer):
+            for i, feature in enumerate(iter_error_features(error_layer, count)):
+                if i % 10000 == 0:
+                    max_rss[0] = max(max_rss[0], get_rss())
+                yield feature
+
+        def write_list():
+            error_layer = get_error_layer()
+            features = list(iter_sampling_rss(error_layer))
+            error_layer.dataProvider().addFeatures(features)
+            return error_layer
+
+        def write_memory():
+            error_layer = get_error_layer()
+            writer = ErrorLayerWriter(error_layer, on_disk=False)
+            writer.add_features(iter_sampling_rss(error_layer))
+            return writer.finish()
+
+        def write_geopackage():
+            error_layer = get_error_layer()
+            writer = ErrorLayerWriter(error_layer, on_disk=True)
+            writer.add_features(iter_sampling_rss(error_layer))
+            return writer.finish()
+
+        # The GeoPackage path goes first: memory freed by a previous run may
+        # be reused, which would only favour the runs that come after it
+        growths = dict()
+        for name, write in [('GeoPackage chunks', write_geopackage), ('memory chunks', write_memory), ('list', write_list)]:
+            start_rss = max_rss[0] = get_rss()
+            start = time.time()
+            layer = write()
+            elapsed = time.time() - start
+            growths[name] = max(max_rss[0], get_rss()) - start_rss
+            self.assertEqual(layer.featureCount(), count)
+            del layer
+            print("INFO: {}: {:.3f}s, resident memory growth: {:.1f} MiB".format(name, elapsed, growths[name]))
+
+        self.assertLess(growths['GeoPackage chunks'], growths['list'])
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,129 @@
+import time
+
+import nose2
+
+from qgis.core import (QgsApplication,
+                       QgsFeature,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsVectorLayer)
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+import processing
+from processing.core.Processing import Processing
+from qgis.analysis import QgsNativeAlgorithms
+
+from asistente_ladm_col.config.table_mapping_config import ID_FIELD
+from asistente_ladm_col.tests.utils import (import_projectgenerator,
+                                            get_test_copy_path)
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+
+import_projectgenerator()
+
+
+def get_boundary_segments_with_processing(boundary_layer):
+    """
+    Segments per boundary as fix_boundaries() used to get them: explode
+    lines, delete duplicate geometries and query segments of each boundary.
+    :return: {boundary id: set of segment WKTs}
+    """
+    tmp_segments_layer = processing.run("native:explodelines", {'INPUT': boundary_layer, 'OUTPUT': 'memory:'})['OUTPUT']
+    segments_layer = processing.run("qgis:deleteduplicategeometries", {'INPUT': tmp_segments_layer, 'OUTPUT': 'memory:'})['OUTPUT']
+
+    boundary_segments = dict()
+    for feature in boundary_layer.getFeatures():
+        exp = '"{id_field}" = {id_field_value}'.format(id_field=ID_FIELD, id_field_value=feature[ID_FIELD])
+        segments = {f.geometry().asWkt() for f in segments_layer.getFeatures(exp)}
+        if segments:
+            boundary_segments[feature.id()] = segments
+    return boundary_segments
+
+
+def get_split_grid_layer(size, pieces=2):
+    """
+    Boundaries of a grid of size x size cells, where each cell side is
+    digitized in several pieces and some sides twice, so that they have to
+    be fixed.
+    """
+    layer = QgsVectorLayer("LineString?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "boundaries", "memory")
+    features = list()
+    for line in range(size + 1):
+        for cell in range(size):
+            for horizontal in [True, False]:
+                start = (cell * 100, line * 100) if horizontal else (line * 100, cell * 100)
+                step = (100 / pieces, 0) if horizontal else (0, 100 / pieces)
+                for piece in range(pieces):
+                    feature = QgsFeature()
+                    feature.setAttributes([len(features) + 1])
+                    feature.setGeometry(QgsGeometry.fromPolylineXY(
+                        [QgsPointXY(1000000 + start[0] + step[0] * piece, 1000000 + start[1] + step[1] * piece),
+                         QgsPointXY(1000000 + start[0] + step[0] * (piece + 1), 1000000 + start[1] + step[1] * (piece + 1))]))
+                    features.append(feature)
+                    if piece == 0 and cell % 5 == 0:
+                        duplicate = QgsFeature(feature)
+                        duplicate.setAttributes([len(features) + 1])
+                        features.append(duplicate)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+class TestFixBoundaries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        Processing.initialize()
+        QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms())
+        self.qgis_utils = QGISUtils()
+
+    def get_segment_wkts(self, boundary_layer):
+        dict_segments, boundary_segments = self.qgis_utils.geometry.get_boundary_segments(boundary_layer)
+        return {boundary_id: {dict_segments[segment_id].geometry().asWkt() for segment_id in segment_ids}
+                for boundary_id, segment_ids in boundary_segments.items()}
+
+    def test_segments_against_processing(self):
+        print("\nINFO: Validating boundary segments against explode lines + delete duplicates...")
+        gpkg_path = get_test_copy_path('geopackage/adjust_boundaries_cases.gpkg')
+        for case in range(1, 10):
+            uri = gpkg_path + '|layername=boundary_case_{case}'.format(case=case)
+            boundary_layer = QgsVectorLayer(uri, 'boundary_layer_{case}'.format(case=case), 'ogr')
+            self.assertEqual(self.get_segment_wkts(boundary_layer), get_boundary_segments_with_processing(boundary_layer),
+                             'Invalid segments: case {case}'.format(case=case))
+
+        boundary_layer = get_split_grid_layer(5)
+        self.assertEqual(self.get_segment_wkts(boundary_layer), get_boundary_segments_with_processing(boundary_layer))
+
+    def test_fix_split_grid(self):
+        print("\nINFO: Validating fix_boundaries() on a grid of split boundaries...")
+        size = 10
+        boundary_layer = get_split_grid_layer(size)
+        merge_geoms, boundaries_to_del = self.qgis_utils.geometry.fix_boundaries(boundary_layer)
+
+        self.assertEqual(len(boundaries_to_del), boundary_layer.featureCount())
+        # Inner nodes have degree 4 and border nodes degree 3 (corners 2), so
+        # each cell side is a boundary, except for those joined at the corners
+        self.assertEqual(len(merge_geoms), 2 * size * (size + 1) - 4)
+        for merge_geom in merge_geoms:
+            self.assertFalse(merge_geom.isMultipart())
+
+    def test_benchmark_fix_boundaries(self):
+        print("\nINFO: Benchmarking fix_boundaries()...")
+        boundary_layer = get_split_grid_layer(112) # ~50k boundaries
+        start = time.time()
+        merge_geoms, boundaries_to_del = self.qgis_utils.geometry.fix_boundaries(boundary_layer)
+        print("INFO: {} boundaries fixed in {:.3f}s".format(boundary_layer.featureCount(), time.time() - start))
+        self.assertEqual(len(boundaries_to_del), boundary_layer.featureCount())
+
+        boundary_layer = get_split_grid_layer(15, pieces=1)
+        start = time.time()
+        get_boundary_segments_with_processing(boundary_layer)
+        processing_time = time.time() - start
+        start = time.time()
+        self.get_segment_wkts(boundary_layer)
+        print("INFO: {} boundaries segmented with processing in {:.3f}s, in one pass in {:.3f}s".format(
+            boundary_layer.featureCount(), processing_time, time.time() - start))
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,117 @@
+import time
+import tracemalloc
+
+import nose2
+
+from qgis.core import (QgsFeature,
+                       QgsGeometry,
+                       QgsRectangle,
+                       QgsVectorLayer)
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.tests.utils import (import_projectgenerator,
+                                            get_test_copy_path)
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+
+import_projectgenerator()
+
+CELL_SIZE = 10 # meters
+
+
+def get_tessellation_layer(rows, columns, planted_gaps=set()):
+    """
+    Grid of square plots of CELL_SIZE, skipping the (row, column) cells in
+    planted_gaps.
+    """
+    layer = QgsVectorLayer("Polygon?crs=EPSG:3116", "plots", "memory")
+    features = list()
+    for row in range(rows):
+        for column in range(columns):
+            if (row, column) in planted_gaps:
+                continue
+            feature = QgsFeature()
+            feature.setGeometry(QgsGeometry.fromRect(QgsRectangle(1000000 + column * CELL_SIZE,
+                                                                  1000000 + row * CELL_SIZE,
+                                                                  1000000 + (column + 1) * CELL_SIZE,
+                                                                  1000000 + (row + 1) * CELL_SIZE)))
+            features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+class TestGapsByTiles(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+
+    def get_areas(self, gaps):
+        return sorted(round(gap.area(), 4) for gap in gaps or list())
+
+    def test_planted_gaps(self):
+        print("\nINFO: Validating tiled gap detection on a tessellation with planted gaps...")
+        # Single cell gaps inside tiles, a 2x2 block gap centered on a tile
+        # corner (tiles of 50 m) and a cell touching the exterior (not a gap)
+        planted_gaps = {(2, 2), (7, 13), (4, 4), (4, 5), (5, 4), (5, 5), (0, 9)}
+        layer = get_tessellation_layer(20, 20, planted_gaps)
+
+        gaps = self.qgis_utils.geometry.get_gaps_in_polygon_layer_by_tiles(layer, False, tile_size=50)
+        self.assertEqual(self.get_areas(gaps), [100.0, 100.0, 400.0])
+
+        expected = self.qgis_utils.geometry.get_gaps_in_polygon_layer(layer, False)
+        self.assertEqual(self.get_areas(gaps), self.get_areas(expected))
+        for gap in gaps:
+            self.assertTrue(any(gap.equals(expected_gap) or gap.symDifference(expected_gap).area() < 1e-6
+                                for expected_gap in expected))
+
+    def test_gaps_crossing_tiles(self):
+        print("\nINFO: Validating gaps stitched across several tiles...")
+        # A strip crossing three tile edges, an L crossing a tile corner and
+        # two cells touching only at a tile corner (two gaps, as in a union)
+        planted_gaps = {(10, column) for column in range(2, 17)}
+        planted_gaps |= {(13, 8), (13, 9), (13, 10), (14, 10), (15, 10)}
+        planted_gaps |= {(4, 14), (5, 15)}
+        layer = get_tessellation_layer(20, 20, planted_gaps)
+
+        gaps = self.qgis_utils.geometry.get_gaps_in_polygon_layer_by_tiles(layer, False, tile_size=50)
+        self.assertEqual(self.get_areas(gaps), [100.0, 100.0, 500.0, 1500.0])
+        self.assertEqual(self.get_areas(gaps), self.get_areas(self.qgis_utils.geometry.get_gaps_in_polygon_layer(layer, False)))
+
+    def test_against_global_engine(self):
+        print("\nINFO: Validating tiled gap detection against get_gaps_in_polygon_layer()...")
+        gpkg_path = get_test_copy_path('geopackage/tests_data.gpkg')
+        layer = QgsVectorLayer(gpkg_path + '|layername=check_gaps_in_plots', 'check_gaps_in_plots', 'ogr')
+        self.assertTrue(layer.isValid())
+        tile_size = max(layer.extent().width(), layer.extent().height()) / 3
+
+        for include_roads in [True, False]:
+            expected = self.qgis_utils.geometry.get_gaps_in_polygon_layer(layer, include_roads)
+            gaps = self.qgis_utils.geometry.get_gaps_in_polygon_layer_by_tiles(layer, include_roads, tile_size=tile_size)
+            self.assertEqual(self.get_areas(gaps), self.get_areas(expected))
+
+    def test_benchmark_tiled_gaps(self):
+        print("\nINFO: Benchmarking global vs tiled gap detection...")
+        for size in [50, 100, 200]:
+            planted_gaps = {(row, column) for row in range(3, size - 3, 7) for column in range(3, size - 3, 7)}
+            layer = get_tessellation_layer(size, size, planted_gaps)
+
+            timings = dict()
+            for name, find_gaps in [('global', lambda: self.qgis_utils.geometry.get_gaps_in_polygon_layer(layer, False)),
+                                    ('tiled', lambda: self.qgis_utils.geometry.get_gaps_in_polygon_layer_by_tiles(layer, False, tile_size=250))]:
+                tracemalloc.start()
+                start = time.time()
+                gaps = find_gaps()
+                elapsed = time.time() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                timings[name] = elapsed
+                self.assertEqual(len(gaps), len(planted_gaps))
+                print("INFO: {} plots, {} engine: {:.3f}s, Python peak memory: {:.1f} MB".format(
+                    layer.featureCount(), name, elapsed, peak / 1024 / 1024))
+
+if __name__ == '__main__':
+    nose2.main()
@@ -1,5 +1,6 @@
 import nose2
 import itertools
+import time
 from qgis.core import QgsProject, QgsWkbTypes
 from processing.core.Processing import Processing
 from qgis.testing import (unittest,
@@ -13,6 +14,7 @@ from asistente_ladm_col.tests.utils import (import_projectgenerator,
                                             )
 
 from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.config.general_config import TABLE_NAME
 from asistente_ladm_col.config.table_mapping_config import BOUNDARY_POINT_TABLE, PLOT_TABLE
 
 import_projectgenerator()
@@ -110,6 +112,40 @@ class TestGetLayers(unittest.TestCase):
                 print("Testing {} ({}) against {} ({})".format(layer_1.name(), layer_1.geometryType(), layer_2.name(), layer_2.geometryType()))
                 self.assertNotEqual(layer_1.geometryType(), layer_2.geometryType(), "Function get_layer loads layers with same name and geometry... This is an error!!!")
 
+    def test_relations_in_successive_batches(self):
+        print("\nINFO: Validating relations when loading all layers in successive batches...")
+        self.qgis_utils.cache_layers_and_relations(self.db_connection)
+        QgsProject.instance().clear()
+        relation_manager = QgsProject.instance().relationManager()
+
+        table_names = sorted(set(record[TABLE_NAME] for record in self.qgis_utils._layers))
+        batch_size = 20
+        for i in range(0, len(table_names), batch_size):
+            relations_before = dict(relation_manager.relations())
+            batch = table_names[i:i + batch_size]
+
+            start = time.time()
+            self.qgis_utils.get_layers(self.db_connection, {name: {'name': name, 'geometry': None} for name in batch}, load=True)
+            elapsed = time.time() - start
+
+            relations_after = relation_manager.relations()
+            print("INFO: Batch {} ({} tables): {:.2f}s, {} layers, {} relations".format(
+                i // batch_size + 1, len(batch), elapsed, len(QgsProject.instance().mapLayers()), len(relations_after)))
+
+            # Existing relations are kept, new ones are only added
+            for relation_id, relation in relations_before.items():
+                self.assertIn(relation_id, relations_after)
+                self.assertEqual(relations_after[relation_id].referencingLayerId(), relation.referencingLayerId())
+
+        # Every cached relation between loaded layers is configured only once
+        configured = set()
+        for relation in relation_manager.relations().values():
+            key = (relation.referencingLayerId(), relation.referencedLayerId(), tuple(relation.referencingFields()))
+            self.assertNotIn(key, configured)
+            configured.add(key)
+
+        QgsProject.instance().clear()
+
 
 if __name__ == '__main__':
     nose2.main()
@@ -0,0 +1,208 @@
+import time
+
+import nose2
+
+from qgis.core import (QgsFeature,
+                       QgsField,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsRectangle,
+                       QgsVectorLayer)
+from qgis.PyQt.QtCore import QVariant
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.table_mapping_config import ID_FIELD
+from asistente_ladm_col.tests.utils import import_projectgenerator
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.utils.quality import QualityUtils
+
+import_projectgenerator()
+
+CELL_SIZE = 10 # meters
+
+
+def get_cell(row, column, overlap=0):
+    return QgsGeometry.fromRect(QgsRectangle(1000000 + column * CELL_SIZE,
+                                             1000000 + row * CELL_SIZE,
+                                             1000000 + (column + 1) * CELL_SIZE + overlap,
+                                             1000000 + (row + 1) * CELL_SIZE))
+
+
+def get_plot_layer(size):
+    """
+    Grid of size x size plots, where every 7th plot overlaps its neighbour
+    """
+    layer = QgsVectorLayer("Polygon?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "plots", "memory")
+    features = list()
+    for row in range(size):
+        for column in range(size):
+            feature = QgsFeature(layer.fields())
+            feature.setAttributes([len(features) + 1])
+            feature.setGeometry(get_cell(row, column, 2 if (row * size + column) % 7 == 0 and column < size - 1 else 0))
+            features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def get_error_layer(error_features=None):
+    layer = QgsVectorLayer("Polygon?crs=EPSG:3116", "overlaps", "memory")
+    layer.dataProvider().addAttributes([QgsField("polygon_id", QVariant.Int),
+                                        QgsField("overlapping_id", QVariant.String),
+                                        QgsField("count_parts", QVariant.Int)])
+    layer.updateFields()
+    if error_features:
+        layer.dataProvider().addFeatures(error_features)
+    return layer
+
+
+def get_errors(features):
+    return sorted((tuple(sorted([str(f[0]), str(f[1])])), f[2], round(f.geometry().area(), 4)) for f in features)
+
+
+class TestIncrementalQuality(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+        self.quality = QualityUtils(self.qgis_utils)
+
+    def edit_plots(self, layer):
+        layer.startEditing()
+        ids = [feature.id() for feature in layer.getFeatures()]
+        layer.changeGeometry(ids[50], get_cell(0, 50, 3)) # New overlap
+        layer.changeGeometry(ids[0], get_cell(0, 0)) # Overlap fixed
+        layer.deleteFeature(ids[7]) # Overlapping plot removed
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([len(ids) + 1])
+        feature.setGeometry(get_cell(30, 30, 5)) # Overlaps 2 plots
+        layer.addFeature(feature)
+        self.assertTrue(layer.commitChanges())
+
+    def test_incremental_overlaps_match_full_run(self):
+        print("\nINFO: Validating incremental overlapping polygons against a full run...")
+        layer = get_plot_layer(150)
+        tracker = self.qgis_utils.dirty_regions
+        tracker.track_layer(layer)
+
+        token = tracker.get_token()
+        prior_error_layer = get_error_layer(self.quality.get_overlapping_polygons_features(layer, get_error_layer()))
+        self.assertTrue(prior_error_layer.featureCount() > 0)
+
+        self.edit_plots(layer)
+        dirty_extents = tracker.get_dirty_extents([layer.id()], token)
+        self.assertTrue(dirty_extents)
+
+        error_layer = get_error_layer()
+        start = time.time()
+        layer_subset = self.qgis_utils.geometry.get_layer_subset_in_extents(layer, dirty_extents)
+        incremental = list(self.quality.iter_incremental_error_features(
+            error_layer, prior_error_layer, dirty_extents, self.quality.get_overlapping_polygons_features(layer_subset, error_layer)))
+        incremental_time = time.time() - start
+
+        start = time.time()
+        full = self.quality.get_overlapping_polygons_features(layer, get_error_layer())
+        full_time = time.time() - start
+
+        print("INFO: {} plots, {} dirty extents, {} features re-evaluated: full run {:.3f}s, incremental {:.3f}s".format(
+            layer.featureCount(), len(dirty_extents), layer_subset.featureCount(), full_time, incremental_time))
+        self.assertEqual(get_errors(incremental), get_errors(full))
+        self.assertNotEqual(get_errors(full), get_errors(prior_error_layer.getFeatures()))
+        self.assertLess(layer_subset.featureCount(), layer.featureCount() / 5)
+
+    def test_incremental_overlapping_points(self):
+        print("\nINFO: Validating incremental overlapping points against a full run...")
+        layer = QgsVectorLayer("Point?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "points", "memory")
+        features = list()
+        for i in range(2000):
+            feature = QgsFeature(layer.fields())
+            feature.setAttributes([i + 1])
+            x = i if i % 10 else i - 1 # Every 10th point overlaps the previous one
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(1000000 + x * 5, 1000000)))
+            features.append(feature)
+        layer.dataProvider().addFeatures(features)
+        tracker = self.qgis_utils.dirty_regions
+        tracker.track_layer(layer)
+
+        error_layer = QgsVectorLayer("Point?crs=EPSG:3116", "overlapping points", "memory")
+        error_layer.dataProvider().addAttributes([QgsField("point_count", QVariant.Int), QgsField("intersecting_ids", QVariant.String)])
+        error_layer.updateFields()
+
+        token = tracker.get_token()
+        prior_error_layer = QgsVectorLayer("Point?crs=EPSG:3116", "overlapping points", "memory")
+        prior_error_layer.dataProvider().addAttributes(error_layer.fields().toList())
+        prior_error_layer.updateFields()
+        prior_error_layer.dataProvider().addFeatures(list(self.quality.iter_overlapping_points_features(layer, error_layer)))
+
+        layer.startEditing()
+        ids = [feature.id() for feature in layer.getFeatures()]
+        layer.changeGeometry(ids[10], QgsGeometry.fromPointXY(QgsPointXY(1000000 + 10 * 5, 1000000))) # Overlap fixed
+        layer.changeGeometry(ids[21], QgsGeometry.fromPointXY(QgsPointXY(1000000 + 22 * 5, 1000000))) # New overlap
+        self.assertTrue(layer.commitChanges())
+
+        dirty_extents = tracker.get_dirty_extents([layer.id()], token)
+        layer_subset = self.qgis_utils.geometry.get_layer_subset_in_extents(layer, dirty_extents)
+        incremental = self.quality.iter_incremental_error_features(
+            error_layer, prior_error_layer, dirty_extents, self.quality.iter_overlapping_points_features(layer_subset, error_layer))
+        full = self.quality.iter_overlapping_points_features(layer, error_layer)
+
+        get_point_errors = lambda features: sorted(sorted(f['intersecting_ids'].split(", ")) for f in features)
+        self.assertEqual(get_point_errors(incremental), get_point_errors(full))
+
+    def test_incremental_run_availability(self):
+        print("\nINFO: Validating when checks can run incrementally...")
+        layer = get_plot_layer(3)
+        untracked_layer = get_plot_layer(3)
+        tracker = self.qgis_utils.dirty_regions
+        tracker.track_layer(layer)
+
+        # Never run, incremental mode off or untracked layers: full run
+        self.assertEqual(self.quality.get_incremental_run('overlaps', [layer], True), (None, None))
+        self.quality.set_last_run('overlaps', [layer], tracker.get_token())
+        self.assertEqual(self.quality.get_incremental_run('overlaps', [layer], False), (None, None))
+        self.quality.set_last_run('overlaps untracked', [untracked_layer], tracker.get_token())
+        self.assertEqual(self.quality.get_incremental_run('overlaps untracked', [untracked_layer], True), (None, None))
+
+        # No edits since the last run
+        self.assertEqual(self.quality.get_incremental_run('overlaps', [layer], True), ([], None))
+
+        # Edits in the edit buffer are tracked before being committed
+        layer.startEditing()
+        layer.changeGeometry(next(layer.getFeatures()).id(), get_cell(5, 5))
+        dirty_extents, prior_error_layer = self.quality.get_incremental_run('overlaps', [layer], True)
+        self.assertEqual(len(dirty_extents), 2) # Old and new extents
+        self.assertTrue(dirty_extents[1].contains(get_cell(5, 5).boundingBox()))
+        layer.rollBack()
+
+        # Another layer was checked
+        self.assertEqual(self.quality.get_incremental_run('overlaps', [get_plot_layer(3)], True), (None, None))
+
+    def test_dirty_regions_pruning(self):
+        print("\nINFO: Validating dirty extents are dropped when no check needs them...")
+        qgis_utils = QGISUtils()
+        quality = QualityUtils(qgis_utils)
+        layer = get_plot_layer(3)
+        tracker = qgis_utils.dirty_regions
+        tracker.track_layer(layer)
+        edit = lambda: tracker.add_extent(layer.id(), get_cell(5, 5).boundingBox())
+
+        quality.set_last_run('overlaps', [layer], tracker.get_token())
+        edit()
+        quality.set_last_run('gaps', [layer], tracker.get_token())
+        edit()
+        self.assertEqual(len(quality.get_incremental_run('overlaps', [layer], True)[0]), 2)
+        self.assertEqual(len(quality.get_incremental_run('gaps', [layer], True)[0]), 1)
+
+        # Extents edited before the oldest last run are dropped
+        quality.set_last_run('overlaps', [layer], tracker.get_token())
+        self.assertEqual(sum(len(regions) for regions in tracker._regions.values()), 1)
+        self.assertEqual(len(quality.get_incremental_run('gaps', [layer], True)[0]), 1)
+
+        quality.set_last_run('gaps', [layer], tracker.get_token())
+        self.assertEqual(sum(len(regions) for regions in tracker._regions.values()), 0)
+        self.assertIsNone(tracker.get_dirty_extents([layer.id()], 0))
+
+if __name__ == '__main__':
+    nose2.main()
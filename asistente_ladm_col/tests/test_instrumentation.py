@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+import nose2
+
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.utils.instrumentation import (Instrumentation,
+                                                      NULL_SPAN)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_span_nesting(self):
+        print("\nINFO: Validating nested spans and inclusive counters...")
+        instrumentation = Instrumentation(enabled=True, trace_path='')
+
+        @instrumentation.timed()
+        def get_features():
+            instrumentation.count('features', 10)
+            return 10
+
+        with instrumentation.span('root', layers=2) as root:
+            with instrumentation.span('first'):
+                instrumentation.count('db_queries')
+                get_features()
+            with instrumentation.span('second'):
+                instrumentation.count('db_queries', 2)
+
+        self.assertEqual(instrumentation.get_root_spans(), [root])
+        self.assertEqual([(depth, span.name) for depth, span in root.iter_spans()],
+                         [(0, 'root'), (1, 'first'), (2, get_features.__qualname__), (1, 'second')])
+        self.assertEqual(root.counters, {'db_queries': 3, 'features': 10})
+        self.assertEqual(root.children[0].counters, {'db_queries': 1, 'features': 10})
+        self.assertEqual(root.children[1].counters, {'db_queries': 2})
+        self.assertEqual(root.attributes, {'layers': 2})
+        for depth, span in root.iter_spans():
+            for child in span.children:
+                self.assertGreaterEqual(child.start, span.start)
+                self.assertLessEqual(child.start + child.duration, span.start + span.duration)
+
+        # Spans are closed on exceptions, which are recorded and propagated
+        with self.assertRaises(ValueError):
+            with instrumentation.span('failing'):
+                raise ValueError()
+        self.assertEqual(instrumentation.get_root_spans()[-1].attributes, {'error': 'ValueError'})
+
+        # Spans opened in other threads are not nested into this thread's spans
+        def run_in_background():
+            with instrumentation.span('background'):
+                pass
+
+        with instrumentation.span('main'):
+            thread = threading.Thread(target=run_in_background)
+            thread.start()
+            thread.join()
+        self.assertEqual([span.name for span in instrumentation.get_root_spans()], ['root', 'failing', 'background', 'main'])
+
+    def test_trace_file(self):
+        print("\nINFO: Validating JSON trace files...")
+        path = os.path.join(tempfile.mkdtemp(), 'trace.json')
+        instrumentation = Instrumentation(enabled=True, trace_path=path)
+        with instrumentation.span('get_layers'):
+            with instrumentation.span('load_layers', layers=3):
+                instrumentation.count('db_queries', 4)
+
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+
+        self.assertEqual([event['name'] for event in events], ['load_layers', 'get_layers']) # Recorded when finished
+        self.assertEqual(events[0]['args'], {'layers': 3, 'db_queries': 4})
+        self.assertEqual({event['ph'] for event in events}, {'X'})
+        self.assertGreaterEqual(events[0]['ts'], events[1]['ts'])
+        self.assertLessEqual(events[0]['ts'] + events[0]['dur'], events[1]['ts'] + events[1]['dur'] + 1)
+
+    def test_disabled_overhead(self):
+        print("\nINFO: Validating instrumentation overhead when disabled...")
+        instrumentation = Instrumentation(enabled=False, trace_path='')
+        self.assertIs(instrumentation.span('x'), NULL_SPAN)
+
+        def function(value):
+            return value
+
+        timed_function = instrumentation.timed()(function)
+
+        def run(f):
+            start = time.perf_counter()
+            for i in range(100000):
+                f(i)
+            return time.perf_counter() - start
+
+        def run_instrumented(i):
+            with instrumentation.span('x'):
+                instrumentation.count('features')
+                return timed_function(i)
+
+        baseline = min(run(function) for i in range(3))
+        instrumented = min(run(run_instrumented) for i in range(3))
+        overhead = (instrumented - baseline) / 100000
+        print("INFO: Overhead per instrumented call: {:.3f} us".format(overhead * 1000000))
+        self.assertLess(overhead, 0.00001) # 10 us, vs. the milliseconds taken by instrumented functions
+        self.assertEqual(instrumentation.get_root_spans(), list())
+
+if __name__ == '__main__':
+    nose2.main()
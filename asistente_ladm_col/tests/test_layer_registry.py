@@ -0,0 +1,86 @@
+import time
+
+import nose2
+
+from qgis.core import (QgsProject,
+                       QgsVectorLayer,
+                       QgsWkbTypes)
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.tests.utils import (import_projectgenerator,
+                                            get_test_copy_path)
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+
+import_projectgenerator()
+
+GPKG_LAYERS = ['topology_polygons_overlap', 'boundary', 'boundary_points_', 'tests_plots']
+
+class TestLayerRegistry(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+        self.gpkg_path = get_test_copy_path('geopackage/tests_data.gpkg')
+
+    def setUp(self):
+        QgsProject.instance().clear()
+
+    def add_layers(self, count):
+        """
+        Add GeoPackage layers, completing count with memory layers
+        """
+        layers = [QgsVectorLayer("{}|layername={}".format(self.gpkg_path, layer_name), layer_name, 'ogr') for layer_name in GPKG_LAYERS]
+        for i in range(count - len(layers)):
+            layers.append(QgsVectorLayer("Point?crs=EPSG:3116", "noise_{}".format(i), 'memory'))
+        QgsProject.instance().addMapLayers(layers)
+        return layers
+
+    def test_registry_follows_project(self):
+        print("\nINFO: Validating layer registry updates...")
+        registry = self.qgis_utils.layer_registry
+        self.assertEqual(len(registry), 0)
+
+        boundary = QgsVectorLayer("{}|layername=boundary".format(self.gpkg_path), 'boundary', 'ogr')
+        plots = QgsVectorLayer("{}|layername=tests_plots".format(self.gpkg_path), 'tests_plots', 'ogr')
+        QgsProject.instance().addMapLayers([boundary, plots])
+        self.assertEqual(len(registry), 2)
+
+        self.assertEqual(self.qgis_utils.get_layer_from_layer_tree('BOUNDARY'), boundary)
+        self.assertEqual(self.qgis_utils.get_layer_from_layer_tree('tests_plots', geometry_type=QgsWkbTypes.PolygonGeometry), plots)
+        self.assertIsNone(self.qgis_utils.get_layer_from_layer_tree('tests_plots', geometry_type=QgsWkbTypes.PointGeometry))
+
+        QgsProject.instance().removeMapLayer(boundary.id())
+        self.assertIsNone(self.qgis_utils.get_layer_from_layer_tree('boundary'))
+        self.assertEqual(len(registry), 1)
+
+        QgsProject.instance().clear()
+        self.assertIsNone(self.qgis_utils.get_layer_from_layer_tree('tests_plots'))
+        self.assertEqual(len(registry), 0)
+
+    def test_lookup_cost_independent_of_layer_count(self):
+        print("\nINFO: Benchmarking get_layer_from_layer_tree() with many layers...")
+        timings = dict()
+        for count in [10, 100, 800]:
+            QgsProject.instance().clear()
+            self.add_layers(count)
+
+            start = time.time()
+            for i in range(1000):
+                layer = self.qgis_utils.get_layer_from_layer_tree('boundary')
+            timings[count] = time.time() - start
+
+            self.assertIsNotNone(layer)
+            print("INFO: {} layers in project, 1000 lookups: {:.4f}s".format(count, timings[count]))
+
+        # Far from linear in the layer count (80x more layers)
+        self.assertLess(timings[800], timings[10] * 5)
+
+    @classmethod
+    def tearDownClass(self):
+        QgsProject.instance().clear()
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,99 @@
+import json
+import tempfile
+import time
+
+import nose2
+
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.tests.utils import (import_projectgenerator,
+                                            get_dbconn,
+                                            restore_schema)
+from asistente_ladm_col.utils.metadata_cache import MetadataCache
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+
+import_projectgenerator()
+
+class TestMetadataCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+        self.db_connection = get_dbconn('test_ladm_col')
+        result = self.db_connection.test_connection()
+        print('test_connection', result)
+        if not result[1]:
+            print('The test connection is not working')
+            return
+        restore_schema('test_ladm_col')
+
+    def setUp(self):
+        self.qgis_utils.metadata_cache = MetadataCache(tempfile.mkdtemp())
+
+    def get_cached_info(self):
+        """
+        Run cache_layers_and_relations() counting how many times the metadata
+        is read from the DB.
+        """
+        self.qgis_utils._layers, self.qgis_utils._relations, self.qgis_utils._bags_of_enum = list(), list(), dict()
+        project_generator_utils = self.qgis_utils.project_generator_utils
+        get_layers_and_relations_info = project_generator_utils.get_layers_and_relations_info
+        db_reads = list()
+
+        def counting_get_layers_and_relations_info(db):
+            db_reads.append(db)
+            return get_layers_and_relations_info(db)
+
+        project_generator_utils.get_layers_and_relations_info = counting_get_layers_and_relations_info
+        try:
+            start = time.time()
+            self.qgis_utils.cache_layers_and_relations(self.db_connection)
+            elapsed = time.time() - start
+        finally:
+            del project_generator_utils.get_layers_and_relations_info
+
+        # Normalize DB records and tuples to compare cold and warm results
+        info = json.loads(json.dumps({
+            'layers': [{key: record[key] for key in record.keys()} for record in self.qgis_utils._layers],
+            'relations': self.qgis_utils._relations,
+            'bags_of_enum': self.qgis_utils._bags_of_enum}, default=str))
+        return info, elapsed, len(db_reads)
+
+    def test_cold_vs_warm_startup(self):
+        print("\nINFO: Validating cold vs warm cache_layers_and_relations()...")
+        cold_info, cold_time, cold_db_reads = self.get_cached_info()
+        warm_info, warm_time, warm_db_reads = self.get_cached_info()
+
+        print("INFO: Cold: {:.3f}s, warm: {:.3f}s".format(cold_time, warm_time))
+        self.assertTrue(cold_info['layers'])
+        self.assertEqual(cold_info, warm_info)
+
+        # The warm run is served from disk without querying the DB metadata
+        self.assertEqual(cold_db_reads, 1)
+        self.assertEqual(warm_db_reads, 0)
+
+    def test_revalidation(self):
+        print("\nINFO: Validating cache invalidation when the DB changes...")
+        db = self.db_connection
+        cache = self.qgis_utils.metadata_cache
+        self.get_cached_info()
+        self.assertIsNotNone(cache.load(db))
+
+        cur = db.conn.cursor()
+        cur.execute("CREATE TABLE {}.tmp_metadata_cache_test (t_id integer)".format(db.schema))
+        db.conn.commit()
+        try:
+            self.assertIsNone(cache.load(db))
+        finally:
+            cur.execute("DROP TABLE {}.tmp_metadata_cache_test".format(db.schema))
+            db.conn.commit()
+
+        self.assertIsNotNone(cache.load(db))
+        cache.clear(db)
+        self.assertIsNone(cache.load(db))
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,228 @@
+import json
+import nose2
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from qgis.core import QgsVectorLayer
+
+from asistente_ladm_col.gui.reports import ReportGenerator
+from asistente_ladm_col.utils.geometry import GeometryUtils
+from asistente_ladm_col.tests.utils import (create_overlapping_polygons_table,
+                                            drop_table,
+                                            get_dbconn,
+                                            get_rss,
+                                            restore_schema)
+
+
+class TestPGConnector(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.db_connection = get_dbconn('test_ladm_col')
+        result = self.db_connection.test_connection()
+        print('test_connection', result)
+        if not result[1]:
+            print('The test connection is not working')
+            return
+        restore_schema('test_ladm_col')
+
+    def test_tables_info_cache(self):
+        print("\nINFO: Validating catalog cache for get_uri_for_layer()...")
+        db = self.db_connection
+        db.clear_tables_info_cache()
+
+        with patch.object(db, '_get_tables_info_from_db', wraps=db._get_tables_info_from_db) as catalog_query:
+            res, tables_info = db.get_tables_info()
+            self.assertTrue(res)
+            self.assertIn('puntolindero', tables_info)
+
+            # Load the URIs of the whole layer set
+            for table_name in tables_info:
+                res, uri = db.get_uri_for_layer(table_name)
+                self.assertTrue(res, uri)
+                self.assertIn('table="test_ladm_col"."{}"'.format(table_name), uri)
+
+            self.assertEqual(catalog_query.call_count, 1)
+
+            res, msg = db.get_uri_for_layer('non_existent_table')
+            self.assertFalse(res)
+            self.assertEqual(catalog_query.call_count, 1)
+
+            # Manual refresh
+            db.clear_tables_info_cache()
+            db.get_uri_for_layer('puntolindero')
+            self.assertEqual(catalog_query.call_count, 2)
+
+            # Reconnection
+            db.test_connection()
+            db.get_uri_for_layer('puntolindero')
+            self.assertEqual(catalog_query.call_count, 3)
+
+    def test_concurrent_queries_with_pool(self):
+        print("\nINFO: Validating concurrent logic validation queries through the connection pool...")
+        schema_name = 'test_ladm_col_logic_checks'
+        restore_schema(schema_name)
+        db = get_dbconn(schema_name)
+        res, msg = db.test_connection()
+        self.assertTrue(res, msg)
+
+        rules = ['DEPARTMENT_CODE_VALIDATION', 'MUNICIPALITY_CODE_VALIDATION', 'ZONE_CODE_VALIDATION',
+                 'PARCEL_NUMBER_VALIDATION', 'PARCEL_NUMBER_BEFORE_VALIDATION',
+                 'COL_PARTY_TYPE_NATURAL_VALIDATION', 'COL_PARTY_TYPE_NO_NATURAL_VALIDATION'] * 4
+        queries = [db.logic_validation_queries[rule]['query'] for rule in rules]
+
+        start = time.time()
+        sequential_results = [db.execute_sql_query(query) for query in queries]
+        sequential_time = time.time() - start
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            concurrent_results = list(executor.map(db.execute_sql_query, queries))
+        concurrent_time = time.time() - start
+
+        print("INFO: {} queries, sequential: {:.3f}s ({:.1f} q/s), concurrent: {:.3f}s ({:.1f} q/s)".format(
+            len(queries), sequential_time, len(queries) / sequential_time, concurrent_time, len(queries) / concurrent_time))
+        self.assertEqual(sequential_results, concurrent_results)
+
+        # Simulate dropped connections, queries should reconnect transparently.
+        # Only the pool's own connections are terminated, other sessions
+        # (e.g., parallel CI jobs) share the test DB and user.
+        pool_pids = [conn.get_backend_pid() for conn, last_used in db._pool._idle]
+        self.assertTrue(pool_pids)
+        cur = db.conn.cursor()
+        cur.execute("SELECT pg_terminate_backend(pid) FROM unnest(%s) AS pid", (pool_pids,))
+        db.conn.commit()
+        self.assertEqual(db.execute_sql_query(queries[0]), sequential_results[0])
+        db.close_connection()
+
+    def test_streaming_query_memory(self):
+        print("\nINFO: Validating memory used by streamed query results...")
+        db = self.db_connection
+        query = "SELECT i AS t_id, md5(i::text) AS description FROM generate_series(1, {}) AS i"
+
+        if get_rss() is None:
+            self.skipTest("Resident memory can't be measured on this platform")
+
+        growths = dict()
+        for size in [10000, 100000, 1000000]:
+            start_rss = max_rss = get_rss()
+            count = 0
+            for record in db.iter_sql_query(query.format(size), fetch_size=1000):
+                count += 1
+                if count % 1000 == 0:
+                    max_rss = max(max_rss, get_rss())
+
+            self.assertEqual(count, size)
+            growths[size] = max_rss - start_rss
+            print("INFO: {} records streamed, resident memory growth: {:.1f} MiB".format(size, growths[size]))
+
+        # Memory depends on the fetch size, not on the result size (a million
+        # records kept in memory would take hundreds of MiB)
+        self.assertLess(growths[1000000], growths[10000] + 32)
+
+    def insert_synthetic_plots(self, db, count, origin=1000000):
+        """
+        Insert a grid of square plots into terreno, filling mandatory columns
+        with dummy values. Returns the t_ids of the new plots.
+        :param origin: Coordinate of the lower left corner of the grid
+        """
+        geometry_type, coord_dimension, srid = db.execute_sql_query_dict_cursor("""
+            SELECT type, coord_dimension, srid FROM public.geometry_columns
+            WHERE f_table_schema = '{}' AND f_table_name = 'terreno' AND f_geometry_column = 'poligono_creado'""".format(db.schema))[0]
+
+        geometry = "ST_MakeEnvelope({origin} + (i % 50) * 100, {origin} + (i / 50) * 100, {origin} + (i % 50) * 100 + 100, {origin} + (i / 50) * 100 + 100, {srid})".format(origin=origin, srid=srid)
+        if geometry_type.startswith('MULTI'):
+            geometry = "ST_Multi({})".format(geometry)
+        if coord_dimension == 3:
+            geometry = "ST_Force3D({})".format(geometry)
+
+        columns = ['poligono_creado']
+        values = [geometry]
+        for record in db.execute_sql_query_dict_cursor("""
+                SELECT column_name, data_type FROM information_schema.columns
+                WHERE table_schema = '{}' AND table_name = 'terreno' AND is_nullable = 'NO'
+                AND column_default IS NULL AND column_name <> 'poligono_creado'""".format(db.schema)):
+            columns.append(record['column_name'])
+            values.append("'synthetic_' || i" if record['data_type'] in ('character varying', 'text') else "1")
+
+        # Pooled connections are rolled back when released, so use db.conn
+        cur = db.conn.cursor()
+        cur.execute("""INSERT INTO {schema}.terreno ({columns})
+                       SELECT {values} FROM generate_series(0, {max_i}) AS i
+                       RETURNING t_id""".format(schema=db.schema, columns=', '.join(columns), values=', '.join(values), max_i=count - 1))
+        plot_ids = [record[0] for record in cur.fetchall()]
+        db.conn.commit()
+        return plot_ids
+
+    def test_annex17_batch_extraction(self):
+        print("\nINFO: Benchmarking per-plot vs batched Annex 17 data extraction...")
+        db = self.db_connection
+        plot_ids = self.insert_synthetic_plots(db, 1000)
+        # A plot far from the grid has no neighbours, so its whole boundary
+        # comes from the ST_Difference row of pre_colindancias
+        plot_ids += self.insert_synthetic_plots(db, 1, origin=2000000)
+        layer_names = ['terreno', 'terrenos', 'construcciones', 'puntos']
+
+        try:
+            report_generator = ReportGenerator(None)
+
+            start = time.time()
+            per_plot = {plot_id: [report_generator.get_layer_geojson(db, layer_name, plot_id) for layer_name in layer_names]
+                        for plot_id in plot_ids}
+            per_plot_time = time.time() - start
+
+            start = time.time()
+            batched = dict()
+            for i in range(0, len(plot_ids), 100):
+                report_generator.prefetch_annex17_data(db, plot_ids[i:i + 100])
+                for plot_id in plot_ids[i:i + 100]:
+                    batched[plot_id] = [report_generator.get_layer_geojson(db, layer_name, plot_id) for layer_name in layer_names]
+            batched_time = time.time() - start
+            report_generator.clear_annex17_data()
+
+            print("INFO: {} plots, per plot: {:.2f}s, batched: {:.2f}s".format(len(plot_ids), per_plot_time, batched_time))
+
+            def normalize(features):
+                return sorted(json.dumps(feature, sort_keys=True) for feature in features or list())
+
+            for plot_id in plot_ids:
+                for expected, result in zip(per_plot[plot_id], batched[plot_id]):
+                    self.assertEqual(normalize(expected), normalize(result))
+        finally:
+            db.conn.cursor().execute("DELETE FROM {}.terreno WHERE t_id IN ({})".format(db.schema, ', '.join(str(t_id) for t_id in plot_ids)))
+            db.conn.commit()
+
+    def test_overlapping_polygons_engines(self):
+        print("\nINFO: Validating Python vs PostGIS overlapping polygons engines...")
+        db = self.db_connection
+        table_name = 'synthetic_overlap_plots'
+        create_overlapping_polygons_table(db, table_name, 400, columns=20)
+
+        try:
+            db_pairs = {(record['polygon_id'], record['overlapping_id']) for record in db.get_overlapping_polygons(table_name, 'poligono_creado')}
+
+            db.clear_tables_info_cache()
+            res, uri = db.get_uri_for_layer(table_name)
+            self.assertTrue(res, uri)
+            layer = QgsVectorLayer(uri, table_name, 'postgres')
+            self.assertTrue(layer.isValid())
+            python_pairs = {tuple(pair) for pair in GeometryUtils().get_overlapping_polygons(layer)} # Feature ids are t_ids
+
+            # 40 shifted squares overlap their neighbours and 1 small square is contained
+            self.assertEqual(db_pairs, python_pairs)
+            self.assertGreaterEqual(len(db_pairs), 41)
+        finally:
+            drop_table(db, table_name)
+
+    def tearDownClass():
+        print('tearDown test_pg_connector')
+
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,151 @@
+import nose2
+
+from qgis.core import (QgsApplication,
+                       QgsVectorLayer)
+from qgis.testing import (unittest,
+                          start_app)
+
+from qgis.PyQt.QtCore import (QCoreApplication,
+                              QThread)
+from processing.core.Processing import Processing
+from qgis.analysis import QgsNativeAlgorithms
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from functools import partial
+
+from asistente_ladm_col.config.table_mapping_config import BOUNDARY_POINT_TABLE
+from asistente_ladm_col.tests.utils import (import_projectgenerator,
+                                            get_dbconn,
+                                            get_test_copy_path,
+                                            restore_schema)
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.utils.quality import QualityUtils
+
+import_projectgenerator()
+
+class TestQualityTasks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+        self.quality = QualityUtils(self.qgis_utils)
+        Processing.initialize()
+        QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms())
+
+    def get_memory_layer(self, layer_name):
+        gpkg_path = get_test_copy_path('geopackage/tests_data.gpkg')
+        uri = gpkg_path + '|layername={layername}'.format(layername=layer_name)
+        return self.qgis_utils.geometry.clone_layer(QgsVectorLayer(uri, layer_name, 'ogr'))
+
+    def get_rules(self):
+        geometry = self.qgis_utils.geometry
+        return [{'id': 'overlapping_polygons',
+                 'text': 'Overlapping polygons',
+                 'function': lambda feedback: geometry.get_overlapping_polygons(self.get_memory_layer('topology_polygons_overlap'))},
+                {'id': 'overlapping_points',
+                 'text': 'Overlapping points',
+                 'function': lambda feedback: geometry.get_overlapping_points(self.get_memory_layer('boundary_points_'))},
+                {'id': 'dangles',
+                 'text': 'Dangles',
+                 'function': lambda feedback: self.quality.get_dangle_ids(self.get_memory_layer('boundary'))[1]}]
+
+    def run_rules(self, rules, cancel=False):
+        results = dict()
+        progress = list()
+        rule_runner = self.quality.rule_runner
+        rule_runner.rules_finished.connect(results.update)
+        rule_runner.progress_changed.connect(progress.append)
+        self.assertTrue(self.quality.run_rules(rules))
+        if cancel:
+            rule_runner.cancel()
+
+        while rule_runner.is_running():
+            QCoreApplication.processEvents()
+        QCoreApplication.processEvents()
+
+        rule_runner.rules_finished.disconnect(results.update)
+        rule_runner.progress_changed.disconnect(progress.append)
+        return results, progress
+
+    def test_rules_match_direct_calls(self):
+        print('\nINFO: Validating quality rules run through the rule runner...')
+        rules = self.get_rules()
+        results, progress = self.run_rules(rules)
+
+        self.assertEqual(sorted(results.keys()), sorted(rule['id'] for rule in rules))
+        for rule in rules:
+            self.assertIsNotNone(results[rule['id']], 'Rule {} returned no result'.format(rule['id']))
+            self.assertEqual(sorted(results[rule['id']]), sorted(rule['function'](feedback=None)),
+                             'Results for rule {} differ when run by the rule runner'.format(rule['id']))
+        self.assertEqual(progress[-1], 100)
+
+    def test_run_while_running(self):
+        print('\nINFO: Validating quality rules are not started twice...')
+        rule_runner = self.quality.rule_runner
+        nested_runs = list()
+
+        def run_again(feedback):
+            nested_runs.append(self.quality.run_rules(self.get_rules()))
+            return True
+
+        results, progress = self.run_rules([{'id': 'run_again', 'text': 'Run again', 'function': run_again}] + self.get_rules())
+        self.assertEqual(nested_runs, [False])
+        self.assertEqual(len(results), 4) # The first run was not reset
+        self.assertFalse(rule_runner.is_running())
+
+    def test_cancel_rules(self):
+        print('\nINFO: Validating canceled quality rules...')
+        rules = self.get_rules()
+        results, progress = self.run_rules(rules, cancel=True)
+        self.assertEqual(results, dict()) # Canceled before the first rule started
+
+        def cancel_run(feedback):
+            self.quality.rule_runner.cancel()
+            return feedback.isCanceled()
+
+        rules.insert(0, {'id': 'cancel', 'text': 'Cancel', 'function': cancel_run})
+        results, progress = self.run_rules(rules)
+        self.assertEqual(results, {'cancel': True}) # The running rule sees it, the others are skipped
+
+    def test_check_rules_run_in_main_thread(self):
+        print('\nINFO: Validating check_* quality rules run through the rule runner...')
+        schema_name = 'test_ladm_col_validations_against_topology_tables'
+        db = get_dbconn(schema_name)
+        result = db.test_connection()
+        self.assertTrue(result[0], 'The test connection is not working')
+        restore_schema(schema_name)
+
+        error_layers = list()
+        add_error_layer = self.quality.add_error_layer
+
+        def recording_add_error_layer(error_layer):
+            self.assertEqual(QThread.currentThread(), QCoreApplication.instance().thread())
+            error_layers.append((error_layer.name(), sorted(f.geometry().asWkt() for f in error_layer.getFeatures())))
+            return add_error_layer(error_layer)
+
+        self.quality.add_error_layer = recording_add_error_layer
+        try:
+            functions = [('check_overlaps_in_boundary_points', partial(self.quality.check_overlapping_points, db, BOUNDARY_POINT_TABLE, incremental=False)),
+                         ('check_too_long_boundary_segments', partial(self.quality.check_too_long_segments, db)),
+                         ('check_dangles_in_boundaries', partial(self.quality.check_dangles_in_boundaries, db))]
+            for rule_id, function in functions:
+                function()
+            direct_error_layers = list(error_layers)
+            del error_layers[:]
+
+            rules = [{'id': rule_id, 'text': rule_id, 'function': function} for rule_id, function in functions]
+            results, progress = self.run_rules(rules)
+        finally:
+            self.quality.add_error_layer = add_error_layer
+
+        self.assertEqual(sorted(results.keys()), sorted(rule_id for rule_id, function in functions))
+        self.assertEqual(error_layers, direct_error_layers)
+        self.assertEqual(progress[-1], 100)
+
+    def tearDownClass():
+        print('tearDown test_quality_tasks')
+
+
+if __name__ == '__main__':
+    nose2.main()
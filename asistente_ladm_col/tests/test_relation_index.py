@@ -0,0 +1,103 @@
+import random
+import time
+from collections import Counter
+
+import nose2
+
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.general_config import (REFERENCED_LAYER,
+                                                      REFERENCING_LAYER,
+                                                      RELATION_NAME,
+                                                      RELATION_TYPE,
+                                                      DOMAIN_CLASS_RELATION,
+                                                      CLASS_CLASS_RELATION)
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.utils.relation_index import RelationIndex
+
+
+def scan_related_layers(relations, layer_names, already_loaded):
+    """
+    Linear scan over the relation list, as get_related_layers() used to do
+    """
+    related_layers = list()
+    for relation in relations:
+        for layer_name in layer_names:
+            if relation[REFERENCING_LAYER] == layer_name:
+                if relation[REFERENCED_LAYER] not in already_loaded:
+                    related_layers.append(relation[REFERENCED_LAYER])
+
+    related_domains = list()
+    for relation in relations:
+        if relation[RELATION_TYPE] == DOMAIN_CLASS_RELATION:
+            for layer_name in related_layers:
+                if relation[REFERENCING_LAYER] == layer_name:
+                    if relation[REFERENCED_LAYER] not in already_loaded:
+                        related_domains.append(relation[REFERENCED_LAYER])
+
+    return related_layers + related_domains
+
+
+class TestRelationIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+
+    def get_synthetic_relations(self, num_classes=1000, num_domains=300, num_relations=5000):
+        rnd = random.Random(17)
+        classes = ['class_{}'.format(i) for i in range(num_classes)]
+        domains = ['domain_{}'.format(i) for i in range(num_domains)]
+        relations = list()
+        for i in range(num_relations):
+            if i % 3:
+                referenced_layer, relation_type = rnd.choice(classes), CLASS_CLASS_RELATION
+            else:
+                referenced_layer, relation_type = rnd.choice(domains), DOMAIN_CLASS_RELATION
+            relations.append({RELATION_NAME: 'rel_{}'.format(i),
+                              REFERENCING_LAYER: rnd.choice(classes),
+                              REFERENCED_LAYER: referenced_layer,
+                              RELATION_TYPE: relation_type})
+        return classes, relations
+
+    def test_related_layers_against_scan(self):
+        print("\nINFO: Validating indexed get_related_layers() against a linear scan...")
+        classes, relations = self.get_synthetic_relations()
+        self.qgis_utils._relations = relations
+        self.qgis_utils._bags_of_enum = dict()
+        rnd = random.Random(23)
+        queries = [(rnd.sample(classes, 5), rnd.sample(classes, 50)) for i in range(200)]
+
+        start = time.time()
+        expected = [scan_related_layers(relations, layer_names, already_loaded) for layer_names, already_loaded in queries]
+        scan_time = time.time() - start
+
+        start = time.time()
+        results = [self.qgis_utils.get_related_layers(layer_names, already_loaded) for layer_names, already_loaded in queries]
+        index_time = time.time() - start
+
+        print("INFO: {} relations, {} queries, scan: {:.3f}s, index: {:.3f}s".format(len(relations), len(queries), scan_time, index_time))
+        for expected_layers, result_layers in zip(expected, results):
+            self.assertEqual(Counter(expected_layers), Counter(result_layers))
+
+    def test_index_is_rebuilt_with_new_relations(self):
+        self.qgis_utils._relations = [{REFERENCING_LAYER: 'a', REFERENCED_LAYER: 'b', RELATION_TYPE: CLASS_CLASS_RELATION}]
+        self.assertEqual(self.qgis_utils.get_related_layers(['a'], list()), ['b'])
+
+        self.qgis_utils._relations = [{REFERENCING_LAYER: 'a', REFERENCED_LAYER: 'c', RELATION_TYPE: CLASS_CLASS_RELATION}]
+        self.assertEqual(self.qgis_utils.get_related_layers(['a'], list()), ['c'])
+
+    def test_referenced_relations(self):
+        relations = [{REFERENCING_LAYER: referencing, REFERENCED_LAYER: referenced, RELATION_TYPE: CLASS_CLASS_RELATION}
+                     for referencing, referenced in [('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd'), ('x', 'a')]]
+        index = RelationIndex(relations)
+
+        self.assertEqual([relation[REFERENCING_LAYER] for relation in index.get_referenced_relations('a')], ['c', 'x'])
+        self.assertEqual([relation[REFERENCED_LAYER] for relation in index.get_referencing_relations('c')], ['a', 'd'])
+        self.assertEqual(index.get_referenced_relations('x'), list())
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,166 @@
+import os
+import stat
+import sys
+import tempfile
+
+import nose2
+
+from qgis.testing import (unittest,
+                          start_app)
+
+from qgis.PyQt.QtCore import (QEventLoop,
+                              QTimer)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.utils.report_pool import (ReportJob,
+                                                  ReportWorkerPool)
+
+# Stub for the report script: it records start/end times in a log file,
+# sleeps and exits with the code passed as argument.
+STUB_REPORT_SCRIPT = """#!{python}
+import sys, time
+log_path, job_id, sleep, exit_code = sys.argv[1], sys.argv[2], float(sys.argv[3]), int(sys.argv[4])
+with open(log_path, 'a') as f:
+    f.write('start {{}} {{}}\\n'.format(job_id, time.time()))
+time.sleep(sleep)
+with open(log_path, 'a') as f:
+    f.write('end {{}} {{}}\\n'.format(job_id, time.time()))
+print('report', job_id)
+sys.exit(exit_code)
+"""
+
+class TestReportWorkerPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.tmp_dir, 'print')
+        with open(self.script_path, 'w') as f:
+            f.write(STUB_REPORT_SCRIPT.format(python=sys.executable))
+        os.chmod(self.script_path, stat.S_IRWXU)
+
+    def setUp(self):
+        self.log_path = tempfile.mktemp(dir=self.tmp_dir)
+
+    def get_job(self, job_id, sleep=0.3, exit_code=0):
+        return ReportJob(job_id, self.script_path, [self.log_path, str(job_id), str(sleep), str(exit_code)])
+
+    def run_pool(self, pool, jobs):
+        results = list()
+        loop = QEventLoop()
+        pool.all_finished.connect(results.extend)
+        pool.all_finished.connect(loop.exit)
+        pool.run(jobs)
+        if pool.is_running():
+            loop.exec()
+        return results
+
+    def get_max_overlap(self):
+        events = list()
+        with open(self.log_path) as f:
+            for line in f:
+                kind, job_id, timestamp = line.split()
+                events.append((float(timestamp), 1 if kind == 'start' else -1))
+
+        running = max_running = 0
+        for timestamp, delta in sorted(events):
+            running += delta
+            max_running = max(max_running, running)
+        return max_running
+
+    def test_concurrency_limit(self):
+        print('\nINFO: Validating the pool never runs more than max_workers processes...')
+        pool = ReportWorkerPool(3, timeout=30, retries=0)
+        results = self.run_pool(pool, [self.get_job(i) for i in range(10)])
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(job.success for job in results))
+        self.assertEqual(pool.max_running, 3)
+        self.assertLessEqual(self.get_max_overlap(), 3)
+        self.assertGreater(self.get_max_overlap(), 1)
+
+    def test_results_in_submission_order(self):
+        print('\nINFO: Validating results keep submission order...')
+        pool = ReportWorkerPool(4, timeout=30, retries=0)
+        # Earlier jobs take longer, so they finish last
+        jobs = [self.get_job(i, sleep=0.1 * (6 - i)) for i in range(6)]
+        finished_order = list()
+        pool.job_finished.connect(lambda job: finished_order.append(job.job_id))
+        results = self.run_pool(pool, jobs)
+
+        self.assertEqual([job.job_id for job in results], list(range(6)))
+        self.assertNotEqual(finished_order, list(range(6)))
+
+    def test_errors_and_retries(self):
+        print('\nINFO: Validating failed, timed out and missing jobs...')
+        pool = ReportWorkerPool(2, timeout=1, retries=1)
+        jobs = [self.get_job('ok'),
+                self.get_job('fails', exit_code=1),
+                self.get_job('timeout', sleep=10),
+                ReportJob('missing', os.path.join(self.tmp_dir, 'does_not_exist'), list())]
+        results = {job.job_id: job for job in self.run_pool(pool, jobs)}
+
+        self.assertTrue(results['ok'].success)
+        self.assertEqual(results['ok'].attempts, 1)
+
+        for job_id in ('fails', 'timeout', 'missing'):
+            self.assertFalse(results[job_id].success)
+            self.assertEqual(results[job_id].attempts, 2) # One retry
+            self.assertTrue(results[job_id].error)
+
+        self.assertEqual(results['fails'].exit_code, 1)
+
+    def test_lazy_arguments(self):
+        print('\nINFO: Validating arguments are prepared when the job starts...')
+        prepared = list()
+
+        def get_arguments(job_id):
+            prepared.append(job_id)
+            return [self.log_path, str(job_id), '0', '0']
+
+        pool = ReportWorkerPool(2, timeout=30, retries=0)
+        jobs = [ReportJob(i, self.script_path, lambda i=i: get_arguments(i)) for i in range(4)]
+        results = self.run_pool(pool, jobs)
+
+        self.assertEqual(sorted(prepared), list(range(4)))
+        self.assertTrue(all(job.success for job in results))
+
+    def test_progress_summary(self):
+        pool = ReportWorkerPool(2, timeout=30, retries=0)
+        progress = list()
+        pool.progress_changed.connect(lambda value, summary: progress.append((value, summary)))
+        self.run_pool(pool, [self.get_job(i, sleep=0) for i in range(4)])
+
+        self.assertEqual([value for value, summary in progress], [25, 50, 75, 100])
+        self.assertIn('4/4', progress[-1][1])
+        self.assertIn('ETA', progress[-1][1])
+
+    def test_cancel(self):
+        print('\nINFO: Validating canceled jobs are finished...')
+        pool = ReportWorkerPool(2, timeout=30, retries=1)
+        QTimer.singleShot(500, pool.cancel)
+        results = self.run_pool(pool, [self.get_job(i, sleep=10) for i in range(6)])
+
+        self.assertEqual([job.job_id for job in results], list(range(6)))
+        self.assertFalse(pool.is_running())
+        for job in results:
+            self.assertFalse(job.success)
+            self.assertEqual(job.error, "Canceled by the user.")
+            self.assertIsNotNone(job.finished_at)
+        self.assertEqual([job.attempts for job in results], [1, 1, 0, 0, 0, 0]) # Not retried nor started
+
+        with open(self.log_path) as f:
+            self.assertFalse([line for line in f if line.startswith('end')]) # Processes were killed
+
+        # Canceling with no pending jobs finishes the running ones
+        pool = ReportWorkerPool(2, timeout=30, retries=0)
+        QTimer.singleShot(500, pool.cancel)
+        self.assertEqual(len(self.run_pool(pool, [self.get_job(i, sleep=10) for i in range(2)])), 2)
+
+    def test_empty_jobs(self):
+        pool = ReportWorkerPool(2)
+        self.assertEqual(self.run_pool(pool, list()), list())
+
+if __name__ == '__main__':
+    nose2.main()
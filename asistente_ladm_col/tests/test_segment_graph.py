@@ -0,0 +1,132 @@
+import sys
+import time
+
+import nose2
+
+from qgis.core import (QgsFeature,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsSpatialIndex)
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.utils.segment_graph import SegmentGraph
+
+
+def get_chain_features(num_segments, closed=False, first_id=1, y_offset=0):
+    """
+    Zigzag chain of 2-vertex segments. If closed, the last segment ends where
+    the first one starts.
+    """
+    points = [QgsPointXY(1000000 + i * 10, 1000000 + y_offset + (i % 2) * 10) for i in range(num_segments + 1)]
+    if closed:
+        points[-1] = points[0]
+
+    features = list()
+    for i in range(num_segments):
+        feature = QgsFeature(first_id + i)
+        # Reverse every third segment, since digitizing direction is arbitrary
+        segment = [points[i], points[i + 1]] if i % 3 else [points[i + 1], points[i]]
+        feature.setGeometry(QgsGeometry.fromPolylineXY(segment))
+        features.append(feature)
+    return features
+
+
+def get_connected_segments_recursive(segment, index, dict_features, items, count_d=0, vertex=None):
+    """
+    Recursive traversal, as get_connected_segments_by_selection() used to do
+    """
+    geom = segment.geometry()
+    if vertex is None:
+        vertex = QgsGeometry(geom.vertexAt(0))
+
+    candidate_features = [dict_features[candidate_id] for candidate_id in index.intersects(vertex.boundingBox())]
+    touches = [candidate_feature for candidate_feature in candidate_features
+               if candidate_feature.id() != segment.id() and candidate_feature.geometry().touches(vertex)]
+
+    if len(touches) == 1:
+        next_geom = touches[0].geometry()
+        start_vertex = QgsGeometry(next_geom.vertexAt(0))
+        end_vertex = QgsGeometry(next_geom.vertexAt(len(next_geom.asPolyline()) - 1))
+        next_vertex = end_vertex if vertex.asWkt() == start_vertex.asWkt() else start_vertex
+
+        if touches[0].id() not in items:
+            items.append(touches[0].id())
+            return get_connected_segments_recursive(touches[0], index, dict_features, items, count_d, next_vertex)
+        elif count_d < 1:
+            return get_connected_segments_recursive(touches[0], index, dict_features, items, count_d + 1, next_vertex)
+    return items
+
+
+class TestSegmentGraph(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.qgis_utils = QGISUtils()
+
+    def test_long_chain(self):
+        print("\nINFO: Validating connected segments on a chain of 100k segments...")
+        features = get_chain_features(100000)
+        start = time.time()
+        segment_graph = SegmentGraph(features)
+        boundary = self.qgis_utils.geometry.get_boundary_to_build(features[50000], segment_graph)
+        print("INFO: Graph built and chain walked in {:.3f}s".format(time.time() - start))
+
+        ids = [feature.id() for feature in features]
+        self.assertEqual(boundary, ids)
+        self.assertIn(segment_graph.get_chain(features[0].id()), [ids, ids[::-1]])
+        self.assertEqual(len(self.qgis_utils.geometry.get_connected_segments(features[0], 1, segment_graph)) +
+                         len(self.qgis_utils.geometry.get_connected_segments(features[0], -1, segment_graph)), 99999)
+
+    def test_chains_split_at_junctions(self):
+        # A closed chain plus a branch at one of its nodes (degree 3), and a
+        # separate open chain
+        ring = get_chain_features(20, closed=True)
+        branch = QgsFeature(100)
+        branch.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(1000000, 1000000), QgsPointXY(999990, 999990)]))
+        open_chain = get_chain_features(10, first_id=200, y_offset=1000)
+        segment_graph = SegmentGraph(ring + [branch] + open_chain)
+
+        self.assertEqual(sorted(segment_graph.get_chain(5)), list(range(1, 21)))
+        self.assertEqual(segment_graph.get_chain(100), [100])
+        self.assertEqual(len(set(segment_graph.get_chain(ring[0].id()))), 20)
+        self.assertIn(segment_graph.get_chain(203), [list(range(200, 210)), list(range(209, 199, -1))])
+
+    def test_against_recursive_traversal(self):
+        print("\nINFO: Comparing iterative and recursive connected segment traversals...")
+        features = get_chain_features(800)
+        dict_features = {feature.id(): feature for feature in features}
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(10000)
+        try:
+            start = time.time()
+            index = QgsSpatialIndex()
+            for feature in features:
+                index.insertFeature(feature)
+            recursive = get_connected_segments_recursive(features[0], index, dict_features, list())
+            recursive_time = time.time() - start
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+
+        start = time.time()
+        segment_graph = SegmentGraph(features)
+        iterative = segment_graph.get_connected_segments(features[0].id(), SegmentGraph.get_node(features[0].geometry().vertexAt(0)))
+        iterative_time = time.time() - start
+
+        print("INFO: 800 segments, recursive: {:.3f}s, iterative: {:.3f}s".format(recursive_time, iterative_time))
+        self.assertEqual(iterative, recursive)
+
+        # Long chains exhaust the default recursion limit
+        features = get_chain_features(5000)
+        dict_features = {feature.id(): feature for feature in features}
+        index = QgsSpatialIndex()
+        for feature in features:
+            index.insertFeature(feature)
+        with self.assertRaises(RecursionError):
+            get_connected_segments_recursive(features[0], index, dict_features, list())
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import (BaseHTTPRequestHandler,
+                         HTTPServer)
+
+import nose2
+
+from qgis.testing import (unittest,
+                          start_app)
+
+from qgis.PyQt.QtCore import QEventLoop
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.lib.source_uploader import SourceUploader
+
+LATENCY = 0.3 # seconds
+
+
+class SourceServiceHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the source service: answers each uploaded file with its
+    URL after some latency. Files named 'flaky*' fail the first time with
+    503, and files named 'rejected*' are answered with a JSON error.
+    """
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8', 'replace')
+        file_name = re.search('filename="([^"]+)"', body).group(1)
+
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+            self.server.requests[file_name] = self.server.requests.get(file_name, 0) + 1
+            attempt = self.server.requests[file_name]
+
+        time.sleep(LATENCY)
+
+        if file_name.startswith('flaky') and attempt == 1:
+            status, response = 503, {'status': 503, 'error': 'Service Unavailable', 'message': 'Try again'}
+        elif file_name.startswith('rejected'):
+            status, response = 200, {'status': 400, 'error': 'Bad Request', 'message': 'Rejected'}
+        else:
+            status, response = 200, {'url': '/v1/file/{}'.format(file_name)}
+
+        with self.server.lock:
+            self.server.in_flight -= 1
+
+        content = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestSourceUploader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), SourceServiceHandler)
+        self.server.lock = threading.Lock()
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.service_url = 'http://127.0.0.1:{}/v1/file'.format(self.server.server_address[1])
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def setUp(self):
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.requests = dict()
+
+    def create_files(self, names):
+        files = list()
+        for i, name in enumerate(names):
+            file_path = os.path.join(self.tmp_dir, name)
+            with open(file_path, 'wb') as f:
+                f.write(os.urandom(1024 * (i + 1)))
+            files.append((i, file_path))
+        return files
+
+    def upload(self, uploader, files):
+        results = dict()
+        loop = QEventLoop()
+        uploader.all_finished.connect(lambda urls, errors: results.update(urls=urls, errors=errors))
+        uploader.all_finished.connect(loop.quit)
+        uploader.upload(files)
+        if uploader.is_running():
+            loop.exec_()
+        return results['urls'], results['errors']
+
+    def test_concurrent_uploads(self):
+        print("\nINFO: Validating concurrency and URL mapping of concurrent uploads...")
+        files = self.create_files(['file_{}.pdf'.format(i) for i in range(12)])
+
+        start = time.time()
+        sequential_urls, errors = self.upload(SourceUploader(self.service_url, max_in_flight=1), files)
+        sequential_time = time.time() - start
+        self.assertEqual(errors, dict())
+        self.assertEqual(self.server.max_in_flight, 1)
+
+        self.setUp()
+        uploader = SourceUploader(self.service_url, max_in_flight=4)
+        progress = list()
+        uploader.bytes_progress_changed.connect(lambda sent, total: progress.append((sent, total)))
+        start = time.time()
+        concurrent_urls, errors = self.upload(uploader, files)
+        concurrent_time = time.time() - start
+
+        print("INFO: {} files, sequential: {:.2f}s, concurrent: {:.2f}s".format(len(files), sequential_time, concurrent_time))
+        self.assertEqual(errors, dict())
+        self.assertEqual(uploader.max_running, 4)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+
+        # Each key gets the URL of its own file
+        expected = {key: '/v1/file/{}'.format(os.path.basename(file_path)) for key, file_path in files}
+        self.assertEqual(sequential_urls, expected)
+        self.assertEqual(concurrent_urls, expected)
+
+        self.assertTrue(progress)
+        self.assertTrue(all(sent <= total for sent, total in progress))
+
+    def test_retries_and_errors(self):
+        print("\nINFO: Validating retries and error handling...")
+        files = self.create_files(['flaky_1.pdf', 'rejected_1.pdf', 'ok_1.pdf', 'missing_server_side.pdf'])
+
+        uploader = SourceUploader(self.service_url, max_in_flight=2, retries=2, backoff=0.1)
+        files_progress = list()
+        uploader.files_progress_changed.connect(lambda count, total: files_progress.append((count, total)))
+        urls, errors = self.upload(uploader, files)
+
+        self.assertEqual(urls[0], '/v1/file/flaky_1.pdf')
+        self.assertEqual(self.server.requests['flaky_1.pdf'], 2)
+        self.assertIn(1, errors) # Rejected by the server, not retried
+        self.assertEqual(self.server.requests['rejected_1.pdf'], 1)
+        self.assertEqual(urls[2], '/v1/file/ok_1.pdf')
+        self.assertEqual(files_progress[-1], (4, 4))
+
+        # Unreachable service
+        uploader = SourceUploader('http://127.0.0.1:1/v1/file', max_in_flight=2, retries=1, backoff=0.1)
+        urls, errors = self.upload(uploader, files[:2])
+        self.assertEqual(urls, dict())
+        self.assertEqual(sorted(errors), [0, 1])
+
+    @classmethod
+    def tearDownClass(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    nose2.main()
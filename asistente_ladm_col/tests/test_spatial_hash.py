@@ -0,0 +1,93 @@
+import nose2
+
+from qgis.core import (QgsFeature,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsVectorLayer)
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.table_mapping_config import ID_FIELD
+from asistente_ladm_col.utils.geometry import GeometryUtils
+from asistente_ladm_col.utils.spatial_hash import SpatialHashIndex
+
+
+def get_layer(geometry_type, records):
+    """
+    :param records: List of (t_id, QgsGeometry)
+    """
+    layer = QgsVectorLayer("{}?crs=EPSG:3116&field={}:integer".format(geometry_type, ID_FIELD), geometry_type, "memory")
+    features = list()
+    for t_id, geometry in records:
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([t_id])
+        feature.setGeometry(geometry)
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def get_line(*coordinates):
+    return QgsGeometry.fromPolylineXY([QgsPointXY(1000000 + x, 1000000 + y) for x, y in coordinates])
+
+
+def get_point(x, y):
+    return QgsGeometry.fromPointXY(QgsPointXY(1000000 + x, 1000000 + y))
+
+class TestSpatialHash(unittest.TestCase):
+
+    def test_exact_match(self):
+        print('\nINFO: Validating spatial hash index with exact matching...')
+        index = SpatialHashIndex()
+        index.insert(1.0, 2.0, 'a')
+        index.insert(1.0, 2.0, 'b')
+        index.insert(1.0, 2.0000001, 'c')
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(sorted(index.query(1.0, 2.0)), ['a', 'b'])
+        self.assertEqual(index.query(5.0, 5.0), [])
+
+    def test_tolerance_match(self):
+        print('\nINFO: Validating spatial hash index with tolerance...')
+        index = SpatialHashIndex(0.01)
+        index.insert(1000.0, 1000.0, 1)
+        index.insert(1000.009, 1000.0, 2) # Neighbouring cell
+        index.insert(1000.0, 1000.02, 3) # Out of tolerance
+
+        self.assertEqual(sorted(index.query(1000.0, 1000.0)), [1, 2])
+        self.assertEqual(index.query(999.995, 1000.0), [1])
+        self.assertEqual(index.query(1000.0, 1000.025), [3])
+
+    def test_pair_boundary_boundary_point(self):
+        print('\nINFO: Validating pairs of boundaries and boundary points found through the spatial hash index...')
+        boundary_layer = get_layer("LineString", [(1, get_line((0, 0), (10, 0))),
+                                                  (2, get_line((10, 0), (10, 10))),
+                                                  (3, get_line((0, 0), (0, 10), (-10, 10), (0, 0)))]) # Closed: (0, 0) twice
+        boundary_point_layer = get_layer("Point", [(11, get_point(0, 0)),
+                                                   (12, get_point(10, 0.0000005)), # Within default tolerance
+                                                   (13, get_point(10, 0.01)), # Out of default tolerance
+                                                   (14, get_point(5, 5))]) # No vertex around
+        geometry = GeometryUtils()
+
+        pairs = geometry.get_pair_boundary_boundary_point(boundary_layer, boundary_point_layer, use_selection=False)
+        self.assertEqual(len(pairs), len(set(pairs))) # Repeated vertices give a single pair
+        self.assertEqual(sorted(pairs), [(1, 11), (1, 12), (2, 12), (3, 11)])
+
+        pairs = geometry.get_pair_boundary_boundary_point(boundary_layer, boundary_point_layer, use_selection=False, tolerance=0.1)
+        self.assertEqual(sorted(pairs), [(1, 11), (1, 12), (1, 13), (2, 12), (2, 13), (3, 11)])
+
+        boundary_layer.selectByIds([feature.id() for feature in boundary_layer.getFeatures() if feature[ID_FIELD] == 2])
+        pairs = geometry.get_pair_boundary_boundary_point(boundary_layer, boundary_point_layer)
+        self.assertEqual(sorted(pairs), [(2, 12)])
+
+        empty_point_layer = get_layer("Point", [])
+        self.assertEqual(geometry.get_pair_boundary_boundary_point(boundary_layer, empty_point_layer, use_selection=False), [])
+
+    def tearDownClass():
+        print('tearDown test_spatial_hash')
+
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import time
+
+import nose2
+
+from qgis.core import (QgsVectorLayer,
+                       QgsWkbTypes)
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.general_config import STYLES_DIR
+from asistente_ladm_col.config.symbology import (CUSTOM_ERROR_LAYERS,
+                                                 ERROR_LAYER,
+                                                 LAYER_QML_STYLE)
+from asistente_ladm_col.utils.symbology import SymbologyUtils
+
+WKB_TYPES = {QgsWkbTypes.PointGeometry: "Point",
+             QgsWkbTypes.LineGeometry: "LineString",
+             QgsWkbTypes.PolygonGeometry: "Polygon"}
+
+
+def get_ladm_layers():
+    """
+    :return: List of (layer, is_error_layer) for every layer with a style
+    """
+    layers = [(QgsVectorLayer("{}?crs=EPSG:3116".format(WKB_TYPES[geometry_type]), name, "memory"), False)
+              for name, styles in LAYER_QML_STYLE.items() if name != ERROR_LAYER for geometry_type in styles]
+    layers.extend((QgsVectorLayer("Point?crs=EPSG:3116", name, "memory"), True) for name in CUSTOM_ERROR_LAYERS)
+    layers.extend((QgsVectorLayer("{}?crs=EPSG:3116".format(WKB_TYPES[geometry_type]), "errors", "memory"), True)
+                  for geometry_type in LAYER_QML_STYLE[ERROR_LAYER])
+    return layers
+
+
+def count_reads(symbology):
+    reads = list()
+    read_style_file = symbology.read_style_file
+
+    def counting_read_style_file(style_path):
+        reads.append(style_path)
+        return read_style_file(style_path)
+
+    symbology.read_style_file = counting_read_style_file
+    return reads
+
+
+class TestSymbologyCache(unittest.TestCase):
+
+    def test_benchmark_styling_ladm_layers(self):
+        print("\nINFO: Benchmarking styling of the LADM_COL layer set with and without style cache...")
+        rounds = 20
+        symbology = SymbologyUtils()
+        reads = count_reads(symbology)
+
+        def style_layers(clear_cache):
+            start = time.time()
+            for i in range(rounds):
+                if clear_cache:
+                    symbology.clear_style_cache()
+                for layer, is_error_layer in get_ladm_layers():
+                    symbology.set_layer_style_from_qml(layer, is_error_layer)
+                    self.assertIsNotNone(layer.renderer())
+            return time.time() - start
+
+        uncached_time = style_layers(True)
+        uncached_reads = len(reads)
+        del reads[:]
+        cached_time = style_layers(False)
+
+        print("INFO: {} rounds of {} layers: {} file reads in {:.3f}s without cache, {} file reads in {:.3f}s with cache".format(
+            rounds, len(get_ladm_layers()), uncached_reads, uncached_time, len(reads), cached_time))
+        self.assertEqual(len(reads), len(set(reads))) # Each style file is read once
+        self.assertEqual(uncached_reads, rounds * len(reads))
+
+    def test_cached_styles_are_clones(self):
+        print("\nINFO: Validating cached styles are cloned and invalidated on file changes...")
+        style_path = os.path.join(tempfile.mkdtemp(), 'style_boundary.qml')
+        shutil.copy(os.path.join(STYLES_DIR, 'style_boundary.qml'), style_path)
+        symbology = SymbologyUtils()
+        reads = count_reads(symbology)
+
+        renderer_1, labeling_1 = symbology.get_style_from_qml_file(style_path)
+        renderer_2, labeling_2 = symbology.get_style_from_qml_file(style_path)
+        self.assertEqual(len(reads), 1)
+        self.assertIsNotNone(renderer_1)
+        self.assertIsNot(renderer_1, renderer_2)
+        self.assertEqual(renderer_1.type(), renderer_2.type())
+        if labeling_1 is not None:
+            self.assertIsNot(labeling_1, labeling_2)
+
+        # Layers take ownership of the renderer, so they never share one
+        layers = [QgsVectorLayer("LineString?crs=EPSG:3116", "boundaries", "memory") for i in range(2)]
+        for layer in layers:
+            layer.setRenderer(symbology.get_style_from_qml_file(style_path)[0])
+        self.assertIsNot(layers[0].renderer(), layers[1].renderer())
+
+        stat = os.stat(style_path)
+        os.utime(style_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        symbology.get_style_from_qml_file(style_path)
+        self.assertEqual(len(reads), 2)
+
+        self.assertEqual(symbology.get_style_from_qml_file(style_path + '.missing'), (None, None))
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,363 @@
+import time
+
+import nose2
+
+from qgis.core import (QgsApplication,
+                       QgsFeature,
+                       QgsField,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsVectorLayer,
+                       QgsWkbTypes,
+                       NULL)
+from qgis.testing import (unittest,
+                          start_app)
+from qgis.PyQt.QtCore import QVariant
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+import processing
+from processing.core.Processing import Processing
+from qgis.analysis import QgsNativeAlgorithms
+
+from asistente_ladm_col.config.general_config import (DEFAULT_EPSG,
+                                                      TranslatableConfigStrings)
+from asistente_ladm_col.config.table_mapping_config import (ID_FIELD,
+                                                            BFS_TABLE_BOUNDARY_POINT_FIELD,
+                                                            LESS_TABLE_BOUNDARY_FIELD,
+                                                            LESS_TABLE_PLOT_FIELD,
+                                                            MOREBFS_TABLE_BOUNDARY_FIELD,
+                                                            MOREBFS_TABLE_PLOT_FIELD,
+                                                            POINT_BFS_TABLE_BOUNDARY_FIELD)
+from asistente_ladm_col.tests.utils import import_projectgenerator
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+from asistente_ladm_col.utils.quality import QualityUtils
+
+import_projectgenerator()
+
+translated_strings = TranslatableConfigStrings()
+
+
+def get_boundary_points_errors_with_processing(boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field=ID_FIELD):
+    """
+    Boundary points not covered by boundary nodes, as the check used to find
+    them: extract vertices and join them by location with processing, and
+    deduplicate on lists.
+    """
+    tmp_boundary_nodes_layer = processing.run("native:extractvertices", {'INPUT': boundary_layer, 'OUTPUT': 'memory:'})['OUTPUT']
+    boundary_nodes_layer = QgsVectorLayer("Point?crs=EPSG:{}".format(DEFAULT_EPSG), 'unique boundary nodes', "memory")
+    boundary_nodes_layer.dataProvider().addAttributes([QgsField(id_field, QVariant.Int)])
+    boundary_nodes_layer.updateFields()
+
+    filter_fs = []
+    fs = []
+    for f in tmp_boundary_nodes_layer.getFeatures():
+        item = [f[id_field], f.geometry().asWkt()]
+        if item not in filter_fs:
+            filter_fs.append(item)
+            fs.append(f)
+    boundary_nodes_layer.dataProvider().addFeatures(fs)
+
+    spatial_join_layer = processing.run("qgis:joinattributesbylocation",
+                                        {'INPUT': boundary_point_layer,
+                                         'JOIN': boundary_nodes_layer,
+                                         'PREDICATE': [0],
+                                         'JOIN_FIELDS': [ID_FIELD],
+                                         'METHOD': 0,
+                                         'DISCARD_NONMATCHING': False,
+                                         'PREFIX': '',
+                                         'OUTPUT': 'memory:'})['OUTPUT']
+
+    dict_boundary_point = {feature[id_field]: feature for feature in boundary_point_layer.getFeatures()}
+    list_point_bfs = [{'boundary_point_id': feature[BFS_TABLE_BOUNDARY_POINT_FIELD], 'boundary_id': feature[POINT_BFS_TABLE_BOUNDARY_FIELD]}
+                      for feature in point_bfs_layer.getFeatures()]
+
+    errors = list()
+    for feature in spatial_join_layer.getFeatures():
+        item_sj = {'boundary_point_id': feature[id_field], 'boundary_id': feature[id_field + '_2']}
+        if item_sj['boundary_id'] == NULL:
+            errors.append((item_sj['boundary_point_id'], None, translated_strings.ERROR_BOUNDARY_POINT_IS_NOT_COVERED_BY_BOUNDARY_NODE))
+        elif item_sj not in list_point_bfs:
+            errors.append((item_sj['boundary_point_id'], item_sj['boundary_id'], translated_strings.ERROR_NO_FOUND_POINT_BFS))
+        elif list_point_bfs.count(item_sj) > 1:
+            errors.append((item_sj['boundary_point_id'], item_sj['boundary_id'], translated_strings.ERROR_DUPLICATE_POINT_BFS))
+
+    return [(point_id, boundary_id, error_type, dict_boundary_point[point_id].geometry().asWkt())
+            for point_id, boundary_id, error_type in set(errors)]
+
+
+def get_boundary_point_layers(num_points, vertices_per_boundary=10):
+    """
+    Boundaries digitized along rows, sharing their end vertices, with one
+    boundary point per vertex. Some points are displaced (not covered by
+    boundary nodes) and some point-boundary relations are missing or
+    duplicated in the point_bfs table.
+    """
+    boundary_layer = QgsVectorLayer("LineString?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "boundaries", "memory")
+    boundary_point_layer = QgsVectorLayer("Point?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "boundary points", "memory")
+    point_bfs_layer = QgsVectorLayer("None?field={}:integer&field={}:integer".format(BFS_TABLE_BOUNDARY_POINT_FIELD,
+                                                                                   POINT_BFS_TABLE_BOUNDARY_FIELD), "point_bfs", "memory")
+
+    boundaries, points, point_bfs = list(), list(), list()
+    row_length = 1000
+    for i in range(num_points):
+        row, column = divmod(i, row_length)
+        point = QgsPointXY(1000000 + column * 10, 1000000 + row * 100)
+        boundary_ids = [row * row_length + column // vertices_per_boundary]
+        if column % vertices_per_boundary == 0 and column > 0:
+            boundary_ids.insert(0, boundary_ids[0] - 1) # Shared end vertex
+
+        feature = QgsFeature()
+        feature.setAttributes([i + 1])
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(point.x() + 1, point.y()) if i % 101 == 0 else point))
+        points.append(feature)
+
+        for boundary_id in boundary_ids:
+            if i % 7 == 0:
+                continue # Not registered
+            for j in range(2 if i % 11 == 0 else 1):
+                relation = QgsFeature()
+                relation.setAttributes([i + 1, boundary_id + 1])
+                point_bfs.append(relation)
+
+    vertices = dict()
+    for feature in points:
+        i = feature.attributes()[0] - 1
+        row, column = divmod(i, row_length)
+        boundary_id = row * row_length + column // vertices_per_boundary
+        vertices.setdefault(boundary_id, list()).append(QgsPointXY(1000000 + column * 10, 1000000 + row * 100))
+    for boundary_id, boundary_vertices in vertices.items():
+        next_vertices = vertices.get(boundary_id + 1)
+        if next_vertices and next_vertices[0].y() == boundary_vertices[0].y():
+            boundary_vertices = boundary_vertices + [next_vertices[0]]
+        if len(boundary_vertices) < 2:
+            continue
+        feature = QgsFeature()
+        feature.setAttributes([boundary_id + 1])
+        feature.setGeometry(QgsGeometry.fromPolylineXY(boundary_vertices))
+        boundaries.append(feature)
+
+    boundary_layer.dataProvider().addFeatures(boundaries)
+    boundary_point_layer.dataProvider().addFeatures(points)
+    point_bfs_layer.dataProvider().addFeatures(point_bfs)
+    return boundary_point_layer, boundary_layer, point_bfs_layer
+
+
+def has_line(intersection):
+    if intersection.type() == QgsWkbTypes.LineGeometry:
+        return True
+    if intersection.type() == QgsWkbTypes.UnknownGeometry:
+        for part in intersection.asGeometryCollection():
+            if part.type() == QgsWkbTypes.LineGeometry:
+                return True
+    return False
+
+
+def get_plot_topology_errors_with_processing(geometry, plot_layer, boundary_layer, more_bfs_layer, less_layer, id_field=ID_FIELD):
+    """
+    Topology table errors of plots covered by boundaries, as the check used
+    to find them: spatial joins of plot lines and inner rings with
+    boundaries, and list based bookkeeping.
+    :return: Set of (plot id, boundary id, error type, error geometry WKT)
+    """
+    join_params = {'JOIN': boundary_layer, 'PREDICATE': [0], 'JOIN_FIELDS': [id_field], 'METHOD': 0,
+                   'DISCARD_NONMATCHING': True, 'PREFIX': '', 'OUTPUT': 'memory:'}
+    plot_as_lines_layer = processing.run("ladm_col:polygonstolines", {'INPUT': plot_layer, 'OUTPUT': 'memory:'})['OUTPUT']
+    plots_with_geometric_errors = {diff['id'] for diff in geometry.difference_plot_boundary(plot_as_lines_layer, boundary_layer)}
+    dict_boundary = {feature[id_field]: feature for feature in boundary_layer.getFeatures()}
+    list_more_bfs = [{'plot_id': f[MOREBFS_TABLE_PLOT_FIELD], 'boundary_id': f[MOREBFS_TABLE_BOUNDARY_FIELD]} for f in more_bfs_layer.getFeatures()]
+    list_less = [{'plot_id': f[LESS_TABLE_PLOT_FIELD], 'boundary_id': f[LESS_TABLE_BOUNDARY_FIELD]} for f in less_layer.getFeatures()]
+
+    inner_rings_layer = geometry.get_inner_rings_layer(plot_layer)
+    join_rings_layer = processing.run("qgis:joinattributesbylocation", dict(join_params, INPUT=inner_rings_layer))['OUTPUT']
+    join_plots_layer = processing.run("qgis:joinattributesbylocation", dict(join_params, INPUT=plot_as_lines_layer))['OUTPUT']
+    list_ring_boundary = [{'plot_id': f[id_field], 'boundary_id': f[id_field + '_2']} for f in join_rings_layer.getFeatures()]
+
+    errors = set()
+    for feature in join_plots_layer.getFeatures():
+        item = {'plot_id': feature[id_field], 'boundary_id': feature[id_field + '_2']}
+        if item['plot_id'] in plots_with_geometric_errors or item in list_ring_boundary:
+            continue
+        if has_line(feature.geometry().intersection(dict_boundary[item['boundary_id']].geometry())):
+            count = list_more_bfs.count(item)
+            if count != 1:
+                error_type = translated_strings.ERROR_DUPLICATE_MORE_BOUNDARY_FACE_STRING_TABLE if count else translated_strings.ERROR_NO_MORE_BOUNDARY_FACE_STRING_TABLE
+                errors.add((item['plot_id'], item['boundary_id'], error_type, feature.geometry().asWkt()))
+
+    for feature in join_rings_layer.getFeatures():
+        item = {'plot_id': feature[id_field], 'boundary_id': feature[id_field + '_2']}
+        if item['plot_id'] in plots_with_geometric_errors:
+            continue
+        if has_line(feature.geometry().intersection(dict_boundary[item['boundary_id']].geometry())):
+            count = list_less.count(item)
+            if count != 1:
+                error_type = translated_strings.ERROR_DUPLICATE_LESS_TABLE if count else translated_strings.ERROR_NO_LESS_TABLE
+                errors.add((item['plot_id'], item['boundary_id'], error_type, feature.geometry().asWkt()))
+
+    return errors
+
+
+def get_plot_grid_layers(size):
+    """
+    Grid of size x size square plots, with one boundary per cell side. Every
+    fourth plot has a hole bounded by a closed boundary. Some plot-boundary
+    relations are missing or duplicated in more_bfs and less, and a few
+    sides have no boundary (plots not covered by boundaries).
+    """
+    plot_layer = QgsVectorLayer("Polygon?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "plots", "memory")
+    boundary_layer = QgsVectorLayer("LineString?crs=EPSG:3116&field={}:integer".format(ID_FIELD), "boundaries", "memory")
+    more_bfs_layer = QgsVectorLayer("None?field={}:integer&field={}:integer".format(MOREBFS_TABLE_PLOT_FIELD, MOREBFS_TABLE_BOUNDARY_FIELD), "more_bfs", "memory")
+    less_layer = QgsVectorLayer("None?field={}:integer&field={}:integer".format(LESS_TABLE_PLOT_FIELD, LESS_TABLE_BOUNDARY_FIELD), "less", "memory")
+
+    def point(x, y):
+        return QgsPointXY(1000000 + x * 10, 1000000 + y * 10)
+
+    boundary_ids = dict()
+    boundaries = list()
+    def add_boundary(key, vertices):
+        if key in boundary_ids:
+            return boundary_ids[key]
+        boundary_ids[key] = len(boundary_ids) + 1
+        if len(boundary_ids) % 97 != 0: # Missing boundary
+            feature = QgsFeature()
+            feature.setAttributes([boundary_ids[key]])
+            feature.setGeometry(QgsGeometry.fromPolylineXY(vertices))
+            boundaries.append(feature)
+        return boundary_ids[key]
+
+    plots, more_bfs, less = list(), list(), list()
+    for row in range(size):
+        for column in range(size):
+            plot_id = row * size + column + 1
+            exterior = [point(column, row), point(column + 1, row), point(column + 1, row + 1), point(column, row + 1), point(column, row)]
+            rings = [exterior]
+            relations = [(more_bfs, add_boundary(('h', column, row), exterior[0:2])),
+                         (more_bfs, add_boundary(('v', column + 1, row), exterior[1:3])),
+                         (more_bfs, add_boundary(('h', column, row + 1), exterior[3:1:-1])),
+                         (more_bfs, add_boundary(('v', column, row), exterior[4:2:-1]))]
+            if plot_id % 4 == 0:
+                hole = [QgsPointXY(p.x() + dx, p.y() + dy) for p, dx, dy in [(exterior[0], 3, 3), (exterior[0], 3, 7), (exterior[0], 7, 7), (exterior[0], 7, 3), (exterior[0], 3, 3)]]
+                rings.append(hole)
+                relations.append((less, add_boundary(('hole', column, row), hole)))
+
+            feature = QgsFeature()
+            feature.setAttributes([plot_id])
+            feature.setGeometry(QgsGeometry.fromPolygonXY(rings))
+            plots.append(feature)
+
+            for i, (table, boundary_id) in enumerate(relations):
+                if (plot_id + i) % 13 == 0:
+                    continue # Not registered
+                for j in range(2 if (plot_id + i) % 17 == 0 else 1):
+                    relation = QgsFeature()
+                    relation.setAttributes([plot_id, boundary_id])
+                    table.append(relation)
+
+    plot_layer.dataProvider().addFeatures(plots)
+    boundary_layer.dataProvider().addFeatures(boundaries)
+    more_bfs_layer.dataProvider().addFeatures(more_bfs)
+    less_layer.dataProvider().addFeatures(less)
+    return plot_layer, boundary_layer, more_bfs_layer, less_layer
+
+
+def get_plot_error_layer():
+    error_layer = QgsVectorLayer("MultiLineString?crs=EPSG:3116", 'error layer', "memory")
+    error_layer.dataProvider().addAttributes([QgsField('plot_id', QVariant.Int),
+                                              QgsField('boundary_id', QVariant.Int),
+                                              QgsField('error_type', QVariant.String)])
+    error_layer.updateFields()
+    return error_layer
+
+
+def get_boundary_point_error_layer():
+    error_layer = QgsVectorLayer("Point?crs=EPSG:3116", 'error layer', "memory")
+    error_layer.dataProvider().addAttributes([QgsField('boundary_point_id', QVariant.Int),
+                                              QgsField('boundary_id', QVariant.Int),
+                                              QgsField('error_type', QVariant.String)])
+    error_layer.updateFields()
+    return error_layer
+
+
+class TestTopologyChecks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        Processing.initialize()
+        QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms())
+        self.qgis_utils = QGISUtils()
+        self.quality = QualityUtils(self.qgis_utils)
+
+    def get_boundary_points_errors(self, boundary_point_layer, boundary_layer, point_bfs_layer, error_layer):
+        features = self.quality.get_boundary_points_features_not_covered_by_boundary_nodes(
+            boundary_point_layer, boundary_layer, point_bfs_layer, error_layer)
+        return [(feature[0], feature[1] if feature[1] != NULL else None, feature[2], feature.geometry().asWkt())
+                for feature in features]
+
+    def test_boundary_points_against_processing(self):
+        print("\nINFO: Validating boundary points covered by boundary nodes against the processing based check...")
+        layers = get_boundary_point_layers(3000)
+        error_layer = get_boundary_point_error_layer()
+
+        errors = self.get_boundary_points_errors(*layers, error_layer)
+        expected = get_boundary_points_errors_with_processing(*layers, error_layer)
+        self.assertTrue(errors)
+        self.assertEqual(len(errors), len(set(errors)))
+        self.assertEqual(sorted(errors), sorted(expected))
+
+    def test_boundary_points_within_tolerance(self):
+        print("\nINFO: Validating boundary points within the vertex match tolerance of boundary nodes...")
+        boundary_point_layer, boundary_layer, point_bfs_layer = get_boundary_point_layers(0)
+
+        boundary = QgsFeature()
+        boundary.setAttributes([1])
+        boundary.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(1000000, 1000000), QgsPointXY(1000010, 1000000)]))
+        boundary_layer.dataProvider().addFeatures([boundary])
+
+        points, point_bfs = list(), list()
+        for point_id, x in [(1, 1000000.0000001), (2, 1000010.00001)]: # Within and out of tolerance
+            point = QgsFeature()
+            point.setAttributes([point_id])
+            point.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, 1000000)))
+            points.append(point)
+            relation = QgsFeature()
+            relation.setAttributes([point_id, 1])
+            point_bfs.append(relation)
+        boundary_point_layer.dataProvider().addFeatures(points)
+        point_bfs_layer.dataProvider().addFeatures(point_bfs)
+
+        errors = self.get_boundary_points_errors(boundary_point_layer, boundary_layer, point_bfs_layer, get_boundary_point_error_layer())
+        self.assertEqual([error[:3] for error in errors],
+                         [(2, None, translated_strings.ERROR_BOUNDARY_POINT_IS_NOT_COVERED_BY_BOUNDARY_NODE)])
+
+    def test_benchmark_boundary_points(self):
+        print("\nINFO: Benchmarking boundary points covered by boundary nodes...")
+        for num_points in [1000, 10000, 100000, 500000]:
+            layers = get_boundary_point_layers(num_points)
+            error_layer = get_boundary_point_error_layer()
+            start = time.time()
+            errors = self.get_boundary_points_errors(*layers, error_layer)
+            print("INFO: {} boundary points, {} errors in {:.3f}s".format(num_points, len(errors), time.time() - start))
+
+    def test_plots_covered_by_boundaries_against_processing(self):
+        print("\nINFO: Validating plots covered by boundaries against the processing based check...")
+        layers = get_plot_grid_layers(12)
+        features = self.quality.get_plot_features_not_covered_by_boundaries(*layers, get_plot_error_layer())
+        errors = [(feature[0], feature[1], feature[2], feature.geometry().asWkt()) for feature in features
+                  if feature[2] != translated_strings.ERROR_PLOT_IS_NOT_COVERED_BY_BOUNDARY]
+
+        self.assertTrue(errors)
+        self.assertEqual(len(errors), len(set(errors)))
+        self.assertEqual(set(errors), get_plot_topology_errors_with_processing(self.qgis_utils.geometry, *layers))
+        self.assertTrue(any(feature[2] == translated_strings.ERROR_PLOT_IS_NOT_COVERED_BY_BOUNDARY for feature in features))
+
+    def test_benchmark_plots_covered_by_boundaries(self):
+        print("\nINFO: Benchmarking plots covered by boundaries...")
+        for size in [10, 30, 60]:
+            layers = get_plot_grid_layers(size)
+            start = time.time()
+            features = self.quality.get_plot_features_not_covered_by_boundaries(*layers, get_plot_error_layer())
+            elapsed = time.time() - start
+            print("INFO: {} plots, {} errors in {:.3f}s ({:.0f} plots/s)".format(size * size, len(features), elapsed, size * size / elapsed))
+
+if __name__ == '__main__':
+    nose2.main()
@@ -0,0 +1,160 @@
+import time
+
+import nose2
+
+from qgis.core import QgsWkbTypes
+from qgis.testing import (unittest,
+                          start_app)
+
+start_app() # need to start before asistente_ladm_col.tests.utils
+
+from asistente_ladm_col.config.table_mapping_config import (BFS_TABLE_BOUNDARY_POINT_FIELD,
+                                                            BOUNDARY_POINT_TABLE,
+                                                            BOUNDARY_TABLE,
+                                                            LESS_TABLE,
+                                                            LESS_TABLE_BOUNDARY_FIELD,
+                                                            LESS_TABLE_PLOT_FIELD,
+                                                            MORE_BOUNDARY_FACE_STRING_TABLE,
+                                                            MOREBFS_TABLE_BOUNDARY_FIELD,
+                                                            MOREBFS_TABLE_PLOT_FIELD,
+                                                            PLOT_TABLE,
+                                                            POINT_BFS_TABLE_BOUNDARY_FIELD,
+                                                            POINT_BOUNDARY_FACE_STRING_TABLE)
+from asistente_ladm_col.tests.utils import (clean_table,
+                                            get_dbconn,
+                                            import_projectgenerator,
+                                            restore_schema)
+from asistente_ladm_col.utils.qgis_utils import QGISUtils
+
+import_projectgenerator()
+
+SCHEMA_NAME = 'test_ladm_col_validations_against_topology_tables'
+TOPOLOGY_TABLES = {POINT_BOUNDARY_FACE_STRING_TABLE: (POINT_BFS_TABLE_BOUNDARY_FIELD, BFS_TABLE_BOUNDARY_POINT_FIELD),
+                   MORE_BOUNDARY_FACE_STRING_TABLE: (MOREBFS_TABLE_PLOT_FIELD, MOREBFS_TABLE_BOUNDARY_FIELD),
+                   LESS_TABLE: (LESS_TABLE_PLOT_FIELD, LESS_TABLE_BOUNDARY_FIELD)}
+
+
+class TestTopologyTables(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        restore_schema(SCHEMA_NAME)
+        self.db_connection = get_dbconn(SCHEMA_NAME)
+        result = self.db_connection.test_connection()
+        print('test_connection', result)
+        if not result[1]:
+            print('The test connection is not working')
+            return
+
+        self.qgis_utils = QGISUtils()
+        self.boundary_layer = self.qgis_utils.get_layer(self.db_connection, BOUNDARY_TABLE, load=False)
+        self.boundary_point_layer = self.qgis_utils.get_layer(self.db_connection, BOUNDARY_POINT_TABLE, load=False)
+        self.plot_layer = self.qgis_utils.get_layer(self.db_connection, PLOT_TABLE, QgsWkbTypes.PolygonGeometry, load=False)
+        self.topology_layers = {table: self.qgis_utils.get_layer(self.db_connection, table, load=False)
+                                for table in TOPOLOGY_TABLES}
+
+        # The schema is shared with other tests, so its topology tables are restored in tearDownClass
+        # (a backup left by an interrupted run holds the original rows and is kept)
+        self.execute_write_query("".join("""CREATE TABLE IF NOT EXISTS "{0}"."{1}_backup" AS SELECT * FROM "{0}"."{1}";""".format(SCHEMA_NAME, table)
+                                         for table in TOPOLOGY_TABLES))
+
+    @classmethod
+    def execute_write_query(self, query):
+        cur = self.db_connection.conn.cursor()
+        cur.execute(query)
+        self.db_connection.conn.commit()
+        cur.close()
+
+    def get_table_contents(self, table):
+        res, records = self.db_connection.execute_sql_query("""SELECT {} AS first_id, {} AS second_id FROM "{}"."{}";""".format(
+            TOPOLOGY_TABLES[table][0], TOPOLOGY_TABLES[table][1], SCHEMA_NAME, table))
+        self.assertTrue(res, records)
+        return sorted((record['first_id'], record['second_id']) for record in records)
+
+    def clean_topology_tables(self):
+        for table in TOPOLOGY_TABLES:
+            clean_table(SCHEMA_NAME, table)
+            self.topology_layers[table].reload()
+
+    def fill_with_sql(self):
+        boundary_uri = self.boundary_layer.dataProvider().uri()
+        point_uri = self.boundary_point_layer.dataProvider().uri()
+        plot_uri = self.plot_layer.dataProvider().uri()
+        res, point_counts = self.db_connection.fill_topology_table_pointbfs(
+            boundary_uri.table(), boundary_uri.geometryColumn(), point_uri.table(), point_uri.geometryColumn())
+        self.assertTrue(res, point_counts)
+        res, plot_counts = self.db_connection.fill_topology_tables_morebfs_less(
+            plot_uri.table(), plot_uri.geometryColumn(), boundary_uri.table(), boundary_uri.geometryColumn())
+        self.assertTrue(res, plot_counts)
+        plot_counts[POINT_BOUNDARY_FACE_STRING_TABLE] = point_counts
+        return plot_counts
+
+    def fill_with_python(self):
+        id_pairs = {POINT_BOUNDARY_FACE_STRING_TABLE: self.qgis_utils.geometry.get_pair_boundary_boundary_point(
+            self.boundary_layer, self.boundary_point_layer, use_selection=False)}
+        id_pairs[MORE_BOUNDARY_FACE_STRING_TABLE], id_pairs[LESS_TABLE] = self.qgis_utils.geometry.get_pair_boundary_plot(
+            self.boundary_layer, self.plot_layer, use_selection=False)
+        return {table: (self.qgis_utils.add_topology_pairs(self.topology_layers[table], *TOPOLOGY_TABLES[table], id_pairs[table]),
+                        len(set(id_pairs[table])))
+                for table in TOPOLOGY_TABLES}
+
+    def test_sql_and_python_paths_match(self):
+        print("\nINFO: Validating topology tables filled with SQL spatial joins against the Python path...")
+        self.clean_topology_tables()
+        python_counts = self.fill_with_python()
+        python_contents = {table: self.get_table_contents(table) for table in TOPOLOGY_TABLES}
+
+        self.clean_topology_tables()
+        sql_counts = self.fill_with_sql()
+        sql_contents = {table: self.get_table_contents(table) for table in TOPOLOGY_TABLES}
+
+        self.assertEqual(sql_contents, python_contents)
+        self.assertEqual(sql_counts, python_counts)
+        self.assertTrue(sql_contents[POINT_BOUNDARY_FACE_STRING_TABLE])
+        self.assertTrue(sql_contents[MORE_BOUNDARY_FACE_STRING_TABLE])
+
+        # Existing pairs are skipped by both paths
+        for table, counts in self.fill_with_sql().items():
+            self.assertEqual(counts[0], 0, table)
+        for table in TOPOLOGY_TABLES:
+            self.topology_layers[table].reload()
+        for table, counts in self.fill_with_python().items():
+            self.assertEqual(counts[0], 0, table)
+        self.assertEqual({table: self.get_table_contents(table) for table in TOPOLOGY_TABLES}, sql_contents)
+
+    def test_sql_path_with_selection(self):
+        print("\nINFO: Validating topology tables filled with SQL spatial joins for selected features...")
+        self.clean_topology_tables()
+        plot_ids = [feature.id() for feature in self.plot_layer.getFeatures()][:1]
+        self.plot_layer.selectByIds(plot_ids)
+        boundary_uri = self.boundary_layer.dataProvider().uri()
+        plot_uri = self.plot_layer.dataProvider().uri()
+        res, counts = self.db_connection.fill_topology_tables_morebfs_less(
+            plot_uri.table(), plot_uri.geometryColumn(), boundary_uri.table(), boundary_uri.geometryColumn(),
+            plot_ids=self.qgis_utils.get_selected_ids(self.plot_layer))
+        self.assertTrue(res, counts)
+
+        more_pairs, less_pairs = self.qgis_utils.geometry.get_pair_boundary_plot(self.boundary_layer, self.plot_layer)
+        self.assertEqual(self.get_table_contents(MORE_BOUNDARY_FACE_STRING_TABLE), sorted(set(more_pairs)))
+        self.assertEqual(self.get_table_contents(LESS_TABLE), sorted(set(less_pairs)))
+        self.plot_layer.removeSelection()
+
+    def test_benchmark_topology_tables(self):
+        print("\nINFO: Benchmarking topology table filling...")
+        for name, fill in [('Python', self.fill_with_python), ('SQL', self.fill_with_sql)]:
+            self.clean_topology_tables()
+            start = time.time()
+            counts = fill()
+            print("INFO: {} path: {} records saved in {:.3f}s".format(
+                name, sum(saved for saved, found in counts.values()), time.time() - start))
+
+    @classmethod
+    def tearDownClass(self):
+        self.execute_write_query("".join("""DELETE FROM "{0}"."{1}";
+                                            INSERT INTO "{0}"."{1}" SELECT * FROM "{0}"."{1}_backup";
+                                            DROP TABLE "{0}"."{1}_backup";""".format(SCHEMA_NAME, table)
+                                         for table in TOPOLOGY_TABLES))
+        self.db_connection.close_connection()
+
+if __name__ == '__main__':
+    nose2.main()
@@ -21,6 +21,11 @@ import os
 from shutil import copyfile
 from sys import platform
 
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
 import psycopg2
 import qgis.utils
 from qgis.core import QgsApplication
@@ -116,6 +121,36 @@ def clean_table(schema, table):
     if query is not None:
         print('The clean {}.{} is not working'.format(schema, table))
 
+def create_overlapping_polygons_table(db, table, count, columns=300):
+    """
+    Create a table with a grid of 100 m squares, `columns` squares per row,
+    where one every 10 squares is shifted 20 m, overlapping its neighbour,
+    and one every 1000 contains a small square.
+    """
+    cur = db.conn.cursor()
+    cur.execute("""
+        DROP TABLE IF EXISTS {schema}.{table};
+        CREATE TABLE {schema}.{table} (t_id serial PRIMARY KEY, poligono_creado geometry(MultiPolygon, 3116));
+        INSERT INTO {schema}.{table} (poligono_creado)
+        SELECT ST_Multi(ST_MakeEnvelope(x, y, x + 100, y + 100, 3116))
+        FROM (SELECT 1000000 + (i % {columns}) * 100 + CASE WHEN i % 10 = 0 THEN 20 ELSE 0 END AS x,
+                     1000000 + (i / {columns}) * 100 AS y
+              FROM generate_series(0, {max_i}) AS i) AS cells;
+        INSERT INTO {schema}.{table} (poligono_creado)
+        SELECT ST_Multi(ST_MakeEnvelope(x + 40, y + 40, x + 60, y + 60, 3116))
+        FROM (SELECT 1000000 + (i % {columns}) * 100 AS x, 1000000 + (i / {columns}) * 100 AS y
+              FROM generate_series(5, {max_i}, 1000) AS i) AS cells;
+        CREATE INDEX ON {schema}.{table} USING gist (poligono_creado);
+        ANALYZE {schema}.{table};""".format(schema=db.schema, table=table, columns=columns, max_i=count - 1))
+    db.conn.commit()
+    cur.close()
+
+def drop_table(db, table):
+    cur = db.conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS {}.{}".format(db.schema, table))
+    db.conn.commit()
+    cur.close()
+
 def get_iface():
     global iface
 
@@ -135,6 +170,34 @@ def get_test_copy_path(path):
     copyfile(src_path, dst_path)
     return dst_path
 
+def get_rss():
+    """
+    Current resident memory of the process. Unlike tracemalloc, it includes
+    memory allocated by C/C++ libraries (Qt, GDAL, libpq).
+
+    :return: Resident memory in MiB, or None if /proc is not available
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+def get_max_rss():
+    """
+    Peak resident memory of the process since it started. It never
+    decreases, so it only tells how much memory a piece of code took if that
+    code raised the peak.
+
+    :return: Peak resident memory in MiB, or None if unknown
+    """
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 / 1024 if platform == 'darwin' else max_rss / 1024 # bytes on macOS, KB elsewhere
+
 def import_projectgenerator():
     global iface
     plugin_found = "projectgenerator" in qgis.utils.plugins
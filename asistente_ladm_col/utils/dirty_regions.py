@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-18
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from functools import partial
+
+from qgis.PyQt.QtCore import QObject
+from qgis.core import (QgsFeatureRequest,
+                       QgsRectangle)
+
+from ..config.general_config import DIRTY_REGION_MARGIN
+
+
+class DirtyRegionTracker(QObject):
+    """
+    Records the extents touched by edits on tracked layers, so that quality
+    checks can re-evaluate only the features around them.
+
+    Both the old and the new extent of each edited feature are recorded, from
+    the edit buffer signals and from the committed changes signals. Each
+    extent gets a sequence number, so that every client (e.g., a quality
+    check) can ask for the extents edited since its own last run with a token
+    obtained from get_token(). Extents no client needs anymore are dropped
+    with prune().
+    """
+    def __init__(self):
+        QObject.__init__(self)
+        self._regions = dict() # {layer id: [(sequence number, QgsRectangle)]}
+        self._tracked_since = dict() # {layer id: sequence number when tracking started}
+        self._sequence = 0
+        self._pruned_until = 0 # Extents up to this sequence number were dropped
+
+    def track_layer(self, layer):
+        if layer.id() in self._tracked_since or not layer.isSpatial():
+            return
+
+        self._tracked_since[layer.id()] = self._sequence
+        self._regions[layer.id()] = list()
+
+        layer.featureAdded.connect(partial(self._feature_changed, layer))
+        layer.featureDeleted.connect(partial(self._feature_changed, layer))
+        layer.attributeValueChanged.connect(partial(self._attribute_changed, layer))
+        layer.geometryChanged.connect(partial(self._geometry_changed, layer))
+        layer.committedFeaturesAdded.connect(self._committed_features_added)
+        layer.committedGeometriesChanges.connect(self._committed_geometries_changed)
+        layer.willBeDeleted.connect(partial(self.untrack_layer, layer.id()))
+
+    def untrack_layer(self, layer_id):
+        self._tracked_since.pop(layer_id, None)
+        self._regions.pop(layer_id, None)
+
+    def is_tracked(self, layer_id, token=0):
+        """
+        :return: Whether every edit on the layer since the token was recorded
+        """
+        return layer_id in self._tracked_since and self._tracked_since[layer_id] <= token
+
+    def get_token(self):
+        return self._sequence
+
+    def get_dirty_extents(self, layer_ids, token=0):
+        """
+        :param layer_ids: Layers whose edits are of interest
+        :param token: Value of get_token() when the client last ran
+        :return: List of QgsRectangle edited after the token. None if any
+                 layer wasn't tracked back then, as edits might be missing.
+        """
+        if token < self._pruned_until or not all(self.is_tracked(layer_id, token) for layer_id in layer_ids):
+            return None
+
+        return [rect for layer_id in layer_ids for sequence, rect in self._regions[layer_id] if sequence > token]
+
+    def prune(self, token):
+        """
+        Drop the extents recorded up to the token, which must be the oldest
+        token still held by clients. Older tokens get None from
+        get_dirty_extents() afterwards.
+        """
+        if token <= self._pruned_until:
+            return
+
+        self._pruned_until = token
+        for layer_id, regions in self._regions.items():
+            self._regions[layer_id] = [(sequence, rect) for sequence, rect in regions if sequence > token]
+
+    def add_extent(self, layer_id, rect):
+        if layer_id not in self._regions or rect.isNull():
+            return
+
+        rect = QgsRectangle(rect)
+        rect.grow(DIRTY_REGION_MARGIN) # Include features touching the edited ones
+        self._sequence += 1
+        self._regions[layer_id].append((self._sequence, rect))
+
+    def add_geometry(self, layer_id, geometry):
+        if geometry is not None and not geometry.isNull():
+            self.add_extent(layer_id, geometry.boundingBox())
+
+    def _add_committed_geometry(self, layer, fid):
+        """
+        Geometry the feature had before being edited, as stored by the
+        provider. New features in the edit buffer have no such geometry.
+        """
+        if fid < 0:
+            return
+
+        request = QgsFeatureRequest(fid).setSubsetOfAttributes([])
+        for feature in layer.dataProvider().getFeatures(request):
+            self.add_geometry(layer.id(), feature.geometry())
+
+    def _add_buffer_geometry(self, layer, fid):
+        request = QgsFeatureRequest(fid).setSubsetOfAttributes([])
+        for feature in layer.getFeatures(request):
+            self.add_geometry(layer.id(), feature.geometry())
+
+    def _feature_changed(self, layer, fid):
+        # Added features are already in the edit buffer, whereas deleted ones
+        # can only be found in the provider
+        self._add_buffer_geometry(layer, fid)
+        self._add_committed_geometry(layer, fid)
+
+    def _attribute_changed(self, layer, fid, idx, value):
+        self._add_buffer_geometry(layer, fid)
+
+    def _geometry_changed(self, layer, fid, geometry):
+        self._add_committed_geometry(layer, fid)
+        self.add_geometry(layer.id(), geometry)
+
+    def _committed_features_added(self, layer_id, features):
+        for feature in features:
+            self.add_geometry(layer_id, feature.geometry())
+
+    def _committed_geometries_changed(self, layer_id, geometries):
+        for geometry in geometries.values():
+            self.add_geometry(layer_id, geometry)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import os
+import shutil
+import tempfile
+from functools import partial
+
+from qgis.core import (Qgis,
+                       QgsApplication,
+                       QgsVectorFileWriter,
+                       QgsVectorLayer)
+
+from ..config.general_config import (ERROR_LAYER_CHUNK_SIZE,
+                                     ERROR_LAYER_DISK_THRESHOLD,
+                                     PLUGIN_NAME)
+
+
+class ErrorLayerWriter:
+    """
+    Writes error features in fixed-size chunks, so that quality checks don't
+    need to hold all their errors in memory before adding them to a layer.
+
+    Chunks are flushed either to the given memory error layer, or, when many
+    errors are expected, to a GeoPackage on disk with the same fields. In
+    both cases the error layer is used as a template to create features
+    (e.g., with QgsVectorLayerUtils.createFeature()) and the layer to add to
+    the map is returned by finish().
+
+    Note that chunks flushed to a memory layer still end up holding every
+    error feature in the memory provider, so only GeoPackages lower the peak
+    memory of checks with many errors.
+
+    Temporary GeoPackages are removed when the layer returned by finish() is
+    deleted, or right away if finish() is never called.
+    """
+    def __init__(self, error_layer, expected_count=0, chunk_size=ERROR_LAYER_CHUNK_SIZE, on_disk=None, path=None):
+        """
+        :param error_layer: Memory layer with the fields of the error layer
+        :param expected_count: Estimated number of error features
+        :param on_disk: Whether to write to a GeoPackage. If None, it's
+                        decided from expected_count.
+        :param path: GeoPackage path, a temporary one if None
+        """
+        self.log = QgsApplication.messageLog()
+        self.error_layer = error_layer
+        self.chunk_size = max(1, chunk_size)
+        self.path = None
+        self._temp_dir = None
+        self._buffer = list()
+        self._count = 0
+        self._writer = None
+
+        if on_disk is None:
+            on_disk = expected_count >= ERROR_LAYER_DISK_THRESHOLD
+
+        if on_disk:
+            if path is None:
+                self._temp_dir = tempfile.mkdtemp()
+                path = os.path.join(self._temp_dir, 'errors.gpkg')
+            self.path = path
+            self._writer = QgsVectorFileWriter(self.path, "UTF-8", error_layer.fields(), error_layer.wkbType(),
+                                               error_layer.crs(), "GPKG")
+            if self._writer.hasError() != QgsVectorFileWriter.NoError:
+                self.log.logMessage("Error layer '{}' couldn't be written to '{}', using a memory layer instead: {}".format(
+                    error_layer.name(), self.path, self._writer.errorMessage()), PLUGIN_NAME, Qgis.Warning)
+                self._writer = None
+                self.path = None
+                self.remove_temp_dir()
+
+    def is_on_disk(self):
+        return self._writer is not None
+
+    def add_feature(self, feature):
+        self._buffer.append(feature)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def add_features(self, features):
+        """
+        :param features: Iterable of features, preferably a generator so
+                         that features are created as chunks are written
+        """
+        for feature in features:
+            self.add_feature(feature)
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        if self._writer is not None:
+            self._writer.addFeatures(self._buffer)
+        else:
+            self.error_layer.dataProvider().addFeatures(self._buffer)
+
+        self._count += len(self._buffer)
+        self._buffer = list()
+
+    def feature_count(self):
+        return self._count + len(self._buffer)
+
+    def finish(self):
+        """
+        Write pending features and close the GeoPackage, if any.
+
+        :return: Error layer with all features written
+        """
+        self.flush()
+        if self._writer is None:
+            return self.error_layer
+
+        del self._writer # Closes the data source
+        self._writer = None
+        layer = QgsVectorLayer(self.path, self.error_layer.name(), 'ogr')
+        if self._temp_dir is not None:
+            layer.willBeDeleted.connect(partial(shutil.rmtree, self._temp_dir, True))
+            self._temp_dir = None # Owned by the layer from now on
+        return layer
+
+    def remove_temp_dir(self):
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, True)
+            self._temp_dir = None
+
+    def __del__(self):
+        if self._writer is not None:
+            del self._writer # A GeoPackage that was not finished can't be opened
+            self._writer = None
+        self.remove_temp_dir()
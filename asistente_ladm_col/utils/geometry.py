@@ -19,11 +19,14 @@
  ***************************************************************************/
 """
 import gc
+import math
 
 from qgis.PyQt.QtCore import (QObject,
                               QVariant)
 from qgis.core import (Qgis,
                        QgsApplication,
+                       QgsCurvePolygon,
+                       QgsFeature,
                        QgsField,
                        QgsGeometry,
                        QgsPolygon,
@@ -32,6 +35,8 @@ from qgis.core import (Qgis,
                        QgsLineString,
                        QgsMultiLineString,
                        QgsProcessingFeedback,
+                       QgsPointXY,
+                       QgsRectangle,
                        QgsSpatialIndex,
                        QgsVectorLayer,
                        QgsVectorLayerEditUtils,
@@ -40,7 +45,12 @@ from qgis.core import (Qgis,
                        edit)
 
 import processing
+from .instrumentation import instrumentation
+from .segment_graph import SegmentGraph
+from .spatial_hash import SpatialHashIndex
 from ..config.general_config import (DEFAULT_EPSG,
+                                     DEFAULT_VERTEX_MATCH_TOLERANCE,
+                                     GAPS_TILE_SIZE,
                                      PLUGIN_NAME)
 from ..config.table_mapping_config import ID_FIELD
 
@@ -51,7 +61,16 @@ class GeometryUtils(QObject):
         QObject.__init__(self)
         self.log = QgsApplication.messageLog()
 
+    @instrumentation.timed()
     def get_pair_boundary_plot(self, boundary_layer, plot_layer, id_field=ID_FIELD, use_selection=True):
+        """
+        Pair plots with the boundaries sharing lines with their outer rings
+        (MoreBFS) or with their inner rings (Less). Rings are extracted once
+        per plot and candidates are tested against a prepared geometry, so
+        that tens of thousands of boundaries can be paired in one pass.
+
+        :return: Tuple (more pairs, less pairs), both lists of (plot id, boundary id)
+        """
         id_field_idx = plot_layer.fields().indexFromName(id_field)
         request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
         polygons = plot_layer.getSelectedFeatures(request) if use_selection else plot_layer.getFeatures(request)
@@ -63,111 +82,85 @@ class GeometryUtils(QObject):
 
         id_field_idx = boundary_layer.fields().indexFromName(id_field)
         request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
-        dict_features = {feature.id(): feature for feature in boundary_layer.getFeatures(request)}
-        index = QgsSpatialIndex(boundary_layer)
-        candidate_features = None
+        dict_features = dict()
+        index = QgsSpatialIndex()
+        for feature in boundary_layer.getFeatures(request):
+            dict_features[feature.id()] = feature
+            index.insertFeature(feature)
+        instrumentation.count('features', len(dict_features))
 
         for polygon in polygons:
-            bbox = polygon.geometry().boundingBox()
+            polygon_geom = polygon.geometry()
+            bbox = polygon_geom.boundingBox()
             bbox.scale(1.001)
             candidates_ids = index.intersects(bbox)
+            if not candidates_ids:
+                continue
 
-            candidate_features = [dict_features[candidate_id] for candidate_id in candidates_ids]
+            engine = QgsGeometry.createGeometryEngine(polygon_geom.constGet())
+            engine.prepareGeometry()
+            outer_rings, inner_rings = self.get_polygon_rings(polygon_geom)
 
-            for candidate_feature in candidate_features:
-                polygon_geom = polygon.geometry()
-                is_multipart = polygon_geom.isMultipart()
+            for candidate_id in candidates_ids:
+                candidate_feature = dict_features[candidate_id]
                 candidate_geometry = candidate_feature.geometry()
-
-                if polygon_geom.intersects(candidate_geometry):
-                    # Does the current multipolygon have inner rings?
-                    has_inner_rings = False
-                    multi_polygon = None
-                    single_polygon = None
-
-                    if is_multipart:
-                        multi_polygon = polygon_geom.get()
-                        for part in range(multi_polygon.numGeometries()):
-                            if multi_polygon.ringCount(part) > 1:
-                                has_inner_rings = True
-                                break
+                if not engine.intersects(candidate_geometry.constGet()):
+                    continue
+
+                # Intersections with outer rings go to MOREBFS table, whereas
+                # intersections with inner rings go to LESS table
+                for rings, pairs, table in [(outer_rings, intersect_more_pairs, 'MoreBFS'),
+                                            (inner_rings, intersect_less_pairs, 'Less')]:
+                    if rings is None:
+                        continue
+
+                    intersection = rings.intersection(candidate_geometry)
+                    if not intersection.isEmpty() and intersection.type() == QgsWkbTypes.LineGeometry:
+                        pairs.append((polygon[id_field], candidate_feature[id_field]))
                     else:
-                        single_polygon = polygon_geom.get()
-                        if single_polygon.numInteriorRings() > 0:
-                            has_inner_rings = True
-
-                    # Now we'll test intersections against borders
-                    if has_inner_rings:
-                        # In this case we need to identify whether the
-                        # intersection is with outer rings (goes to MOREBFS
-                        # table) or with inner rings (goes to LESS table)
-                        multi_outer_rings = QgsMultiLineString()
-                        multi_inner_rings = QgsMultiLineString()
-
-                        if is_multipart and multi_polygon:
-                            for i in range(multi_polygon.numGeometries()):
-                                temp_polygon = multi_polygon.geometryN(i)
-                                multi_outer_rings.addGeometry(temp_polygon.exteriorRing().clone())
-                                for j in range(temp_polygon.numInteriorRings()):
-                                    multi_inner_rings.addGeometry(temp_polygon.interiorRing(j).clone())
-
-                        elif not is_multipart and single_polygon:
-                            multi_outer_rings.addGeometry(single_polygon.exteriorRing().clone())
-                            for j in range(single_polygon.numInteriorRings()):
-                                multi_inner_rings.addGeometry(single_polygon.interiorRing(j).clone())
-
-                        intersection_type = QgsGeometry(multi_outer_rings).intersection(candidate_geometry).type()
-                        if intersection_type == QgsWkbTypes.LineGeometry:
-                            intersect_more_pairs.append((polygon[id_field], candidate_feature[id_field]))
-                        else:
-                            self.log.logMessage(
-                                "(MoreBFS) Intersection between plot (t_id={}) and boundary (t_id={}) is a geometry of type: {}".format(
-                                    polygon[id_field],
-                                    candidate_feature[id_field],
-                                    intersection_type),
-                                PLUGIN_NAME,
-                                Qgis.Warning
-                            )
-
-                        intersection_type = QgsGeometry(multi_inner_rings).intersection(candidate_geometry).type()
-                        if intersection_type == QgsWkbTypes.LineGeometry:
-                            intersect_less_pairs.append((polygon[id_field], candidate_feature[id_field]))
-                        else:
-                            self.log.logMessage(
-                                "(Less) Intersection between plot (t_id={}) and boundary (t_id={}) is a geometry of type: {}".format(
-                                    polygon[id_field],
-                                    candidate_feature[id_field],
-                                    intersection_type),
-                                PLUGIN_NAME,
-                                Qgis.Warning
-                            )
+                        self.log.logMessage(
+                            "({}) Intersection between plot (t_id={}) and boundary (t_id={}) is a geometry of type: {}".format(
+                                table,
+                                polygon[id_field],
+                                candidate_feature[id_field],
+                                intersection.type()),
+                            PLUGIN_NAME,
+                            Qgis.Warning
+                        )
 
-                    else:
-                        boundary = None
-                        if is_multipart and multi_polygon:
-                            boundary = multi_polygon.boundary()
-                        elif not is_multipart and single_polygon:
-                            boundary = single_polygon.boundary()
-
-                        intersection_type = QgsGeometry(boundary).intersection(candidate_geometry).type()
-                        if boundary and intersection_type == QgsWkbTypes.LineGeometry:
-                            intersect_more_pairs.append((polygon[id_field], candidate_feature[id_field]))
-                        else:
-                            self.log.logMessage(
-                                "(MoreBFS) Intersection between plot (t_id={}) and boundary (t_id={}) is a geometry of type: {}".format(
-                                    polygon[id_field],
-                                    candidate_feature[id_field],
-                                    intersection_type),
-                                PLUGIN_NAME,
-                                Qgis.Warning
-                            )
-        # free up memory
-        del candidate_features
-        del dict_features
-        gc.collect()
         return (intersect_more_pairs, intersect_less_pairs)
 
-    def get_pair_boundary_boundary_point(self, boundary_layer, boundary_point_layer, id_field=ID_FIELD, use_selection=True):
+    def get_polygon_rings(self, geometry):
+        """
+        :return: Tuple (outer rings, inner rings) as multilinestring
+                 QgsGeometry objects. Inner rings are None if the polygon has
+                 no holes.
+        """
+        multi_outer_rings = QgsMultiLineString()
+        multi_inner_rings = QgsMultiLineString()
+
+        for part in geometry.asGeometryCollection():
+            polygon = part.constGet()
+
+            # TODO: remove when the error is resolved (see get_inner_rings_layer)
+            if not isinstance(polygon, QgsCurvePolygon):
+                polygon = QgsPolygon()
+                polygon.fromWkt(part.asWkt())
+
+            multi_outer_rings.addGeometry(polygon.exteriorRing().clone())
+            for j in range(polygon.numInteriorRings()):
+                multi_inner_rings.addGeometry(polygon.interiorRing(j).clone())
+
+        return (QgsGeometry(multi_outer_rings),
+                QgsGeometry(multi_inner_rings) if multi_inner_rings.numGeometries() else None)
+
+    @instrumentation.timed()
+    def get_pair_boundary_boundary_point(self, boundary_layer, boundary_point_layer, id_field=ID_FIELD, use_selection=True, tolerance=DEFAULT_VERTEX_MATCH_TOLERANCE):
+        """
+        Pairs boundaries with the boundary points lying on their vertices.
+        Boundary points are indexed once in a hash grid, so each boundary
+        vertex is resolved with a constant-time lookup.
+        """
         id_field_idx = boundary_layer.fields().indexFromName(id_field)
         request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
         lines = boundary_layer.getSelectedFeatures(request) if use_selection else boundary_layer.getFeatures(request)
@@ -178,27 +171,24 @@ class GeometryUtils(QObject):
 
         id_field_idx = boundary_point_layer.fields().indexFromName(id_field)
         request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
-        dict_features = {feature.id(): feature for feature in boundary_point_layer.getFeatures(request)}
-        index = QgsSpatialIndex(boundary_point_layer)
-        candidate_features = None
+        index = SpatialHashIndex(tolerance)
+        for feature in boundary_point_layer.getFeatures(request):
+            point = feature.geometry().asPoint()
+            index.insert(point.x(), point.y(), feature[id_field])
 
+        existing_pairs = set()
         for line in lines:
-            bbox = line.geometry().boundingBox()
-            bbox.scale(1.001)
-            candidates_ids = index.intersects(bbox)
-            candidate_features = [dict_features[candidate_id] for candidate_id in candidates_ids]
-            for candidate_feature in candidate_features:
-                #if line.geometry().intersects(candidate_feature.geometry()):
-                #    intersect_pair.append(line['t_id'], candidate_feature['t_id'])
-                candidate_point = candidate_feature.geometry().asPoint()
-                for line_vertex in line.geometry().asPolyline():
-                    if line_vertex.x() == candidate_point.x() and line_vertex.y() == candidate_point.y():
-                        pair = (line[id_field], candidate_feature[id_field])
-                        if pair not in intersect_pairs:
-                            intersect_pairs.append(pair)
+            line_id = line[id_field]
+            for line_vertex in line.geometry().vertices():
+                for point_id in index.query(line_vertex.x(), line_vertex.y()):
+                    pair = (line_id, point_id)
+                    if pair not in existing_pairs:
+                        existing_pairs.add(pair)
+                        intersect_pairs.append(pair)
+
         # free up memory
-        del candidate_features
-        del dict_features
+        del index
+        del existing_pairs
         gc.collect()
         return intersect_pairs
 
@@ -243,15 +233,19 @@ class GeometryUtils(QObject):
             vertex1 = vertex2
         return segments_info
 
+    @instrumentation.timed()
     def get_overlapping_points(self, point_layer):
         """
         Returns a list of lists, where inner lists are ids of overlapping
         points, e.g., [[1, 3], [19, 2, 8]].
         """
         res = list()
-        if point_layer.featureCount() == 0:
+        feature_count = point_layer.featureCount()
+        if feature_count == 0:
             return res
 
+        instrumentation.count('features', feature_count)
+
         set_points = set()
         index = QgsSpatialIndex(point_layer)
 
@@ -266,6 +260,28 @@ class GeometryUtils(QObject):
 
         return res
 
+    def get_layer_subset_in_extents(self, layer, extents):
+        """
+        Copy into a memory layer the features whose bounding boxes intersect
+        any of the given extents, e.g., to re-evaluate a check only around
+        edited features.
+
+        :param extents: List of QgsRectangle
+        :return: Memory layer with the same fields and geometry type
+        """
+        layer_subset = QgsVectorLayer("{}?crs={}".format(QgsWkbTypes.displayString(layer.wkbType()), layer.crs().authid()),
+                                      layer.name(), "memory")
+        layer_subset.dataProvider().addAttributes(layer.fields().toList())
+        layer_subset.updateFields()
+
+        features = dict() # Extents might overlap
+        for rect in extents:
+            for feature in layer.getFeatures(QgsFeatureRequest().setFilterRect(rect)):
+                features[feature.id()] = feature
+
+        layer_subset.dataProvider().addFeatures(list(features.values()))
+        return layer_subset
+
     def get_overlapping_lines(self, line_layer, use_selection=True):
         """
         Returns a dict whose key is a pair of line ids where there are
@@ -284,6 +300,7 @@ class GeometryUtils(QObject):
 
         return dict_res
 
+    @instrumentation.timed()
     def get_overlapping_polygons(self, polygon_layer):
         """
         Obtains overlapping polygons from a single layer
@@ -299,6 +316,7 @@ class GeometryUtils(QObject):
 
         request = QgsFeatureRequest().setSubsetOfAttributes([])
         dict_features = {feature.id(): feature for feature in polygon_layer.getFeatures(request)}
+        instrumentation.count('features', len(dict_features))
         index = QgsSpatialIndex(polygon_layer)
         candidate_features = None
 
@@ -343,6 +361,7 @@ class GeometryUtils(QObject):
 
         return QgsGeometry.collectGeometry(listGeoms) if len(listGeoms) > 0 else None
 
+    @instrumentation.timed()
     def get_inner_intersections_between_polygons(self, polygon_layer_1, polygon_layer_2):
         """
         Discard intersections other than inner intersections (i.e., only returns
@@ -352,6 +371,7 @@ class GeometryUtils(QObject):
         list_overlapping = list()
         request = QgsFeatureRequest().setSubsetOfAttributes([])
         dict_features = {feature.id(): feature for feature in polygon_layer_2.getFeatures(request)}
+        instrumentation.count('features', len(dict_features))
         index = QgsSpatialIndex(polygon_layer_2)
         candidate_features = None
 
@@ -437,6 +457,224 @@ class GeometryUtils(QObject):
 
         return self.extract_geoms_by_type(clean_errors, [QgsWkbTypes.PolygonGeometry])
 
+    @instrumentation.timed()
+    def get_gaps_in_polygon_layer_by_tiles(self, layer, include_roads, tile_size=GAPS_TILE_SIZE, get_tile_parts=None):
+        """
+        Tiled counterpart of get_gaps_in_polygon_layer(), which never builds
+        the union of the whole layer. For each tile, the polygons touching it
+        are dissolved and the uncovered area of the tile is split into pieces.
+        Pieces that don't reach the edges shared with other tiles are complete
+        uncovered areas, while the rest are stitched to the pieces of adjacent
+        tiles with a union-find, and only pieces of the same area are merged.
+        Uncovered areas are then classified as gaps or exterior, just like
+        get_gaps_in_polygon_layer() does. Exterior areas are never merged
+        unless they can be reported (i.e., roads are included and the union
+        has several parts).
+
+        Connectivity of the global union (needed when roads are included) is
+        tracked with a union-find over the polygon parts seen in each tile.
+
+        :param layer: Polygon layer
+        :param include_roads: Whether areas between disconnected groups of
+                              polygons should be reported as gaps
+        :param tile_size: Side of the tiles, in layer units
+        :param get_tile_parts: Function that receives a QgsRectangle and returns
+                               a list of (part geometry, part node ids) for the
+                               dissolved polygons intersecting it. Node ids
+                               identify single-part polygons across tiles.
+                               Defaults to get_union_parts_in_rect() on the layer.
+        :return: List of polygon geometries or None
+        """
+        if get_tile_parts is None:
+            get_tile_parts = lambda rect: self.get_union_parts_in_rect(layer, rect)
+
+        extent = layer.extent()
+        if extent.isNull() or extent.isEmpty():
+            return None
+
+        def find(parents, node):
+            parents.setdefault(node, node)
+            while parents[node] != node:
+                parents[node] = parents[parents[node]]
+                node = parents[node]
+            return node
+
+        def union(parents, node, other_node):
+            parents[find(parents, other_node)] = find(parents, node)
+
+        node_parents = dict() # Union-find over node ids
+        piece_parents = dict() # Union-find over indexes of border pieces
+
+        tiles = self.get_tiles(extent, tile_size)
+        last_row, last_column = tiles[-1][0]
+        union_bbox = QgsRectangle()
+        union_bbox.setMinimal()
+        complete_pieces = list() # Uncovered areas inside a single tile
+        border_pieces = list() # Parts of uncovered areas that go on in adjacent tiles
+        tile_border_pieces = dict() # {(row, column): [index in border_pieces]}
+        convex_hulls = list()
+        for (row, column), rect in tiles:
+            parts = get_tile_parts(rect)
+            tile_geom = QgsGeometry.fromRect(rect)
+            if parts:
+                for part, nodes in parts:
+                    union_bbox.combineExtentWith(part.boundingBox())
+                    if nodes:
+                        find(node_parents, nodes[0])
+                    for node in nodes[1:]:
+                        union(node_parents, nodes[0], node)
+
+                # Parts of a union are disjoint, so collecting them is enough
+                tile_union = QgsGeometry.collectGeometry([part for part, nodes in parts])
+                convex_hulls.append(tile_union.convexHull())
+                uncovered = tile_geom.difference(tile_union)
+            else:
+                uncovered = tile_geom
+
+            if uncovered.isEmpty():
+                continue
+
+            shared_edges = list()
+            if column > 0:
+                shared_edges.append(QgsGeometry.fromPolylineXY([QgsPointXY(rect.xMinimum(), rect.yMinimum()), QgsPointXY(rect.xMinimum(), rect.yMaximum())]))
+            if column < last_column:
+                shared_edges.append(QgsGeometry.fromPolylineXY([QgsPointXY(rect.xMaximum(), rect.yMinimum()), QgsPointXY(rect.xMaximum(), rect.yMaximum())]))
+            if row > 0:
+                shared_edges.append(QgsGeometry.fromPolylineXY([QgsPointXY(rect.xMinimum(), rect.yMinimum()), QgsPointXY(rect.xMaximum(), rect.yMinimum())]))
+            if row < last_row:
+                shared_edges.append(QgsGeometry.fromPolylineXY([QgsPointXY(rect.xMinimum(), rect.yMaximum()), QgsPointXY(rect.xMaximum(), rect.yMaximum())]))
+
+            for piece in self.extract_geoms_by_type(uncovered, [QgsWkbTypes.PolygonGeometry]):
+                if any(piece.intersects(edge) for edge in shared_edges):
+                    tile_border_pieces.setdefault((row, column), list()).append(len(border_pieces))
+                    border_pieces.append(piece)
+                else:
+                    complete_pieces.append(piece)
+
+        if not convex_hulls:
+            return None
+
+        # Pieces of the same uncovered area share a segment of a tile edge
+        # (touching at a tile corner doesn't connect them)
+        for (row, column), indexes in tile_border_pieces.items():
+            for neighbour in [(row, column + 1), (row + 1, column)]:
+                for index in indexes:
+                    for neighbour_index in tile_border_pieces.get(neighbour, list()):
+                        piece, neighbour_piece = border_pieces[index], border_pieces[neighbour_index]
+                        if piece.boundingBox().intersects(neighbour_piece.boundingBox()) and \
+                                piece.intersection(neighbour_piece).length() > 0:
+                            union(piece_parents, index, neighbour_index)
+
+        groups = dict()
+        for index in range(len(border_pieces)):
+            groups.setdefault(find(piece_parents, index), list()).append(border_pieces[index])
+
+        union_is_multipart = len({find(node_parents, node) for node in list(node_parents)}) > 1
+        report_exterior = include_roads and union_is_multipart
+        aux_convex_hull = QgsGeometry.collectGeometry(convex_hulls).convexHull()
+        bbox_geom = QgsGeometry.fromRect(union_bbox)
+        buffer_diff = bbox_geom.buffer(2, 3).difference(bbox_geom)
+
+        uncovered_areas = [[piece] for piece in complete_pieces] + list(groups.values())
+        complete_pieces.clear()
+        border_pieces.clear()
+        groups.clear()
+
+        diff_geoms = list()
+        skipped_exterior_areas = 0
+        for pieces in uncovered_areas:
+            if not report_exterior and any(piece.intersects(buffer_diff) for piece in pieces):
+                # Exterior, it would be discarded anyway
+                skipped_exterior_areas += 1
+                continue
+
+            area = QgsGeometry.unaryUnion(pieces) if len(pieces) > 1 else pieces[0]
+            area = area.intersection(bbox_geom)
+            if not area.isEmpty():
+                diff_geoms.extend(self.extract_geoms_by_type(area, [QgsWkbTypes.PolygonGeometry]))
+        uncovered_areas.clear()
+
+        if not diff_geoms and not skipped_exterior_areas:
+            return None
+
+        # Every uncovered area touches the union, so only its contact with
+        # the exterior decides whether it is a gap
+        feature_error = list()
+        if len(diff_geoms) + skipped_exterior_areas == 1:
+            if include_roads and (skipped_exterior_areas or diff_geoms[0].intersects(buffer_diff)):
+                return None
+
+        for conflict_geom in diff_geoms:
+            if conflict_geom.intersects(buffer_diff) and not report_exterior:
+                continue
+
+            feature_error.append(conflict_geom)
+
+        if not feature_error:
+            return list()
+
+        unified_error = QgsGeometry.collectGeometry(feature_error)
+        feature_error.clear()
+        clean_errors = unified_error.intersection(aux_convex_hull)
+
+        return self.extract_geoms_by_type(clean_errors, [QgsWkbTypes.PolygonGeometry])
+
+    def get_union_parts_in_rect(self, layer, rect):
+        """
+        Dissolve the valid polygons of a layer whose bounding box intersects
+        a rectangle.
+
+        :return: List of (part geometry, list of node ids), where node ids are
+                 (feature id, part index) of the single-part polygons that
+                 intersect the dissolved part.
+        """
+        request = QgsFeatureRequest().setFilterRect(rect).setSubsetOfAttributes([])
+        polygons = list()
+        for feature in layer.getFeatures(request):
+            geometry = feature.geometry()
+            if geometry.isEmpty() or not geometry.isGeosValid():
+                continue
+
+            if geometry.isMultipart():
+                for i, polygon in enumerate(geometry.asMultiPolygon()):
+                    polygons.append(((feature.id(), i), QgsGeometry.fromPolygonXY(polygon)))
+            else:
+                polygons.append(((feature.id(), 0), geometry))
+
+        if not polygons:
+            return list()
+
+        union_geom = QgsGeometry.unaryUnion([polygon for node, polygon in polygons])
+        parts = list()
+        for part in self.extract_geoms_by_type(union_geom, [QgsWkbTypes.PolygonGeometry]):
+            engine = QgsGeometry.createGeometryEngine(part.constGet())
+            engine.prepareGeometry()
+            part_bbox = part.boundingBox()
+            nodes = [node for node, polygon in polygons
+                     if part_bbox.intersects(polygon.boundingBox()) and engine.intersects(polygon.constGet())]
+            parts.append((part, nodes))
+
+        return parts
+
+    def get_tiles(self, extent, tile_size):
+        """
+        Split an extent into a grid of tiles of tile_size. Tiles in the last
+        row and column are clipped to the extent.
+
+        :return: List of ((row, column), QgsRectangle), row by row
+        """
+        columns = max(1, math.ceil(extent.width() / tile_size))
+        rows = max(1, math.ceil(extent.height() / tile_size))
+        tiles = list()
+        for row in range(rows):
+            for column in range(columns):
+                tiles.append(((row, column),
+                              QgsRectangle(extent.xMinimum() + column * tile_size,
+                                           extent.yMinimum() + row * tile_size,
+                                           min(extent.xMinimum() + (column + 1) * tile_size, extent.xMaximum()),
+                                           min(extent.yMinimum() + (row + 1) * tile_size, extent.yMaximum()))))
+        return tiles
+
     def add_topological_vertices(self, layer1, layer2, id_field=ID_FIELD):
         """
         Modify layer1 adding vertices that are in layer2 and not in layer1
@@ -697,130 +935,92 @@ class GeometryUtils(QObject):
         layer.reload()
         return layer
 
-    def get_connected_segments(self, segment, direction, index, dict_features, items=list(), count_d=0):
-        vertex = None
-        geom = segment.geometry()
-        if direction == 1:
-            vertex = QgsGeometry(geom.vertexAt(0))
-        elif direction == -1:
-            vertex = QgsGeometry(geom.vertexAt(len(geom.asPolyline()) - 1))
-
-        geom = segment.geometry()
-        bbox = vertex.boundingBox()
-        candidates_ids = index.intersects(bbox)
-        candidate_features = [dict_features[candidate_id] for candidate_id in candidates_ids]
-
-        touches = list()
-        for candidate_feature in candidate_features:
-            if candidate_feature.id() != segment.id():
-                if candidate_feature.geometry().touches(vertex):
-                    touches.append(candidate_feature)
-
-        if len(touches) == 1:
-            if touches[0].id() not in items:
-                items.append(touches[0].id())
-                return self.get_connected_segments(touches[0], direction, index, dict_features, items, count_d)
-            else:
-                if count_d <= 1:
-                    # the direction is changed due to the direction of digitization
-                    direction *= -1
-                    # in circular geometries it can happen that the condition of exit is not satisfied, reason for
-                    # which the number of consecutive iterations is counted not to stay in an infinite cycle.
-                    count_d += 1
-                    return self.get_connected_segments(touches[0], direction, index, dict_features, items, count_d)
-                else:
-                    return items
-        else:
-            return items
-
-    def get_boundary_to_build(self, segment, index, dict_features):
-        id = segment.id()
-        segments_connected = list()
-
-        way = 1
-        start_sc = self.get_connected_segments(segment, way, index, dict_features, items=list())
-        segments_connected.extend(start_sc)
-
-        way = -1
-        end_sc = self.get_connected_segments(segment, way, index, dict_features, items=list())
-        segments_connected.extend(end_sc)
-
-        if id not in segments_connected:
-            segments_connected.append(id)
-        # segments_connected.sort() # sort items
-        segments_of_the_boundary = list(set(segments_connected))
-        return segments_of_the_boundary
-
-    def get_connected_segments_by_selection(self, segment, direction, index, dict_features, items=list(), count_d=0, vertex=None):
-        geom = segment.geometry()
-
-        if vertex is None:
-            if direction == 1:
-                vertex = QgsGeometry(geom.vertexAt(0))
-            elif direction == -1:
-                vertex = QgsGeometry(geom.vertexAt(len(geom.asPolyline()) - 1))
-
-        bbox = vertex.boundingBox()
-        candidates_ids = index.intersects(bbox)
-        candidate_features = [dict_features[candidate_id] for candidate_id in candidates_ids]
-
-        touches = list()
-        for candidate_feature in candidate_features:
-            if candidate_feature.id() != segment.id():
-                if candidate_feature.geometry().touches(vertex):
-                    touches.append(candidate_feature)
-
-        if len(touches) == 1:
-
-            # select next vertex
-            next_geom = touches[0].geometry()
-            start_vertex = QgsGeometry(next_geom.vertexAt(0))
-            end_vertex = QgsGeometry(next_geom.vertexAt(len(next_geom.asPolyline()) - 1))
-            next_vertex = None
-
-            if vertex.asWkt() == start_vertex.asWkt():
-                next_vertex = end_vertex
-            else:
-                next_vertex = start_vertex
+    def get_inner_rings(self, geometry):
+        """
+        Inner rings of a (multi)polygon, in part order.
 
-            if touches[0].id() not in items:
-                items.append(touches[0].id())
-                return self.get_connected_segments_by_selection(touches[0], direction, index, dict_features, items, count_d, next_vertex)
-            else:
-                if count_d < 1:
-                    # in circular geometries it can happen that the condition of exit is not satisfied,
-                    # reason for which the number of consecutive iterations is counted not to stay in an infinite cycle.
-                    count_d += 1
-                    return self.get_connected_segments_by_selection(touches[0], direction, index, dict_features, items, count_d, next_vertex)
-                else:
-                    return items
-        else:
-            return items
+        :return: List of line geometries
+        """
+        rings = list()
+        for part in geometry.asGeometryCollection():
+            polygon = part.constGet()
 
-    def get_boundary_to_build_by_selection(self, segment, index, dict_features):
-        id = segment.id()
-        segments_connected = list()
+            # TODO: remove when the error is resolved (see get_inner_rings_layer)
+            if not isinstance(polygon, QgsCurvePolygon):
+                polygon = QgsPolygon()
+                polygon.fromWkt(part.asWkt())
 
-        direction = 1
-        start_sc = self.get_connected_segments_by_selection(segment, direction, index, dict_features, items=list(), vertex=None)
-        segments_connected.extend(start_sc)
+            for i in range(polygon.numInteriorRings()):
+                rings.append(QgsGeometry(polygon.interiorRing(i).clone()))
 
-        direction = -1
-        end_sc = self.get_connected_segments_by_selection(segment, direction, index, dict_features, items=list(), vertex=None)
-        segments_connected.extend(end_sc)
+        return rings
 
-        if id not in segments_connected:
-            segments_connected.append(id)
+    def get_connected_segments(self, segment, direction, segment_graph):
+        """
+        Segments connected to a segment through its start vertex (direction 1)
+        or its end vertex (direction -1), walking along nodes that join
+        exactly two segments.
+
+        :param segment_graph: SegmentGraph built from the segments layer
+        :return: List of segment ids, without the given segment
+        """
+        start, end = segment_graph.get_end_nodes(segment.id())
+        return segment_graph.get_connected_segments(segment.id(), start if direction == 1 else end)
+
+    def get_boundary_to_build(self, segment, segment_graph):
+        """
+        Segments that should be part of the same boundary as a given segment.
 
-        segments_of_the_boundary = list(set(segments_connected))
-        segments_of_the_boundary.sort()
-        return segments_of_the_boundary
+        :return: Sorted list of segment ids, including the given segment
+        """
+        return sorted(segment_graph.get_chain(segment.id()))
 
     def merge_geometries(self, features):
-        geoms = QgsGeometry.fromWkt('GEOMETRYCOLLECTION()')
-        for feature in features:
-            geoms = geoms.combine(feature.geometry())
-        return geoms
+        geometries = [feature.geometry() for feature in features]
+        if not geometries:
+            return QgsGeometry.fromWkt('GEOMETRYCOLLECTION()')
+
+        # Same as combining geometries one by one (union + line merge), but
+        # with a single union
+        union_geom = QgsGeometry.unaryUnion(geometries)
+        merged_geom = union_geom.mergeLines() if union_geom.isMultipart() else union_geom
+        return merged_geom if not merged_geom.isNull() else union_geom
+
+    def get_boundary_segments(self, boundary_layer):
+        """
+        Explode boundaries into 2-vertex segments, discarding duplicate
+        segments (regardless of their direction), which would otherwise be
+        taken as junctions when building boundaries. A duplicate segment
+        belongs to the first boundary it was found in.
+
+        :return: Tuple (dict_segments, boundary_segments), where dict_segments
+                 is {segment id: QgsFeature} and boundary_segments is
+                 {boundary feature id: sorted list of segment ids}
+        """
+        dict_segments = dict()
+        boundary_segments = dict()
+        segment_keys = set()
+        request = QgsFeatureRequest().setSubsetOfAttributes([])
+        for feature in boundary_layer.getFeatures(request):
+            segment_ids = list()
+            for part in feature.geometry().asGeometryCollection():
+                vertices = list(part.vertices())
+                for start_vertex, end_vertex in zip(vertices[:-1], vertices[1:]):
+                    start_node, end_node = SegmentGraph.get_node(start_vertex), SegmentGraph.get_node(end_vertex)
+                    segment_key = (start_node, end_node) if start_node <= end_node else (end_node, start_node)
+                    if start_node == end_node or segment_key in segment_keys:
+                        continue
+
+                    segment_keys.add(segment_key)
+                    segment = QgsFeature(len(dict_segments) + 1)
+                    segment.setGeometry(QgsGeometry(QgsLineString([start_vertex, end_vertex])))
+                    dict_segments[segment.id()] = segment
+                    segment_ids.append(segment.id())
+
+            if segment_ids:
+                boundary_segments[feature.id()] = segment_ids
+
+        return dict_segments, boundary_segments
 
     def fix_selected_boundaries(self, boundary_layer, selected_ids=list(), id_field=ID_FIELD):
 
@@ -831,53 +1031,35 @@ class GeometryUtils(QObject):
             boundary_layer.selectByIds(selected_ids)
             selected_features = [feature for feature in boundary_layer.selectedFeatures()]
 
-        tmp_segments_layer = processing.run("native:explodelines", {'INPUT': boundary_layer, 'OUTPUT': 'memory:'})['OUTPUT']
-
-        # remove duplicate segments (algorithm don't work with duplicate geometries)
-        segments_layer = processing.run("qgis:deleteduplicategeometries", {'INPUT': tmp_segments_layer, 'OUTPUT': 'memory:'})['OUTPUT']
-
-        id_field_idx = segments_layer.fields().indexFromName(id_field)
-        request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
-        dict_segments = {feature.id(): feature for feature in segments_layer.getFeatures(request)}
-        index = QgsSpatialIndex(segments_layer)
-
-        # create relation between feature and yours segments
-        boundary_segments = dict()
-        for feature in boundary_layer.getFeatures():
-            exp = '"{id_field}" = {id_field_value}'.format(id_field=ID_FIELD, id_field_value=feature[ID_FIELD])
-            segment_ids = [f.id() for f in segments_layer.getFeatures(exp)]
-            segment_ids.sort()
-            if segment_ids:
-                boundary_segments[feature.id()] = segment_ids
+        dict_segments, boundary_segments = self.get_boundary_segments(boundary_layer)
+        segment_graph = SegmentGraph(dict_segments.values())
+        segment_boundaries = {segment_id: boundary_id
+                              for boundary_id, segment_ids in boundary_segments.items()
+                              for segment_id in segment_ids}
 
         process_sc = list()
-        total_sc = list()
+        total_sc = set()
         for feature in selected_features:
-            segment_sf_ids = boundary_segments[feature.id()]
-            for segment_sf_id in segment_sf_ids:
+            for segment_sf_id in boundary_segments.get(feature.id(), list()):
                 if segment_sf_id not in total_sc:
                     segment_sf = dict_segments[segment_sf_id]
-                    segments_connected = self.get_boundary_to_build_by_selection(segment_sf, index, dict_segments)
-                    total_sc.extend(segments_connected)
+                    segments_connected = self.get_boundary_to_build(segment_sf, segment_graph)
+                    total_sc.update(segments_connected)
                     process_sc.append(segments_connected)
 
         # It isn't necessary fix the boundaries that are okay.
-        for sc_check in process_sc.copy():
-            sc_check.sort()
-            for boundary_segment_id in boundary_segments:
-                if sc_check == boundary_segments[boundary_segment_id]:
-                    process_sc.remove(sc_check)
-
-        boundaries_to_del_ids = list()
-        candidate_segments = list()
+        current_boundaries = {tuple(segment_ids) for segment_ids in boundary_segments.values()}
+        process_sc = [sc_check for sc_check in process_sc if tuple(sc_check) not in current_boundaries]
+
+        boundaries_to_del_ids = set()
         for segments_connected in process_sc:
-            for boundary_id in boundary_segments:
-                if boundary_id not in boundaries_to_del_ids:
-                    if len(set(boundary_segments[boundary_id]).intersection(set(segments_connected))) > 0:
-                        boundaries_to_del_ids.append(boundary_id)
-                        candidate_segments.extend(boundary_segments[boundary_id])
+            boundaries_to_del_ids.update(segment_boundaries[segment_id] for segment_id in segments_connected)
+
+        candidate_segments = set()
+        for boundary_id in boundaries_to_del_ids:
+            candidate_segments.update(boundary_segments[boundary_id])
 
-        segments_to_include = list(set(candidate_segments) - set(total_sc))
+        segments_to_include = sorted(candidate_segments - total_sc)
 
         new_geometries = list()
         # new boundaries result of merge segments
@@ -891,32 +1073,29 @@ class GeometryUtils(QObject):
             segment_geom = dict_segments[segment_id].geometry()
             new_geometries.append(segment_geom)
 
-        boundaries_to_del_unique_ids = list(set(boundaries_to_del_ids))
-
-        return new_geometries, boundaries_to_del_unique_ids
+        return new_geometries, sorted(boundaries_to_del_ids)
 
+    @instrumentation.timed()
     def fix_boundaries(self, layer, id_field=ID_FIELD):
-        tmp_segments_layer = processing.run("native:explodelines", {'INPUT': layer, 'OUTPUT': 'memory:'})['OUTPUT']
-        # remove duplicate segments (algorithm don't with duplicate geometries)
-        segments_layer = processing.run("qgis:deleteduplicategeometries", {'INPUT': tmp_segments_layer, 'OUTPUT': 'memory:'})['OUTPUT']
-        id_field_idx = segments_layer.fields().indexFromName(id_field)
-        request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
-        dict_features = {feature.id(): feature for feature in segments_layer.getFeatures(request)}
-        index = QgsSpatialIndex(segments_layer)
+        """
+        Rebuild boundaries as maximal chains of segments joined by nodes of
+        degree 2, so that boundaries end exactly where they meet other ones.
+
+        :return: Tuple (list of new boundary geometries, list of ids of the
+                 boundaries to be replaced)
+        """
+        dict_features, boundary_segments = self.get_boundary_segments(layer)
+        segment_graph = SegmentGraph(dict_features.values())
 
         process_sc = list()
-        total_sc = list()
-        boundaries_to_del_ids = list()
+        total_sc = set()
 
         for id in dict_features:
             if id not in total_sc:
                 segment = dict_features[id]
-                try:
-                    segments_connected = self.get_boundary_to_build(segment, index, dict_features)
-                    total_sc.extend(segments_connected)
-                    process_sc.append(segments_connected)
-                except RecursionError as re:
-                    print('Error: {}'.format(re.args[0]))
+                segments_connected = self.get_boundary_to_build(segment, segment_graph)
+                total_sc.update(segments_connected)
+                process_sc.append(segments_connected)
 
         merge_geometries = list()
         for sc_ids in process_sc:
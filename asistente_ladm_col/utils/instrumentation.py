@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-18
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import (Qgis,
+                       QgsApplication)
+
+from ..config.general_config import (DEFAULT_INSTRUMENTATION_ENABLED,
+                                     INSTRUMENTATION_MAX_TRACE_EVENTS,
+                                     PLUGIN_NAME)
+
+ROOT_SPANS_KEPT = 100 # Finished top-level spans available through get_root_spans()
+
+
+class Span:
+    """
+    Timed section of code with counters (e.g., DB queries, features) and
+    nested spans. Counters are inclusive: counting on a span also counts on
+    its ancestors.
+    """
+    def __init__(self, instrumentation, name, **attributes):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.attributes = attributes
+        self.parent = None
+        self.children = list()
+        self.counters = dict()
+        self.start = None
+        self.duration = None
+        self.thread_id = None
+
+    def __enter__(self):
+        self.instrumentation._enter_span(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation._exit_span(self, exc_type)
+        return False
+
+    def count(self, name, value=1):
+        span = self
+        while span is not None:
+            span.counters[name] = span.counters.get(name, 0) + value
+            span = span.parent
+
+    def iter_spans(self, depth=0):
+        """
+        :return: Generator of (depth, span) for this span and its descendants
+        """
+        yield (depth, self)
+        for child in self.children:
+            yield from child.iter_spans(depth + 1)
+
+    def to_text(self):
+        lines = list()
+        for depth, span in self.iter_spans():
+            details = ", ".join("{}={}".format(k, v) for k, v in sorted({**span.attributes, **span.counters}.items()))
+            lines.append("{}{}: {:.1f} ms{}".format("    " * depth, span.name, span.duration * 1000,
+                                                   " ({})".format(details) if details else ""))
+        return "\n".join(lines)
+
+    def to_trace_event(self, origin):
+        """
+        :return: Complete event ('X') of the Trace Event Format, which can be
+                 opened with chrome://tracing or ui.perfetto.dev
+        """
+        return {'name': self.name,
+                'cat': PLUGIN_NAME,
+                'ph': 'X',
+                'ts': round((self.start - origin) * 1000000, 1),
+                'dur': round(self.duration * 1000000, 1),
+                'pid': os.getpid(),
+                'tid': self.thread_id,
+                'args': {**self.attributes, **self.counters}}
+
+
+class NullSpan:
+    """
+    Returned instead of a Span when instrumentation is disabled.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def count(self, name, value=1):
+        pass
+
+NULL_SPAN = NullSpan()
+
+
+class Instrumentation:
+    """
+    Lightweight timing and counters for the plugin, e.g.:
+
+        with instrumentation.span("load_layers", layers=len(names)):
+            ...
+            instrumentation.count('db_queries')
+
+        @instrumentation.timed()
+        def get_overlapping_polygons(self, polygon_layer):
+
+    Spans opened while another span is open in the same thread are nested
+    into it. When a top-level span finishes, its tree is written to the QGIS
+    message log and, if a trace path is set, all recorded spans are written
+    to a JSON trace file.
+
+    When disabled, span() returns a shared no-op object and count() returns
+    right away, so instrumented code pays a function call and nothing else.
+    Don't use timed() on generators, since only their creation would be
+    timed.
+    """
+    def __init__(self, enabled=None, trace_path=None, max_trace_events=INSTRUMENTATION_MAX_TRACE_EVENTS):
+        """
+        :param enabled: If None, read from QSettings
+        :param trace_path: JSON trace file. If None, read from QSettings.
+        """
+        settings = QSettings()
+        if enabled is None:
+            enabled = settings.value('Asistente-LADM_COL/instrumentation/enabled', DEFAULT_INSTRUMENTATION_ENABLED, bool)
+        if trace_path is None:
+            trace_path = settings.value('Asistente-LADM_COL/instrumentation/trace_path', '', str) or None
+
+        self.log = QgsApplication.messageLog()
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._events = deque(maxlen=max_trace_events)
+        self._root_spans = deque(maxlen=ROOT_SPANS_KEPT)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    def set_trace_path(self, trace_path):
+        self.trace_path = trace_path or None
+
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, **attributes)
+
+    def count(self, name, value=1):
+        """
+        Add to a counter of the innermost open span in the current thread.
+        """
+        if not self.enabled:
+            return
+
+        stack = self._get_stack()
+        if stack:
+            stack[-1].count(name, value)
+
+    def timed(self, name=None):
+        """
+        Decorator that runs the function in a span.
+
+        :param name: Span name, the function's qualified name if None
+        """
+        def decorator(function):
+            span_name = name or function.__qualname__
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                with Span(self, span_name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+        return decorator
+
+    def get_root_spans(self):
+        """
+        :return: List of the last finished top-level spans, oldest first
+        """
+        with self._lock:
+            return list(self._root_spans)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self._root_spans.clear()
+
+    def write_trace(self, trace_path):
+        with self._lock:
+            events = list(self._events)
+
+        try:
+            with open(trace_path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        except OSError as e:
+            self.log.logMessage("Instrumentation trace file '{}' couldn't be written: {}".format(trace_path, e), PLUGIN_NAME, Qgis.Warning)
+
+    def _get_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = list()
+        return stack
+
+    def _enter_span(self, span):
+        stack = self._get_stack()
+        if stack:
+            span.parent = stack[-1]
+            span.parent.children.append(span)
+        stack.append(span)
+        span.thread_id = threading.get_ident()
+        span.start = time.perf_counter()
+
+    def _exit_span(self, span, exc_type):
+        span.duration = time.perf_counter() - span.start
+        if exc_type is not None:
+            span.attributes['error'] = exc_type.__name__
+
+        stack = self._get_stack()
+        if span in stack:
+            del stack[stack.index(span):] # Children left open are closed with it
+
+        with self._lock:
+            self._events.append(span.to_trace_event(self._origin))
+            if span.parent is None:
+                self._root_spans.append(span)
+
+        if span.parent is None:
+            self.log.logMessage(span.to_text(), PLUGIN_NAME, Qgis.Info)
+            if self.trace_path:
+                self.write_trace(self.trace_path)
+
+
+instrumentation = Instrumentation()
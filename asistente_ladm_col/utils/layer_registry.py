@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import QObject
+from qgis.core import (QgsDataSourceUri,
+                       QgsProject)
+
+
+class LayerRegistry(QObject):
+    """
+    Index of the project's DB layers keyed on (database, schema, table,
+    geometry column). It is updated incrementally from QgsProject signals, so
+    finding a layer doesn't require parsing the source of every map layer.
+
+    Databases are identified by (host, port, database, username, password)
+    for PostgreSQL layers and by file path for GeoPackage layers, whose schema
+    is None.
+    """
+    def __init__(self, project=None):
+        QObject.__init__(self)
+        self.project = project or QgsProject.instance()
+        self._layer_keys = dict() # {layer_id: (db, schema, table, geometry_column)}
+        self._by_table = dict() # {(schema, table): [layer_id]}
+        self._by_db = dict() # {(db, schema): [layer_id]}
+
+        self.project.layersAdded.connect(self.add_layers)
+        self.project.layersWillBeRemoved.connect(self.remove_layers)
+        self.add_layers(self.project.mapLayers().values())
+
+    @staticmethod
+    def get_pg_db_key(uri):
+        return ('postgres', uri.host(), uri.port(), uri.database(), uri.username(), uri.password())
+
+    @staticmethod
+    def get_layer_key(layer):
+        """
+        :return: Tuple (db, schema, table, geometry column) or None if the
+                 layer doesn't come from a supported DB
+        """
+        provider = layer.dataProvider()
+        if provider is None:
+            return None
+
+        if provider.name() == 'postgres':
+            uri = QgsDataSourceUri(layer.source())
+            return (LayerRegistry.get_pg_db_key(uri), uri.schema(), uri.table(), uri.geometryColumn())
+
+        if '|layername=' in layer.source(): # GeoPackage layers
+            parts = layer.source().split('|')
+            for part in parts[1:]:
+                if part.startswith('layername='):
+                    return (('ogr', parts[0]), None, part[len('layername='):].lower(), None)
+
+        return None
+
+    def add_layers(self, layers):
+        for layer in layers:
+            key = self.get_layer_key(layer)
+            if key is None or layer.id() in self._layer_keys:
+                continue
+
+            db, schema, table, geometry_column = key
+            self._layer_keys[layer.id()] = key
+            self._by_table.setdefault((schema, table), list()).append(layer.id())
+            self._by_db.setdefault((db, schema), list()).append(layer.id())
+
+    def remove_layers(self, layer_ids):
+        for layer_id in layer_ids:
+            key = self._layer_keys.pop(layer_id, None)
+            if key is None:
+                continue
+
+            db, schema, table, geometry_column = key
+            self._remove_from_index(self._by_table, (schema, table), layer_id)
+            self._remove_from_index(self._by_db, (db, schema), layer_id)
+
+    @staticmethod
+    def _remove_from_index(index, key, layer_id):
+        index[key].remove(layer_id)
+        if not index[key]:
+            del index[key]
+
+    def get_layers_by_table(self, table, schema=None):
+        """
+        Layers of a given table. PostgreSQL layers must also match the schema,
+        whereas GeoPackage layers are matched only by table name.
+        """
+        layer_ids = list(self._by_table.get((schema, table), list()))
+        if schema is not None:
+            layer_ids.extend(self._by_table.get((None, table), list()))
+        return self._get_map_layers(layer_ids)
+
+    def get_pg_layers(self, uri, schema):
+        """
+        All layers from a given PostgreSQL database (QgsDataSourceUri) and schema.
+        """
+        return self._get_map_layers(self._by_db.get((self.get_pg_db_key(uri), schema), list()))
+
+    def _get_map_layers(self, layer_ids):
+        layers = list()
+        for layer_id in layer_ids:
+            layer = self.project.mapLayer(layer_id)
+            if layer is not None:
+                layers.append(layer)
+        return layers
+
+    def __len__(self):
+        return len(self._layer_keys)
@@ -1,7 +1,9 @@
+import psycopg2.extras
 from qgis.PyQt.QtCore import (QObject,
                               QCoreApplication,
                               QVariant)
-from qgis.core import (QgsApplication,
+from qgis.core import (Qgis,
+                       QgsApplication,
                        QgsGeometry,
                        QgsField,
                        QgsVectorLayerUtils,
@@ -15,6 +17,8 @@ from ..config.table_mapping_config import (ID_FIELD,
                                            PARCEL_TYPE_FIELD,
                                            PARCEL_TABLE)
 from ..config.general_config import (DEFAULT_EPSG,
+                                     ERROR_LAYER_CHUNK_SIZE,
+                                     PLUGIN_NAME,
                                      translated_strings)
 
 class LogicChecks(QObject):
@@ -23,17 +27,39 @@ class LogicChecks(QObject):
         QObject.__init__(self)
         self.log = QgsApplication.messageLog()
 
+    def iter_sql_query(self, db, query, cursor_factory=psycopg2.extras.RealDictCursor):
+        """
+        Stream the records of a logic consistency query. Connection errors
+        raised by db.iter_sql_query() are logged and end the stream.
+        """
+        try:
+            yield from db.iter_sql_query(query, cursor_factory)
+        except psycopg2.OperationalError as e:
+            self.log.logMessage(
+                QCoreApplication.translate("LogicChecks", "Logic consistency query couldn't be completed: {}").format(e),
+                PLUGIN_NAME,
+                Qgis.Critical)
+
+    @staticmethod
+    def flush_features(error_layer, features):
+        """
+        Add features to the error layer and empty the given list, so that
+        records streamed from the DB are not all kept in memory.
+        :return: Number of features added
+        """
+        error_layer.dataProvider().addFeatures(features)
+        count = len(features)
+        del features[:]
+        return count
+
     def get_parcel_right_relationship_errors(self, db, error_layer, table_name):
 
         query_parcels_with_no_right = db.logic_validation_queries['PARCELS_WITH_NO_RIGHT']['query']
         table = db.logic_validation_queries['PARCELS_WITH_NO_RIGHT']['table']
-        parcels_no_right = db.execute_sql_query_dict_cursor(query_parcels_with_no_right)
+        parcels_no_right = self.iter_sql_query(db, query_parcels_with_no_right, psycopg2.extras.DictCursor)
 
         query_parcels_with_repeated_domain_right = db.logic_validation_queries['PARCELS_WITH_REPEATED_DOMAIN_RIGHT']['query']
-        parcels_repeated_domain_right = db.execute_sql_query_dict_cursor(query_parcels_with_repeated_domain_right)
-
-        parcel_no_right_ids = [sublist[0] for sublist in parcels_no_right]
-        parcel_duplicated_domain_right_ids = [sublist[0] for sublist in parcels_repeated_domain_right]
+        parcels_repeated_domain_right = self.iter_sql_query(db, query_parcels_with_repeated_domain_right, psycopg2.extras.DictCursor)
 
         if error_layer is None:
             error_layer = QgsVectorLayer("NoGeometry?crs=EPSG:{}".format(DEFAULT_EPSG), table_name, "memory")
@@ -42,26 +68,31 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "error_type"), QVariant.String)])
             error_layer.updateFields()
 
+        count = 0
         new_features = list()
-        for parcel_id in parcel_no_right_ids:
+        for record in parcels_no_right:
             new_feature = QgsVectorLayerUtils().createFeature(
                 error_layer,
                 QgsGeometry(),
-                {0: parcel_id,
+                {0: record[0],
                  1: translated_strings.ERROR_PARCEL_WITH_NO_RIGHT})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                count += self.flush_features(error_layer, new_features)
 
-        for parcel_id in parcel_duplicated_domain_right_ids:
+        for record in parcels_repeated_domain_right:
             new_feature = QgsVectorLayerUtils().createFeature(
                 error_layer,
                 QgsGeometry(),
-                {0: parcel_id,
+                {0: record[0],
                  1: translated_strings.ERROR_PARCEL_WITH_REPEATED_DOMAIN_RIGHT})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                count += self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        count += self.flush_features(error_layer, new_features)
 
-        return len(new_features), error_layer
+        return count, error_layer
 
     def get_duplicate_records_in_a_table(self, db, table, fields, error_layer,  id_field=ID_FIELD):
         rule = 'DUPLICATE_RECORDS_IN_TABLE'
@@ -78,14 +109,16 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "count"), QVariant.Int)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.iter_sql_query(db, query)
 
         new_features = list()
         for record in records:
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, QgsGeometry(), {0: record['duplicate_ids'], 1: record['duplicate_total']})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        self.flush_features(error_layer, new_features)
 
         return error_layer
 
@@ -103,7 +136,7 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "fraction_sum"), QVariant.Double)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.iter_sql_query(db, query)
         new_features = list()
         for record in records:
             new_feature = QgsVectorLayerUtils().createFeature(
@@ -113,8 +146,10 @@ class LogicChecks(QObject):
                  1: ",".join([str(f) for f in record['miembros']]),
                  2: record['suma_fracciones']})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        self.flush_features(error_layer, new_features)
 
         return error_layer
 
@@ -130,8 +165,9 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "error_type"), QVariant.String)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.iter_sql_query(db, query)
 
+        count = 0
         new_features = list()
         for record in records:
             errors_list = list()
@@ -149,10 +185,12 @@ class LogicChecks(QObject):
             mgs_error = ', '. join(errors_list)
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, QgsGeometry(), {0: record[ID_FIELD], 1:mgs_error})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                count += self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        count += self.flush_features(error_layer, new_features)
 
-        return len(new_features), error_layer
+        return count, error_layer
 
     def col_party_type_no_natural_validation(self, db, rule, error_layer):
 
@@ -167,8 +205,9 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "error_type"), QVariant.String)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.iter_sql_query(db, query)
 
+        count = 0
         new_features = list()
         for record in records:
             errors_list = list()
@@ -186,10 +225,12 @@ class LogicChecks(QObject):
             mgs_error = ', '. join(errors_list)
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, QgsGeometry(),{0: record[ID_FIELD], 1: mgs_error})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                count += self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        count += self.flush_features(error_layer, new_features)
 
-        return len(new_features), error_layer
+        return count, error_layer
 
     def parcel_type_and_22_position_of_parcel_number_validation(self, db, rule, error_layer):
 
@@ -204,8 +245,9 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "error_type"), QVariant.String)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.iter_sql_query(db, query)
 
+        count = 0
         new_features = list()
         for record in records:
             mgs_error =  None
@@ -226,10 +268,12 @@ class LogicChecks(QObject):
 
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, QgsGeometry(), {0: record[ID_FIELD], 1: mgs_error})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                count += self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        count += self.flush_features(error_layer, new_features)
 
-        return len(new_features), error_layer
+        return count, error_layer
 
     def uebaunit_parcel_validation(self, db, rule, error_layer):
         query = db.logic_validation_queries[rule]['query']
@@ -246,8 +290,9 @@ class LogicChecks(QObject):
                               QgsField(QCoreApplication.translate("QGISUtils", "error_type"), QVariant.String)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.iter_sql_query(db, query)
 
+        count = 0
         new_features = list()
         for record in records:
             mgs_error = None
@@ -284,7 +329,9 @@ class LogicChecks(QObject):
                                                                3: building_unit_count,
                                                                4: mgs_error})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                count += self.flush_features(error_layer, new_features)
 
-        error_layer.dataProvider().addFeatures(new_features)
+        count += self.flush_features(error_layer, new_features)
 
-        return len(new_features), error_layer
+        return count, error_layer
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import hashlib
+import json
+import os
+
+from qgis.core import (Qgis,
+                       QgsApplication)
+
+from ..config.general_config import (METADATA_CACHE_PATH,
+                                     PLUGIN_NAME,
+                                     PLUGIN_VERSION)
+
+
+class MetadataCache:
+    """
+    On-disk cache of layers, relations and bags of enum information, which
+    is expensive to extract (DB queries plus parsing of INTERLIS models).
+
+    There is one JSON file per connection and schema. Entries are stored
+    along with the DB's models fingerprint (see DBConnector), so they are
+    only used while the models in the DB haven't changed.
+    """
+    def __init__(self, cache_path=METADATA_CACHE_PATH):
+        self.cache_path = cache_path
+        self.log = QgsApplication.messageLog()
+
+    def get_cache_file_path(self, db):
+        key = "{}|{}|{}".format(db.mode, db.uri, db.schema or '')
+        return os.path.join(self.cache_path, "{}.json".format(hashlib.sha1(key.encode('utf-8')).hexdigest()))
+
+    def load(self, db):
+        """
+        :return: Tuple (layers, relations, bags_of_enum) or None if there is
+                 no valid cache entry for the DB
+        """
+        fingerprint = db.get_models_fingerprint()
+        if fingerprint is None:
+            return None
+
+        cache_file_path = self.get_cache_file_path(db)
+        if not os.path.isfile(cache_file_path):
+            return None
+
+        try:
+            with open(cache_file_path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log.logMessage("Metadata cache file '{}' couldn't be read: {}".format(cache_file_path, e), PLUGIN_NAME, Qgis.Warning)
+            return None
+
+        if entry.get('plugin_version') != PLUGIN_VERSION or entry.get('fingerprint') != fingerprint:
+            return None
+
+        return (entry['layers'], entry['relations'], entry['bags_of_enum'])
+
+    def save(self, db, layers, relations, bags_of_enum):
+        fingerprint = db.get_models_fingerprint()
+        if fingerprint is None or layers is None:
+            return
+
+        entry = {
+            'plugin_version': PLUGIN_VERSION,
+            'fingerprint': fingerprint,
+            'layers': [{key: record[key] for key in record.keys()} for record in layers],
+            'relations': relations,
+            'bags_of_enum': bags_of_enum
+        }
+
+        cache_file_path = self.get_cache_file_path(db)
+        tmp_file_path = "{}.tmp".format(cache_file_path)
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            with open(tmp_file_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp_file_path, cache_file_path) # Readers never see half-written files
+        except (OSError, TypeError, ValueError) as e:
+            self.log.logMessage("Metadata cache file '{}' couldn't be written: {}".format(cache_file_path, e), PLUGIN_NAME, Qgis.Warning)
+
+    def clear(self, db=None):
+        """
+        Remove the cache entry for a DB, or all entries if db is None.
+        """
+        if db is not None:
+            file_paths = [self.get_cache_file_path(db)]
+        elif os.path.isdir(self.cache_path):
+            file_paths = [os.path.join(self.cache_path, file_name) for file_name in os.listdir(self.cache_path)]
+        else:
+            file_paths = list()
+
+        for file_path in file_paths:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
@@ -17,6 +17,7 @@
  ***************************************************************************/
 """
 import ast
+import csv
 import datetime
 import glob
 import os
@@ -28,33 +29,46 @@ from qgis.PyQt.QtCore import (Qt,
                               QObject,
                               pyqtSignal,
                               QCoreApplication,
-                              QSettings)
-from qgis.PyQt.QtWidgets import QProgressBar, QMessageBox
+                              QDate,
+                              QDateTime,
+                              QSettings,
+                              QVariant)
+from qgis.PyQt.QtWidgets import QMessageBox, QWidget
 from qgis.core import (Qgis,
                        QgsApplication,
                        QgsAttributeEditorContainer,
                        QgsAttributeEditorElement,
+                       QgsCoordinateReferenceSystem,
+                       QgsCoordinateTransform,
                        QgsDataSourceUri,
                        QgsDefaultValue,
                        QgsEditorWidgetSetup,
                        QgsExpression,
                        QgsExpressionContextUtils,
+                       QgsFeatureRequest,
                        QgsGeometry,
                        QgsLayerTreeGroup,
                        QgsLayerTreeNode,
                        QgsMapLayer,
                        QgsOptionalExpression,
+                       QgsPoint,
                        QgsProject,
                        QgsProperty,
                        QgsRelation,
                        QgsVectorLayer,
                        QgsVectorLayerUtils,
                        QgsWkbTypes,
+                       NULL,
                        edit)
 
+from .dirty_regions import DirtyRegionTracker
 from .geometry import GeometryUtils
+from .instrumentation import instrumentation
+from .layer_registry import LayerRegistry
+from .metadata_cache import MetadataCache
 from .project_generator_utils import ProjectGeneratorUtils
 from .qt_utils import OverrideCursor
+from .relation_index import RelationIndex
 from .symbology import SymbologyUtils
 from ..config.general_config import (DEFAULT_EPSG,
                                      FIELD_MAPPING_PATH,
@@ -119,7 +133,7 @@ class QGISUtils(QObject):
     activate_layer_requested = pyqtSignal(QgsMapLayer)
     clear_status_bar_emitted = pyqtSignal()
     clear_message_bar_emitted = pyqtSignal()
-    create_progress_message_bar_emitted = pyqtSignal(str, QProgressBar)
+    create_progress_message_bar_emitted = pyqtSignal(str, QWidget) # e.g., a QProgressBar
     remove_error_group_requested = pyqtSignal()
     layer_symbology_changed = pyqtSignal(str) # layer id
     refresh_menus_requested = pyqtSignal(DBConnector)
@@ -142,11 +156,15 @@ class QGISUtils(QObject):
         self.symbology = SymbologyUtils()
         self.geometry = GeometryUtils()
         self.layer_tree_view = layer_tree_view
+        self.metadata_cache = MetadataCache()
+        self.layer_registry = LayerRegistry()
+        self.dirty_regions = DirtyRegionTracker()
 
         self.__settings_dialog = None
         self._source_handler = None
         self._layers = list()
         self._relations = list()
+        self._relation_index = None
         self._bags_of_enum = dict()
 
     def set_db_connection(self, mode, dict_conn):
@@ -182,7 +200,12 @@ class QGISUtils(QObject):
         QCoreApplication.processEvents()
 
         with OverrideCursor(Qt.WaitCursor):
-            self._layers, self._relations, self._bags_of_enum = self.project_generator_utils.get_layers_and_relations_info(db)
+            cached = self.metadata_cache.load(db)
+            if cached is not None:
+                self._layers, self._relations, self._bags_of_enum = cached
+            else:
+                self._layers, self._relations, self._bags_of_enum = self.project_generator_utils.get_layers_and_relations_info(db)
+                self.metadata_cache.save(db, self._layers, self._relations, self._bags_of_enum)
 
         self.clear_status_bar_emitted.emit()
 
@@ -198,12 +221,9 @@ class QGISUtils(QObject):
         domains of those related layers. Additionally, we load its related
         structures and domains to build bags_of_enum widgets.
         """
-        related_layers = list()
-        for relation in self._relations:
-            for layer_name in layer_names:
-                if relation[REFERENCING_LAYER] == layer_name:
-                    if relation[REFERENCED_LAYER] not in already_loaded:
-                        related_layers.append(relation[REFERENCED_LAYER])
+        already_loaded = set(already_loaded)
+        related_layers = [layer_name for layer_name in self.get_relation_index().get_referenced_layers(layer_names)
+                          if layer_name not in already_loaded]
 
         related_layers_bags_of_enum = list()
         for layer_name in layer_names:
@@ -218,21 +238,24 @@ class QGISUtils(QObject):
         return related_layers + related_layers_bags_of_enum
 
     def get_related_domains(self, layer_names, already_loaded):
-        related_domains = list()
-        for relation in self._relations:
-            if relation[RELATION_TYPE] == DOMAIN_CLASS_RELATION:
-                for layer_name in layer_names:
-                    if relation[REFERENCING_LAYER] == layer_name:
-                        if relation[REFERENCED_LAYER] not in already_loaded:
-                            related_domains.append(relation[REFERENCED_LAYER])
+        return [layer_name for layer_name in self.get_relation_index().get_referenced_layers(layer_names, DOMAIN_CLASS_RELATION)
+                if layer_name not in already_loaded]
 
-        return related_domains
+    def get_relation_index(self):
+        """
+        Adjacency indexes of the cached relations, rebuilt whenever the
+        relations are cached again.
+        """
+        if self._relation_index is None or self._relation_index.relations is not self._relations:
+            self._relation_index = RelationIndex(self._relations)
+        return self._relation_index
 
     def get_layer(self, db, layer_name, geometry_type=None, load=False):
         # Handy function to avoid sending a whole dict when all we need is a single table/layer
         res_layer = self.get_layers(db, {layer_name: {'name': layer_name, 'geometry': geometry_type}}, load)
         return res_layer[layer_name]
 
+    @instrumentation.timed()
     def get_layers(self, db, layers, load=False):
         # layers = {layer_id : {name: ABC, geometry: DEF}}
         # layer_id should match layer_name most of the times, but if the same
@@ -246,25 +269,21 @@ class QGISUtils(QObject):
 
         self.map_freeze_requested.emit(True)
 
-        profiler = QgsApplication.profiler()
         with OverrideCursor(Qt.WaitCursor):
-            profiler.start("existing_layers")
-            ladm_layers = self.get_ladm_layers_from_layer_tree(db)
-            for layer_id, layer_info in layers.items():
-                layer_obj = None
+            with instrumentation.span("existing_layers"):
+                ladm_layers = self.get_ladm_layers_from_layer_tree(db)
+                for layer_id, layer_info in layers.items():
+                    layer_obj = None
 
-                # If layer is in LayerTree, return it
-                for ladm_layer in ladm_layers:
-                    if layer_info['name'] == ladm_layer.dataProvider().uri().table():
-                        if layer_info['geometry'] is not None and layer_info['geometry'] != ladm_layer.geometryType():
-                            continue
+                    # If layer is in LayerTree, return it
+                    for ladm_layer in ladm_layers:
+                        if layer_info['name'] == ladm_layer.dataProvider().uri().table():
+                            if layer_info['geometry'] is not None and layer_info['geometry'] != ladm_layer.geometryType():
+                                continue
 
-                        layer_obj = ladm_layer
+                            layer_obj = ladm_layer
 
-                response_layers[layer_id] = layer_obj
-            profiler.end()
-            print("Existing layers",profiler.totalTime())
-            profiler.clear()
+                    response_layers[layer_id] = layer_obj
 
             if load:
                 layers_to_load = [layers[layer_id]['name'] for layer_id, layer_obj in response_layers.items() if layer_obj is None]
@@ -273,21 +292,15 @@ class QGISUtils(QObject):
                     # Get related layers from cached relations and add them to
                     # list of layers to load, Project Generator will set relations
                     already_loaded = [ladm_layer.dataProvider().uri().table() for ladm_layer in ladm_layers]
-                    profiler.start("related_layers")
-                    additional_layers_to_load = self.get_related_layers(layers_to_load, already_loaded)
-                    profiler.end()
-                    print("Related layers",profiler.totalTime())
-                    profiler.clear()
+                    with instrumentation.span("related_layers"):
+                        additional_layers_to_load = self.get_related_layers(layers_to_load, already_loaded)
                     all_layers_to_load = list(set(layers_to_load + additional_layers_to_load))
 
                     self.status_bar_message_emitted.emit(QCoreApplication.translate("QGISUtils",
                         "Loading LADM_COL layers to QGIS and configuring their relations and forms..."), 0)
                     QCoreApplication.processEvents()
-                    profiler.start("load_layers")
-                    self.project_generator_utils.load_layers(all_layers_to_load, db)
-                    profiler.end()
-                    print("Load layers", profiler.totalTime())
-                    profiler.clear()
+                    with instrumentation.span("load_layers", layers=len(all_layers_to_load)):
+                        self.project_generator_utils.load_layers(all_layers_to_load, db)
 
                     # Now that all layers are loaded, update response dict
                     # and apply post_load_configurations to new layers
@@ -329,34 +342,31 @@ class QGISUtils(QObject):
                             QgsProject.instance().removeMapLayer(layer)
                             ladm_layers.remove(layer)
 
-                    profiler.start("post_load")
-                    # Apply post-load configs to all just loaded layers
-                    requested_layer_names = [v['name'] for k,v in layers.items()]
-                    for layer in ladm_layers:
-                        layer_name = layer.dataProvider().uri().table()
-                        layer_geometry = layer.geometryType()
+                    with instrumentation.span("post_load"):
+                        # Apply post-load configs to all just loaded layers
+                        requested_layer_names = [v['name'] for k,v in layers.items()]
+                        for layer in ladm_layers:
+                            layer_name = layer.dataProvider().uri().table()
+                            layer_geometry = layer.geometryType()
 
-                        if layer_name in all_layers_to_load:
-                            # Discard already loaded layers
+                            if layer_name in all_layers_to_load:
+                                # Discard already loaded layers
 
-                            for layer_id, layer_info in new_layers.items():
-                                # This should update response_layers dict with
-                                # newly added layer objects
-                                if layer_info['name'] == layer_name:
-                                    if layer_info['geometry'] is not None and layer_info['geometry'] != layer_geometry:
-                                        continue
+                                for layer_id, layer_info in new_layers.items():
+                                    # This should update response_layers dict with
+                                    # newly added layer objects
+                                    if layer_info['name'] == layer_name:
+                                        if layer_info['geometry'] is not None and layer_info['geometry'] != layer_geometry:
+                                            continue
 
-                                    response_layers[layer_id] = layer
-                                    del new_layers[layer_id] # Don't look for this layer anymore
-                                    break
+                                        response_layers[layer_id] = layer
+                                        del new_layers[layer_id] # Don't look for this layer anymore
+                                        break
 
-                            # Turn off layers loaded as related layers
-                            visible = layer_name in requested_layer_names
-                            self.post_load_configurations(layer, visible)
+                                # Turn off layers loaded as related layers
+                                visible = layer_name in requested_layer_names
+                                self.post_load_configurations(layer, visible)
 
-                    profiler.end()
-                    print("Post load",profiler.totalTime())
-                    profiler.clear()
                     self.clear_status_bar_emitted.emit()
 
         self.map_freeze_requested.emit(False)
@@ -368,49 +378,18 @@ class QGISUtils(QObject):
         return response_layers
 
     def get_layer_from_layer_tree(self, layer_name, schema=None, geometry_type=None):
-        for k,layer in QgsProject.instance().mapLayers().items():
-            if layer.dataProvider().name() == 'postgres':
-                if QgsDataSourceUri(layer.source()).table() == layer_name.lower() and \
-                    QgsDataSourceUri(layer.source()).schema() == schema:
-                    if geometry_type is not None:
-                        if layer.geometryType() == geometry_type:
-                            return layer
-                    else:
-                        return layer
-            else:
-                if '|layername=' in layer.source(): # GeoPackage layers
-                    if layer.source().split()[-1] == layer_name.lower():
-                        if geometry_type is not None:
-                            if layer.geometryType() == geometry_type:
-                                return layer
-                        else:
-                            return layer
+        for layer in self.layer_registry.get_layers_by_table(layer_name.lower(), schema):
+            if geometry_type is None or layer.geometryType() == geometry_type:
+                return layer
+
         return None
 
     def get_ladm_layers_from_layer_tree(self, db):
-        ladm_layers = list()
-
-        for k,layer in QgsProject.instance().mapLayers().items():
-            if db.mode == 'pg':
-                if layer.dataProvider().name() == 'postgres':
-
-                    layer_uri = layer.dataProvider().uri()
-                    db_uri = QgsDataSourceUri(db.uri)
+        if db.mode == 'pg':
+            return self.layer_registry.get_pg_layers(QgsDataSourceUri(db.uri), db.schema)
 
-                    if layer_uri.schema() == db.schema and \
-                       layer_uri.database() == db_uri.database() and \
-                       layer_uri.host() == db_uri.host() and \
-                       layer_uri.port() == db_uri.port() and \
-                       layer_uri.username() == db_uri.username() and \
-                       layer_uri.password() == db_uri.password():
-
-                        ladm_layers.append(layer)
-
-            elif db.mode == 'gpkg':
-                # To be implemented for GeoPackage layers
-                pass
-
-        return ladm_layers
+        # To be implemented for GeoPackage layers
+        return list()
 
     def automatic_namespace_local_id_configuration_changed(self, db):
         layers = self.get_ladm_layers_from_layer_tree(db)
@@ -432,64 +411,57 @@ class QGISUtils(QObject):
         if layer.isSpatial():
             self.symbology.set_layer_style_from_qml(layer)
             self.set_layer_visibility(layer, visible)
+            self.dirty_regions.track_layer(layer)
 
     def configure_missing_relations(self, layer):
         """
         Relations between newly loaded layers and already loaded layer cannot
         be handled by project generator (which only sets relations between
         loaded layers), so we do it in the Asistente LADM_COL.
+
+        Relations are registered one by one, so relations already in the
+        project are left untouched (instead of rebuilding the whole set).
         """
         layer_name = layer.dataProvider().uri().table()
+        schema = layer.dataProvider().uri().schema()
+        relation_manager = QgsProject.instance().relationManager()
+        relation_index = self.get_relation_index()
+
+        # Relations in which the layer is the referencing one
+        for db_relation in relation_index.get_referencing_relations(layer_name):
+            referenced_layer = self.get_layer_from_layer_tree(db_relation[REFERENCED_LAYER], schema)
+            if referenced_layer is not None:
+                self.add_missing_relation(relation_manager, db_relation, layer, referenced_layer)
+
+        # Relations in which the layer is referenced by already loaded layers
+        for db_relation in relation_index.get_referenced_relations(layer_name):
+            referencing_layer = self.get_layer_from_layer_tree(db_relation[REFERENCING_LAYER], schema)
+            if referencing_layer is not None:
+                self.add_missing_relation(relation_manager, db_relation, referencing_layer, layer)
+
+    def add_missing_relation(self, relation_manager, db_relation, referencing_layer, referenced_layer):
+        """
+        Register a DB relation unless the project already has an equivalent one
+        (same id or same layers and fields, e.g., set by Project Generator).
+        """
+        if relation_manager.relation(db_relation[RELATION_NAME]).isValid():
+            return
 
-        db_relations = list()
-        for relation in self._relations:
-            if relation[REFERENCING_LAYER] == layer_name:
-                db_relations.append(relation)
-
-        qgis_relations = QgsProject.instance().relationManager().referencingRelations(layer)
-        qgis_rels = list()
-        for qgis_relation in qgis_relations:
-            qgis_rel = dict()
-            referenced_layer = qgis_relation.referencedLayer()
-            qgis_rel[REFERENCED_LAYER] = referenced_layer.dataProvider().uri().table()
-            qgis_rel[REFERENCED_FIELD] = referenced_layer.fields()[qgis_relation.referencedFields()[0]].name()
-            qgis_rel[REFERENCING_FIELD] = layer.fields()[qgis_relation.referencingFields()[0]].name()
-            qgis_rels.append(qgis_rel)
-
-        new_relations = list()
-        # Compare relations, configure what is missing
-        for db_relation in db_relations:
-            found = False
-            for qgis_rel in qgis_rels:
-                # We known that referencing_layer already matches, so don't check
-                if qgis_rel[REFERENCED_LAYER] == db_relation[REFERENCED_LAYER] and \
-                    qgis_rel[REFERENCING_FIELD] == db_relation[REFERENCING_FIELD] and \
-                    qgis_rel[REFERENCED_FIELD] == db_relation[REFERENCED_FIELD]:
-
-                    found = True
-                    break
-
-            if not found:
-                # This relation is not configured into QGIS, let's do it
-                new_rel = QgsRelation()
-                new_rel.setReferencingLayer(layer.id())
-                referenced_layer = self.get_layer_from_layer_tree(
-                    db_relation[REFERENCED_LAYER],
-                    layer.dataProvider().uri().schema())
-                if referenced_layer is None:
-                    # Referenced_layer NOT FOUND in layer tree...
-                    continue
-                new_rel.setReferencedLayer(referenced_layer.id())
-                new_rel.addFieldPair(db_relation[REFERENCING_FIELD],
-                    db_relation[REFERENCED_FIELD])
-                new_rel.setId(db_relation[RELATION_NAME]) #generateId()
-                new_rel.setName(db_relation[RELATION_NAME])
-
-                new_relations.append(new_rel)
+        for qgis_relation in relation_manager.referencingRelations(referencing_layer):
+            if qgis_relation.referencedLayerId() == referenced_layer.id() and \
+                referencing_layer.fields()[qgis_relation.referencingFields()[0]].name() == db_relation[REFERENCING_FIELD] and \
+                referenced_layer.fields()[qgis_relation.referencedFields()[0]].name() == db_relation[REFERENCED_FIELD]:
+                return
 
-        all_qgis_relations = list(QgsProject.instance().relationManager().relations().values())
-        all_qgis_relations.extend(new_relations)
-        QgsProject.instance().relationManager().setRelations(all_qgis_relations)
+        # This relation is not configured into QGIS, let's do it
+        new_rel = QgsRelation()
+        new_rel.setReferencingLayer(referencing_layer.id())
+        new_rel.setReferencedLayer(referenced_layer.id())
+        new_rel.addFieldPair(db_relation[REFERENCING_FIELD],
+            db_relation[REFERENCED_FIELD])
+        new_rel.setId(db_relation[RELATION_NAME]) #generateId()
+        new_rel.setName(db_relation[RELATION_NAME])
+        relation_manager.addRelation(new_rel)
 
     def configure_missing_bags_of_enum(self, layer):
         """
@@ -759,6 +731,19 @@ class QGISUtils(QObject):
                 Qgis.Warning)
             return False
 
+        if db.mode == 'pg':
+            res = self.copy_csv_to_pg(csv_path, delimiter, longitude, latitude, db, epsg, target_layer_name, elevation, decimal_point)
+            if res is not None:
+                return res
+            # Otherwise, go on with the QGIS provider path, e.g., to show overlapping points
+
+        return self.copy_csv_with_provider(csv_path, delimiter, longitude, latitude, db, epsg, target_layer_name, elevation, decimal_point)
+
+    def copy_csv_with_provider(self, csv_path, delimiter, longitude, latitude, db, epsg, target_layer_name, elevation=None, decimal_point='.'):
+        """
+        Copy CSV points to the DB through a delimited text layer and the
+        target layer's data provider. Works for any DB engine.
+        """
         # Create QGIS vector layer
         uri = "file:///{}?decimalPoint={}&delimiter={}&xField={}&yField={}&crs=EPSG:{}".format(
               csv_path,
@@ -853,6 +838,165 @@ class QGISUtils(QObject):
 
         return True
 
+    def copy_csv_to_pg(self, csv_path, delimiter, longitude, latitude, db, epsg, target_layer_name, elevation=None, decimal_point='.'):
+        """
+        Fast path of copy_csv_to_db for PostgreSQL. CSV rows are parsed and
+        reprojected on the fly and streamed into the target table with COPY,
+        so no intermediate layers or feature lists are built.
+
+        Returns True or False like copy_csv_to_db, or None if the CSV has
+        overlapping points, which the provider path reports to the user.
+        """
+        target_point_layer = self.get_layer(db, target_layer_name, load=True)
+        if target_point_layer is None:
+            self.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                                           "The point layer '{}' couldn't be found in the DB... {}").format(target_layer_name, db.get_description()),
+                Qgis.Warning)
+            return False
+
+        # Skip checking point overlaps if layer is Surver points
+        if target_layer_name != SURVEY_POINT_TABLE:
+            coordinates = set()
+            for geometry, row in self.read_csv_points(csv_path, delimiter, longitude, latitude, epsg, elevation, decimal_point):
+                point = geometry.constGet()
+                if (point.x(), point.y()) in coordinates:
+                    return None
+                coordinates.add((point.x(), point.y()))
+            del coordinates
+
+        # Copy mapped fields and fields with automatic values, the DB takes
+        # care of the rest (e.g., t_id)
+        fields = target_point_layer.fields()
+        csv_field_names = self.get_csv_field_names(csv_path, delimiter)
+        mapped_names = list()
+        copy_idxs = list()
+        for idx in fields.allAttributesList():
+            field_name = fields.field(idx).name()
+            if field_name == ID_FIELD:
+                continue
+            if field_name in csv_field_names:
+                mapped_names.append(field_name)
+                copy_idxs.append(idx)
+            elif target_point_layer.defaultValueDefinition(idx).expression():
+                copy_idxs.append(idx)
+
+        uri = target_point_layer.dataProvider().uri()
+        srid = target_point_layer.crs().postgisSrid()
+        has_z = QgsWkbTypes.hasZ(target_point_layer.wkbType())
+
+        def records():
+            for geometry, row in self.read_csv_points(csv_path, delimiter, longitude, latitude, epsg, elevation, decimal_point):
+                attrs = dict()
+                for idx in copy_idxs:
+                    field = fields.field(idx)
+                    if field.name() in mapped_names:
+                        attrs[idx] = self.parse_csv_value(field, row[field.name()], decimal_point)
+
+                feature = QgsVectorLayerUtils().createFeature(target_point_layer, geometry, attrs)
+                point = geometry.constGet().clone()
+                if has_z and not point.is3D():
+                    point.addZValue(0)
+                elif not has_z and point.is3D():
+                    point.dropZValue()
+
+                yield [self.get_copy_value(feature[idx]) for idx in copy_idxs] + \
+                      ['SRID={};{}'.format(srid, point.asWkt())]
+
+        res, result = db.copy_records(uri.table(),
+                                      [fields.field(idx).name() for idx in copy_idxs] + [uri.geometryColumn()],
+                                      records())
+        if not res:
+            self.message_emitted.emit(result, Qgis.Warning)
+            return False
+
+        count = result
+        target_point_layer.reload()
+        QgsProject.instance().addMapLayer(target_point_layer)
+
+        if count:
+            self.zoom_full_requested.emit()
+            self.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                                           "{} points were added succesfully to '{}'.").format(count,
+                                                                                               target_layer_name),
+                Qgis.Info)
+        else:
+            self.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                                           "No point was added to '{}'.").format(target_layer_name),
+                Qgis.Warning)
+            return False
+
+        return True
+
+    @staticmethod
+    def get_csv_field_names(csv_path, delimiter):
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            return next(csv.reader(csv_file, delimiter=delimiter), list())
+
+    @staticmethod
+    def read_csv_points(csv_path, delimiter, longitude, latitude, epsg, elevation=None, decimal_point='.'):
+        """
+        Generator of (point geometry, CSV row as dict) tuples. Geometries are
+        reprojected to DEFAULT_EPSG. Rows without valid coordinates are skipped.
+        """
+        transform = None
+        if not epsg == DEFAULT_EPSG:
+            transform = QgsCoordinateTransform(QgsCoordinateReferenceSystem('EPSG:{}'.format(epsg)),
+                                               QgsCoordinateReferenceSystem('EPSG:{}'.format(DEFAULT_EPSG)),
+                                               QgsProject.instance())
+
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=delimiter):
+                try:
+                    x = float(row[longitude].replace(decimal_point, '.'))
+                    y = float(row[latitude].replace(decimal_point, '.'))
+                    z = float(row[elevation.strip()].replace(decimal_point, '.')) if elevation else None
+                except (ValueError, AttributeError, KeyError):
+                    continue
+
+                geometry = QgsGeometry(QgsPoint(x, y, z) if z is not None else QgsPoint(x, y))
+                if transform is not None:
+                    geometry.transform(transform)
+
+                yield geometry, row
+
+    @staticmethod
+    def parse_csv_value(field, value, decimal_point='.'):
+        """
+        Convert a CSV text value to the type of the target field. Values that
+        cannot be converted are returned as None (NULL).
+        """
+        value = value.strip() if value is not None else ''
+        if not value:
+            return None
+
+        if field.isNumeric():
+            try:
+                return float(value.replace(decimal_point, '.')) if field.type() == QVariant.Double else int(value)
+            except ValueError:
+                return None
+        elif field.type() == QVariant.Date:
+            date = QDate.fromString(value.strip("'")[:10], Qt.ISODate)
+            return date if date.isValid() else None
+        elif field.type() == QVariant.DateTime:
+            date_time = QDateTime.fromString(value.strip("'").replace(' ', 'T'), Qt.ISODate)
+            return date_time if date_time.isValid() else None
+
+        return value
+
+    @staticmethod
+    def get_copy_value(value):
+        if value is None or value == NULL:
+            return None
+        if isinstance(value, QDate):
+            return value.toString(Qt.ISODate)
+        if isinstance(value, QDateTime):
+            return value.toString(Qt.ISODate)
+        return value
+
+    @instrumentation.timed()
     def fill_topology_table_pointbfs(self, db, use_selection=True):
         res_layers = self.get_layers(db, {
             BOUNDARY_TABLE: {'name': BOUNDARY_TABLE, 'geometry': None},
@@ -909,35 +1053,33 @@ class QGISUtils(QObject):
                 Qgis.Warning)
             return
 
-        bfs_features = bfs_layer.getFeatures()
-
-        # Get unique pairs id_boundary-id_boundary_point
-        existing_pairs = [(bfs_feature[POINT_BFS_TABLE_BOUNDARY_FIELD], bfs_feature[BFS_TABLE_BOUNDARY_POINT_FIELD]) for bfs_feature in bfs_features]
-        existing_pairs = set(existing_pairs)
-
         boundary_point_layer = res_layers[BOUNDARY_POINT_TABLE]
-        id_pairs = self.geometry.get_pair_boundary_boundary_point(boundary_layer, boundary_point_layer, use_selection=use_selection)
-
-        if id_pairs:
-            bfs_layer.startEditing()
-            features = list()
-            for id_pair in id_pairs:
-                if not id_pair in existing_pairs: # Avoid duplicated pairs in the DB
-                    # Create feature
-                    feature = QgsVectorLayerUtils().createFeature(bfs_layer)
-                    feature.setAttribute(POINT_BFS_TABLE_BOUNDARY_FIELD, id_pair[0])
-                    feature.setAttribute(BFS_TABLE_BOUNDARY_POINT_FIELD, id_pair[1])
-                    features.append(feature)
-            bfs_layer.addFeatures(features)
-            bfs_layer.commitChanges()
+        if self.is_set_based_topology_available(db, boundary_layer, boundary_point_layer, bfs_layer):
+            # Let PostGIS pair and insert records in a single statement
+            boundary_uri = boundary_layer.dataProvider().uri()
+            point_uri = boundary_point_layer.dataProvider().uri()
+            res, counts = db.fill_topology_table_pointbfs(
+                boundary_uri.table(), boundary_uri.geometryColumn(), point_uri.table(), point_uri.geometryColumn(),
+                boundary_ids=self.get_selected_ids(boundary_layer) if use_selection else None)
+            if not res:
+                self.message_emitted.emit(counts, Qgis.Warning)
+                return
+            num_saved, num_pairs = counts
+            bfs_layer.reload()
+        else:
+            id_pairs = self.geometry.get_pair_boundary_boundary_point(boundary_layer, boundary_point_layer, use_selection=use_selection)
+            num_pairs = len(set(id_pairs))
+            num_saved = self.add_topology_pairs(bfs_layer, POINT_BFS_TABLE_BOUNDARY_FIELD, BFS_TABLE_BOUNDARY_POINT_FIELD, id_pairs)
+
+        if num_pairs:
             self.message_emitted.emit(
                 QCoreApplication.translate("QGISUtils",
                                            "{} out of {} records were saved into {}! {} out of {} records already existed in the database.").format(
-                    len(features),
-                    len(id_pairs),
+                    num_saved,
+                    num_pairs,
                     POINT_BOUNDARY_FACE_STRING_TABLE,
-                    len(id_pairs) - len(features),
-                    len(id_pairs)
+                    num_pairs - num_saved,
+                    num_pairs
                 ),
                 Qgis.Info)
         else:
@@ -945,6 +1087,7 @@ class QGISUtils(QObject):
                 QCoreApplication.translate("QGISUtils", "No pairs id_boundary-id_boundary_point found."),
                 Qgis.Info)
 
+    @instrumentation.timed()
     def fill_topology_tables_morebfs_less(self, db, use_selection=True):
         res_layers = self.get_layers(db, {
             PLOT_TABLE: {'name': PLOT_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry},
@@ -1010,69 +1153,82 @@ class QGISUtils(QObject):
                 Qgis.Warning)
             return
 
-        more_bfs_features = more_bfs_layer.getFeatures()
-        less_features = less_layer.getFeatures()
-
-        # Get unique pairs id_boundary-id_plot in both tables
-        existing_more_pairs = [(more_bfs_feature[MOREBFS_TABLE_PLOT_FIELD], more_bfs_feature[MOREBFS_TABLE_BOUNDARY_FIELD]) for more_bfs_feature in more_bfs_features]
-        existing_more_pairs = set(existing_more_pairs)
-        existing_less_pairs = [(less_feature[LESS_TABLE_PLOT_FIELD], less_feature[LESS_TABLE_BOUNDARY_FIELD]) for less_feature in less_features]
-        existing_less_pairs = set(existing_less_pairs)
-
         boundary_layer = res_layers[BOUNDARY_TABLE]
-        id_more_pairs, id_less_pairs = self.geometry.get_pair_boundary_plot(boundary_layer, plot_layer, use_selection=use_selection)
-
-        if id_less_pairs:
-            less_layer.startEditing()
-            features = list()
-            for id_pair in id_less_pairs:
-                if not id_pair in existing_less_pairs: # Avoid duplicated pairs in the DB
-                    # Create feature
-                    feature = QgsVectorLayerUtils().createFeature(less_layer)
-                    feature.setAttribute(LESS_TABLE_PLOT_FIELD, id_pair[0])
-                    feature.setAttribute(LESS_TABLE_BOUNDARY_FIELD, id_pair[1])
-                    features.append(feature)
-            less_layer.addFeatures(features)
-            less_layer.commitChanges()
-            self.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils", "{} out of {} records were saved into '{}'! {} out of {} records already existed in the database.").format(
-                    len(features),
-                    len(id_less_pairs),
-                    LESS_TABLE,
-                    len(id_less_pairs) - len(features),
-                    len(id_less_pairs)
-                ),
-                Qgis.Info)
+        if self.is_set_based_topology_available(db, plot_layer, boundary_layer, more_bfs_layer, less_layer):
+            # Let PostGIS pair and insert records in a single transaction
+            plot_uri = plot_layer.dataProvider().uri()
+            boundary_uri = boundary_layer.dataProvider().uri()
+            res, counts = db.fill_topology_tables_morebfs_less(
+                plot_uri.table(), plot_uri.geometryColumn(), boundary_uri.table(), boundary_uri.geometryColumn(),
+                plot_ids=self.get_selected_ids(plot_layer) if use_selection else None)
+            if not res:
+                self.message_emitted.emit(counts, Qgis.Warning)
+                return
+            more_bfs_layer.reload()
+            less_layer.reload()
         else:
-            self.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils", "No pairs id_boundary-id_plot found for '{}' table.").format(LESS_TABLE),
-                Qgis.Info)
+            id_more_pairs, id_less_pairs = self.geometry.get_pair_boundary_plot(boundary_layer, plot_layer, use_selection=use_selection)
+            counts = {
+                LESS_TABLE: (self.add_topology_pairs(less_layer, LESS_TABLE_PLOT_FIELD, LESS_TABLE_BOUNDARY_FIELD, id_less_pairs),
+                             len(set(id_less_pairs))),
+                MORE_BOUNDARY_FACE_STRING_TABLE: (self.add_topology_pairs(more_bfs_layer, MOREBFS_TABLE_PLOT_FIELD, MOREBFS_TABLE_BOUNDARY_FIELD, id_more_pairs),
+                                                  len(set(id_more_pairs)))}
+
+        for table in [LESS_TABLE, MORE_BOUNDARY_FACE_STRING_TABLE]:
+            num_saved, num_pairs = counts[table]
+            if num_pairs:
+                self.message_emitted.emit(
+                    QCoreApplication.translate("QGISUtils", "{} out of {} records were saved into '{}'! {} out of {} records already existed in the database.").format(
+                        num_saved,
+                        num_pairs,
+                        table,
+                        num_pairs - num_saved,
+                        num_pairs
+                    ),
+                    Qgis.Info)
+            else:
+                self.message_emitted.emit(
+                    QCoreApplication.translate("QGISUtils", "No pairs id_boundary-id_plot found for '{}' table.").format(table),
+                    Qgis.Info)
 
-        if id_more_pairs:
-            more_bfs_layer.startEditing()
-            features = list()
-            for id_pair in id_more_pairs:
-                if not id_pair in existing_more_pairs: # Avoid duplicated pairs in the DB
-                    # Create feature
-                    feature = QgsVectorLayerUtils().createFeature(more_bfs_layer)
-                    feature.setAttribute(MOREBFS_TABLE_PLOT_FIELD, id_pair[0])
-                    feature.setAttribute(MOREBFS_TABLE_BOUNDARY_FIELD, id_pair[1])
-                    features.append(feature)
-            more_bfs_layer.addFeatures(features)
-            more_bfs_layer.commitChanges()
-            self.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils", "{} out of {} records were saved into '{}'! {} out of {} records already existed in the database.").format(
-                    len(features),
-                    len(id_more_pairs),
-                    MORE_BOUNDARY_FACE_STRING_TABLE,
-                    len(id_more_pairs) - len(features),
-                    len(id_more_pairs)
-                ),
-                Qgis.Info)
-        else:
-            self.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils", "No pairs id_boundary-id_plot found for '{}' table.").format(MORE_BOUNDARY_FACE_STRING_TABLE),
-                Qgis.Info)
+    @staticmethod
+    def is_set_based_topology_available(db, *layers):
+        """
+        Topology tables can be filled by SQL spatial joins only if every
+        layer involved is a whole table of the PostGIS database.
+        """
+        return db.mode == 'pg' and all(layer.dataProvider().name() == 'postgres' and not layer.subsetString()
+                                       for layer in layers)
+
+    @staticmethod
+    def get_selected_ids(layer, id_field=ID_FIELD):
+        request = QgsFeatureRequest().setSubsetOfAttributes([layer.fields().indexFromName(id_field)])
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        return [feature[id_field] for feature in layer.getSelectedFeatures(request)]
+
+    def add_topology_pairs(self, layer, first_field, second_field, id_pairs):
+        """
+        Bulk insert pairs into a topology table through its data provider,
+        skipping pairs that already exist in the table or are repeated.
+
+        :return: Number of records saved
+        """
+        request = QgsFeatureRequest().setSubsetOfAttributes([first_field, second_field], layer.fields())
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        existing_pairs = {(feature[first_field], feature[second_field]) for feature in layer.getFeatures(request)}
+
+        features = list()
+        for id_pair in id_pairs:
+            if not id_pair in existing_pairs: # Avoid duplicated pairs in the DB
+                existing_pairs.add(id_pair)
+                feature = QgsVectorLayerUtils().createFeature(layer)
+                feature.setAttribute(first_field, id_pair[0])
+                feature.setAttribute(second_field, id_pair[1])
+                features.append(feature)
+
+        if features:
+            layer.dataProvider().addFeatures(features)
+        return len(features)
 
     def get_error_layers_group(self):
         """
@@ -16,6 +16,7 @@
  *                                                                         *
  ***************************************************************************/
 """
+from collections import Counter
 
 from qgis.PyQt.QtCore import (QObject,
                               QCoreApplication,
@@ -23,6 +24,7 @@ from qgis.PyQt.QtCore import (QObject,
                               QSettings)
 from qgis.core import (Qgis,
                        QgsApplication,
+                       QgsFeature,
                        QgsField,
                        QgsGeometry,
                        QgsPointXY,
@@ -37,11 +39,17 @@ from qgis.core import (Qgis,
                        QgsRectangle)
 
 import processing
+from .error_layer_writer import ErrorLayerWriter
 from .logic_checks import LogicChecks
 from .project_generator_utils import ProjectGeneratorUtils
+from .quality_tasks import QualityRuleRunner
+from .spatial_hash import SpatialHashIndex
 from ..config.general_config import (DEFAULT_EPSG,
+                                     DEFAULT_INCREMENTAL_QUALITY_CHECKS,
                                      DEFAULT_TOO_LONG_BOUNDARY_SEGMENTS_TOLERANCE,
                                      DEFAULT_USE_ROADS_VALUE,
+                                     DEFAULT_VERTEX_MATCH_TOLERANCE,
+                                     ERROR_LAYER_CHUNK_SIZE,
                                      translated_strings)
 from ..config.table_mapping_config import (BOUNDARY_POINT_TABLE,
                                            BOUNDARY_TABLE,
@@ -73,7 +81,28 @@ class QualityUtils(QObject):
         self.project_generator_utils = ProjectGeneratorUtils()
         self.log = QgsApplication.messageLog()
 
-    def check_boundary_points_covered_by_boundary_nodes(self, db):
+        self._last_runs = dict() # {error layer name: (input layer ids, dirty region token, error layer id)}
+
+        self.rule_runner = QualityRuleRunner()
+        self.rule_runner.rules_finished.connect(self.show_error_layers)
+
+    def run_rules(self, rules):
+        """
+        Run quality rules one after the other (see QualityRuleRunner).
+
+        :return: False if a previous run hasn't finished yet
+        """
+        return self.rule_runner.run(rules)
+
+    @staticmethod
+    def is_canceled(feedback):
+        return feedback is not None and feedback.isCanceled()
+
+    def show_error_layers(self, results):
+        if self.qgis_utils.error_group_exists():
+            self.qgis_utils.set_error_group_visibility(True)
+
+    def check_boundary_points_covered_by_boundary_nodes(self, db, feedback=None):
         res_layers = self.qgis_utils.get_layers(db, {
             BOUNDARY_TABLE: {'name': BOUNDARY_TABLE, 'geometry': None},
             POINT_BOUNDARY_FACE_STRING_TABLE: {'name': POINT_BOUNDARY_FACE_STRING_TABLE, 'geometry': None},
@@ -114,8 +143,12 @@ class QualityUtils(QObject):
                                      QgsField('error_type', QVariant.String)])
         error_layer.updateFields()
 
-        features = self.get_boundary_points_features_not_covered_by_boundary_nodes(boundary_point_layer, boundary_layer, point_bfs_layer, error_layer)
-        error_layer.dataProvider().addFeatures(features)
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_point_layer.featureCount())
+        writer.add_features(self.iter_boundary_points_features_not_covered_by_boundary_nodes(boundary_point_layer, boundary_layer, point_bfs_layer, error_layer))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -129,39 +162,19 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils", "All boundary points are covered by boundary nodes!"), Qgis.Info)
 
     def get_boundary_points_features_not_covered_by_boundary_nodes(self, boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field=ID_FIELD):
+        return list(self.iter_boundary_points_features_not_covered_by_boundary_nodes(boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field))
 
-        tmp_boundary_nodes_layer = processing.run("native:extractvertices", {'INPUT': boundary_layer, 'OUTPUT': 'memory:'})['OUTPUT']
+    def iter_boundary_points_features_not_covered_by_boundary_nodes(self, boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field=ID_FIELD):
 
-        # layer is created with unique vertices
-        # It is necessary because 'remove duplicate vertices' processing algorithm does not filter the data as we need them
-        boundary_nodes_layer = QgsVectorLayer("Point?crs=EPSG:{}".format(DEFAULT_EPSG), 'unique boundary nodes', "memory")
-        data_provider = boundary_nodes_layer.dataProvider()
-        data_provider.addAttributes([QgsField(id_field, QVariant.Int)])
-        boundary_nodes_layer.updateFields()
-
-        id_field_idx = tmp_boundary_nodes_layer.fields().indexFromName(id_field)
+        # Boundary ids of boundary nodes, snapped to DEFAULT_VERTEX_MATCH_TOLERANCE
+        # so that nodes and boundary points match like in get_pair_boundary_boundary_point
+        boundary_nodes = SpatialHashIndex(DEFAULT_VERTEX_MATCH_TOLERANCE)
+        id_field_idx = boundary_layer.fields().indexFromName(id_field)
         request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
-
-        filter_fs = []
-        fs = []
-        for f in tmp_boundary_nodes_layer.getFeatures(request):
-            item = [f[id_field], f.geometry().asWkt()]
-            if item not in filter_fs:
-                filter_fs.append(item)
-                fs.append(f)
-        del filter_fs
-        boundary_nodes_layer.dataProvider().addFeatures(fs)
-
-        # Spatial Join between boundary_points and boundary_nodes
-        spatial_join_layer = processing.run("qgis:joinattributesbylocation",
-                       {'INPUT': boundary_point_layer,
-                        'JOIN': boundary_nodes_layer,
-                        'PREDICATE': [0], # Intersects
-                        'JOIN_FIELDS': [ID_FIELD],
-                        'METHOD': 0,
-                        'DISCARD_NONMATCHING': False,
-                        'PREFIX': '',
-                        'OUTPUT': 'memory:'})['OUTPUT']
+        for feature in boundary_layer.getFeatures(request):
+            boundary_id = feature[id_field]
+            for x, y in dict.fromkeys((vertex.x(), vertex.y()) for vertex in feature.geometry().vertices()):
+                boundary_nodes.insert(x, y, boundary_id)
 
         # create dict with layer data
         id_field_idx = boundary_point_layer.fields().indexFromName(id_field)
@@ -169,31 +182,35 @@ class QualityUtils(QObject):
         dict_boundary_point = {feature[id_field]: feature for feature in boundary_point_layer.getFeatures(request)}
 
         exp_point_bfs = '"{}" is not null and "{}" is not null'.format(BFS_TABLE_BOUNDARY_POINT_FIELD, POINT_BFS_TABLE_BOUNDARY_FIELD)
-        list_point_bfs = [{'boundary_point_id': feature[BFS_TABLE_BOUNDARY_POINT_FIELD], 'boundary_id': feature[POINT_BFS_TABLE_BOUNDARY_FIELD]}
-                     for feature in point_bfs_layer.getFeatures(exp_point_bfs)]
-
-        spatial_join_boundary_point_boundary_node = [{'boundary_point_id': feature[id_field],
-                                                           'boundary_id': feature[id_field + '_2']}
-                                                          for feature in spatial_join_layer.getFeatures()]
+        count_point_bfs = Counter((feature[BFS_TABLE_BOUNDARY_POINT_FIELD], feature[POINT_BFS_TABLE_BOUNDARY_FIELD])
+                                  for feature in point_bfs_layer.getFeatures(exp_point_bfs))
 
         boundary_point_without_boundary_node = list()
-        no_register_point_bfs = list()
-        duplicate_in_point_bfs = list()
+        no_register_point_bfs = dict() # dicts as ordered sets
+        duplicate_in_point_bfs = dict()
 
         # point_bfs topology check
-        for item_sj in spatial_join_boundary_point_boundary_node:
-            boundary_point_id = item_sj['boundary_point_id']
-            boundary_id = item_sj['boundary_id']
-
-            if boundary_id != NULL:
-                if item_sj not in list_point_bfs:
-                    no_register_point_bfs.append((boundary_point_id, boundary_id))  # no registered in point bfs
-                elif list_point_bfs.count(item_sj) > 1:
-                    duplicate_in_point_bfs.append((boundary_point_id, boundary_id))  # duplicate in point bfs
-            else:
+        for boundary_point_id, boundary_point in dict_boundary_point.items():
+            geometry = boundary_point.geometry()
+            boundary_ids = None
+            if not geometry.isNull() and not geometry.isEmpty():
+                vertex = geometry.vertexAt(0)
+                boundary_ids = dict.fromkeys(boundary_nodes.query(vertex.x(), vertex.y())) # dict as an ordered set
+
+            if not boundary_ids:
                 boundary_point_without_boundary_node.append(boundary_point_id) # boundary point without boundary node
+                continue
 
-        features = list()
+            for boundary_id in boundary_ids:
+                if boundary_id == NULL:
+                    boundary_point_without_boundary_node.append(boundary_point_id)
+                    continue
+
+                count = count_point_bfs[(boundary_point_id, boundary_id)]
+                if count == 0:
+                    no_register_point_bfs[(boundary_point_id, boundary_id)] = None # no registered in point bfs
+                elif count > 1:
+                    duplicate_in_point_bfs[(boundary_point_id, boundary_id)] = None # duplicate in point bfs
 
         # boundary point without boundary node
         if boundary_point_without_boundary_node is not None:
@@ -204,12 +221,12 @@ class QualityUtils(QObject):
                                                                   {0: boundary_point_id,
                                                                    1: None,
                                                                    2: translated_strings.ERROR_BOUNDARY_POINT_IS_NOT_COVERED_BY_BOUNDARY_NODE})
-                features.append(new_feature)
+                yield new_feature
 
 
         # No registered in point_bfs
         if no_register_point_bfs is not None:
-            for error_no_register in set(no_register_point_bfs):
+            for error_no_register in no_register_point_bfs:
                 boundary_point_id = error_no_register[0]  # boundary_point_id
                 boundary_id = error_no_register[1]  # boundary_id
                 boundary_point_geom = dict_boundary_point[boundary_point_id].geometry()
@@ -217,11 +234,11 @@ class QualityUtils(QObject):
                                                                   {0: boundary_point_id,
                                                                    1: boundary_id,
                                                                    2: translated_strings.ERROR_NO_FOUND_POINT_BFS})
-                features.append(new_feature)
+                yield new_feature
 
         # Duplicate in point_bfs
         if duplicate_in_point_bfs is not None:
-            for error_duplicate in set(duplicate_in_point_bfs):
+            for error_duplicate in duplicate_in_point_bfs:
                 boundary_point_id = error_duplicate[0]  # boundary_point_id
                 boundary_id = error_duplicate[1]  # boundary_id
                 boundary_point_geom = dict_boundary_point[boundary_point_id].geometry()
@@ -229,11 +246,9 @@ class QualityUtils(QObject):
                                                                   {0: boundary_point_id,
                                                                    1: boundary_id,
                                                                    2: translated_strings.ERROR_DUPLICATE_POINT_BFS})
-                features.append(new_feature)
-
-        return features
+                yield new_feature
 
-    def check_boundary_nodes_covered_by_boundary_points(self, db):
+    def check_boundary_nodes_covered_by_boundary_points(self, db, feedback=None):
         res_layers = self.qgis_utils.get_layers(db, {
             BOUNDARY_POINT_TABLE: {'name': BOUNDARY_POINT_TABLE, 'geometry': None},
             POINT_BOUNDARY_FACE_STRING_TABLE: {'name': POINT_BOUNDARY_FACE_STRING_TABLE, 'geometry': None},
@@ -281,8 +296,12 @@ class QualityUtils(QObject):
 
         error_layer.updateFields()
 
-        features = self.get_boundary_nodes_features_not_covered_by_boundary_points(boundary_point_layer, boundary_layer, point_bfs, error_layer)
-        data_provider.addFeatures(features)
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_point_layer.featureCount())
+        writer.add_features(self.iter_boundary_nodes_features_not_covered_by_boundary_points(boundary_point_layer, boundary_layer, point_bfs, error_layer))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -295,6 +314,9 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils", "There are no missing boundary points in boundaries."), Qgis.Info)
 
     def get_boundary_nodes_features_not_covered_by_boundary_points(self, boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field=ID_FIELD):
+        return list(self.iter_boundary_nodes_features_not_covered_by_boundary_points(boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field))
+
+    def iter_boundary_nodes_features_not_covered_by_boundary_points(self, boundary_point_layer, boundary_layer, point_bfs_layer, error_layer, id_field=ID_FIELD):
 
         tmp_boundary_nodes_layer = processing.run("native:extractvertices", {'INPUT': boundary_layer, 'OUTPUT': 'memory:'})['OUTPUT']
 
@@ -352,8 +374,8 @@ class QualityUtils(QObject):
                                                           for feature in spatial_join_layer.getFeatures()]
 
         boundary_node_without_boundary_point = list()
-        no_register_point_bfs = list()
-        duplicate_in_point_bfs = list()
+        no_register_point_bfs = dict() # dicts as ordered sets
+        duplicate_in_point_bfs = dict()
 
         # point_bfs topology check
         for item_sj in list_spatial_join_boundary_node_boundary_point:
@@ -366,14 +388,12 @@ class QualityUtils(QObject):
                 item_sj_check = {'boundary_point_id': boundary_point_id, 'boundary_id': boundary_id}  # dict to check
 
                 if item_sj_check not in list_point_bfs:
-                    no_register_point_bfs.append((boundary_point_id, boundary_node_id))  # no registered in point bfs
+                    no_register_point_bfs[(boundary_point_id, boundary_node_id)] = None  # no registered in point bfs
                 elif list_point_bfs.count(item_sj_check) > 1:
-                    duplicate_in_point_bfs.append((boundary_point_id, boundary_node_id))  # duplicate in point bfs
+                    duplicate_in_point_bfs[(boundary_point_id, boundary_node_id)] = None  # duplicate in point bfs
             else:
                 boundary_node_without_boundary_point.append(boundary_node_id)  # boundary node without boundary point
 
-        features = list()
-
         # boundary node without boundary point
         if boundary_node_without_boundary_point is not None:
             for item in boundary_node_without_boundary_point:
@@ -382,33 +402,31 @@ class QualityUtils(QObject):
                 boundary_id = dict_boundary_nodes[boundary_node_id][id_field]  # get boundary id
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, boundary_node_geom,
                                                                   {0: None,  1: boundary_id, 2: translated_strings.ERROR_BOUNDARY_NODE_IS_NOT_COVERED_BY_BOUNDARY_POINT})
-                features.append(new_feature)
+                yield new_feature
 
         # Duplicate in point_bfs
         if duplicate_in_point_bfs is not None:
-            for error_duplicate in set(duplicate_in_point_bfs):
+            for error_duplicate in duplicate_in_point_bfs:
                 boundary_point_id = error_duplicate[0]
                 boundary_node_id = error_duplicate[1]
                 boundary_node_geom = dict_boundary_nodes[boundary_node_id].geometry()
                 boundary_id = dict_boundary_nodes[boundary_node_id][id_field]  # get boundary id
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, boundary_node_geom,
                                                                   {0: boundary_point_id, 1: boundary_id, 2: translated_strings.ERROR_DUPLICATE_POINT_BFS})
-                features.append(new_feature)
+                yield new_feature
 
         # No registered in point_bfs
         if no_register_point_bfs is not None:
-            for error_no_register in set(no_register_point_bfs):
+            for error_no_register in no_register_point_bfs:
                 boundary_point_id = error_no_register[0]
                 boundary_node_id = error_no_register[1]
                 boundary_node_geom = dict_boundary_nodes[boundary_node_id].geometry()
                 boundary_id = dict_boundary_nodes[boundary_node_id][id_field]  # get boundary id
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, boundary_node_geom,
                                                                   {0: boundary_point_id, 1: boundary_id, 2: translated_strings.ERROR_NO_FOUND_POINT_BFS})
-                features.append(new_feature)
+                yield new_feature
 
-        return features
-
-    def check_plot_nodes_covered_by_boundary_points(self, db):
+    def check_plot_nodes_covered_by_boundary_points(self, db, feedback=None):
         res_layers = self.qgis_utils.get_layers(db, {
             PLOT_TABLE: {'name': PLOT_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry},
             BOUNDARY_POINT_TABLE: {'name': BOUNDARY_POINT_TABLE, 'geometry': None}}, load=True)
@@ -441,8 +459,12 @@ class QualityUtils(QObject):
         error_layer.updateFields()
 
         topology_rule = 'plot_nodes_covered_by_boundary_points'
-        features = self.get_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule)
-        error_layer.dataProvider().addFeatures(features)
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_point_layer.featureCount())
+        writer.add_features(self.iter_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -455,7 +477,7 @@ class QualityUtils(QObject):
             self.qgis_utils.message_emitted.emit(
                 QCoreApplication.translate("QGISUtils", "All plot nodes are covered by boundary points!"), Qgis.Info)
 
-    def check_boundary_points_covered_by_plot_nodes(self, db):
+    def check_boundary_points_covered_by_plot_nodes(self, db, feedback=None):
         res_layers = self.qgis_utils.get_layers(db, {
             PLOT_TABLE: {'name': PLOT_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry},
             BOUNDARY_POINT_TABLE: {'name': BOUNDARY_POINT_TABLE, 'geometry': None}}, load=True)
@@ -488,8 +510,12 @@ class QualityUtils(QObject):
         error_layer.updateFields()
 
         topology_rule = 'boundary_points_covered_by_plot_nodes'
-        features = self.get_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule)
-        error_layer.dataProvider().addFeatures(features)
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_point_layer.featureCount())
+        writer.add_features(self.iter_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -504,6 +530,10 @@ class QualityUtils(QObject):
 
     @staticmethod
     def get_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule, id_field=ID_FIELD):
+        return list(QualityUtils.iter_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule, id_field))
+
+    @staticmethod
+    def iter_boundary_points_features_not_covered_by_plot_nodes_and_viceversa(boundary_point_layer, plot_layer, error_layer, topology_rule, id_field=ID_FIELD):
         tmp_plot_nodes_layer = processing.run("native:extractvertices", {'INPUT': plot_layer, 'OUTPUT': 'memory:'})['OUTPUT']
 
         # layer is created with unique vertices
@@ -545,24 +575,21 @@ class QualityUtils(QObject):
                                                     'DISCARD_NONMATCHING': False,
                                                     'PREFIX': '',
                                                     'NON_MATCHING': 'memory:'})['NON_MATCHING']
-        features = list()
-
         for feature in spatial_join_layer.getFeatures():
             feature_id = feature[ID_FIELD]
             feature_geom = feature.geometry()
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, feature_geom, {0: feature_id})
-            features.append(new_feature)
+            yield new_feature
 
-        return features
-
-    def check_overlapping_points(self, db, point_layer_name):
+    def check_overlapping_points(self, db, point_layer_name, incremental=None, feedback=None):
         """
         Shows which points are overlapping
         :param db: db connection instance
         :param entity: points layer
+        :param incremental: Whether to re-evaluate only points around edits made
+                            since the last run. If None, it's read from settings.
         :return:
         """
-        features = []
         point_layer = self.qgis_utils.get_layer(db, point_layer_name, load=True)
 
         if point_layer is None:
@@ -590,22 +617,21 @@ class QualityUtils(QObject):
         data_provider.addAttributes([QgsField("point_count", QVariant.Int), QgsField("intersecting_ids", QVariant.String) ])
         error_layer.updateFields()
 
-        overlapping = self.qgis_utils.geometry.get_overlapping_points(point_layer)
-        flat_overlapping = [id for items in overlapping for id in items]  # Build a flat list of ids
-
-        t_ids = {f.id(): f[ID_FIELD] for f in point_layer.getFeatures(flat_overlapping)}
+        token = self.qgis_utils.dirty_regions.get_token()
+        dirty_extents, prior_error_layer = self.get_incremental_run(error_layer_name, [point_layer], incremental)
 
-        for items in overlapping:
-            # We need a feature geometry, pick the first id to get it
-            feature = point_layer.getFeature(items[0])
-            point = feature.geometry()
-            new_feature = QgsVectorLayerUtils().createFeature(
-                error_layer,
-                point,
-                {0: len(items), 1: ", ".join([str(t_ids[i]) for i in items])})
-            features.append(new_feature)
+        writer = ErrorLayerWriter(error_layer, expected_count=point_layer.featureCount())
+        if dirty_extents is not None:
+            point_layer_subset = self.qgis_utils.geometry.get_layer_subset_in_extents(point_layer, dirty_extents)
+            writer.add_features(self.iter_incremental_error_features(
+                error_layer, prior_error_layer, dirty_extents, self.iter_overlapping_points_features(point_layer_subset, error_layer)))
+        else:
+            writer.add_features(self.iter_overlapping_points_features(point_layer, error_layer))
+        error_layer = writer.finish()
 
-        error_layer.dataProvider().addFeatures(features)
+        added_layer = None
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -619,7 +645,25 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils",
                                            "There are no overlapping points in layer '{}'!").format(point_layer_name), Qgis.Info)
 
-    def check_plots_covered_by_boundaries(self, db):
+        self.set_last_run(error_layer_name, [point_layer], token, added_layer)
+
+    def iter_overlapping_points_features(self, point_layer, error_layer):
+        overlapping = self.qgis_utils.geometry.get_overlapping_points(point_layer)
+        flat_overlapping = [id for items in overlapping for id in items]  # Build a flat list of ids
+
+        t_ids = {f.id(): f[ID_FIELD] for f in point_layer.getFeatures(flat_overlapping)}
+
+        for items in overlapping:
+            # We need a feature geometry, pick the first id to get it
+            feature = point_layer.getFeature(items[0])
+            point = feature.geometry()
+            new_feature = QgsVectorLayerUtils().createFeature(
+                error_layer,
+                point,
+                {0: len(items), 1: ", ".join([str(t_ids[i]) for i in items])})
+            yield new_feature
+
+    def check_plots_covered_by_boundaries(self, db, feedback=None):
         # read data
         res_layers = self.qgis_utils.get_layers(db, {
             PLOT_TABLE: {'name': PLOT_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry},
@@ -678,10 +722,14 @@ class QualityUtils(QObject):
                                      QgsField('error_type', QVariant.String)])
         error_layer.updateFields()
 
-        features = self.get_plot_features_not_covered_by_boundaries(plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer)
+        writer = ErrorLayerWriter(error_layer, expected_count=plot_layer.featureCount())
+        writer.add_features(self.iter_plot_features_not_covered_by_boundaries(plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
-        if features:
-            error_layer.dataProvider().addFeatures(features)
+        if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
 
             self.qgis_utils.message_emitted.emit(
@@ -693,6 +741,9 @@ class QualityUtils(QObject):
                                            "All plots are covered by boundaries!"), Qgis.Info)
 
     def get_plot_features_not_covered_by_boundaries(self, plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer, id_field=ID_FIELD):
+        return list(self.iter_plot_features_not_covered_by_boundaries(plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer, id_field))
+
+    def iter_plot_features_not_covered_by_boundaries(self, plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer, id_field=ID_FIELD):
         """
         Returns all plot features that have errors when checking if they are covered by boundaries.
         That is both geometric and alphanumeric (topology table) errors.
@@ -715,180 +766,74 @@ class QualityUtils(QObject):
         dict_boundary = {feature[id_field]: feature for feature in boundary_layer.getFeatures(request)}
 
         exp_more = '"{}" is not null and "{}" is not null'.format(MOREBFS_TABLE_BOUNDARY_FIELD, MOREBFS_TABLE_PLOT_FIELD)
-        list_more_bfs = [{'plot_id': feature[MOREBFS_TABLE_PLOT_FIELD], 'boundary_id': feature[MOREBFS_TABLE_BOUNDARY_FIELD]}
-                         for feature in more_bfs_layer.getFeatures(exp_more)]
+        count_more_bfs_by_pair = Counter((feature[MOREBFS_TABLE_PLOT_FIELD], feature[MOREBFS_TABLE_BOUNDARY_FIELD])
+                                         for feature in more_bfs_layer.getFeatures(exp_more))
 
         exp_less = '"{}" is not null and "{}" is not null'.format(LESS_TABLE_BOUNDARY_FIELD, LESS_TABLE_PLOT_FIELD)
-        list_less = [{'plot_id': feature[LESS_TABLE_PLOT_FIELD], 'boundary_id': feature[LESS_TABLE_BOUNDARY_FIELD]}
-                     for feature in less_layer.getFeatures(exp_less)]
-
-        tmp_inner_rings_layer = self.qgis_utils.geometry.get_inner_rings_layer(plot_layer)
-        inner_rings_layer = processing.run("native:addautoincrementalfield",
-                                           {'INPUT': tmp_inner_rings_layer,
-                                            'FIELD_NAME': 'AUTO',
-                                            'START': 0,
-                                            'GROUP_FIELDS': [],
-                                            'SORT_EXPRESSION': '',
-                                            'SORT_ASCENDING': True,
-                                            'SORT_NULLS_FIRST': False,
-                                            'OUTPUT': 'memory:'})['OUTPUT']
-
-
-        id_field_idx = inner_rings_layer.fields().indexFromName(id_field)
-        auto_idx = inner_rings_layer.fields().indexFromName('AUTO')
-        request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx, auto_idx])
-        dict_inner_rings = {'{}-{}'.format(feature[id_field], feature['AUTO']): feature for feature in inner_rings_layer.getFeatures(request)}
-
-        # spatial joins between inner rings and boundary
-        spatial_join_inner_rings_boundary_layer = processing.run("qgis:joinattributesbylocation",
-                                                                 {'INPUT': inner_rings_layer,
-                                                                  'JOIN': boundary_layer,
-                                                                  'PREDICATE': [0],  # Intersects
-                                                                  'JOIN_FIELDS': [id_field],
-                                                                  'METHOD': 0,
-                                                                  'DISCARD_NONMATCHING': True,
-                                                                  'PREFIX': '',
-                                                                  'OUTPUT': 'memory:'})['OUTPUT']
-        # The id field has the same name for both layers
-        # This list is only used to check plot's inner rings without boundaries
-        dict_spatial_join_inner_rings_boundary = [{'plot_ring_id': '{}-{}'.format(feature[id_field], feature['AUTO']), 'boundary_id': feature[id_field + '_2']}
-                                                  for feature in spatial_join_inner_rings_boundary_layer.getFeatures()]
-
-        # list create for filter inner rings from spatial join with between plot and boundary
-        list_spatial_join_plot_ring_boundary = [{'plot_id': feature[id_field],
-                                                   'boundary_id': feature[id_field + '_2']}
-                                                  for feature in spatial_join_inner_rings_boundary_layer.getFeatures()]
-
-        # Spatial join between plot as lines and boundary
-        spatial_join_plot_boundary_layer = processing.run("qgis:joinattributesbylocation",
-                                                          {'INPUT': plot_as_lines_layer,
-                                                           'JOIN': boundary_layer,
-                                                           'PREDICATE': [0],
-                                                           'JOIN_FIELDS': [id_field],
-                                                           'METHOD': 0,
-                                                           'DISCARD_NONMATCHING': True,
-                                                           'PREFIX': '',
-                                                           'OUTPUT': 'memory:'})['OUTPUT']
-        # The id field has the same name for both layers
-        dict_spatial_join_plot_boundary = [{'plot_id': feature[id_field], 'boundary_id': feature[id_field + '_2']}
-                                           for feature in spatial_join_plot_boundary_layer.getFeatures()]
-
-        #####################################################
-        # Validation of geometric errors
-        #####################################################
-
-        # Identify plots with geometry problems and remove coincidence in spatial join between plot as line and boundary
-        # and inner_rings and boundary. No need to check further topological rules for plots
+        count_less_by_pair = Counter((feature[LESS_TABLE_PLOT_FIELD], feature[LESS_TABLE_BOUNDARY_FIELD])
+                                     for feature in less_layer.getFeatures(exp_less))
 
+        # Plots with geometric errors are not checked against topology tables
         errors_plot_boundary_diffs = self.qgis_utils.geometry.difference_plot_boundary(plot_as_lines_layer, boundary_layer)
-        for error_diff in errors_plot_boundary_diffs:
-            plot_id = error_diff['id']
-            # All plots with geometric errors are eliminated. It is not necessary check more
-            # in spatial join between plot as line and boundary
-            for item_sj in dict_spatial_join_plot_boundary.copy():
-                if item_sj['plot_id'] == plot_id:
-                    dict_spatial_join_plot_boundary.remove(item_sj)
-
-            # All plots with geometric errors are eliminated. It is not necessary check more
-            # in spatial join between inner_rings and boundary
-            for item_sj in dict_spatial_join_inner_rings_boundary.copy():
-                if int(item_sj['plot_ring_id'].split('-')[0]) == plot_id:
-                    dict_spatial_join_inner_rings_boundary.remove(item_sj)
-
-        ######################################################
-        # Validation of errors in alphanumeric topology tables
-        ######################################################
-
-        # start validation for more_bfs table
-        # remove spatial join intersection with geometries that no contain lines. Because it is not necessary to check
-        for item_sj in dict_spatial_join_plot_boundary.copy():
-            boundary_id = item_sj['boundary_id']
-            plot_id = item_sj['plot_id']
-
-            if item_sj in list_spatial_join_plot_ring_boundary:
-                # it is removed because it is registered in the spatial join between rings and boundaries
-                # and it shouldn't be registered in the topology table of more_bfs
-                dict_spatial_join_plot_boundary.remove(item_sj)
-            else:
-                plot_geom = dict_plot_as_lines[plot_id].geometry()
-                boundary_geom = dict_boundary[boundary_id].geometry()
-                intersection = plot_geom.intersection(boundary_geom)
-
-                if intersection.type() != QgsWkbTypes.LineGeometry:
-                    if intersection.type() == QgsWkbTypes.UnknownGeometry:
-                        has_line = False
-                        for part in intersection.asGeometryCollection():
-                            if part.isMultipart():
-                                for i in range(part.numGeometries()):
-                                    if QgsWkbTypes.geometryType(
-                                            part.geometryN(i).wkbType()) == QgsWkbTypes.LineGeometry:
-                                        has_line = True
-                                        break
-                            else:
-                                if part.type() == QgsWkbTypes.LineGeometry:
-                                    has_line = True
-                                    break
-                        if not has_line:
-                            # Remove point intersections plot-boundary
-                            dict_spatial_join_plot_boundary.remove(item_sj)
-                    else:
-                        dict_spatial_join_plot_boundary.remove(item_sj)
-
-        # Check relation between plot and boundary not registered in more_bfs
-        errors_not_in_more_bfs = list()
-        errors_duplicate_in_more_bfs = list()
-        for item_sj_pb in dict_spatial_join_plot_boundary:
-            count_more_bfs = list_more_bfs.count(item_sj_pb)
-            if count_more_bfs > 1:
-                errors_duplicate_in_more_bfs.append((item_sj_pb['plot_id'], item_sj_pb['boundary_id']))
-            elif count_more_bfs == 0:
-                errors_not_in_more_bfs.append((item_sj_pb['plot_id'], item_sj_pb['boundary_id']))
-
-        # finalize validation for more_bfs table
-
-        # start validation for less table
-
-        errors_not_in_less = list()
-        errors_duplicate_in_less = list()
-        # start validation for more_bfs table
-        # remove spatial join intersection with geometries that no contain lines.
-        # Because it is not necessary to check topology register
-        for inner_ring in dict_spatial_join_inner_rings_boundary:
-            boundary_id = inner_ring['boundary_id']
-            plot_ring_id = inner_ring['plot_ring_id']
-
-            boundary_geom = dict_boundary[boundary_id].geometry()
-            inner_ring_geom = dict_inner_rings[plot_ring_id].geometry()
-
-            # check intersections difference to line, we check that collections dont have lines parts
-            intersection = inner_ring_geom.intersection(boundary_geom)
-            has_line = False
-            if intersection.type() != QgsWkbTypes.LineGeometry:
-                if intersection.type() == QgsWkbTypes.UnknownGeometry:
-                    for part in intersection.asGeometryCollection():
-                        if part.isMultipart():
-                            for i in range(part.numGeometries()):
-                                if QgsWkbTypes.geometryType(part.geometryN(i).wkbType()) == QgsWkbTypes.LineGeometry:
-                                    has_line = True
-                                    break
-                        else:
-                            if part.type() == QgsWkbTypes.LineGeometry:
-                                has_line = True
-                                break
-            else:
-                has_line = True
-
-            if has_line:
-                tmp_dict_plot_boundary = {'plot_id': int(plot_ring_id.split('-')[0]), 'boundary_id': boundary_id}
-                count_less = list_less.count(tmp_dict_plot_boundary)
-
-                if count_less >1:
-                    errors_duplicate_in_less.append((plot_ring_id, boundary_id))  # duplicate in less table
-                elif count_less == 0:
-                    errors_not_in_less.append((plot_ring_id, boundary_id))  # not registered less table
-        # finalize validation for less table
-
-        features = list()
+        plots_with_geometric_errors = {error_diff['id'] for error_diff in errors_plot_boundary_diffs}
+
+        # One spatial index over boundaries and a single pass over plots and
+        # their inner rings. Plot-boundary relations are checked against
+        # more_bfs unless the boundary touches an inner ring of the plot,
+        # whose relations are checked against less instead.
+        boundary_index = QgsSpatialIndex()
+        boundaries = dict() # {feature id: (boundary id, geometry)}
+        for feature in dict_boundary.values():
+            boundary_index.insertFeature(feature)
+            boundaries[feature.id()] = (feature[id_field], feature.geometry())
+
+        dict_inner_rings = dict() # {(plot id, ring index): geometry}
+        id_field_idx = plot_layer.fields().indexFromName(id_field)
+        request = QgsFeatureRequest().setSubsetOfAttributes([id_field_idx])
+        for plot in plot_layer.getFeatures(request):
+            if plot[id_field] in plots_with_geometric_errors:
+                continue
+            for i, ring in enumerate(self.qgis_utils.geometry.get_inner_rings(plot.geometry())):
+                dict_inner_rings[(plot[id_field], i)] = ring
+
+        inner_rings_by_plot = dict()
+        for plot_ring_id in dict_inner_rings:
+            inner_rings_by_plot.setdefault(plot_ring_id[0], list()).append(plot_ring_id)
+
+        errors_not_in_more_bfs = dict() # dicts as ordered sets
+        errors_duplicate_in_more_bfs = dict()
+        errors_not_in_less = dict()
+        errors_duplicate_in_less = dict()
+        for plot_id, plot_as_lines in dict_plot_as_lines.items():
+            if plot_id in plots_with_geometric_errors:
+                continue
+
+            plot_geom = plot_as_lines.geometry()
+            candidate_ids = boundary_index.intersects(plot_geom.boundingBox())
+
+            # Less table: boundaries sharing lines with inner rings
+            ring_boundary_ids = set()
+            for plot_ring_id in inner_rings_by_plot.get(plot_id, list()):
+                inner_ring_geom = dict_inner_rings[plot_ring_id]
+                for boundary_id, boundary_geom in self.get_intersecting_geometries(inner_ring_geom, candidate_ids, boundaries):
+                    ring_boundary_ids.add(boundary_id)
+                    if self.has_line_parts(inner_ring_geom.intersection(boundary_geom)):
+                        count_less = count_less_by_pair[(plot_id, boundary_id)]
+                        if count_less > 1:
+                            errors_duplicate_in_less[(plot_ring_id, boundary_id)] = None # duplicate in less table
+                        elif count_less == 0:
+                            errors_not_in_less[(plot_ring_id, boundary_id)] = None # not registered less table
+
+            # More BFS table: other boundaries sharing lines with the plot
+            for boundary_id, boundary_geom in self.get_intersecting_geometries(plot_geom, candidate_ids, boundaries):
+                if boundary_id in ring_boundary_ids:
+                    continue
+                if self.has_line_parts(plot_geom.intersection(boundary_geom)):
+                    count_more_bfs = count_more_bfs_by_pair[(plot_id, boundary_id)]
+                    if count_more_bfs > 1:
+                        errors_duplicate_in_more_bfs[(plot_id, boundary_id)] = None
+                    elif count_more_bfs == 0:
+                        errors_not_in_more_bfs[(plot_id, boundary_id)] = None
 
         # plot not covered by boundary
         for plot_boundary_diff in errors_plot_boundary_diffs:
@@ -896,53 +841,74 @@ class QualityUtils(QObject):
             plot_geom = plot_boundary_diff['geometry']
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, plot_geom,
                                                               {0: plot_id, 1: None, 2: type_tplg_error[0]})
-            features.append(new_feature)
+            yield new_feature
 
         # not registered more bfs
         if errors_not_in_more_bfs:
-            for error_more_bfs in set(errors_not_in_more_bfs):
+            for error_more_bfs in errors_not_in_more_bfs:
                 plot_id = error_more_bfs[0]  # plot_id
                 boundary_id = error_more_bfs[1]  # boundary_id
                 geom_plot = dict_plot_as_lines[plot_id].geometry()
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_plot,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[1]})
-                features.append(new_feature)
+                yield new_feature
 
         # Duplicate in more bfs
         if errors_duplicate_in_more_bfs:
-            for error_more_bfs in set(errors_duplicate_in_more_bfs):
+            for error_more_bfs in errors_duplicate_in_more_bfs:
                 plot_id = error_more_bfs[0]  # plot_id
                 boundary_id = error_more_bfs[1]  # boundary_id
                 geom_plot = dict_plot_as_lines[plot_id].geometry()
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_plot,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[2]})
-                features.append(new_feature)
+                yield new_feature
 
         # not registered less
         if errors_not_in_less:
-            for error_less in set(errors_not_in_less):
+            for error_less in errors_not_in_less:
                 plot_ring_id = error_less[0]  # plot_ring_id
-                plot_id = int(plot_ring_id.split('-')[0]) # plot_id
+                plot_id = plot_ring_id[0] # plot_id
                 boundary_id = error_less[1]  # boundary_id
-                geom_ring = dict_inner_rings[plot_ring_id].geometry()
+                geom_ring = dict_inner_rings[plot_ring_id]
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_ring,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[3]})
-                features.append(new_feature)
+                yield new_feature
 
         # Duplicate in less
         if errors_duplicate_in_less:
-            for error_less in set(errors_duplicate_in_less):
+            for error_less in errors_duplicate_in_less:
                 plot_ring_id = error_less[0]  # plot_ring_id
-                plot_id = int(plot_ring_id.split('-')[0]) # plot_id
+                plot_id = plot_ring_id[0] # plot_id
                 boundary_id = error_less[1]  # boundary_id
-                geom_ring = dict_inner_rings[plot_ring_id].geometry()
+                geom_ring = dict_inner_rings[plot_ring_id]
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_ring,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[4]})
-                features.append(new_feature)
+                yield new_feature
+
+    def get_intersecting_geometries(self, geometry, candidate_ids, geometries):
+        """
+        Filter candidates from a spatial index by their intersection with a
+        geometry (prepared once).
 
-        return features
+        :param geometries: {feature id: (id, geometry)}
+        :return: List of (id, geometry) tuples
+        """
+        engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+        engine.prepareGeometry()
+        return [geometries[candidate_id] for candidate_id in candidate_ids
+                if engine.intersects(geometries[candidate_id][1].constGet())]
 
-    def check_boundaries_covered_by_plots(self, db):
+    def has_line_parts(self, geometry):
+        """
+        Whether a geometry (e.g., an intersection) is a line or a collection
+        with line parts.
+        """
+        if geometry.type() == QgsWkbTypes.LineGeometry:
+            return True
+
+        return bool(self.qgis_utils.geometry.extract_geoms_by_type(geometry, [QgsWkbTypes.LineGeometry]))
+
+    def check_boundaries_covered_by_plots(self, db, feedback=None):
         # read data
         res_layers = self.qgis_utils.get_layers(db, {
             PLOT_TABLE: {'name': PLOT_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry},
@@ -1001,10 +967,14 @@ class QualityUtils(QObject):
                                      QgsField('error_type', QVariant.String)])
         error_layer.updateFields()
 
-        features = self.get_boundary_features_not_covered_by_plots(plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer)
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_layer.featureCount())
+        writer.add_features(self.iter_boundary_features_not_covered_by_plots(plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
-        if features:
-            error_layer.dataProvider().addFeatures(features)
+        if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
 
             self.qgis_utils.message_emitted.emit(
@@ -1017,6 +987,9 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils", "All boundaries are covered by plots!"), Qgis.Info)
 
     def get_boundary_features_not_covered_by_plots(self, plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer, id_field=ID_FIELD):
+        return list(self.iter_boundary_features_not_covered_by_plots(plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer, id_field))
+
+    def iter_boundary_features_not_covered_by_plots(self, plot_layer, boundary_layer, more_bfs_layer, less_layer, error_layer, id_field=ID_FIELD):
         """
         Return all boundary features that have errors when checking if they are covered by plots.
         This takes into account both geometric and alphanumeric (topology table) errors.
@@ -1230,8 +1203,6 @@ class QualityUtils(QObject):
                     errors_not_in_less.append((plot_ring_id, boundary_id))  # no registered less table
         # finalize validation for less table
 
-        features = list()
-
         # boundary not covered by plot
         for boundary_plot_diff in errors_boundary_plot_diffs:
             boundary_id = boundary_plot_diff['id']
@@ -1239,7 +1210,7 @@ class QualityUtils(QObject):
             plot_id = boundary_plot_diff['id_plot'] if 'id_plot' in boundary_plot_diff else None
             new_feature = QgsVectorLayerUtils().createFeature(error_layer, boundary_geom,
                                                               {0: plot_id, 1: boundary_id, 2: type_tplg_error[0]})
-            features.append(new_feature)
+            yield new_feature
 
         # No registered more bfs
         if errors_not_in_more_bfs:
@@ -1249,7 +1220,7 @@ class QualityUtils(QObject):
                 geom_boundary = dict_boundary[boundary_id].geometry()
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_boundary,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[1]})
-                features.append(new_feature)
+                yield new_feature
 
         # Duplicate in more bfs
         if errors_duplicate_in_more_bfs:
@@ -1259,7 +1230,7 @@ class QualityUtils(QObject):
                 geom_boundary = dict_boundary[boundary_id].geometry()
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_boundary,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[2]})
-                features.append(new_feature)
+                yield new_feature
 
         # No registered less
         if errors_not_in_less:
@@ -1270,7 +1241,7 @@ class QualityUtils(QObject):
                 geom_ring = dict_inner_rings[plot_ring_id].geometry()
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_ring,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[3]})
-                features.append(new_feature)
+                yield new_feature
 
         # Duplicate in less
         if errors_duplicate_in_less:
@@ -1281,11 +1252,9 @@ class QualityUtils(QObject):
                 geom_ring = dict_inner_rings[plot_ring_id].geometry()
                 new_feature = QgsVectorLayerUtils().createFeature(error_layer, geom_ring,
                                                                   {0: plot_id, 1: boundary_id, 2: type_tplg_error[4]})
-                features.append(new_feature)
-
-        return features
+                yield new_feature
 
-    def check_overlapping_polygons(self, db, polygon_layer_name):
+    def check_overlapping_polygons(self, db, polygon_layer_name, incremental=None, feedback=None):
         polygon_layer = self.qgis_utils.get_layer(db, polygon_layer_name, QgsWkbTypes.PolygonGeometry, load=True)
 
         if polygon_layer is None:
@@ -1311,6 +1280,43 @@ class QualityUtils(QObject):
                                      QgsField("count_parts", QVariant.Int)])
         error_layer.updateFields()
 
+        token = self.qgis_utils.dirty_regions.get_token()
+        dirty_extents, prior_error_layer = self.get_incremental_run(error_layer_name, [polygon_layer], incremental)
+
+        writer = ErrorLayerWriter(error_layer, expected_count=polygon_layer.featureCount())
+        if dirty_extents is not None:
+            polygon_layer_subset = self.qgis_utils.geometry.get_layer_subset_in_extents(polygon_layer, dirty_extents)
+            writer.add_features(self.iter_incremental_error_features(
+                error_layer, prior_error_layer, dirty_extents, self.iter_overlapping_polygons_features(polygon_layer_subset, error_layer)))
+        elif db.mode == 'pg' and polygon_layer.dataProvider().name() == 'postgres' and not polygon_layer.subsetString():
+            writer.add_features(self.iter_overlapping_polygons_features_from_db(db, polygon_layer, error_layer))
+        else:
+            writer.add_features(self.iter_overlapping_polygons_features(polygon_layer, error_layer))
+        error_layer = writer.finish()
+
+        added_layer = None
+        if self.is_canceled(feedback):
+            return
+
+        if error_layer.featureCount() > 0:
+            added_layer = self.add_error_layer(error_layer)
+
+            self.qgis_utils.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                    "A memory layer with {} overlapping polygons in layer '{}' has been added to the map!").format(
+                    added_layer.featureCount(), polygon_layer_name), Qgis.Info)
+        else:
+            self.qgis_utils.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                    "There are no overlapping polygons in layer '{}'!").format(
+                    polygon_layer_name), Qgis.Info)
+
+        self.set_last_run(error_layer_name, [polygon_layer], token, added_layer)
+
+    def get_overlapping_polygons_features(self, polygon_layer, error_layer):
+        return list(self.iter_overlapping_polygons_features(polygon_layer, error_layer))
+
+    def iter_overlapping_polygons_features(self, polygon_layer, error_layer):
         if QgsWkbTypes.isMultiType(polygon_layer.wkbType()) and \
             polygon_layer.geometryType() == QgsWkbTypes.PolygonGeometry:
             polygon_layer = processing.run("native:multiparttosingleparts",
@@ -1324,8 +1330,6 @@ class QualityUtils(QObject):
         if type(polygon_layer) == QgsVectorLayer: # A string might come from processing for empty layers
             t_ids = {f.id(): f[ID_FIELD] for f in polygon_layer.getFeatures() if f.id() in flat_overlapping}
 
-        features = []
-
         for overlapping_item in overlapping:
             polygon_id_field = overlapping_item[0]
             overlapping_id_field = overlapping_item[1]
@@ -1339,24 +1343,55 @@ class QualityUtils(QObject):
                      1: t_ids[overlapping_id_field],
                      2: len(polygon_intersection.asMultiPolygon()) if polygon_intersection.isMultipart() else 1})
 
-                features.append(new_feature)
+                yield new_feature
 
-        error_layer.dataProvider().addFeatures(features)
+    def get_overlapping_polygons_features_from_db(self, db, polygon_layer, error_layer):
+        return list(self.iter_overlapping_polygons_features_from_db(db, polygon_layer, error_layer))
 
-        if error_layer.featureCount() > 0:
-            added_layer = self.add_error_layer(error_layer)
+    def iter_overlapping_polygons_features_from_db(self, db, polygon_layer, error_layer):
+        """
+        Let PostGIS find overlapping polygons and their intersections, instead
+        of comparing candidate pairs in Python.
+        """
+        uri = polygon_layer.dataProvider().uri()
+        for record in db.get_overlapping_polygons(uri.table(), uri.geometryColumn()):
+            polygon_intersection = QgsGeometry()
+            polygon_intersection.fromWkb(bytes(record['geom']))
+            if polygon_intersection.isEmpty():
+                continue
 
-            self.qgis_utils.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils",
-                    "A memory layer with {} overlapping polygons in layer '{}' has been added to the map!").format(
-                    added_layer.featureCount(), polygon_layer_name), Qgis.Info)
-        else:
-            self.qgis_utils.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils",
-                    "There are no overlapping polygons in layer '{}'!").format(
-                    polygon_layer_name), Qgis.Info)
+            new_feature = QgsVectorLayerUtils().createFeature(
+                error_layer,
+                polygon_intersection,
+                {0: record['polygon_id'],
+                 1: record['overlapping_id'],
+                 2: len(polygon_intersection.asMultiPolygon()) if polygon_intersection.isMultipart() else 1})
+
+            yield new_feature
 
-    def check_overlaps_in_boundaries(self, db):
+    def get_union_parts_in_rect_from_db(self, db, polygon_layer, rect):
+        """
+        Let PostGIS dissolve the polygons of a tile when searching for gaps.
+
+        :raise ConnectionError: If the DB connection failed, since a missing
+                                tile would be taken as a gap
+        """
+        uri = polygon_layer.dataProvider().uri()
+        res, records = db.get_polygon_union_parts(uri.table(), uri.geometryColumn(), rect.xMinimum(),
+                                                  rect.yMinimum(), rect.xMaximum(), rect.yMaximum())
+        if not res:
+            raise ConnectionError(records)
+
+        parts = list()
+        for record in records:
+            part = QgsGeometry()
+            part.fromWkb(bytes(record['geom']))
+            if not part.isEmpty():
+                parts.append((part, record['nodes']))
+
+        return parts
+
+    def check_overlaps_in_boundaries(self, db, feedback=None):
         boundary_layer = self.qgis_utils.get_layer(db, BOUNDARY_TABLE, load=True)
 
         if boundary_layer is None:
@@ -1395,6 +1430,9 @@ class QualityUtils(QObject):
         else:
             msg = ''
 
+            if self.is_canceled(feedback):
+                return
+
             if type(error_point_layer) is QgsVectorLayer and error_point_layer.featureCount() > 0:
                 added_point_layer = self.add_error_layer(error_point_layer)
                 msg = QCoreApplication.translate("QGISUtils",
@@ -1414,13 +1452,12 @@ class QualityUtils(QObject):
 
             self.qgis_utils.message_emitted.emit(msg, Qgis.Info)
 
-    def check_boundaries_are_not_split(self, db):
+    def check_boundaries_are_not_split(self, db, feedback=None):
         """
         An split boundary is an incomplete boundary because it is connected to
         a single boundary and therefore, they don't represent a change in
         boundary (colindancia).
         """
-        features = []
         boundary_layer = self.qgis_utils.get_layer(db, BOUNDARY_TABLE, load=True)
 
         if boundary_layer is None:
@@ -1451,12 +1488,14 @@ class QualityUtils(QObject):
         pr.addAttributes([QgsField("boundary_id", QVariant.Int)])
         error_layer.updateFields()
 
-        for feature in wrong_boundaries:
-            new_feature = QgsVectorLayerUtils().createFeature(error_layer, feature.geometry(),
-                                                              {0: feature[ID_FIELD]})
-            features.append(new_feature)
+        writer = ErrorLayerWriter(error_layer, expected_count=len(wrong_boundaries))
+        writer.add_features(QgsVectorLayerUtils().createFeature(error_layer, feature.geometry(), {0: feature[ID_FIELD]})
+                            for feature in wrong_boundaries)
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
-        error_layer.dataProvider().addFeatures(features)
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
             self.qgis_utils.message_emitted.emit(
@@ -1469,9 +1508,8 @@ class QualityUtils(QObject):
                                            "There are no wrong boundaries."),
                 Qgis.Info)
 
-    def check_too_long_segments(self, db):
+    def check_too_long_segments(self, db, feedback=None):
         tolerance = int(QSettings().value('Asistente-LADM_COL/quality/too_long_tolerance', DEFAULT_TOO_LONG_BOUNDARY_SEGMENTS_TOLERANCE)) # meters
-        features = []
         boundary_layer = self.qgis_utils.get_layer(db, BOUNDARY_TABLE, load=True)
 
         if boundary_layer is None:
@@ -1495,22 +1533,13 @@ class QualityUtils(QObject):
                           QgsField("distance", QVariant.Double)])
         error_layer.updateFields()
 
-        for feature in boundary_layer.getFeatures():
-            lines = feature.geometry()
-            if lines.isMultipart():
-                for part in range(lines.constGet().numGeometries()):
-                    line = lines.constGet().geometryN(part)
-                    segments_info = self.qgis_utils.geometry.get_too_long_segments_from_simple_line(line, tolerance)
-                    for segment_info in segments_info:
-                        new_feature = QgsVectorLayerUtils().createFeature(error_layer, segment_info[0], {0:feature.id(), 1:segment_info[1]})
-                        features.append(new_feature)
-            else:
-                segments_info = self.qgis_utils.geometry.get_too_long_segments_from_simple_line(lines.constGet(), tolerance)
-                for segment_info in segments_info:
-                    new_feature = QgsVectorLayerUtils().createFeature(error_layer, segment_info[0], {0:feature.id(), 1:segment_info[1]})
-                    features.append(new_feature)
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_layer.featureCount())
+        writer.add_features(self.iter_too_long_segments_features(boundary_layer, error_layer, tolerance))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
 
-        error_layer.dataProvider().addFeatures(features)
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
             self.qgis_utils.message_emitted.emit(
@@ -1523,7 +1552,23 @@ class QualityUtils(QObject):
                                            "All boundary segments are within the length tolerance for segments ({}m.)!").format(tolerance),
                 Qgis.Info)
 
-    def check_missing_boundary_points_in_boundaries(self, db):
+    def iter_too_long_segments_features(self, boundary_layer, error_layer, tolerance):
+        for feature in boundary_layer.getFeatures():
+            lines = feature.geometry()
+            if lines.isMultipart():
+                for part in range(lines.constGet().numGeometries()):
+                    line = lines.constGet().geometryN(part)
+                    segments_info = self.qgis_utils.geometry.get_too_long_segments_from_simple_line(line, tolerance)
+                    for segment_info in segments_info:
+                        new_feature = QgsVectorLayerUtils().createFeature(error_layer, segment_info[0], {0:feature.id(), 1:segment_info[1]})
+                        yield new_feature
+            else:
+                segments_info = self.qgis_utils.geometry.get_too_long_segments_from_simple_line(lines.constGet(), tolerance)
+                for segment_info in segments_info:
+                    new_feature = QgsVectorLayerUtils().createFeature(error_layer, segment_info[0], {0:feature.id(), 1:segment_info[1]})
+                    yield new_feature
+
+    def check_missing_boundary_points_in_boundaries(self, db, feedback=None):
         res_layers = self.qgis_utils.get_layers(db, {
             BOUNDARY_POINT_TABLE: {'name': BOUNDARY_POINT_TABLE, 'geometry': None},
             POINT_BOUNDARY_FACE_STRING_TABLE: {'name': POINT_BOUNDARY_FACE_STRING_TABLE, 'geometry': None},
@@ -1571,10 +1616,28 @@ class QualityUtils(QObject):
 
         error_layer.updateFields()
 
+        writer = ErrorLayerWriter(error_layer, expected_count=boundary_point_layer.featureCount())
+        writer.add_features(self.iter_missing_boundary_points_features(boundary_point_layer, boundary_layer, point_ccl_table, error_layer))
+        error_layer = writer.finish()
+
+        if self.is_canceled(feedback):
+            return
+
+        if error_layer.featureCount() > 0:
+            added_layer = self.add_error_layer(error_layer)
+
+            self.qgis_utils.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                    "A memory layer with {} boundary vertices with no associated boundary points or with boundary points wrongly registered in the PointBFS table been added to the map!").format(added_layer.featureCount()), Qgis.Info)
+        else:
+            self.qgis_utils.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                                           "There are no missing boundary points in boundaries."), Qgis.Info)
+
+    def iter_missing_boundary_points_features(self, boundary_point_layer, boundary_layer, point_ccl_table, error_layer):
         # check missing points
         missing_points = self.get_missing_boundary_points_in_boundaries(boundary_point_layer, boundary_layer)
 
-        new_features = list()
         for key, point_list in missing_points.items():
             for point in point_list:
                 new_feature = QgsVectorLayerUtils().createFeature(
@@ -1584,7 +1647,7 @@ class QualityUtils(QObject):
                         0: None,
                         1: key,
                         2: QCoreApplication.translate("QGISUtils", "Missing boundary point in boundary")})
-                new_features.append(new_feature)
+                yield new_feature
 
         dic_points_ccl = dict()
         for feature_point_ccl in point_ccl_table.getFeatures():
@@ -1604,29 +1667,17 @@ class QualityUtils(QObject):
 
             if key_query in dic_points_ccl:
                 if dic_points_ccl[key_query] > 1:
-                    new_features.append(QgsVectorLayerUtils().createFeature(error_layer, point_selected.geometry(),
+                    yield QgsVectorLayerUtils().createFeature(error_layer, point_selected.geometry(),
                         {0: boundary_point_id,
                          1: boundary_id,
-                         2: QCoreApplication.translate("QGISUtils", "Relation found more than once in the PointBFS table")}))
+                         2: QCoreApplication.translate("QGISUtils", "Relation found more than once in the PointBFS table")})
             else:
-                new_features.append(QgsVectorLayerUtils().createFeature(error_layer, point_selected.geometry(),
+                yield QgsVectorLayerUtils().createFeature(error_layer, point_selected.geometry(),
                     {0: boundary_point_id,
                      1: boundary_id,
-                     2: QCoreApplication.translate("QGISUtils", "Relation not found in the PointBFS table")}))
-        data_provider.addFeatures(new_features)
-
-        if error_layer.featureCount() > 0:
-            added_layer = self.add_error_layer(error_layer)
-
-            self.qgis_utils.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils",
-                    "A memory layer with {} boundary vertices with no associated boundary points or with boundary points wrongly registered in the PointBFS table been added to the map!").format(added_layer.featureCount()), Qgis.Info)
-        else:
-            self.qgis_utils.message_emitted.emit(
-                QCoreApplication.translate("QGISUtils",
-                                           "There are no missing boundary points in boundaries."), Qgis.Info)
+                     2: QCoreApplication.translate("QGISUtils", "Relation not found in the PointBFS table")})
 
-    def check_missing_survey_points_in_buildings(self, db):
+    def check_missing_survey_points_in_buildings(self, db, feedback=None):
         """
         Not used anymore but kept for reference.
         """
@@ -1667,13 +1718,13 @@ class QualityUtils(QObject):
 
         missing_points = self.get_missing_boundary_points_in_boundaries(survey_point_layer, building_layer)
 
-        new_features = list()
-        for key, point_list in missing_points.items():
-            for point in point_list:
-                new_feature = QgsVectorLayerUtils().createFeature(error_layer, point, {0: key})
-                new_features.append(new_feature)
+        writer = ErrorLayerWriter(error_layer, expected_count=survey_point_layer.featureCount())
+        writer.add_features(QgsVectorLayerUtils().createFeature(error_layer, point, {0: key})
+                            for key, point_list in missing_points.items() for point in point_list)
+        error_layer = writer.finish()
 
-        data_provider.addFeatures(new_features)
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -1686,7 +1737,7 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils",
                                            "There are no missing survey points in buildings."), Qgis.Info)
 
-    def check_dangles_in_boundaries(self, db):
+    def check_dangles_in_boundaries(self, db, feedback=None):
         boundary_layer = self.qgis_utils.get_layer(db, BOUNDARY_TABLE, load=True)
 
         if boundary_layer is None:
@@ -1712,12 +1763,13 @@ class QualityUtils(QObject):
 
         end_points, dangle_ids = self.get_dangle_ids(boundary_layer)
 
-        new_features = []
-        for dangle in end_points.getFeatures(dangle_ids):
-            new_feature = QgsVectorLayerUtils().createFeature(end_points, dangle.geometry(), {0: dangle[ID_FIELD]})
-            new_features.append(new_feature)
+        writer = ErrorLayerWriter(error_layer, expected_count=len(dangle_ids))
+        writer.add_features(QgsVectorLayerUtils().createFeature(end_points, dangle.geometry(), {0: dangle[ID_FIELD]})
+                            for dangle in end_points.getFeatures(dangle_ids))
+        error_layer = writer.finish()
 
-        error_layer.dataProvider().addFeatures(new_features)
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -1788,7 +1840,7 @@ class QualityUtils(QObject):
                         res[feature[ID_FIELD]] = [diff_geom]
         return res
 
-    def check_right_of_way_overlaps_buildings(self, db):
+    def check_right_of_way_overlaps_buildings(self, db, feedback=None):
         res_layers = self.qgis_utils.get_layers(db, {
             RIGHT_OF_WAY_TABLE: {'name': RIGHT_OF_WAY_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry},
             BUILDING_TABLE: {'name': BUILDING_TABLE, 'geometry': QgsWkbTypes.PolygonGeometry}}, load=True)
@@ -1837,12 +1889,13 @@ class QualityUtils(QObject):
         ids, overlapping_polygons = self.qgis_utils.geometry.get_inner_intersections_between_polygons(right_of_way_layer, building_layer)
 
         if overlapping_polygons is not None:
-            new_features = list()
-            for key, polygon in zip(ids, overlapping_polygons.asGeometryCollection()):
-                new_feature = QgsVectorLayerUtils().createFeature(error_layer, polygon, {0: key[0], 1: key[1]}) # right_of_way_id, building_id
-                new_features.append(new_feature)
+            writer = ErrorLayerWriter(error_layer, expected_count=len(ids))
+            writer.add_features(QgsVectorLayerUtils().createFeature(error_layer, polygon, {0: key[0], 1: key[1]}) # right_of_way_id, building_id
+                                for key, polygon in zip(ids, overlapping_polygons.asGeometryCollection()))
+            error_layer = writer.finish()
 
-            data_provider.addFeatures(new_features)
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -1856,7 +1909,7 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils",
                                            "There are no Right of Way-Building overlaps."), Qgis.Info)
 
-    def check_gaps_in_plots(self, db):
+    def check_gaps_in_plots(self, db, feedback=None):
         use_roads = bool(QSettings().value('Asistente-LADM_COL/quality/use_roads', DEFAULT_USE_ROADS_VALUE, bool))
         plot_layer = self.qgis_utils.get_layer(db, PLOT_TABLE, QgsWkbTypes.PolygonGeometry, True)
 
@@ -1882,15 +1935,27 @@ class QualityUtils(QObject):
         data_provider.addAttributes([QgsField("id", QVariant.Int)])
         error_layer.updateFields()
 
-        gaps = self.qgis_utils.geometry.get_gaps_in_polygon_layer(plot_layer, use_roads)
+        get_tile_parts = None
+        if db.mode == 'pg' and plot_layer.dataProvider().name() == 'postgres' and not plot_layer.subsetString():
+            get_tile_parts = lambda rect: self.get_union_parts_in_rect_from_db(db, plot_layer, rect)
+
+        try:
+            gaps = self.qgis_utils.geometry.get_gaps_in_polygon_layer_by_tiles(plot_layer, use_roads, get_tile_parts=get_tile_parts)
+        except ConnectionError as e:
+            self.qgis_utils.message_emitted.emit(
+                QCoreApplication.translate("QGISUtils",
+                                           "Gaps in layer Plot couldn't be checked in the DB: {}").format(e),
+                Qgis.Warning)
+            return
 
         if gaps is not None:
-            new_features = list()
-            for geom, id in zip(gaps, range(0, len(gaps))):
-                feature = QgsVectorLayerUtils().createFeature(error_layer, geom, {0: id})
-                new_features.append(feature)
+            writer = ErrorLayerWriter(error_layer, expected_count=len(gaps))
+            writer.add_features(QgsVectorLayerUtils().createFeature(error_layer, geom, {0: id})
+                                for geom, id in zip(gaps, range(0, len(gaps))))
+            error_layer = writer.finish()
 
-            data_provider.addFeatures(new_features)
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -1904,7 +1969,7 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils",
                                            "There are no gaps in layer Plot."), Qgis.Info)
 
-    def check_multiparts_in_right_of_way(self, db):
+    def check_multiparts_in_right_of_way(self, db, feedback=None):
         right_of_way_layer = self.qgis_utils.get_layer(db, RIGHT_OF_WAY_TABLE, QgsWkbTypes.PolygonGeometry, True)
 
         if right_of_way_layer is None:
@@ -1932,12 +1997,13 @@ class QualityUtils(QObject):
         multi_parts, ids = self.qgis_utils.geometry.get_multipart_geoms(right_of_way_layer)
 
         if multi_parts is not None:
-            new_features = list()
-            for geom, id in zip(multi_parts, ids):
-                feature = QgsVectorLayerUtils().createFeature(error_layer, geom, {0: id})
-                new_features.append(feature)
+            writer = ErrorLayerWriter(error_layer, expected_count=len(ids))
+            writer.add_features(QgsVectorLayerUtils().createFeature(error_layer, geom, {0: id})
+                                for geom, id in zip(multi_parts, ids))
+            error_layer = writer.finish()
 
-            data_provider.addFeatures(new_features)
+        if self.is_canceled(feedback):
+            return
 
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
@@ -1951,7 +2017,7 @@ class QualityUtils(QObject):
                 QCoreApplication.translate("QGISUtils",
                                            "There are no multipart geometries in layer Right Of Way."), Qgis.Info)
 
-    def check_parcel_right_relationship(self, db):
+    def check_parcel_right_relationship(self, db, feedback=None):
 
         table_name = QCoreApplication.translate("LogicChecksConfigStrings","Logic Consistency Errors in table '{}'").format(PARCEL_TABLE)
         error_layer = None
@@ -1971,6 +2037,9 @@ class QualityUtils(QObject):
         errors_count, error_layer = self.logic.get_parcel_right_relationship_errors(db, error_layer, table_name)
 
         if errors_count > 0:
+            if self.is_canceled(feedback):
+                return
+
             if error_layer_exist is False:
                 added_layer = self.add_error_layer(error_layer)
             else:
@@ -1986,11 +2055,14 @@ class QualityUtils(QObject):
                                            "Parcel-Right relationships are correct!"),
                 Qgis.Info)
 
-    def check_fraction_sum_for_party_groups(self, db):
+    def check_fraction_sum_for_party_groups(self, db, feedback=None):
 
         error_layer = None
         error_layer = self.logic.get_fractions_which_sum_is_not_one(db, error_layer)
 
+        if self.is_canceled(feedback):
+            return
+
         if error_layer.featureCount() > 0:
             added_layer = self.add_error_layer(error_layer)
 
@@ -2026,6 +2098,80 @@ class QualityUtils(QObject):
 
         return (end_points, list(set(end_point_ids) - set(overlapping_point_ids)))
 
+    def get_incremental_run(self, error_layer_name, layers, incremental=None):
+        """
+        Find out whether a check can re-evaluate only the features around
+        edits made since its last run, i.e., whether its input layers were
+        tracked since then.
+
+        Only edits notified by layer signals are tracked (see
+        DirtyRegionTracker). Edits written straight through dataProvider(),
+        e.g., QGISUtils.add_topology_pairs(), bypass them and aren't seen
+        here, so checks depending on such layers must be run in full.
+
+        :param incremental: If None, it's read from settings
+        :return: Tuple (dirty extents, prior error layer or None if the last
+                 run found no errors). Dirty extents are None if the check has
+                 to be run on the whole dataset.
+        """
+        if incremental is None:
+            incremental = QSettings().value('Asistente-LADM_COL/quality/incremental_checks', DEFAULT_INCREMENTAL_QUALITY_CHECKS, bool)
+
+        last_run = self._last_runs.get(error_layer_name)
+        if not incremental or last_run is None:
+            return (None, None)
+
+        layer_ids, token, error_layer_id = last_run
+        if layer_ids != [layer.id() for layer in layers]:
+            return (None, None)
+
+        prior_error_layer = None
+        if error_layer_id is not None:
+            prior_error_layer = QgsProject.instance().mapLayer(error_layer_id)
+            if prior_error_layer is None: # Removed by the user
+                return (None, None)
+
+        return (self.qgis_utils.dirty_regions.get_dirty_extents(layer_ids, token), prior_error_layer)
+
+    def set_last_run(self, error_layer_name, layers, token, error_layer=None):
+        """
+        :param token: Dirty region token obtained before running the check
+        :param error_layer: Error layer added to the map, if any
+        """
+        self._last_runs[error_layer_name] = ([layer.id() for layer in layers],
+                                             token,
+                                             error_layer.id() if error_layer is not None else None)
+
+        # Extents older than every last run won't be asked for again
+        self.qgis_utils.dirty_regions.prune(min(last_run[1] for last_run in self._last_runs.values()))
+
+    @staticmethod
+    def iter_incremental_error_features(error_layer, prior_error_layer, dirty_extents, features):
+        """
+        Merge the errors of a previous run with the errors found re-evaluating
+        the features around dirty extents. Errors touching dirty extents are
+        taken from the new ones, the rest are kept from the previous run.
+
+        :param features: Errors found in the features whose bounding boxes
+                         intersect dirty extents
+        """
+        def is_dirty(geometry):
+            bbox = geometry.boundingBox()
+            return any(bbox.intersects(rect) for rect in dirty_extents)
+
+        if prior_error_layer is not None:
+            field_names = error_layer.fields().names()
+            for prior_feature in prior_error_layer.getFeatures():
+                if not is_dirty(prior_feature.geometry()):
+                    feature = QgsFeature(error_layer.fields())
+                    feature.setGeometry(prior_feature.geometry())
+                    feature.setAttributes([prior_feature[field_name] for field_name in field_names])
+                    yield feature
+
+        for feature in features:
+            if is_dirty(feature.geometry()):
+                yield feature
+
     def add_error_layer(self, error_layer):
         group = self.qgis_utils.get_error_layers_group()
 
@@ -2043,7 +2189,7 @@ class QualityUtils(QObject):
             self.qgis_utils.symbology.set_layer_style_from_qml(added_layer, is_error_layer=True)
         return added_layer
 
-    def find_duplicate_records_in_a_table(self, db):
+    def find_duplicate_records_in_a_table(self, db, feedback=None):
 
         for table in LOGIC_CONSISTENCY_TABLES:
             fields = LOGIC_CONSISTENCY_TABLES[table]
@@ -2051,6 +2197,9 @@ class QualityUtils(QObject):
             error_layer = None
             error_layer = self.logic.get_duplicate_records_in_a_table(db, table, fields, error_layer)
 
+            if self.is_canceled(feedback):
+                return
+
             if error_layer.featureCount() > 0:
                 added_layer = self.add_error_layer(error_layer)
 
@@ -2064,7 +2213,7 @@ class QualityUtils(QObject):
                                                "There are no repeated records in {table}!".format(table=table)),
                     Qgis.Info)
 
-    def basic_logic_validations(self, db, rule):
+    def basic_logic_validations(self, db, rule, feedback=None):
 
         query = db.logic_validation_queries[rule]['query']
         table_name = db.logic_validation_queries[rule]['table_name']
@@ -2092,16 +2241,24 @@ class QualityUtils(QObject):
                               QgsField(QCoreApplication.translate("QualityConfigStrings", "error_type"), QVariant.String)])
             error_layer.updateFields()
 
-        records = db.execute_sql_query(query)
+        records = self.logic.iter_sql_query(db, query)
 
-        new_features = []
+        errors_count = 0
+        new_features = list()
         for record in records:
             new_feature = QgsVectorLayerUtils().createFeature(error_layer,QgsGeometry(), {0: record[ID_FIELD], 1:desc_error})
             new_features.append(new_feature)
+            if len(new_features) >= ERROR_LAYER_CHUNK_SIZE:
+                errors_count += self.logic.flush_features(error_layer, new_features)
+                if self.is_canceled(feedback):
+                    return
 
-        error_layer.dataProvider().addFeatures(new_features)
+        errors_count += self.logic.flush_features(error_layer, new_features)
+
+        if errors_count > 0:
+            if self.is_canceled(feedback):
+                return
 
-        if len(new_features) > 0:
             if error_layer_exist is False:
                 added_layer = self.add_error_layer(error_layer)
             else:
@@ -2109,7 +2266,7 @@ class QualityUtils(QObject):
 
             self.qgis_utils.message_emitted.emit(
                 QCoreApplication.translate("QGISUtils",
-                                           "A memory layer with {error_count} error record(s) from {table} has been added to the map!").format(error_count=len(new_features), table=table),
+                                           "A memory layer with {error_count} error record(s) from {table} has been added to the map!").format(error_count=errors_count, table=table),
                 Qgis.Info)
         else:
             self.qgis_utils.message_emitted.emit(
@@ -2117,7 +2274,7 @@ class QualityUtils(QObject):
                                            "There are no repeated records in {table}!".format(table=table)),
                 Qgis.Info)
 
-    def advance_logic_validations(self, db, rule):
+    def advance_logic_validations(self, db, rule, feedback=None):
         table_name = db.logic_validation_queries[rule]['table_name']
         table = db.logic_validation_queries[rule]['table']
 
@@ -2145,6 +2302,9 @@ class QualityUtils(QObject):
             errors_count, error_layer = self.logic.uebaunit_parcel_validation(db, rule, error_layer)
 
         if errors_count > 0:
+            if self.is_canceled(feedback):
+                return
+
             if error_layer_exist is False:
                 added_layer = self.add_error_layer(error_layer)
             else:
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import traceback
+
+from qgis.PyQt.QtCore import (QObject,
+                              QCoreApplication,
+                              QTimer,
+                              pyqtSignal)
+from qgis.core import (Qgis,
+                       QgsApplication,
+                       QgsFeedback)
+
+from .instrumentation import instrumentation
+from ..config.general_config import PLUGIN_NAME
+
+
+class QualityRuleRunner(QObject):
+    """
+    Runs quality rules, which are dicts like {'id': ..., 'text': ...,
+    'function': ...}. The function is called with a QgsFeedback as 'feedback'
+    keyword argument, which it uses to report progress and to stop early if
+    the run is canceled.
+
+    Rules run one after the other in the main thread, since they load layers
+    and add error layers to the QGIS project, which can't be used from other
+    threads. The event loop gets control back between rules and whenever a
+    rule reports progress, so that the progress bar and the cancel button
+    keep responding.
+    """
+    progress_changed = pyqtSignal(int) # Percentage of finished rules
+    rules_finished = pyqtSignal(dict) # {rule_id: rule_result}
+
+    def __init__(self):
+        QObject.__init__(self)
+        self.log = QgsApplication.messageLog()
+        self._pending_rules = list()
+        self._feedback = None # Of the running rule
+        self._scheduled = False # Whether _run_next_rule() is waiting for the event loop
+        self._progress = dict()
+        self._results = dict()
+
+    def is_running(self):
+        return bool(self._pending_rules) or self._feedback is not None or self._scheduled
+
+    def cancel(self):
+        """
+        Stop the running rule as soon as it checks its feedback and skip the
+        pending ones. Results of the rules run so far are still emitted.
+        """
+        self._pending_rules = list()
+        if self._feedback is not None:
+            self._feedback.cancel()
+
+    def run(self, rules):
+        """
+        :return: False if rules are still running from a previous call, in
+                 which case the new rules are not run
+        """
+        if self.is_running():
+            self.log.logMessage("Quality rules are already running, new rules were not started.", PLUGIN_NAME, Qgis.Warning)
+            return False
+
+        self._results = dict()
+        self._progress = {rule['id']: 0 for rule in rules}
+        self._pending_rules = list(rules)
+
+        # Give control back to the event loop so that callers can show
+        # progress and cancel before the first rule starts
+        self._scheduled = True
+        QTimer.singleShot(0, self._run_next_rule)
+        return True
+
+    def _run_next_rule(self):
+        self._scheduled = False
+        if not self._pending_rules:
+            self.rules_finished.emit(self._results)
+            return
+
+        rule = self._pending_rules.pop(0)
+        self._feedback = QgsFeedback()
+        self._feedback.progressChanged.connect(lambda progress, rule_id=rule['id']: self._set_rule_progress(rule_id, progress, True))
+
+        try:
+            with instrumentation.span(rule['id']):
+                self._results[rule['id']] = rule['function'](feedback=self._feedback)
+        except Exception:
+            self.log.logMessage(
+                QCoreApplication.translate("QualityRuleRunner", "Quality rule '{}' failed: {}").format(rule['id'], traceback.format_exc()),
+                PLUGIN_NAME,
+                Qgis.Critical)
+            self._results[rule['id']] = None
+
+        self._feedback = None
+        self._set_rule_progress(rule['id'], 100)
+        self._scheduled = True
+        QTimer.singleShot(0, self._run_next_rule)
+
+    def _set_rule_progress(self, rule_id, progress, process_events=False):
+        self._progress[rule_id] = progress
+        self.progress_changed.emit(int(sum(self._progress.values()) / len(self._progress)))
+
+        if process_events:
+            # Rules block the event loop, let the progress bar repaint and
+            # the cancel button respond
+            QCoreApplication.processEvents()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from ..config.general_config import (REFERENCED_LAYER,
+                                     REFERENCING_LAYER,
+                                     RELATION_TYPE)
+
+
+class RelationIndex:
+    """
+    Adjacency indexes over the cached DB relations (list of dicts as built by
+    ProjectGeneratorUtils), so that looking for the relations of a layer
+    doesn't require scanning the whole relation list.
+
+    Relations keep their original order inside each adjacency list.
+    """
+    def __init__(self, relations):
+        self.relations = relations
+        self._referencing = dict() # {referencing layer: [relation]}
+        self._referenced = dict() # {referenced layer: [relation]}
+
+        for relation in relations or list():
+            self._referencing.setdefault(relation[REFERENCING_LAYER], list()).append(relation)
+            self._referenced.setdefault(relation[REFERENCED_LAYER], list()).append(relation)
+
+    def get_referencing_relations(self, layer_name):
+        """
+        Relations in which the layer is the referencing (child) layer.
+        """
+        return self._referencing.get(layer_name, list())
+
+    def get_referenced_relations(self, layer_name):
+        """
+        Relations in which the layer is the referenced (parent) layer.
+        """
+        return self._referenced.get(layer_name, list())
+
+    def get_referenced_layers(self, layer_names, relation_type=None):
+        """
+        Layers referenced by any of the given layers, optionally only through
+        relations of a given type. Repeated layers are kept, as in the relation
+        list, since callers remove duplicates themselves.
+        """
+        referenced_layers = list()
+        for layer_name in layer_names:
+            for relation in self._referencing.get(layer_name, list()):
+                if relation_type is None or relation[RELATION_TYPE] == relation_type:
+                    referenced_layers.append(relation[REFERENCED_LAYER])
+
+        return referenced_layers
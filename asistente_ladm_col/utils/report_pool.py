@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import functools
+import time
+from collections import deque
+
+from qgis.PyQt.QtCore import (QObject,
+                              QCoreApplication,
+                              QProcess,
+                              QTimer,
+                              pyqtSignal)
+
+
+class ReportJob:
+    """
+    A single report to be generated by an external process. `arguments` can
+    be a list or a callable returning a list; the callable is only evaluated
+    when the job is about to start, so data files can be prepared lazily.
+    """
+    def __init__(self, job_id, program, arguments):
+        self.job_id = job_id
+        self.program = program
+        self.arguments = arguments
+        self.attempts = 0
+        self.success = False
+        self.exit_code = None
+        self.error = ''
+        self.started_at = None
+        self.finished_at = None
+
+    def get_arguments(self):
+        if callable(self.arguments):
+            self.arguments = self.arguments()
+        return self.arguments
+
+
+class ReportWorkerPool(QObject):
+    """
+    Runs report jobs as concurrent QProcesses, at most `max_workers` at a
+    time. Pending jobs wait in a FIFO queue. Each attempt is killed after
+    `timeout` seconds and failed jobs are run again up to `retries` times.
+
+    Results are emitted in submission order once all jobs are finished,
+    regardless of the order in which processes finish.
+    """
+    progress_changed = pyqtSignal(int, str) # Percentage, progress/ETA summary
+    job_finished = pyqtSignal(object) # ReportJob
+    stderr_received = pyqtSignal(object, str) # ReportJob, text
+    stdout_received = pyqtSignal(object, str) # ReportJob, text
+    all_finished = pyqtSignal(list) # [ReportJob] in submission order
+
+    def __init__(self, max_workers, timeout=300, retries=1, encoding='UTF8'):
+        QObject.__init__(self)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.retries = retries
+        self.encoding = encoding
+        self.max_running = 0 # Peak of simultaneous processes, for diagnostics
+
+        self._jobs = list()
+        self._queue = deque()
+        self._running = dict() # {job_id: (job, process, timer)}
+        self._finished_count = 0
+        self._start_time = None
+        self._canceled = False
+
+    def is_running(self):
+        return bool(self._running or self._queue)
+
+    def run(self, jobs):
+        self._jobs = list(jobs)
+        self._queue = deque(self._jobs)
+        self._finished_count = 0
+        self._start_time = time.time()
+        self._canceled = False
+        self.max_running = 0
+
+        if not self._jobs:
+            self.all_finished.emit(list())
+            return
+
+        self._start_next_jobs()
+
+    def cancel(self):
+        """
+        Kill running processes and drop pending jobs. Dropped jobs are
+        finished as failed right away, killed ones once their process ends,
+        so all_finished is still emitted.
+        """
+        self._canceled = True
+        error = QCoreApplication.translate("ReportWorkerPool", "Canceled by the user.")
+        for job, proc, timer in list(self._running.values()):
+            job.error = error
+            proc.kill()
+
+        queued, self._queue = self._queue, deque()
+        for job in queued:
+            job.error = error
+            self._job_done(job)
+
+    def _start_next_jobs(self):
+        while self._queue and len(self._running) < self.max_workers:
+            self._start_job(self._queue.popleft())
+
+        self.max_running = max(self.max_running, len(self._running))
+
+    def _start_job(self, job):
+        job.attempts += 1
+        job.error = ''
+        if job.started_at is None:
+            job.started_at = time.time()
+
+        try:
+            arguments = job.get_arguments()
+        except Exception as e:
+            job.error = QCoreApplication.translate("ReportWorkerPool", "Couldn't prepare the report: {}").format(e)
+            self._job_done(job)
+            return
+
+        proc = QProcess(self)
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(functools.partial(self._job_timed_out, job, proc))
+
+        proc.readyReadStandardError.connect(functools.partial(self._stderr_ready, job, proc))
+        proc.readyReadStandardOutput.connect(functools.partial(self._stdout_ready, job, proc))
+        proc.finished.connect(functools.partial(self._process_finished, job, proc))
+        proc.errorOccurred.connect(functools.partial(self._process_error, job, proc))
+
+        self._running[job.job_id] = (job, proc, timer)
+        proc.start(job.program, arguments)
+        if self.timeout and job.job_id in self._running: # It might have failed to start already
+            timer.start(self.timeout * 1000)
+
+    def _stderr_ready(self, job, proc):
+        self.stderr_received.emit(job, bytes(proc.readAllStandardError()).decode(self.encoding, 'replace'))
+
+    def _stdout_ready(self, job, proc):
+        self.stdout_received.emit(job, bytes(proc.readAllStandardOutput()).decode(self.encoding, 'replace'))
+
+    def _job_timed_out(self, job, proc):
+        job.error = QCoreApplication.translate("ReportWorkerPool", "The report process took more than {} seconds and was stopped.").format(self.timeout)
+        proc.kill()
+
+    def _process_error(self, job, proc, error):
+        # A process that couldn't start never emits finished()
+        if error == QProcess.FailedToStart:
+            job.error = QCoreApplication.translate("ReportWorkerPool", "The report process couldn't be started: {}").format(proc.errorString())
+            self._process_done(job, proc, None)
+
+    def _process_finished(self, job, proc, exit_code, exit_status):
+        self._process_done(job, proc, exit_code if exit_status == QProcess.NormalExit else None)
+
+    def _process_done(self, job, proc, exit_code):
+        if job.job_id not in self._running:
+            return # Already handled
+
+        job, proc, timer = self._running.pop(job.job_id)
+        timer.stop()
+        timer.deleteLater()
+        proc.deleteLater()
+
+        job.exit_code = exit_code
+        job.success = exit_code == 0 and not job.error
+        if not job.success and not job.error:
+            job.error = QCoreApplication.translate("ReportWorkerPool", "The report process finished with exit code {}.").format(exit_code)
+
+        if not job.success and not self._canceled and job.attempts <= self.retries:
+            self._queue.append(job) # Try again after pending jobs
+        else:
+            self._job_done(job)
+
+        self._start_next_jobs()
+
+    def _job_done(self, job):
+        job.finished_at = time.time()
+        self._finished_count += 1
+        self.job_finished.emit(job)
+        self._emit_progress()
+
+        if self._finished_count == len(self._jobs):
+            self.all_finished.emit(self._jobs)
+
+    def _emit_progress(self):
+        total = len(self._jobs)
+        elapsed = time.time() - self._start_time
+        remaining = (elapsed / self._finished_count) * (total - self._finished_count)
+        failed = len([job for job in self._jobs if job.finished_at is not None and not job.success])
+        summary = QCoreApplication.translate("ReportWorkerPool", "{done}/{total} reports ({failed} failed), elapsed {elapsed}, ETA {eta}").format(
+            done=self._finished_count,
+            total=total,
+            failed=failed,
+            elapsed=self.format_seconds(elapsed),
+            eta=self.format_seconds(remaining))
+        self.progress_changed.emit(int(self._finished_count * 100 / total), summary)
+
+    @staticmethod
+    def format_seconds(seconds):
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return "{:d}:{:02d}:{:02d}".format(hours, minutes, seconds)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+
+class SegmentGraph:
+    """
+    Planar graph of line segments (e.g., exploded boundaries) whose nodes are
+    the segment end points. It is built once, so that walking along connected
+    segments doesn't require spatial index lookups nor GEOS predicates.
+
+    Nodes are compared by their exact 2D coordinates, which is what
+    QgsGeometry.touches() does for segment end points.
+    """
+    def __init__(self, features=None):
+        self._ends = dict() # {segment id: (start node, end node)}
+        self._incident = dict() # {node: [segment id]}
+
+        for feature in features or list():
+            self.add_segment(feature.id(), feature.geometry())
+
+    @staticmethod
+    def get_node(point):
+        return (point.x(), point.y())
+
+    def add_segment(self, segment_id, geometry):
+        vertices = list(geometry.vertices())
+        if not vertices:
+            return
+
+        start, end = self.get_node(vertices[0]), self.get_node(vertices[-1])
+        self._ends[segment_id] = (start, end)
+        if start == end:
+            return # Closed lines have no boundary, so they touch nothing
+
+        self._incident.setdefault(start, list()).append(segment_id)
+        self._incident.setdefault(end, list()).append(segment_id)
+
+    def get_end_nodes(self, segment_id):
+        return self._ends[segment_id]
+
+    def get_incident_segments(self, node):
+        return self._incident.get(node, list())
+
+    def get_degree(self, node):
+        return len(self.get_incident_segments(node))
+
+    def get_opposite_node(self, segment_id, node):
+        start, end = self._ends[segment_id]
+        return end if node == start else start
+
+    def get_connected_segments(self, segment_id, node, visited=None):
+        """
+        Walk from a segment through one of its end nodes, as long as each node
+        joins exactly two segments. The walk stops at nodes with any other
+        degree or when a visited segment is reached (closed chains).
+
+        :param visited: Set of segment ids not to be walked into. It's updated
+                        with the segments found.
+        :return: List of segment ids in walking order, without segment_id
+        """
+        if visited is None:
+            visited = {segment_id}
+
+        connected = list()
+        while True:
+            others = [other_id for other_id in self.get_incident_segments(node) if other_id != segment_id]
+            if len(others) != 1 or others[0] in visited:
+                break
+
+            segment_id = others[0]
+            visited.add(segment_id)
+            connected.append(segment_id)
+            node = self.get_opposite_node(segment_id, node)
+
+        return connected
+
+    def get_chain(self, segment_id):
+        """
+        Maximal chain of segments containing a given segment, i.e., the
+        segments reachable from it without crossing nodes whose degree is
+        other than 2.
+
+        :return: List of segment ids, ordered from one end of the chain to the
+                 other one
+        """
+        start, end = self._ends[segment_id]
+        visited = {segment_id}
+        before = self.get_connected_segments(segment_id, start, visited)
+        after = self.get_connected_segments(segment_id, end, visited)
+        return before[::-1] + [segment_id] + after
+
+    def __len__(self):
+        return len(self._ends)
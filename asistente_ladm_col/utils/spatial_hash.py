@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+                              Asistente LADM_COL
+                             --------------------
+        begin                : 2026-10-17
+        git sha              : :%H$
+        copyright            : (C) 2026 by agent
+        email                : agent@local
+ ***************************************************************************/
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License v3.0 as          *
+ *   published by the Free Software Foundation.                            *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import math
+
+
+class SpatialHashIndex:
+    """
+    Uniform grid of cells keyed on snapped coordinates. Answers "which items
+    lie within tolerance of (x, y)?" by inspecting only the 3x3 neighbourhood
+    of the cell that contains the query, so lookups are O(1) on average.
+
+    A tolerance of 0 falls back to exact coordinate matching.
+    """
+
+    def __init__(self, tolerance=0.0):
+        self.tolerance = abs(tolerance)
+        self._cells = dict()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _cell(self, x, y):
+        if not self.tolerance:
+            return (x, y)
+        return (math.floor(x / self.tolerance), math.floor(y / self.tolerance))
+
+    def insert(self, x, y, value):
+        self._cells.setdefault(self._cell(x, y), list()).append((x, y, value))
+        self._count += 1
+
+    def query(self, x, y):
+        """
+        Returns a list with the values of all items within tolerance of (x, y).
+        """
+        if not self.tolerance:
+            return [item[2] for item in self._cells.get((x, y), list())]
+
+        cx, cy = self._cell(x, y)
+        squared_tolerance = self.tolerance * self.tolerance
+        values = list()
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for item_x, item_y, value in self._cells.get((i, j), list()):
+                    if (item_x - x) ** 2 + (item_y - y) ** 2 <= squared_tolerance:
+                        values.append(value)
+        return values
@@ -23,12 +23,16 @@ from qgis.PyQt.QtCore import (QObject,
                               QFile,
                               QIODevice)
 from qgis.PyQt.QtXml import QDomDocument
-from qgis.core import (QgsFeatureRenderer,
+from qgis.core import (Qgis,
+                       QgsApplication,
+                       QgsFeatureRenderer,
                        QgsAbstractVectorLayerLabeling,
                        QgsReadWriteContext)
 
+from .instrumentation import instrumentation
 from ..config.translator import QGIS_LANG, DEFAULT_LANGUAGE
-from ..config.general_config import STYLES_DIR
+from ..config.general_config import (PLUGIN_NAME,
+                                     STYLES_DIR)
 from ..config.symbology import (LAYER_QML_STYLE,
                                 CUSTOM_ERROR_LAYERS,
                                 ERROR_LAYER)
@@ -40,6 +44,8 @@ class SymbologyUtils(QObject):
 
     def __init__(self):
         QObject.__init__(self)
+        self.log = QgsApplication.messageLog()
+        self._style_cache = dict() # {style path: (mtime, renderer, labeling)}
 
     def set_layer_style_from_qml(self, layer, is_error_layer=False, emit=False):
         qml_name = None
@@ -67,13 +73,41 @@ class SymbologyUtils(QObject):
                 layer.setLabelsEnabled(True)
 
     def get_style_from_qml(self, qml_name):
+        return self.get_style_from_qml_file(os.path.join(STYLES_DIR, qml_name + '.qml'))
+
+    def get_style_from_qml_file(self, style_path):
+        """
+        Parsed styles are cached along with the modification time of their
+        files, so that each file is read once unless it changes. Callers get
+        clones, since layers take ownership of their renderer and labeling.
+
+        :return: Tuple (renderer, labeling), any of them might be None
+        """
+        try:
+            mtime = os.stat(style_path).st_mtime_ns
+        except OSError as e:
+            self.log.logMessage("Unable to read style file from {}: {}".format(style_path, e), PLUGIN_NAME, Qgis.Warning)
+            return (None, None)
+
+        if style_path not in self._style_cache or self._style_cache[style_path][0] != mtime:
+            self._style_cache[style_path] = (mtime, *self.read_style_file(style_path))
+
+        mtime, renderer, labeling = self._style_cache[style_path]
+        return (renderer.clone() if renderer else None,
+                labeling.clone() if labeling else None)
+
+    def clear_style_cache(self):
+        self._style_cache = dict()
+
+    def read_style_file(self, style_path):
         renderer = None
         labeling = None
 
-        style_path = os.path.join(STYLES_DIR, qml_name + '.qml')
+        instrumentation.count('style_file_reads')
         file = QFile(style_path)
         if not file.open(QIODevice.ReadOnly | QIODevice.Text):
-            print("Unable to read style file from", style_path)
+            self.log.logMessage("Unable to read style file from {}".format(style_path), PLUGIN_NAME, Qgis.Warning)
+            return (renderer, labeling)
 
         doc = QDomDocument()
         doc.setContent(file)